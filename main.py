@@ -9,11 +9,12 @@ This script orchestrates the entire benchmark workflow:
 5. Generates CSV reports
 """
 
+import os
 from typing import Sequence
 
 from absl import app, logging
 
-from src import config, llm, loader, orchestration, reporting, utils
+from src import analysis, config, llm, loader, orchestration, reporting, utils
 
 
 def main(argv: Sequence[str]) -> None:
@@ -42,46 +43,242 @@ def main(argv: Sequence[str]) -> None:
 
   # Initialize LLM clients
   logging.info("Initializing LLM clients")
-  solver_clients = llm.get_solvable_models()
-  evaluator_clients = llm.get_evaluator_models()
-  theorist_clients = llm.get_unsolvable_models()
-  ranking_clients = llm.get_ranking_models()
+  llm.configure_transport(
+    pool_size=cfg.http_pool_size,
+    connect_timeout=cfg.http_connect_timeout,
+    read_timeout=cfg.http_read_timeout,
+    async_pool_size=cfg.http_async_pool_size,
+    stream_idle_timeout=cfg.stream_idle_timeout,
+    base_url=cfg.llm_base_url,
+  )
+  # Backends come first: every API call below goes through one of them.
+  configured_backends = llm.configure_backends(
+    cfg.llm_backends,
+    model_backends=cfg.model_backends,
+    role_backends=cfg.role_backends,
+  )
+  default_backend = configured_backends[llm.OPENROUTER]
+  llm.get_backend_key_pool(default_backend).fetch_credit_limits(
+    default_backend.api_url
+  )
+  response_cache = llm.configure_response_cache(
+    path=cfg.llm_cache_path,
+    mode=cfg.llm_cache_mode,
+    max_bytes=cfg.llm_cache_max_bytes,
+    max_age_seconds=cfg.llm_cache_max_age_seconds,
+  )
+  llm.configure_concurrency(
+    enabled=cfg.adaptive_concurrency,
+    initial_limit=cfg.concurrency_initial_limit,
+    min_limit=cfg.concurrency_min_limit,
+    max_limit=cfg.concurrency_max_limit,
+  )
+  llm.configure_circuit_breakers(
+    failure_threshold=cfg.circuit_breaker_threshold,
+    recovery_timeout=cfg.circuit_breaker_recovery,
+  )
+  llm.configure_hedging(
+    enabled=cfg.hedge_requests,
+    percentile=cfg.hedge_percentile,
+    budget_ratio=cfg.hedge_budget,
+  )
+  llm.configure_deadlines(
+    iteration=cfg.iteration_deadline,
+    solver_phase=cfg.solver_phase_deadline,
+    judge_phase=cfg.judge_phase_deadline,
+    adaptive_timeouts=cfg.adaptive_timeouts,
+  )
+  analysis.configure_judging(
+    mode=cfg.judge_mode, min_straggler_gap=cfg.judge_min_straggler_gap
+  )
+  llm.configure_single_flight(enabled=cfg.single_flight)
+  llm.configure_retries(budget_ratio=cfg.retry_budget)
+  # Attempts go to csv/attempts.csv as they are made, not held in memory.
+  attempts_csv = reporting.AttemptsCsvWriter(cfg.output_dir)
+  llm.configure_retry_telemetry(sink=attempts_csv.write)
+  llm.configure_routing(
+    default_sort=cfg.provider_sort, learn_routes=cfg.learn_provider_routes
+  )
+  llm.configure_prompt_caching(enabled=cfg.prompt_caching)
+  llm.configure_token_budgets(autotune=cfg.autotune_token_budgets)
+  llm.configure_continuations(max_continuations=cfg.max_continuations)
+  llm.configure_run_budget(max_cost=cfg.max_cost, max_tokens=cfg.max_tokens)
+  fallback_model = llm.Model(cfg.fallback_model) if cfg.fallback_model else None
+  client_cls = llm.AsyncLlmClient if cfg.async_mode else llm.LlmClient
+  client_kwargs = {"client_cls": client_cls, "stream": cfg.stream_responses}
+  solver_clients = llm.get_solvable_models(**client_kwargs)
+  evaluator_clients = llm.get_evaluator_models(
+    fallback_model=fallback_model, **client_kwargs
+  )
+  theorist_clients = llm.get_unsolvable_models(**client_kwargs)
+  ranking_clients = llm.get_ranking_models(
+    fallback_model=fallback_model, **client_kwargs
+  )
+  capability_cache = llm.configure_capabilities(cfg.model_capabilities_path)
+  all_clients = (
+    solver_clients + evaluator_clients + theorist_clients + ranking_clients
+  )
+  benchmarked_models = list({client.model: None for client in all_clients})
+  if fallback_model is not None and fallback_model not in benchmarked_models:
+    benchmarked_models.append(fallback_model)
+  if cfg.probe_model_capabilities and capability_cache.stale(
+    benchmarked_models
+  ):
+    capability_cache.probe(default_backend.api_url, benchmarked_models)
+  client_backends = {
+    (client.model.value, client.role): client.backend.name
+    for client in all_clients
+    + [client.fallback for client in all_clients if client.fallback]
+  }
+  for (model_name, role), backend in sorted(client_backends.items()):
+    if backend != default_backend.name:
+      logging.info("%s serves %s as %s", backend, model_name, role)
 
-  # Create benchmark runner
-  runner = orchestration.BenchmarkRunner(
-    solver_clients=solver_clients,
-    evaluator_clients=evaluator_clients,
-    theorist_clients=theorist_clients,
-    ranking_clients=ranking_clients,
-    solvable_dataset=solvable_dataset,
-    unsolvable_dataset=unsolvable_dataset,
-    output_dir=cfg.output_dir,
-    max_workers=cfg.max_parallel_workers,
+  journal = reporting.configure_run_journal(
+    cfg.run_journal_path, resume=cfg.resume
   )
+  resume_state = journal.load() if cfg.resume else None
+  # The runners append each question's rows as soon as it finishes.
+  reporting.configure_results_csv(cfg.output_dir)
+
+  # Create benchmark runner
+  if cfg.async_mode:
+    runner = orchestration.AsyncBenchmarkRunner(
+      solver_clients=solver_clients,
+      evaluator_clients=evaluator_clients,
+      theorist_clients=theorist_clients,
+      ranking_clients=ranking_clients,
+      solvable_dataset=solvable_dataset,
+      unsolvable_dataset=unsolvable_dataset,
+      output_dir=cfg.output_dir,
+      max_concurrency=cfg.max_async_iterations,
+      stream_partial_markdown=cfg.stream_partial_markdown,
+      resume_state=resume_state,
+    )
+  else:
+    runner = orchestration.BenchmarkRunner(
+      solver_clients=solver_clients,
+      evaluator_clients=evaluator_clients,
+      theorist_clients=theorist_clients,
+      ranking_clients=ranking_clients,
+      solvable_dataset=solvable_dataset,
+      unsolvable_dataset=unsolvable_dataset,
+      output_dir=cfg.output_dir,
+      max_workers=cfg.max_parallel_workers,
+      stream_partial_markdown=cfg.stream_partial_markdown,
+      max_calls_per_model=cfg.concurrency_max_limit,
+      resume_state=resume_state,
+    )
 
   # Run all iterations in parallel
-  solvable_reports, unsolvable_reports = runner.run_iterations(
+  solvable_count, unsolvable_count = runner.run_iterations(
     solvable_iterations=cfg.solvable_iterations,
     unsolvable_iterations=cfg.unsolvable_iterations,
   )
 
-  # Generate CSV reports
-  if solvable_reports or unsolvable_reports:
-    logging.info("Generating CSV files")
+  if solvable_count or unsolvable_count:
+    logging.info(
+      "Results of %d solvable and %d unsolvable question(s) are in %s",
+      solvable_count,
+      unsolvable_count,
+      os.path.join(cfg.output_dir, "csv"),
+    )
+
+  if cfg.adaptive_concurrency:
+    concurrency_stats = llm.get_concurrency_stats()
+    for model_name, stats in concurrency_stats.items():
+      logging.info("Adaptive concurrency for %s: %s", model_name, stats)
+    reporting.write_concurrency_csv(concurrency_stats, cfg.output_dir)
+
+  if cfg.hedge_requests:
+    for (model_name, role), stats in llm.get_hedge_stats().items():
+      logging.info(
+        "Hedged requests for %s as %s: %s", model_name, role, stats
+      )
+
+  for model_name, collapsed in llm.get_single_flight_stats().items():
+    logging.info(
+      "Collapsed %d duplicate in-flight call(s) to %s", collapsed, model_name
+    )
+
+  for key_label, stats in llm.get_key_pool_stats().items():
+    logging.info("API key %s: %s", key_label, stats)
 
-    if solvable_reports:
-      reporting.write_solvable_csv(solvable_reports, cfg.output_dir)
-      logging.info("Wrote solvable.csv")
+  route_stats = llm.get_route_stats()
+  for stats in route_stats:
+    logging.info(
+      "Provider %s served %d %s call(s) to %s (latency EWMA %.2fs)",
+      stats["provider"],
+      stats["calls"],
+      stats["role"],
+      stats["model"],
+      stats["latency_ewma"],
+    )
+  reporting.write_routes_csv(route_stats, cfg.output_dir)
+
+  for model_name, capabilities in capability_cache.stats().items():
+    if capabilities["source"] == "error":
+      logging.info("Adapted requests to %s: %s", model_name, capabilities)
 
-    if unsolvable_reports:
-      reporting.write_unsolvable_csv(unsolvable_reports, cfg.output_dir)
-      logging.info("Wrote unsolvable.csv")
+  for model_name, stats in llm.get_retry_telemetry().stats().items():
+    logging.info("Attempts for %s: %s", model_name, stats)
+  logging.info("Retry budget: %s", llm.get_retry_budget().stats())
+  attempts_csv.close()
 
-    reporting.write_evaluations_csv(
-      solvable_reports, unsolvable_reports, cfg.output_dir
+  usage_tracker = llm.get_usage_tracker()
+  total_usage = usage_tracker.total()
+  logging.info(
+    "Run usage: %d tokens (%d prompt, %d completion, %d reasoning, "
+    "%d cached), $%.4f",
+    total_usage.total_tokens,
+    total_usage.prompt_tokens,
+    total_usage.completion_tokens,
+    total_usage.reasoning_tokens,
+    total_usage.cached_tokens,
+    total_usage.cost,
+  )
+  for model_name, stats in usage_tracker.prompt_cache_stats().items():
+    logging.info(
+      "Prompt cache for %s: %d/%d calls hit (%.0f%%), %.0f%% of prompt "
+      "tokens cached",
+      model_name,
+      stats["hits"],
+      stats["calls"],
+      stats["hit_rate"] * 100,
+      stats["cached_token_ratio"] * 100,
     )
-    logging.info("Wrote evaluations.csv")
+  for model_name, stats in llm.get_token_estimate_stats().items():
+    logging.info(
+      "Prompt token estimates for %s: %d estimated vs %d reported over %d "
+      "call(s) (calibration ratio %.3f)",
+      model_name,
+      stats["estimated_tokens"],
+      stats["actual_tokens"],
+      stats["calls"],
+      stats["ratio"],
+    )
+  for (model_name, role), stats in llm.get_token_budget_stats().items():
+    logging.info(
+      "Completion tokens for %s as %s: p%g %s over %d call(s), %d hit the "
+      "cap, tuned max_tokens %s",
+      model_name,
+      role,
+      llm.get_budget_tuner().percentile,
+      stats["percentile_tokens"],
+      stats["calls"],
+      stats["truncated"],
+      stats["tuned_max_tokens"],
+    )
+  reporting.write_usage_csv(
+    usage_tracker.by_model_and_role(), cfg.output_dir, client_backends
+  )
+
+  if response_cache is not None:
+    logging.info("LLM response cache stats: %s", response_cache.stats())
+    response_cache.close()
 
+  journal.close()
+  llm.close_sessions()
   logging.info("Benchmark run complete.")
 
 
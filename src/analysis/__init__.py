@@ -1,5 +1,10 @@
 """Analysis module for running solvable and unsolvable question analyses."""
 
+from src.analysis.judging import (
+  JudgeSettings,
+  configure_judging,
+  get_judge_settings,
+)
 from src.analysis.models import (
   CrossEvaluation,
   CrossRanking,
@@ -8,10 +13,21 @@ from src.analysis.models import (
   SolvableQuestionReport,
   UnsolvableQuestionReport,
 )
-from src.analysis.solvable import analyze_solvable_question
-from src.analysis.unsolvable import analyze_unsolvable_question
+from src.analysis.solvable import (
+  analyze_solvable_question,
+  analyze_solvable_question_async,
+  schedule_solvable_question,
+)
+from src.analysis.unsolvable import (
+  analyze_unsolvable_question,
+  analyze_unsolvable_question_async,
+  schedule_unsolvable_question,
+)
 
 __all__ = [
+  "JudgeSettings",
+  "configure_judging",
+  "get_judge_settings",
   "CrossEvaluation",
   "ModelResponse",
   "SolvableQuestionReport",
@@ -20,4 +36,8 @@ __all__ = [
   "UnsolvableQuestionReport",
   "analyze_solvable_question",
   "analyze_unsolvable_question",
+  "analyze_solvable_question_async",
+  "analyze_unsolvable_question_async",
+  "schedule_solvable_question",
+  "schedule_unsolvable_question",
 ]
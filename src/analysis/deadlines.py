@@ -0,0 +1,118 @@
+"""Collects the results of an analysis phase until its deadline passes."""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator
+
+from src import llm
+
+
+class PhaseDeadline:
+  """A phase deadline that starts counting when the phase's first task runs.
+
+  Tasks of a scheduled question run on shared workers, some time after the
+  question was submitted, so the deadline of each phase is created by
+  whichever of its tasks starts first. It is never later than the deadline
+  of the enclosing phase, e.g. the iteration.
+
+  Safe to share across threads.
+  """
+
+  def __init__(
+    self,
+    seconds: float | None,
+    name: str,
+    parent: "PhaseDeadline | None" = None,
+  ):
+    """Initializes the deadline without starting it.
+
+    Args:
+        seconds: Seconds the phase may take once started, or None.
+        name: What the deadline bounds, e.g. "solver phase".
+        parent: The enclosing phase's deadline, or None.
+    """
+    self.seconds = seconds
+    self.name = name
+    self.parent = parent
+    self._deadline: llm.Deadline | None = None
+    self._started = False
+    self._lock = threading.Lock()
+
+  def start(self) -> llm.Deadline | None:
+    """Starts the deadline if needed and returns the tightest one in effect.
+
+    Returns:
+        The phase's deadline, or the enclosing one if tighter, or None if
+        neither is set.
+    """
+    with self._lock:
+      if not self._started:
+        deadline = None if self.parent is None else self.parent.start()
+        if self.seconds is not None:
+          own = llm.Deadline(time.monotonic() + self.seconds, self.name)
+          if deadline is None or own.expires_at < deadline.expires_at:
+            deadline = own
+        self._deadline = deadline
+        self._started = True
+      return self._deadline
+
+  def expired(self) -> bool:
+    """Whether the deadline has started and passed."""
+    with self._lock:
+      deadline = self._deadline
+    return deadline is not None and deadline.remaining() <= 0
+
+
+def as_completed(
+  futures: Iterable[concurrent.futures.Future],
+  deadline: llm.Deadline | None,
+) -> Iterator[concurrent.futures.Future]:
+  """Yields futures as they complete, until the deadline passes.
+
+  Futures still running at the deadline are not yielded; the caller
+  records them as timed out instead of waiting for them.
+
+  Args:
+      futures: The phase's futures.
+      deadline: The phase deadline, or None to wait for every future.
+  """
+  pending = set(futures)
+  while pending:
+    done, pending = concurrent.futures.wait(
+      pending,
+      timeout=_wait_timeout(deadline),
+      return_when=concurrent.futures.FIRST_COMPLETED,
+    )
+    if not done:
+      return
+    yield from done
+
+
+async def as_completed_async(
+  tasks: Iterable[asyncio.Task],
+  deadline: llm.Deadline | None,
+) -> AsyncIterator[asyncio.Task]:
+  """Async variant of as_completed for tasks on the running loop."""
+  pending = set(tasks)
+  while pending:
+    done, pending = await asyncio.wait(
+      pending,
+      timeout=_wait_timeout(deadline),
+      return_when=asyncio.FIRST_COMPLETED,
+    )
+    if not done:
+      return
+    for task in done:
+      yield task
+
+
+def timed_out_message(deadline: llm.Deadline) -> str:
+  """Returns the error text recorded for a call cut off by `deadline`."""
+  return f"API Error: Timed out at the {deadline.name} deadline"
+
+
+def _wait_timeout(deadline: llm.Deadline | None) -> float | None:
+  """Returns how long to wait for the next result, or None for no limit."""
+  return None if deadline is None else max(deadline.remaining(), 0.0)
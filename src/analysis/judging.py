@@ -0,0 +1,123 @@
+"""Chooses between batched and pointwise (streaming) judging of responses."""
+
+import dataclasses
+
+from src import config, llm
+
+BATCH = "batch"
+POINTWISE = "pointwise"
+ADAPTIVE = "adaptive"
+JUDGE_MODES = (BATCH, POINTWISE, ADAPTIVE)
+
+
+@dataclasses.dataclass(frozen=True)
+class JudgeSettings:
+  """How evaluators grade the responses to a solvable question.
+
+  Attributes:
+      mode: "batch", "pointwise" or "adaptive".
+      min_straggler_gap: Seconds the solvers still running must be
+          expected to take for adaptive judging to go pointwise.
+      straggler_percentile: Latency percentile of a running solver taken
+          as its expected duration.
+      max_prompt_overhead: Largest ratio of question block to response
+          tokens for which adaptive judging goes pointwise, since every
+          pointwise call repeats the question block.
+  """
+
+  mode: str = config.JUDGE_MODE
+  min_straggler_gap: float = config.JUDGE_MIN_STRAGGLER_GAP
+  straggler_percentile: float = config.JUDGE_STRAGGLER_PERCENTILE
+  max_prompt_overhead: float = config.JUDGE_MAX_PROMPT_OVERHEAD
+
+  def choose(
+    self,
+    question_block: str,
+    response_text: str,
+    running: list[llm.BaseLlmClient],
+    elapsed: float,
+  ) -> str:
+    """Returns how to judge a response that just arrived.
+
+    Args:
+        question_block: The question and true answer every judge prompt
+            repeats.
+        response_text: The response.
+        running: Clients of the solvers of the question still running.
+        elapsed: Seconds since the solvers started.
+
+    Returns:
+        "pointwise" to judge the response on its own now, or "batch" to
+        judge it with the others once the last solver is done.
+    """
+    if self.mode != ADAPTIVE:
+      return self.mode
+    if not running:
+      return BATCH
+    overhead = llm.estimate_text_tokens(question_block) / max(
+      llm.estimate_text_tokens(response_text), 1
+    )
+    if overhead > self.max_prompt_overhead:
+      return BATCH
+    gap = self.straggler_gap(running, elapsed)
+    if gap is not None and gap < self.min_straggler_gap:
+      return BATCH
+    return POINTWISE
+
+  def straggler_gap(
+    self, running: list[llm.BaseLlmClient], elapsed: float
+  ) -> float | None:
+    """Returns how much longer the slowest running solver should take.
+
+    Args:
+        running: Clients of the solvers still running.
+        elapsed: Seconds since they started.
+
+    Returns:
+        Seconds until the slowest solver is expected to finish, or None if
+        that is unknown: a solver has no latency samples in its role yet,
+        or is already slower than its latency percentile.
+    """
+    gaps = []
+    for client in running:
+      latencies = llm.get_hedge_policy(client.model, client.role).latencies
+      latency = latencies.percentile(self.straggler_percentile)
+      if latency is None or latency <= elapsed:
+        return None
+      gaps.append(latency - elapsed)
+    return max(gaps, default=0.0)
+
+
+_settings = JudgeSettings()
+
+
+def configure_judging(
+  mode: str = config.JUDGE_MODE,
+  min_straggler_gap: float = config.JUDGE_MIN_STRAGGLER_GAP,
+) -> JudgeSettings:
+  """Sets how evaluators grade the responses to solvable questions.
+
+  Args:
+      mode: "batch", "pointwise" or "adaptive".
+      min_straggler_gap: Seconds the solvers still running must be
+          expected to take for adaptive judging to go pointwise.
+
+  Returns:
+      The settings now in effect.
+
+  Raises:
+      ValueError: If the mode is unknown.
+  """
+  global _settings
+
+  if mode not in JUDGE_MODES:
+    raise ValueError(f"Unknown judge mode: {mode}")
+  _settings = dataclasses.replace(
+    _settings, mode=mode, min_straggler_gap=min_straggler_gap
+  )
+  return _settings
+
+
+def get_judge_settings() -> JudgeSettings:
+  """Returns the judging settings."""
+  return _settings
@@ -3,6 +3,7 @@
 import dataclasses
 
 from src.evaluation.models import EvaluationScore
+from src.llm.models import Usage
 
 
 @dataclasses.dataclass
@@ -12,6 +13,16 @@ class CrossEvaluation:
   evaluator_model_name: str
   evaluation: EvaluationScore
   evaluation_time: float = 0.0  # Time in seconds to perform evaluation
+  # Model that actually served the call; differs from evaluator_model_name
+  # when the evaluator's circuit was open and a fallback model answered.
+  served_model_name: str | None = None
+  backend: str | None = None  # API that served the call, e.g. "local"
+  # Usage of the batch call that produced this evaluation. Every response
+  # judged in the same batch shares it.
+  usage: Usage | None = None
+  # "pointwise" if the response was judged on its own as soon as it
+  # arrived, "batch" if together with the others.
+  mode: str = "batch"
 
 
 @dataclasses.dataclass
@@ -21,6 +32,13 @@ class ModelResponse:
   model_name: str
   response_text: str
   generation_time: float = 0.0  # Time in seconds to generate response
+  time_to_first_token: float | None = None  # Seconds, streamed calls only
+  tokens_per_second: float | None = None  # Streamed calls only
+  winning_attempt: str = "primary"  # "hedge" if a hedged duplicate won
+  provider: str | None = None  # Upstream provider OpenRouter routed to
+  backend: str | None = None  # API that served the call, e.g. "local"
+  truncated: bool = False  # Still cut off at max_tokens after continuing
+  usage: Usage | None = None  # None for cache hits and failed calls
   deterministic_scores: list[EvaluationScore] = dataclasses.field(
     default_factory=list
   )
@@ -46,6 +64,13 @@ class ModelHypothesis:
   model_name: str
   response_text: str  # Can be the hypothesis or an error message
   generation_time: float = 0.0  # Time in seconds to generate hypothesis
+  time_to_first_token: float | None = None  # Seconds, streamed calls only
+  tokens_per_second: float | None = None  # Streamed calls only
+  winning_attempt: str = "primary"  # "hedge" if a hedged duplicate won
+  provider: str | None = None  # Upstream provider OpenRouter routed to
+  backend: str | None = None  # API that served the call, e.g. "local"
+  truncated: bool = False  # Still cut off at max_tokens after continuing
+  usage: Usage | None = None  # None for cache hits and failed calls
 
 
 @dataclasses.dataclass(frozen=True)
@@ -55,6 +80,11 @@ class CrossRanking:
   ranker_model_name: str
   ranking: EvaluationScore  # 'reasoning' holds the ranked list
   ranking_time: float = 0.0  # Time in seconds to perform ranking
+  # Model that actually served the call; differs from ranker_model_name
+  # when the ranker's circuit was open and a fallback model answered.
+  served_model_name: str | None = None
+  backend: str | None = None  # API that served the call, e.g. "local"
+  usage: Usage | None = None  # None for cache hits and failed calls
 
 
 @dataclasses.dataclass(frozen=True)
@@ -0,0 +1,252 @@
+"""DAG task scheduler running every question's work on shared worker pools."""
+
+import collections
+import concurrent.futures
+import dataclasses
+import heapq
+import itertools
+import threading
+from collections.abc import Callable, Iterable
+
+from absl import logging
+
+# Worker pools: LLM calls, and local work such as selecting questions,
+# scoring responses and rendering reports.
+LLM_POOL = "llm"
+LOCAL_POOL = "local"
+
+
+@dataclasses.dataclass(eq=False)
+class Task:
+  """One node of a question's task graph.
+
+  Attributes:
+      name: What the task does, for logs, e.g. "generate openai/gpt-5".
+      fn: The work. Called without arguments once every dependency has
+          finished; it reads their results with `result()`.
+      deps: Tasks that must finish first.
+      priority: Lower runs first among ready tasks.
+      pool: The worker pool the task runs on.
+      key: Concurrency key, e.g. the model called, capped across all
+          running tasks. None for uncapped work.
+      future: Settles with the task's result or exception.
+  """
+
+  name: str
+  fn: Callable[[], object]
+  deps: tuple["Task", ...] = ()
+  priority: int = 0
+  pool: str = LLM_POOL
+  key: str | None = None
+  future: concurrent.futures.Future = dataclasses.field(
+    default_factory=concurrent.futures.Future
+  )
+  _waiting: int = 0
+  _dependents: list["Task"] = dataclasses.field(default_factory=list)
+
+  def result(self) -> object:
+    """Returns the task's result, raising its exception if it failed."""
+    return self.future.result()
+
+
+class DagScheduler:
+  """Runs task graphs on fixed worker pools shared by every question.
+
+  A task becomes ready once all its dependencies have finished, whether
+  they succeeded or not; a failed dependency's exception surfaces when its
+  result is read. Each pool's workers take the ready task with the lowest
+  priority whose key is below the per-key cap, so giving a question's
+  tasks the question's start order as priority finishes questions in
+  flight before starting new ones.
+
+  Use as a context manager: workers start on entry and stop on exit.
+  """
+
+  def __init__(
+    self, pool_sizes: dict[str, int], max_per_key: int | None = None
+  ):
+    """Initializes the scheduler without starting its workers.
+
+    Args:
+        pool_sizes: Number of worker threads per pool name.
+        max_per_key: Tasks with the same key allowed to run at once, or
+            None for no cap.
+    """
+    self.pool_sizes = dict(pool_sizes)
+    self.max_per_key = max_per_key
+    self._ready: dict[str, list[tuple[int, int, Task]]] = {
+      pool: [] for pool in pool_sizes
+    }
+    self._running: dict[str, int] = collections.defaultdict(int)
+    self._sequence = itertools.count()
+    self._condition = threading.Condition()
+    self._closed = False
+    self._threads: list[threading.Thread] = []
+
+  def __enter__(self) -> "DagScheduler":
+    self.start()
+    return self
+
+  def __exit__(self, exc_type, exc, traceback) -> None:
+    self.shutdown(cancel=exc_type is not None)
+
+  def start(self) -> None:
+    """Starts the worker threads."""
+    for pool, size in self.pool_sizes.items():
+      for i in range(size):
+        thread = threading.Thread(
+          target=self._work, args=(pool,), name=f"{pool}-{i}", daemon=True
+        )
+        thread.start()
+        self._threads.append(thread)
+
+  def shutdown(self, cancel: bool = False) -> None:
+    """Stops the workers once the ready tasks have run.
+
+    Args:
+        cancel: Whether to cancel the tasks not started yet instead and
+            return without waiting for running ones, e.g. on Ctrl-C.
+    """
+    with self._condition:
+      self._closed = True
+      if cancel:
+        for ready in self._ready.values():
+          for _, _, task in ready:
+            task.future.cancel()
+          ready.clear()
+      self._condition.notify_all()
+    if not cancel:
+      for thread in self._threads:
+        thread.join()
+
+  def submit(
+    self,
+    name: str,
+    fn: Callable[[], object],
+    deps: Iterable[Task] = (),
+    priority: int = 0,
+    pool: str = LLM_POOL,
+    key: str | None = None,
+    hold: bool = False,
+  ) -> Task:
+    """Adds a task to the graph.
+
+    Args:
+        name: What the task does, for logs.
+        fn: The work, called without arguments.
+        deps: Tasks that must finish first. They must have been submitted
+            to this scheduler.
+        priority: Lower runs first among ready tasks.
+        pool: The worker pool to run on.
+        key: Concurrency key capped by max_per_key, or None.
+        hold: Whether the task waits for `release` as well as its deps,
+            so the rest of a graph can be submitted before it starts.
+
+    Returns:
+        The task. Its future settles when it has run.
+
+    Raises:
+        ValueError: If the pool is unknown.
+    """
+    if pool not in self._ready:
+      raise ValueError(f"Unknown worker pool: {pool}")
+    task = Task(
+      name=name,
+      fn=fn,
+      deps=tuple(deps),
+      priority=priority,
+      pool=pool,
+      key=key,
+    )
+    with self._condition:
+      task._waiting = int(hold)
+      for dep in task.deps:
+        if not dep.future.done():
+          task._waiting += 1
+          dep._dependents.append(task)
+      if task._waiting == 0:
+        self._push(task)
+    return task
+
+  def release(self, task: Task) -> None:
+    """Lets a task submitted with hold=True run once its deps finish."""
+    with self._condition:
+      task._waiting -= 1
+      if task._waiting == 0:
+        self._push(task)
+
+  def add_dependency(self, task: Task, dep: Task) -> None:
+    """Makes a task that has not become ready yet also wait for `dep`.
+
+    Lets running tasks extend the graph, e.g. with work that must finish
+    before a question's report is rendered.
+
+    Raises:
+        ValueError: If `task` is already ready or has run.
+    """
+    with self._condition:
+      if task._waiting == 0:
+        raise ValueError(f"Task {task.name} is already ready")
+      task.deps = (*task.deps, dep)
+      if not dep.future.done():
+        task._waiting += 1
+        dep._dependents.append(task)
+
+  def _push(self, task: Task) -> None:
+    """Queues a ready task. Must be called with the condition held."""
+    heapq.heappush(
+      self._ready[task.pool], (task.priority, next(self._sequence), task)
+    )
+    self._condition.notify_all()
+
+  def _pop(self, pool: str) -> Task | None:
+    """Takes the first ready task of `pool` under its key's cap, if any.
+
+    Must be called with the condition held.
+    """
+    ready = self._ready[pool]
+    skipped = []
+    task = None
+    while ready:
+      entry = heapq.heappop(ready)
+      key = entry[2].key
+      if (
+        key is None
+        or self.max_per_key is None
+        or self._running[key] < self.max_per_key
+      ):
+        task = entry[2]
+        break
+      skipped.append(entry)
+    for entry in skipped:
+      heapq.heappush(ready, entry)
+    return task
+
+  def _work(self, pool: str) -> None:
+    """Runs ready tasks of `pool` until the scheduler shuts down."""
+    while True:
+      with self._condition:
+        task = self._pop(pool)
+        while task is None:
+          if self._closed and not self._ready[pool]:
+            return
+          self._condition.wait()
+          task = self._pop(pool)
+        if task.key is not None:
+          self._running[task.key] += 1
+
+      if task.future.set_running_or_notify_cancel():
+        try:
+          task.future.set_result(task.fn())
+        except Exception as e:
+          logging.debug("Task %s failed: %s", task.name, e)
+          task.future.set_exception(e)
+
+      with self._condition:
+        if task.key is not None:
+          self._running[task.key] -= 1
+        for dependent in task._dependents:
+          dependent._waiting -= 1
+          if dependent._waiting == 0:
+            self._push(dependent)
+        self._condition.notify_all()
@@ -1,12 +1,16 @@
 """Solvable question analysis functionality."""
 
+import asyncio
+import functools
+import os
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
 
 import requests
 from absl import logging
 
 from src import evaluation, llm, reporting
+from src.analysis import deadlines, judging, scheduler
 from src.analysis.models import (
   CrossEvaluation,
   ModelResponse,
@@ -15,23 +19,35 @@ from src.analysis.models import (
 from src.loader import KaggleLoader
 
 
-def _query_solver(client: llm.LlmClient, question: str) -> ModelResponse:
+def _query_solver(
+  client: llm.LlmClient,
+  question: str,
+  on_chunk: llm.StreamCallback | None = None,
+) -> ModelResponse:
   """Query a single solver model and return the response.
 
   Args:
       client: The LLM client to query.
       question: The question to ask.
+      on_chunk: Optional callback receiving streamed text as it arrives.
 
   Returns:
       ModelResponse with the result or error message.
   """
   logging.info("Querying solver: %s", client.model.value)
   try:
-    response_text, elapsed_time = client.call_api(question)
+    response = client.complete(question, on_chunk=on_chunk)
     return ModelResponse(
       model_name=client.model.value,
-      response_text=response_text,
-      generation_time=elapsed_time,
+      response_text=response.text,
+      generation_time=response.elapsed_time,
+      time_to_first_token=response.time_to_first_token,
+      tokens_per_second=response.tokens_per_second,
+      winning_attempt=response.winning_attempt,
+      provider=response.provider,
+      backend=response.backend,
+      truncated=response.truncated,
+      usage=response.usage,
     )
   except (llm.LlmApiError, requests.exceptions.RequestException) as e:
     logging.error(
@@ -45,22 +61,69 @@ def _query_solver(client: llm.LlmClient, question: str) -> ModelResponse:
     )
 
 
+async def _query_solver_async(
+  client: llm.AsyncLlmClient,
+  question: str,
+  on_chunk: llm.StreamCallback | None = None,
+) -> ModelResponse:
+  """Async variant of _query_solver for an AsyncLlmClient.
+
+  Args:
+      client: The async LLM client to query.
+      question: The question to ask.
+      on_chunk: Optional callback receiving streamed text as it arrives.
+
+  Returns:
+      ModelResponse with the result or error message.
+  """
+  logging.info("Querying solver: %s", client.model.value)
+  try:
+    response = await client.complete(question, on_chunk=on_chunk)
+    return ModelResponse(
+      model_name=client.model.value,
+      response_text=response.text,
+      generation_time=response.elapsed_time,
+      time_to_first_token=response.time_to_first_token,
+      tokens_per_second=response.tokens_per_second,
+      winning_attempt=response.winning_attempt,
+      provider=response.provider,
+      backend=response.backend,
+      truncated=response.truncated,
+      usage=response.usage,
+    )
+  except llm.LlmApiError as e:
+    logging.error(
+      "API call failed for solver model %s: %s", client.model.value, e
+    )
+    return ModelResponse(
+      model_name=client.model.value,
+      response_text=f"API Error: {e}",
+      generation_time=0.0,
+    )
+
+
 def analyze_solvable_question(
   solver_clients: list[llm.LlmClient],
   evaluator_clients: list[llm.LlmClient],
   dataset: KaggleLoader,
   output_dir: str,
+  stream_partial_markdown: bool = False,
 ) -> SolvableQuestionReport:
   """Runs one random solvable question against all solvers.
 
   Then, all evaluators score all solver responses using batch evaluation.
   Results are written to a markdown file named with the question ID.
 
+  The question runs on a scheduler of its own; the benchmark runner
+  schedules many questions on a shared one instead.
+
   Args:
       solver_clients: List of clients to generate solutions.
       evaluator_clients: List of clients to judge solutions.
       dataset: The KaggleLoader for solvable questions.
       output_dir: Directory to save the output markdown file.
+      stream_partial_markdown: Whether to mirror streamed text into
+          per-model .partial.md files while responses are in flight.
 
   Returns:
       A SolvableQuestionReport with comprehensive cross-evaluation.
@@ -69,11 +132,640 @@ def analyze_solvable_question(
       KeyError: If the loaded question content does not contain
           'message_1' (question) or 'message_2' (answer) keys.
   """
-  import os
+  pool_sizes = {
+    scheduler.LLM_POOL: max(len(solver_clients) + len(evaluator_clients), 1),
+    scheduler.LOCAL_POOL: 1,
+  }
+  with scheduler.DagScheduler(pool_sizes) as dag:
+    task = schedule_solvable_question(
+      dag,
+      solver_clients,
+      evaluator_clients,
+      dataset,
+      output_dir,
+      stream_partial_markdown,
+    )
+    return task.result()
+
+
+def schedule_solvable_question(
+  dag: scheduler.DagScheduler,
+  solver_clients: list[llm.LlmClient],
+  evaluator_clients: list[llm.LlmClient],
+  dataset: KaggleLoader,
+  output_dir: str,
+  stream_partial_markdown: bool = False,
+  priority: int = 0,
+  resume: "reporting.PartialQuestion | None" = None,
+) -> scheduler.Task:
+  """Schedules one random solvable question as a task graph.
+
+  The question is selected, every solver generates a response, the
+  responses get their deterministic scores, every evaluator judges them,
+  and the report is rendered. Each solver and evaluator call is a task of
+  its own, capped per model by the scheduler, and runs under the deadline
+  of its phase, which starts when the phase's first task does.
+
+  With a run journal configured, every successful call and the finished
+  report are journaled as they complete.
+
+  Args:
+      dag: The scheduler to run the tasks on.
+      solver_clients: List of clients to generate solutions.
+      evaluator_clients: List of clients to judge solutions.
+      dataset: The KaggleLoader for solvable questions.
+      output_dir: Directory to save the output markdown file.
+      stream_partial_markdown: Whether to mirror streamed text into
+          per-model .partial.md files while responses are in flight.
+      priority: Priority of the question's tasks; lower runs first.
+      resume: What an interrupted run completed of the question to run
+          again. Its journaled calls are replayed instead of reissued.
+
+  Returns:
+      The final task. Its result is the SolvableQuestionReport, or it
+      raises what analyze_solvable_question would.
+  """
+  deadline_settings = llm.get_deadline_settings()
+  iteration_deadline = deadlines.PhaseDeadline(
+    deadline_settings.iteration, "iteration"
+  )
+  solver_deadline = deadlines.PhaseDeadline(
+    deadline_settings.solver_phase, "solver phase", iteration_deadline
+  )
+  evaluator_deadline = deadlines.PhaseDeadline(
+    deadline_settings.judge_phase, "evaluator phase", iteration_deadline
+  )
+  judge_settings = judging.get_judge_settings()
+  journal = reporting.get_run_journal()
+  all_responses: list[ModelResponse] = []
+  valid_responses: dict[str, str] = {}  # For batch evaluation
+  file_lock = threading.Lock()  # Protect concurrent file writes
+  running = {client.model.value: client for client in solver_clients}
+  solvers_started_at = None
+  # Pointwise judge tasks per evaluator, keyed by the judged model.
+  pointwise: dict[str, dict[str, scheduler.Task]] = {
+    client.model.value: {} for client in evaluator_clients
+  }
+
+  def _select():
+    """Start the iteration and pick its question."""
+    iteration_deadline.start()
+    selected = _select_question(
+      dataset, output_dir, resume.question_id if resume else None
+    )
+    if journal is not None:
+      journal.started(reporting.SOLVABLE, selected[0])
+    logging.info("Querying %d solver models", len(solver_clients))
+    return selected
+
+  select = dag.submit(
+    "select solvable question",
+    _select,
+    priority=priority,
+    pool=scheduler.LOCAL_POOL,
+    hold=True,
+  )
+
+  def _generate(client):
+    """Query a single solver, record its response, and maybe judge it."""
+    nonlocal solvers_started_at
+    q_id, question, true_answer, markdown_path = select.result()
+    replayed = resume.response(client.model.value) if resume else None
+    with file_lock:
+      if solvers_started_at is None:
+        solvers_started_at = time.monotonic()
+    with llm.within_deadline(solver_deadline.start()) as phase_deadline:
+      if replayed is not None:
+        logging.info("Replaying journaled response of %s", client.model.value)
+        model_resp = replayed
+      elif solver_deadline.expired():
+        model_resp = _timed_out_response(client, phase_deadline)
+      else:
+        model_resp = _query_solver(
+          client,
+          question,
+          _partial_writer(markdown_path, client, stream_partial_markdown),
+        )
+        if solver_deadline.expired() and _is_error(model_resp):
+          model_resp = _timed_out_response(client, phase_deadline)
+        elif journal is not None and not _is_error(model_resp):
+          journal.record_response(reporting.SOLVABLE, q_id, model_resp)
+    # Write response to markdown immediately (thread-safe)
+    with file_lock:
+      _record_response(
+        markdown_path, model_resp, all_responses, valid_responses
+      )
+      del running[model_resp.model_name]
+      mode = judging.BATCH
+      if replayed is not None:
+        # Judge it as the interrupted run did, so its judgments replay.
+        if resume.judged_alone(model_resp.model_name):
+          mode = judging.POINTWISE
+      elif not _is_error(model_resp):
+        mode = judge_settings.choose(
+          question + true_answer,
+          model_resp.response_text,
+          list(running.values()),
+          time.monotonic() - solvers_started_at,
+        )
+      if mode != judging.POINTWISE:
+        return
+      # Judge the response now rather than after the slowest solver.
+      for evaluator_client in evaluator_clients:
+        task = dag.submit(
+          f"judge {model_resp.model_name} by {evaluator_client.model.value}",
+          functools.partial(
+            _judge_one,
+            evaluator_client,
+            model_resp.model_name,
+            model_resp.response_text,
+          ),
+          priority=priority,
+          key=evaluator_client.model.value,
+        )
+        pointwise[evaluator_client.model.value][model_resp.model_name] = task
+        dag.add_dependency(render, task)
+
+  generate = [
+    dag.submit(
+      f"generate {client.model.value}",
+      functools.partial(_generate, client),
+      deps=[select],
+      priority=priority,
+      key=client.model.value,
+    )
+    for client in solver_clients
+  ]
+
+  def _score():
+    """Score every response against the true answer."""
+    for task in generate:
+      task.result()
+    logging.info("Starting cross-evaluation")
+    _add_deterministic_scores(all_responses, select.result()[2])
+
+  score = dag.submit(
+    "score responses",
+    _score,
+    deps=generate,
+    priority=priority,
+    pool=scheduler.LOCAL_POOL,
+  )
+
+  def _judge_one(evaluator_client, model_name, response_text):
+    """Judge one response as soon as it arrived, or None if timed out."""
+    q_id, question, true_answer, _ = select.result()
+    evaluator_name = evaluator_client.model.value
+    replayed = (
+      resume.judgment(evaluator_name, [model_name]) if resume else None
+    )
+    if replayed is not None:
+      scores, *call = replayed
+      return scores[model_name], *call
+    with llm.within_deadline(evaluator_deadline.start()):
+      if evaluator_deadline.expired():
+        return None
+      logging.info(
+        "Querying evaluator %s on %s", evaluator_name, model_name
+      )
+      judge = evaluation.LlmEvaluator(judge_client=evaluator_client)
+      result = judge.evaluate_one_solution(
+        question, model_name, response_text, true_answer
+      )
+    (score_value, reasoning), *call = result
+    if journal is not None and score_value is not None:
+      journal.record_judgment(
+        reporting.SOLVABLE,
+        q_id,
+        evaluator_name,
+        [model_name],
+        ({model_name: (score_value, reasoning)}, *call),
+      )
+    return result
+
+  def _judge(evaluator_client):
+    """Run a single evaluator and return results, or None if it timed out."""
+    score.result()
+    q_id, question, true_answer, _ = select.result()
+    evaluator_name = evaluator_client.model.value
+    batch = {
+      model_name: response_text
+      for model_name, response_text in valid_responses.items()
+      if model_name not in pointwise[evaluator_client.model.value]
+    }
+    if not batch:
+      return {}, 0.0, None, None, None
+    replayed = resume.judgment(evaluator_name, list(batch)) if resume else None
+    if replayed is not None:
+      return replayed
+    with llm.within_deadline(evaluator_deadline.start()):
+      if evaluator_deadline.expired():
+        return None
+      logging.info("Querying evaluator %s", evaluator_name)
+      judge = evaluation.LlmEvaluator(judge_client=evaluator_client)
+      scores, elapsed_time = judge.evaluate_all_solutions(
+        question, batch, true_answer
+      )
+    result = (
+      scores,
+      elapsed_time,
+      judge.served_model_name,
+      judge.served_backend,
+      judge.last_usage,
+    )
+    if journal is not None and any(
+      score_value is not None for score_value, _ in scores.values()
+    ):
+      journal.record_judgment(
+        reporting.SOLVABLE, q_id, evaluator_name, list(batch), result
+      )
+    return result
+
+  judges = {
+    client.model.value: dag.submit(
+      f"judge {client.model.value}",
+      functools.partial(_judge, client),
+      deps=[score],
+      priority=priority,
+      key=client.model.value,
+    )
+    for client in evaluator_clients
+  }
+
+  def _render():
+    """Write the remaining report sections and return the report."""
+    q_id, question, true_answer, markdown_path = select.result()
+    score.result()
+    evaluator_results = {}
+    for evaluator_name, task in judges.items():
+      result = task.result()
+      if result is not None:
+        evaluator_results[evaluator_name] = result
+    pointwise_results = {}
+    for evaluator_name, tasks in pointwise.items():
+      pointwise_results[evaluator_name] = {}
+      for model_name, task in tasks.items():
+        result = task.result()
+        if result is None:
+          result = _timed_out_evaluation(
+            evaluator_name, model_name, evaluator_deadline.start()
+          )
+        pointwise_results[evaluator_name][model_name] = result
+    if valid_responses:
+      _record_timed_out_evaluators(
+        evaluator_clients,
+        evaluator_results,
+        valid_responses,
+        evaluator_deadline.start(),
+      )
+    report = _finish_report(
+      q_id,
+      question,
+      true_answer,
+      markdown_path,
+      all_responses,
+      valid_responses,
+      [c.model.value for c in evaluator_clients],
+      evaluator_results,
+      pointwise_results,
+    )
+    if journal is not None:
+      journal.record_question(reporting.SOLVABLE, q_id)
+    return report
+
+  render = dag.submit(
+    "render solvable report",
+    _render,
+    deps=[score, *judges.values()],
+    priority=priority,
+    pool=scheduler.LOCAL_POOL,
+  )
+  dag.release(select)
+  return render
+
+
+async def analyze_solvable_question_async(
+  solver_clients: list[llm.AsyncLlmClient],
+  evaluator_clients: list[llm.AsyncLlmClient],
+  dataset: KaggleLoader,
+  output_dir: str,
+  stream_partial_markdown: bool = False,
+  resume: "reporting.PartialQuestion | None" = None,
+) -> SolvableQuestionReport:
+  """Async variant of analyze_solvable_question.
+
+  Solver and evaluator calls run as tasks on the current event loop rather
+  than on per-iteration thread pools. Cancelling the awaiting task cancels
+  every in-flight request. Each response is judged on its own as soon as
+  it arrives or together with the others, as the judging settings choose.
+  With a run journal configured, every successful call and the finished
+  report are journaled as they complete.
+
+  Args:
+      solver_clients: List of async clients to generate solutions.
+      evaluator_clients: List of async clients to judge solutions.
+      dataset: The KaggleLoader for solvable questions.
+      output_dir: Directory to save the output markdown file.
+      stream_partial_markdown: Whether to mirror streamed text into
+          per-model .partial.md files while responses are in flight.
+      resume: What an interrupted run completed of the question to run
+          again. Its journaled calls are replayed instead of reissued.
+
+  Returns:
+      A SolvableQuestionReport with comprehensive cross-evaluation.
+
+  Raises:
+      KeyError: If the loaded question content does not contain
+          'message_1' (question) or 'message_2' (answer) keys.
+  """
+  q_id, question, true_answer, markdown_path = _select_question(
+    dataset, output_dir, resume.question_id if resume else None
+  )
+  journal = reporting.get_run_journal()
+  if journal is not None:
+    journal.started(reporting.SOLVABLE, q_id)
+
+  deadline_settings = llm.get_deadline_settings()
+  # Started by the first judge call, which may come before the last solver
+  # is done. The iteration deadline still applies through the task context.
+  evaluator_deadline = deadlines.PhaseDeadline(
+    deadline_settings.judge_phase, "evaluator phase"
+  )
+  judge_settings = judging.get_judge_settings()
+  all_responses: list[ModelResponse] = []
+  valid_responses: dict[str, str] = {}  # For batch evaluation
+  running = {client.model.value: client for client in solver_clients}
+  # Pointwise judge tasks per evaluator, keyed by the judged model.
+  pointwise: dict[str, dict[str, asyncio.Task]] = {
+    client.model.value: {} for client in evaluator_clients
+  }
+
+  async def _generate(client):
+    """Query a single solver, or replay its journaled response."""
+    replayed = resume.response(client.model.value) if resume else None
+    if replayed is not None:
+      logging.info("Replaying journaled response of %s", client.model.value)
+      return replayed
+    model_resp = await _query_solver_async(
+      client,
+      question,
+      _partial_writer(markdown_path, client, stream_partial_markdown),
+    )
+    if journal is not None and not _is_error(model_resp):
+      journal.record_response(reporting.SOLVABLE, q_id, model_resp)
+    return model_resp
+
+  async def _judge_one(evaluator_client, model_name, response_text):
+    """Judge one response as soon as it arrived."""
+    evaluator_name = evaluator_client.model.value
+    replayed = (
+      resume.judgment(evaluator_name, [model_name]) if resume else None
+    )
+    if replayed is not None:
+      scores, *call = replayed
+      return scores[model_name], *call
+    with llm.within_deadline(evaluator_deadline.start()):
+      logging.info(
+        "Querying evaluator %s on %s", evaluator_name, model_name
+      )
+      judge = evaluation.LlmEvaluator(judge_client=evaluator_client)
+      result = await judge.evaluate_one_solution_async(
+        question, model_name, response_text, true_answer
+      )
+    (score_value, reasoning), *call = result
+    if journal is not None and score_value is not None:
+      journal.record_judgment(
+        reporting.SOLVABLE,
+        q_id,
+        evaluator_name,
+        [model_name],
+        ({model_name: (score_value, reasoning)}, *call),
+      )
+    return result
+
+  def _record_and_maybe_judge(model_resp, elapsed):
+    """Record a solver response and start judging it if it pays off."""
+    _record_response(markdown_path, model_resp, all_responses, valid_responses)
+    del running[model_resp.model_name]
+    mode = judging.BATCH
+    if resume and resume.response(model_resp.model_name) is not None:
+      # Judge it as the interrupted run did, so its judgments replay.
+      if resume.judged_alone(model_resp.model_name):
+        mode = judging.POINTWISE
+    elif not _is_error(model_resp):
+      mode = judge_settings.choose(
+        question + true_answer,
+        model_resp.response_text,
+        list(running.values()),
+        elapsed,
+      )
+    if mode != judging.POINTWISE:
+      return
+    # Judge the response now rather than after the slowest solver.
+    for evaluator_client in evaluator_clients:
+      pointwise[evaluator_client.model.value][model_resp.model_name] = (
+        asyncio.create_task(
+          _judge_one(
+            evaluator_client, model_resp.model_name, model_resp.response_text
+          )
+        )
+      )
 
-  # 1. Get a random question that hasn't been solved yet
+  async def _run_evaluator(evaluator_client):
+    """Run a single evaluator, or replay its journaled judgment."""
+    evaluator_name = evaluator_client.model.value
+    batch = {
+      model_name: response_text
+      for model_name, response_text in valid_responses.items()
+      if model_name not in pointwise[evaluator_name]
+    }
+    if not batch:
+      return evaluator_name, {}, 0.0, None, None, None
+    replayed = resume.judgment(evaluator_name, list(batch)) if resume else None
+    if replayed is not None:
+      return evaluator_name, *replayed
+    logging.info("Querying evaluator %s", evaluator_name)
+    judge = evaluation.LlmEvaluator(judge_client=evaluator_client)
+    scores, elapsed_time = await judge.evaluate_all_solutions_async(
+      question, batch, true_answer
+    )
+    result = (
+      scores,
+      elapsed_time,
+      judge.served_model_name,
+      judge.served_backend,
+      judge.last_usage,
+    )
+    if journal is not None and any(
+      score_value is not None for score_value, _ in scores.values()
+    ):
+      journal.record_judgment(
+        reporting.SOLVABLE, q_id, evaluator_name, list(batch), result
+      )
+    return evaluator_name, *result
+
+  logging.info("Querying %d solver models", len(solver_clients))
+  solvers_started_at = time.monotonic()
+  # Only the solver tasks run under the solver phase deadline; pointwise
+  # judge tasks are started from outside it.
+  with llm.deadline_scope(
+    deadline_settings.solver_phase, "solver phase"
+  ) as phase_deadline:
+    task_to_client = {
+      asyncio.create_task(_generate(client)): client
+      for client in solver_clients
+    }
+  finished = set()
+  try:
+    async for task in deadlines.as_completed_async(
+      task_to_client, phase_deadline
+    ):
+      finished.add(task)
+      _record_and_maybe_judge(
+        task.result(), time.monotonic() - solvers_started_at
+      )
+  except BaseException:
+    for tasks in pointwise.values():
+      for judge_task in tasks.values():
+        judge_task.cancel()
+    raise
+  finally:
+    # Cancels stragglers, and every task if we are cancelled ourselves.
+    for task in task_to_client:
+      task.cancel()
+
+  for task, client in task_to_client.items():
+    if task not in finished:
+      _record_response(
+        markdown_path,
+        _timed_out_response(client, phase_deadline),
+        all_responses,
+        valid_responses,
+      )
+
+  logging.info("Starting cross-evaluation")
+  _add_deterministic_scores(all_responses, true_answer)
+
+  evaluator_results = {}
+  pointwise_results = {}
+  if valid_responses:
+    with llm.within_deadline(evaluator_deadline.start()) as phase_deadline:
+      evaluator_tasks = [
+        asyncio.create_task(_run_evaluator(client))
+        for client in evaluator_clients
+      ]
+      judge_tasks = [
+        *evaluator_tasks,
+        *(task for tasks in pointwise.values() for task in tasks.values()),
+      ]
+      try:
+        async for task in deadlines.as_completed_async(
+          judge_tasks, phase_deadline
+        ):
+          if task in evaluator_tasks:
+            evaluator_name, *evaluator_result = task.result()
+            evaluator_results[evaluator_name] = tuple(evaluator_result)
+      finally:
+        for task in judge_tasks:
+          task.cancel()
+
+      for evaluator_name, tasks in pointwise.items():
+        pointwise_results[evaluator_name] = {
+          model_name: (
+            task.result()
+            if task.done() and not task.cancelled()
+            else _timed_out_evaluation(
+              evaluator_name, model_name, phase_deadline
+            )
+          )
+          for model_name, task in tasks.items()
+        }
+      _record_timed_out_evaluators(
+        evaluator_clients, evaluator_results, valid_responses, phase_deadline
+      )
+
+  report = _finish_report(
+    q_id,
+    question,
+    true_answer,
+    markdown_path,
+    all_responses,
+    valid_responses,
+    [c.model.value for c in evaluator_clients],
+    evaluator_results,
+    pointwise_results,
+  )
+  if journal is not None:
+    journal.record_question(reporting.SOLVABLE, q_id)
+  return report
+
+
+def _partial_writer(
+  markdown_path: str, client: llm.BaseLlmClient, enabled: bool
+) -> llm.StreamCallback | None:
+  """Returns a callback that appends streamed text to the partial file."""
+  if not enabled:
+    return None
+  return functools.partial(
+    reporting.append_partial_response, markdown_path, client.model.value
+  )
+
+
+def _select_question(
+  dataset: KaggleLoader, output_dir: str, question_id: str | None = None
+) -> tuple[str, str, str, str]:
+  """Picks a random unsolved question and writes its markdown header.
+
+  Args:
+      dataset: The KaggleLoader for solvable questions.
+      output_dir: Directory to save the output markdown file.
+      question_id: The question to run instead of a random one, e.g. one
+          an interrupted run did not finish. Its report is started over.
+
+  Returns:
+      A tuple of (question_id, question, true_answer, markdown_path).
+
+  Raises:
+      KeyError: If the loaded question content does not contain
+          'message_1' (question) or 'message_2' (answer) keys.
+      ValueError: If every question has already been solved.
+  """
   os.makedirs(output_dir, exist_ok=True)
+  if question_id is not None:
+    q_id, q_content = question_id, dataset.get_question(question_id)
+    markdown_path = os.path.join(output_dir, f"solvable_{q_id}.md")
+  else:
+    q_id, q_content, markdown_path = _pick_unsolved_question(
+      dataset, output_dir
+    )
 
+  # Extract data
+  try:
+    question = q_content["message_1"]
+    true_answer = q_content["message_2"]
+  except KeyError as e:
+    logging.error("Solvable question %s is missing expected keys: %s", q_id, e)
+    raise KeyError(
+      f"Question {q_id} is missing 'message_1' or 'message_2' key."
+    ) from e
+  logging.info("Selected solvable question ID: %s", q_id)
+
+  # Write question and true answer to markdown
+  reporting.write_solvable_header(markdown_path, q_id, question, true_answer)
+  return q_id, question, true_answer, markdown_path
+
+
+def _pick_unsolved_question(
+  dataset: KaggleLoader, output_dir: str
+) -> tuple[str, dict, str]:
+  """Picks a random question without a markdown report yet.
+
+  Returns:
+      A tuple of (question_id, question_content, markdown_path).
+
+  Raises:
+      ValueError: If every question has already been solved.
+  """
   max_attempts = len(dataset.data) if hasattr(dataset, "data") else 1000
   attempts = 0
   q_id = None
@@ -113,60 +805,101 @@ def analyze_solvable_question(
       "Delete output files or reset the output directory to run again."
     )
 
-  # 2. Extract data
-  try:
-    question = q_content["message_1"]
-    true_answer = q_content["message_2"]
-  except KeyError as e:
-    logging.error("Solvable question %s is missing expected keys: %s", q_id, e)
-    raise KeyError(
-      f"Question {q_id} is missing 'message_1' or 'message_2' key."
-    ) from e
-  logging.info("Selected solvable question ID: %s", q_id)
+  return q_id, q_content, markdown_path
 
-  # Write question and true answer to markdown
-  reporting.write_solvable_header(markdown_path, q_id, question, true_answer)
 
-  # 3. Phase 1: Get all responses in parallel
-  all_responses: list[ModelResponse] = []
-  valid_responses: dict[str, str] = {}  # For batch evaluation
-  file_lock = threading.Lock()  # Protect concurrent file writes
+def _record_response(
+  markdown_path: str,
+  model_resp: ModelResponse,
+  all_responses: list[ModelResponse],
+  valid_responses: dict[str, str],
+) -> None:
+  """Appends a finished solver response to the report and markdown file.
 
-  logging.info("Querying %d solver models", len(solver_clients))
-  with ThreadPoolExecutor(max_workers=len(solver_clients)) as executor:
-    # Submit all tasks
-    future_to_client = {
-      executor.submit(_query_solver, client, question): client
-      for client in solver_clients
-    }
+  Callers running solvers on threads must hold a lock around this call.
+  """
+  reporting.remove_partial_response(markdown_path, model_resp.model_name)
+  all_responses.append(model_resp)
+  reporting.append_response(
+    markdown_path, model_resp.model_name, model_resp.response_text
+  )
 
-    try:
-      # Collect results as they complete
-      for future in as_completed(future_to_client):
-        model_resp = future.result()
-        all_responses.append(model_resp)
-
-        # Write response to markdown immediately (thread-safe)
-        with file_lock:
-          reporting.append_response(
-            markdown_path, model_resp.model_name, model_resp.response_text
-          )
+  # Track valid responses for batch evaluation
+  if not model_resp.response_text.startswith("API Error:"):
+    valid_responses[model_resp.model_name] = model_resp.response_text
 
-        # Track valid responses for batch evaluation
-        if not model_resp.response_text.startswith("API Error:"):
-          valid_responses[model_resp.model_name] = model_resp.response_text
-    except KeyboardInterrupt:
-      logging.warning("Keyboard interrupt received, canceling solver tasks...")
-      for future in future_to_client:
-        future.cancel()
-      executor.shutdown(wait=False, cancel_futures=True)
-      raise
-
-  # 4. Phase 2: Cross-Evaluation (Batch mode)
-  logging.info("Starting cross-evaluation")
 
-  # Calculate deterministic scores for all responses
-  for model_resp in all_responses:
+def _is_error(model_resp: ModelResponse) -> bool:
+  """Whether a solver response records a failed call."""
+  return model_resp.response_text.startswith("API Error:")
+
+
+def _timed_out_response(
+  client: llm.BaseLlmClient, phase_deadline: llm.Deadline
+) -> ModelResponse:
+  """Returns the response recorded for a solver cut off by the deadline."""
+  logging.warning(
+    "Solver %s timed out at the %s deadline",
+    client.model.value,
+    phase_deadline.name,
+  )
+  return ModelResponse(
+    model_name=client.model.value,
+    response_text=deadlines.timed_out_message(phase_deadline),
+    generation_time=0.0,
+  )
+
+
+def _record_timed_out_evaluators(
+  evaluator_clients: list[llm.BaseLlmClient],
+  evaluator_results: dict[str, tuple],
+  valid_responses: dict[str, str],
+  phase_deadline: llm.Deadline | None,
+) -> None:
+  """Records every evaluator without a result as timed out."""
+  for client in evaluator_clients:
+    evaluator_name = client.model.value
+    if evaluator_name in evaluator_results:
+      continue
+    logging.warning(
+      "Evaluator %s timed out at the %s deadline",
+      evaluator_name,
+      phase_deadline.name,
+    )
+    message = deadlines.timed_out_message(phase_deadline)
+    evaluator_results[evaluator_name] = (
+      {model_name: (None, message) for model_name in valid_responses},
+      0.0,
+      None,
+      None,
+      None,
+    )
+
+
+def _timed_out_evaluation(
+  evaluator_name: str, model_name: str, phase_deadline: llm.Deadline
+) -> tuple[tuple[None, str], float, None, None, None]:
+  """Returns the pointwise result recorded for a judgment cut off."""
+  logging.warning(
+    "Evaluator %s timed out on %s at the %s deadline",
+    evaluator_name,
+    model_name,
+    phase_deadline.name,
+  )
+  return (
+    (None, deadlines.timed_out_message(phase_deadline)),
+    0.0,
+    None,
+    None,
+    None,
+  )
+
+
+def _add_deterministic_scores(
+  responses: list[ModelResponse], true_answer: str
+) -> None:
+  """Calculates deterministic scores for all successful responses."""
+  for model_resp in responses:
     if not model_resp.response_text.startswith("API Error:"):
       # Token F1 score
       token_f1 = evaluation.f1_score(model_resp.response_text, true_answer)
@@ -188,62 +921,74 @@ def analyze_solvable_question(
       )
       model_resp.deterministic_scores.append(symbol_f1)
 
-  # Batch evaluate with all evaluators
-  evaluator_results = {}  # Store results by evaluator name
-
-  if valid_responses:
 
-    def _run_evaluator(evaluator_client):
-      """Run a single evaluator and return results."""
-      logging.info(
-        "Querying evaluator %s",
-        evaluator_client.model.value,
-      )
-      judge = evaluation.LlmEvaluator(judge_client=evaluator_client)
-      scores, elapsed_time = judge.evaluate_all_solutions(
-        question, valid_responses, true_answer
-      )
-      return evaluator_client.model.value, scores, elapsed_time
-
-    # Run all evaluators in parallel and collect results
-    with ThreadPoolExecutor(max_workers=len(evaluator_clients)) as executor:
-      future_to_evaluator = {
-        executor.submit(_run_evaluator, client): client
-        for client in evaluator_clients
-      }
+def _finish_report(
+  q_id: str,
+  question: str,
+  true_answer: str,
+  markdown_path: str,
+  all_responses: list[ModelResponse],
+  valid_responses: dict[str, str],
+  evaluator_names: list[str],
+  evaluator_results: dict[str, tuple[dict, float, str, str, llm.Usage | None]],
+  pointwise_results: dict[str, dict[str, tuple]] | None = None,
+) -> SolvableQuestionReport:
+  """Attaches evaluations, writes the remaining report sections, and returns it.
 
-      try:
-        for future in as_completed(future_to_evaluator):
-          evaluator_name, results, eval_time = future.result()
-          evaluator_results[evaluator_name] = (results, eval_time)
-      except KeyboardInterrupt:
-        logging.warning(
-          "Keyboard interrupt received, canceling evaluator tasks..."
-        )
-        for future in future_to_evaluator:
-          future.cancel()
-        executor.shutdown(wait=False, cancel_futures=True)
-        raise
+  Args:
+      q_id: The question identifier.
+      question: The question text.
+      true_answer: The correct answer.
+      markdown_path: Path of the question's markdown report.
+      all_responses: Every solver response, including errors.
+      valid_responses: Successful responses keyed by model name.
+      evaluator_names: Evaluator model names in report order.
+      evaluator_results: Maps evaluator names to (scores, elapsed_time,
+          served_model_name, backend, usage) of their batch call.
+      pointwise_results: Maps evaluator names to the responses they
+          judged on their own, each mapped to ((score, reasoning),
+          elapsed_time, served_model_name, backend, usage). These take
+          precedence.
 
+  Returns:
+      The compiled SolvableQuestionReport.
+  """
   # Now assign scores to responses in the correct order
-  evaluator_names = [c.model.value for c in evaluator_clients]
+  pointwise_results = pointwise_results or {}
   for model_resp in all_responses:
     for evaluator_name in evaluator_names:
-      if evaluator_name in evaluator_results:
-        results, eval_time = evaluator_results[evaluator_name]
-        if model_resp.model_name in results:
-          score_value, reasoning = results[model_resp.model_name]
-          model_resp.llm_evaluations.append(
-            CrossEvaluation(
-              evaluator_model_name=evaluator_name,
-              evaluation=evaluation.EvaluationScore(
-                metric_name="llm_logicality_score",
-                score=score_value,
-                reasoning=reasoning,
-              ),
-              evaluation_time=eval_time,
-            )
-          )
+      pointwise = pointwise_results.get(evaluator_name, {})
+      if model_resp.model_name in pointwise:
+        result, eval_time, served, backend, usage = pointwise[
+          model_resp.model_name
+        ]
+        mode = judging.POINTWISE
+      elif evaluator_name in evaluator_results:
+        results, eval_time, served, backend, usage = evaluator_results[
+          evaluator_name
+        ]
+        if model_resp.model_name not in results:
+          continue
+        result = results[model_resp.model_name]
+        mode = judging.BATCH
+      else:
+        continue
+      score_value, reasoning = result
+      model_resp.llm_evaluations.append(
+        CrossEvaluation(
+          evaluator_model_name=evaluator_name,
+          evaluation=evaluation.EvaluationScore(
+            metric_name="llm_logicality_score",
+            score=score_value,
+            reasoning=reasoning,
+          ),
+          evaluation_time=eval_time,
+          served_model_name=served,
+          backend=backend,
+          usage=usage,
+          mode=mode,
+        )
+      )
 
   # Initialize analysis table in markdown AFTER all evaluations complete
   reporting.start_analysis_table(
@@ -265,20 +1010,36 @@ def analyze_solvable_question(
     for resp in all_responses
     if resp.generation_time > 0
   }
-  evaluation_times = {}
+  # Each evaluator's time is the sum of its calls. Every response judged
+  # in a batch carries the batch call's time, so it is counted once.
+  evaluation_times: dict[str, float] = {}
+  batches_timed = set()
   for model_resp in all_responses:
     for eval_item in model_resp.llm_evaluations:
-      if eval_item.evaluation_time > 0:
-        evaluation_times[eval_item.evaluator_model_name] = (
-          eval_item.evaluation_time
-        )
+      if eval_item.evaluation_time <= 0:
+        continue
+      evaluator_name = eval_item.evaluator_model_name
+      if eval_item.mode == judging.BATCH:
+        if evaluator_name in batches_timed:
+          continue
+        batches_timed.add(evaluator_name)
+      evaluation_times[evaluator_name] = (
+        evaluation_times.get(evaluator_name, 0.0) + eval_item.evaluation_time
+      )
 
   if generation_times or evaluation_times:
     reporting.write_timing_summary(
-      markdown_path, generation_times, evaluation_times
+      markdown_path,
+      generation_times,
+      evaluation_times,
+      hedged_models={
+        resp.model_name
+        for resp in all_responses
+        if resp.winning_attempt == "hedge"
+      },
     )
 
-  # 5. Compile and return the final report
+  # Compile and return the final report
   logging.info("Solvable question report saved to: %s", markdown_path)
   return SolvableQuestionReport(
     question_id=q_id,
@@ -344,7 +1105,9 @@ def _write_evaluator_reasoning(
           )
           reporting.write_evaluator_reasoning(
             filepath,
-            evaluator_name,
+            reporting.format_judge_name(
+              evaluator_name, eval_item.served_model_name
+            ),
             model_resp.model_name,
             score_val,
             eval_item.evaluation.reasoning,
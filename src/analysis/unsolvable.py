@@ -1,12 +1,16 @@
 """Unsolvable question analysis functionality."""
 
+import asyncio
+import functools
+import json
+import os
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
 from absl import logging
 
 from src import evaluation, llm, reporting
+from src.analysis import deadlines, scheduler
 from src.analysis.models import (
   CrossRanking,
   ModelHypothesis,
@@ -15,23 +19,35 @@ from src.analysis.models import (
 from src.loader import JsonLoader
 
 
-def _query_theorist(client: llm.LlmClient, question: str) -> ModelHypothesis:
+def _query_theorist(
+  client: llm.LlmClient,
+  question: str,
+  on_chunk: llm.StreamCallback | None = None,
+) -> ModelHypothesis:
   """Query a single theorist model and return the hypothesis.
 
   Args:
       client: The LLM client to query.
       question: The question to ask.
+      on_chunk: Optional callback receiving streamed text as it arrives.
 
   Returns:
       ModelHypothesis with the result or error message.
   """
   logging.info("Querying solver: %s", client.model.value)
   try:
-    response_text, elapsed_time = client.call_api(question)
+    response = client.complete(question, on_chunk=on_chunk)
     return ModelHypothesis(
       model_name=client.model.value,
-      response_text=response_text,
-      generation_time=elapsed_time,
+      response_text=response.text,
+      generation_time=response.elapsed_time,
+      time_to_first_token=response.time_to_first_token,
+      tokens_per_second=response.tokens_per_second,
+      winning_attempt=response.winning_attempt,
+      provider=response.provider,
+      backend=response.backend,
+      truncated=response.truncated,
+      usage=response.usage,
     )
   except (llm.LlmApiError, requests.exceptions.RequestException) as e:
     logging.error(
@@ -47,31 +63,504 @@ def _query_theorist(client: llm.LlmClient, question: str) -> ModelHypothesis:
     )
 
 
+async def _query_theorist_async(
+  client: llm.AsyncLlmClient,
+  question: str,
+  on_chunk: llm.StreamCallback | None = None,
+) -> ModelHypothesis:
+  """Async variant of _query_theorist for an AsyncLlmClient.
+
+  Args:
+      client: The async LLM client to query.
+      question: The question to ask.
+      on_chunk: Optional callback receiving streamed text as it arrives.
+
+  Returns:
+      ModelHypothesis with the result or error message.
+  """
+  logging.info("Querying solver: %s", client.model.value)
+  try:
+    response = await client.complete(question, on_chunk=on_chunk)
+    return ModelHypothesis(
+      model_name=client.model.value,
+      response_text=response.text,
+      generation_time=response.elapsed_time,
+      time_to_first_token=response.time_to_first_token,
+      tokens_per_second=response.tokens_per_second,
+      winning_attempt=response.winning_attempt,
+      provider=response.provider,
+      backend=response.backend,
+      truncated=response.truncated,
+      usage=response.usage,
+    )
+  except llm.LlmApiError as e:
+    logging.error(
+      "API call failed for solver model %s: %s",
+      client.model.value,
+      e,
+    )
+    return ModelHypothesis(
+      model_name=client.model.value,
+      response_text=f"API Error: {e}",
+      generation_time=0.0,
+    )
+
+
 def analyze_unsolvable_question(
   solver_clients: list[llm.LlmClient],
   ranking_clients: list[llm.LlmClient],
   dataset: JsonLoader,
   output_dir: str,
+  stream_partial_markdown: bool = False,
 ) -> UnsolvableQuestionReport:
   """Runs one unsolvable question against all solvers.
 
   Then, all ranking models rank the full set of hypotheses for the question.
   Results are written to a markdown file named with the question ID.
 
+  The question runs on a scheduler of its own; the benchmark runner
+  schedules many questions on a shared one instead.
+
   Args:
       solver_clients: List of clients to generate hypotheses.
       ranking_clients: List of clients to rank the hypotheses.
       dataset: The JsonLoader for unsolvable questions.
       output_dir: Directory to save the output markdown file.
+      stream_partial_markdown: Whether to mirror streamed text into
+          per-model .partial.md files while responses are in flight.
 
   Returns:
       An UnsolvableQuestionReport object.
   """
-  import os
+  pool_sizes = {
+    scheduler.LLM_POOL: max(len(solver_clients), len(ranking_clients), 1),
+    scheduler.LOCAL_POOL: 1,
+  }
+  with scheduler.DagScheduler(pool_sizes) as dag:
+    task = schedule_unsolvable_question(
+      dag,
+      solver_clients,
+      ranking_clients,
+      dataset,
+      output_dir,
+      stream_partial_markdown,
+    )
+    return task.result()
+
+
+def schedule_unsolvable_question(
+  dag: scheduler.DagScheduler,
+  solver_clients: list[llm.LlmClient],
+  ranking_clients: list[llm.LlmClient],
+  dataset: JsonLoader,
+  output_dir: str,
+  stream_partial_markdown: bool = False,
+  priority: int = 0,
+  resume: "reporting.PartialQuestion | None" = None,
+) -> scheduler.Task:
+  """Schedules one unsolvable question as a task graph.
+
+  The question is selected, every theorist generates a hypothesis, every
+  ranker ranks them, and the report is rendered. Each theorist and ranker
+  call is a task of its own, capped per model by the scheduler, and runs
+  under the deadline of its phase, which starts when the phase's first
+  task does.
+
+  With a run journal configured, every successful call and the finished
+  report are journaled as they complete.
+
+  Args:
+      dag: The scheduler to run the tasks on.
+      solver_clients: List of clients to generate hypotheses.
+      ranking_clients: List of clients to rank the hypotheses.
+      dataset: The JsonLoader for unsolvable questions.
+      output_dir: Directory to save the output markdown file.
+      stream_partial_markdown: Whether to mirror streamed text into
+          per-model .partial.md files while responses are in flight.
+      priority: Priority of the question's tasks; lower runs first.
+      resume: What an interrupted run completed of the question to run
+          again. Its journaled calls are replayed instead of reissued.
+
+  Returns:
+      The final task. Its result is the UnsolvableQuestionReport, or it
+      raises what analyze_unsolvable_question would.
+  """
+  deadline_settings = llm.get_deadline_settings()
+  iteration_deadline = deadlines.PhaseDeadline(
+    deadline_settings.iteration, "iteration"
+  )
+  theorist_deadline = deadlines.PhaseDeadline(
+    deadline_settings.solver_phase, "theorist phase", iteration_deadline
+  )
+  ranker_deadline = deadlines.PhaseDeadline(
+    deadline_settings.judge_phase, "ranker phase", iteration_deadline
+  )
+  journal = reporting.get_run_journal()
+  hypotheses: list[ModelHypothesis] = []
+  valid_hypotheses_text: list[str] = []
+  file_lock = threading.Lock()  # Protect concurrent file writes
+
+  def _select():
+    """Start the iteration and pick its question."""
+    iteration_deadline.start()
+    selected = _select_question(
+      dataset, output_dir, resume.question_id if resume else None
+    )
+    if journal is not None:
+      journal.started(reporting.UNSOLVABLE, selected[0])
+    logging.info("Querying %d solver models", len(solver_clients))
+    return selected
+
+  select = dag.submit(
+    "select unsolvable question",
+    _select,
+    priority=priority,
+    pool=scheduler.LOCAL_POOL,
+  )
+
+  def _generate(client):
+    """Query a single theorist and record its hypothesis."""
+    q_id, question, markdown_path = select.result()
+    replayed = resume.response(client.model.value) if resume else None
+    with llm.within_deadline(theorist_deadline.start()) as phase_deadline:
+      if replayed is not None:
+        logging.info(
+          "Replaying journaled hypothesis of %s", client.model.value
+        )
+        hypothesis = replayed
+      elif theorist_deadline.expired():
+        hypothesis = _timed_out_hypothesis(client, phase_deadline)
+      else:
+        hypothesis = _query_theorist(
+          client,
+          question,
+          _partial_writer(markdown_path, client, stream_partial_markdown),
+        )
+        if theorist_deadline.expired() and _is_error(hypothesis):
+          hypothesis = _timed_out_hypothesis(client, phase_deadline)
+        elif journal is not None and not _is_error(hypothesis):
+          journal.record_response(reporting.UNSOLVABLE, q_id, hypothesis)
+    # Write hypothesis to markdown immediately (thread-safe)
+    with file_lock:
+      _record_hypothesis(
+        markdown_path, hypothesis, hypotheses, valid_hypotheses_text
+      )
+
+  generate = [
+    dag.submit(
+      f"generate {client.model.value}",
+      functools.partial(_generate, client),
+      deps=[select],
+      priority=priority,
+      key=client.model.value,
+    )
+    for client in solver_clients
+  ]
+
+  def _rank(ranker_client):
+    """Run a single ranker and return results, or None if it timed out."""
+    for task in generate:
+      task.result()
+    q_id, question, _ = select.result()
+    if not valid_hypotheses_text:
+      return None
+    ranker_name = ranker_client.model.value
+    with file_lock:
+      if resume:
+        _restore_ranked_order(resume, hypotheses, valid_hypotheses_text)
+      ranked = [h.model_name for h in hypotheses if not _is_error(h)]
+      ranked_text = list(valid_hypotheses_text)
+    replayed = (
+      resume.judgment(ranker_name, ranked, ordered=True) if resume else None
+    )
+    if replayed is not None:
+      return replayed
+    with llm.within_deadline(ranker_deadline.start()):
+      if ranker_deadline.expired():
+        return None
+      logging.info("Querying ranker %s", ranker_name)
+      judge = evaluation.LlmEvaluator(judge_client=ranker_client)
+      ranking, elapsed_time = judge.rank_hypotheses(question, ranked_text)
+    result = (
+      ranking,
+      elapsed_time,
+      judge.served_model_name,
+      judge.served_backend,
+      judge.last_usage,
+    )
+    # A failed ranking call reports no elapsed time.
+    if journal is not None and elapsed_time > 0:
+      journal.record_judgment(
+        reporting.UNSOLVABLE, q_id, ranker_name, ranked, result
+      )
+    return result
+
+  rankers = {
+    client.model.value: dag.submit(
+      f"rank {client.model.value}",
+      functools.partial(_rank, client),
+      deps=generate,
+      priority=priority,
+      key=client.model.value,
+    )
+    for client in ranking_clients
+  }
+
+  def _render():
+    """Write the remaining report sections and return the report."""
+    q_id, question, markdown_path = select.result()
+    for task in generate:
+      task.result()
+    ranker_results = {}
+    for ranker_name, task in rankers.items():
+      result = task.result()
+      if result is not None:
+        ranker_results[ranker_name] = result
+    if valid_hypotheses_text:
+      _record_timed_out_rankers(
+        ranking_clients,
+        ranker_results,
+        len(valid_hypotheses_text),
+        ranker_deadline.start(),
+      )
+    report = _finish_report(
+      q_id,
+      question,
+      markdown_path,
+      hypotheses,
+      valid_hypotheses_text,
+      [client.model.value for client in ranking_clients],
+      ranker_results,
+    )
+    if journal is not None:
+      journal.record_question(reporting.UNSOLVABLE, q_id)
+    return report
+
+  return dag.submit(
+    "render unsolvable report",
+    _render,
+    deps=[*generate, *rankers.values()],
+    priority=priority,
+    pool=scheduler.LOCAL_POOL,
+  )
+
+
+async def analyze_unsolvable_question_async(
+  solver_clients: list[llm.AsyncLlmClient],
+  ranking_clients: list[llm.AsyncLlmClient],
+  dataset: JsonLoader,
+  output_dir: str,
+  stream_partial_markdown: bool = False,
+  resume: "reporting.PartialQuestion | None" = None,
+) -> UnsolvableQuestionReport:
+  """Async variant of analyze_unsolvable_question.
+
+  Theorist and ranker calls run as tasks on the current event loop rather
+  than on per-iteration thread pools. Cancelling the awaiting task cancels
+  every in-flight request. With a run journal configured, every successful
+  call and the finished report are journaled as they complete.
+
+  Args:
+      solver_clients: List of async clients to generate hypotheses.
+      ranking_clients: List of async clients to rank the hypotheses.
+      dataset: The JsonLoader for unsolvable questions.
+      output_dir: Directory to save the output markdown file.
+      stream_partial_markdown: Whether to mirror streamed text into
+          per-model .partial.md files while responses are in flight.
+      resume: What an interrupted run completed of the question to run
+          again. Its journaled calls are replayed instead of reissued.
+
+  Returns:
+      An UnsolvableQuestionReport object.
+  """
+  q_id, question, markdown_path = _select_question(
+    dataset, output_dir, resume.question_id if resume else None
+  )
+  journal = reporting.get_run_journal()
+  if journal is not None:
+    journal.started(reporting.UNSOLVABLE, q_id)
+
+  hypotheses: list[ModelHypothesis] = []
+  valid_hypotheses_text: list[str] = []
+
+  async def _generate(client):
+    """Query a single theorist, or replay its journaled hypothesis."""
+    replayed = resume.response(client.model.value) if resume else None
+    if replayed is not None:
+      logging.info("Replaying journaled hypothesis of %s", client.model.value)
+      return replayed
+    hypothesis = await _query_theorist_async(
+      client,
+      question,
+      _partial_writer(markdown_path, client, stream_partial_markdown),
+    )
+    if journal is not None and not _is_error(hypothesis):
+      journal.record_response(reporting.UNSOLVABLE, q_id, hypothesis)
+    return hypothesis
+
+  logging.info("Querying %d solver models", len(solver_clients))
+  deadline_settings = llm.get_deadline_settings()
+  with llm.deadline_scope(
+    deadline_settings.solver_phase, "theorist phase"
+  ) as phase_deadline:
+    task_to_client = {
+      asyncio.create_task(_generate(client)): client
+      for client in solver_clients
+    }
+    finished = set()
+    try:
+      async for task in deadlines.as_completed_async(
+        task_to_client, phase_deadline
+      ):
+        finished.add(task)
+        _record_hypothesis(
+          markdown_path, task.result(), hypotheses, valid_hypotheses_text
+        )
+    finally:
+      # Cancels stragglers, and every task if we are cancelled ourselves.
+      for task in task_to_client:
+        task.cancel()
+
+    for task, client in task_to_client.items():
+      if task not in finished:
+        _record_hypothesis(
+          markdown_path,
+          _timed_out_hypothesis(client, phase_deadline),
+          hypotheses,
+          valid_hypotheses_text,
+        )
+
+  ranker_results = {}
+  if valid_hypotheses_text:
+    if resume:
+      _restore_ranked_order(resume, hypotheses, valid_hypotheses_text)
+    ranked = [h.model_name for h in hypotheses if not _is_error(h)]
+
+    async def _run_ranker(ranker_client):
+      """Run a single ranker, or replay its journaled ranking."""
+      ranker_name = ranker_client.model.value
+      replayed = (
+        resume.judgment(ranker_name, ranked, ordered=True) if resume else None
+      )
+      if replayed is not None:
+        return ranker_name, *replayed
+      logging.info("Querying ranker %s", ranker_name)
+      judge = evaluation.LlmEvaluator(judge_client=ranker_client)
+      ranking, elapsed_time = await judge.rank_hypotheses_async(
+        question, valid_hypotheses_text
+      )
+      result = (
+        ranking,
+        elapsed_time,
+        judge.served_model_name,
+        judge.served_backend,
+        judge.last_usage,
+      )
+      # A failed ranking call reports no elapsed time.
+      if journal is not None and elapsed_time > 0:
+        journal.record_judgment(
+          reporting.UNSOLVABLE, q_id, ranker_name, ranked, result
+        )
+      return ranker_name, *result
+
+    with llm.deadline_scope(
+      deadline_settings.judge_phase, "ranker phase"
+    ) as phase_deadline:
+      ranker_tasks = [
+        asyncio.create_task(_run_ranker(client)) for client in ranking_clients
+      ]
+      try:
+        async for task in deadlines.as_completed_async(
+          ranker_tasks, phase_deadline
+        ):
+          ranker_name, *ranker_result = task.result()
+          ranker_results[ranker_name] = tuple(ranker_result)
+      finally:
+        for task in ranker_tasks:
+          task.cancel()
+
+      _record_timed_out_rankers(
+        ranking_clients,
+        ranker_results,
+        len(valid_hypotheses_text),
+        phase_deadline,
+      )
+
+  report = _finish_report(
+    q_id,
+    question,
+    markdown_path,
+    hypotheses,
+    valid_hypotheses_text,
+    [client.model.value for client in ranking_clients],
+    ranker_results,
+  )
+  if journal is not None:
+    journal.record_question(reporting.UNSOLVABLE, q_id)
+  return report
+
+
+def _partial_writer(
+  markdown_path: str, client: llm.BaseLlmClient, enabled: bool
+) -> llm.StreamCallback | None:
+  """Returns a callback that appends streamed text to the partial file."""
+  if not enabled:
+    return None
+  return functools.partial(
+    reporting.append_partial_response, markdown_path, client.model.value
+  )
+
+
+def _select_question(
+  dataset: JsonLoader, output_dir: str, question_id: str | None = None
+) -> tuple[str, str, str]:
+  """Picks the next unsolved question and writes its markdown headers.
 
+  Args:
+      dataset: The JsonLoader for unsolvable questions.
+      output_dir: Directory to save the output markdown file.
+      question_id: The question to run instead of the next one, e.g. one
+          an interrupted run did not finish. Its report is started over.
+
+  Returns:
+      A tuple of (question_id, question, markdown_path).
+
+  Raises:
+      KeyError: If `question_id` is unknown or has no 'question' key.
+      ValueError: If every question has already been solved.
+  """
   # Ensure output directory exists
   os.makedirs(output_dir, exist_ok=True)
 
+  if question_id is not None:
+    q_id, question = question_id, dataset.get_question(question_id)["question"]
+    markdown_path = os.path.join(output_dir, f"unsolvable_{q_id}.md")
+  else:
+    q_id, question, markdown_path = _next_unsolved_question(
+      dataset, output_dir
+    )
+
+  logging.info("Processing unsolvable question ID: %s", q_id)
+
+  # Initialize markdown file with header
+  reporting.write_unsolvable_header(markdown_path)
+
+  # Write question header to markdown
+  reporting.write_unsolvable_question_header(markdown_path, q_id, question)
+  return q_id, question, markdown_path
+
+
+def _next_unsolved_question(
+  dataset: JsonLoader, output_dir: str
+) -> tuple[str, str, str]:
+  """Picks the next question without a markdown report yet.
+
+  Returns:
+      A tuple of (question_id, question, markdown_path).
+
+  Raises:
+      ValueError: If every question has already been solved.
+  """
   # Find an unsolved question
   max_attempts = 1000  # Prevent infinite loop
   attempts = 0
@@ -122,50 +611,132 @@ def analyze_unsolvable_question(
       "Delete output files or reset the output directory to run again."
     )
 
-  logging.info("Processing unsolvable question ID: %s", q_id)
+  return q_id, question, markdown_path
 
-  # Initialize markdown file with header
-  reporting.write_unsolvable_header(markdown_path)
 
-  # Write question header to markdown
-  reporting.write_unsolvable_question_header(markdown_path, q_id, question)
+def _record_hypothesis(
+  markdown_path: str,
+  hypothesis: ModelHypothesis,
+  hypotheses: list[ModelHypothesis],
+  valid_hypotheses_text: list[str],
+) -> None:
+  """Appends a finished hypothesis to the report and markdown file.
 
-  # Phase 1: Get all hypotheses in parallel
-  hypotheses: list[ModelHypothesis] = []
-  valid_hypotheses_text: list[str] = []
-  file_lock = threading.Lock()  # Protect concurrent file writes
+  Callers running theorists on threads must hold a lock around this call.
+  """
+  reporting.remove_partial_response(markdown_path, hypothesis.model_name)
+  hypotheses.append(hypothesis)
+  reporting.append_hypothesis(
+    markdown_path, hypothesis.model_name, hypothesis.response_text
+  )
 
-  logging.info("Querying %d solver models", len(solver_clients))
-  with ThreadPoolExecutor(max_workers=len(solver_clients)) as executor:
-    # Submit all tasks
-    future_to_client = {
-      executor.submit(_query_theorist, client, question): client
-      for client in solver_clients
-    }
+  # Track valid hypotheses for ranking
+  if not hypothesis.response_text.startswith("API Error:"):
+    valid_hypotheses_text.append(hypothesis.response_text)
+
+
+def _is_error(hypothesis: ModelHypothesis) -> bool:
+  """Whether a hypothesis records a failed call."""
+  return hypothesis.response_text.startswith("API Error:")
+
+
+def _restore_ranked_order(
+  resume: "reporting.PartialQuestion",
+  hypotheses: list[ModelHypothesis],
+  valid_hypotheses_text: list[str],
+) -> None:
+  """Reorders hypotheses as an interrupted run ranked them, if it did.
+
+  Rankings refer to hypotheses by position, so a journaled ranking only
+  replays against the order it was made in. Callers must hold the lock
+  guarding both lists.
+  """
+  order = resume.judged_order(
+    [h.model_name for h in hypotheses if not _is_error(h)]
+  )
+  if order is None:
+    return
+  hypotheses.sort(
+    key=lambda h: order.index(h.model_name)
+    if h.model_name in order
+    else len(order)
+  )
+  valid_hypotheses_text[:] = [
+    h.response_text for h in hypotheses if not _is_error(h)
+  ]
+
+
+def _timed_out_hypothesis(
+  client: llm.BaseLlmClient, phase_deadline: llm.Deadline
+) -> ModelHypothesis:
+  """Returns the hypothesis recorded for a theorist cut off by the deadline."""
+  logging.warning(
+    "Theorist %s timed out at the %s deadline",
+    client.model.value,
+    phase_deadline.name,
+  )
+  return ModelHypothesis(
+    model_name=client.model.value,
+    response_text=deadlines.timed_out_message(phase_deadline),
+    generation_time=0.0,
+  )
 
-    try:
-      # Collect results as they complete
-      for future in as_completed(future_to_client):
-        hypothesis = future.result()
-        hypotheses.append(hypothesis)
-
-        # Write hypothesis to markdown immediately (thread-safe)
-        with file_lock:
-          reporting.append_hypothesis(
-            markdown_path, hypothesis.model_name, hypothesis.response_text
-          )
 
-        # Track valid hypotheses for ranking
-        if not hypothesis.response_text.startswith("API Error:"):
-          valid_hypotheses_text.append(hypothesis.response_text)
-    except KeyboardInterrupt:
-      logging.warning("Keyboard interrupt received, canceling solver tasks...")
-      for future in future_to_client:
-        future.cancel()
-      executor.shutdown(wait=False, cancel_futures=True)
-      raise
-
-  # Phase 2: Cross-Ranking
+def _record_timed_out_rankers(
+  ranking_clients: list[llm.BaseLlmClient],
+  ranker_results: dict[str, tuple],
+  num_hypotheses: int,
+  phase_deadline: llm.Deadline | None,
+) -> None:
+  """Records every ranker without a result as timed out."""
+  for client in ranking_clients:
+    ranker_name = client.model.value
+    if ranker_name in ranker_results:
+      continue
+    logging.warning(
+      "Ranker %s timed out at the %s deadline",
+      ranker_name,
+      phase_deadline.name,
+    )
+    ranking = evaluation.EvaluationScore(
+      metric_name="llm_hypothesis_ranking",
+      score=None,
+      reasoning=json.dumps(
+        {
+          "rankings": [0] * num_hypotheses,
+          "explanation": deadlines.timed_out_message(phase_deadline),
+        }
+      ),
+    )
+    ranker_results[ranker_name] = (ranking, 0.0, None, None, None)
+
+
+def _finish_report(
+  q_id: str,
+  question: str,
+  markdown_path: str,
+  hypotheses: list[ModelHypothesis],
+  valid_hypotheses_text: list[str],
+  ranker_names: list[str],
+  ranker_results: dict[
+    str, tuple[evaluation.EvaluationScore, float, str, str, llm.Usage | None]
+  ],
+) -> UnsolvableQuestionReport:
+  """Writes the rankings and timing sections and compiles the report.
+
+  Args:
+      q_id: The question identifier.
+      question: The question text.
+      markdown_path: Path of the question's markdown report.
+      hypotheses: Every theorist hypothesis, including errors.
+      valid_hypotheses_text: The successful hypotheses that were ranked.
+      ranker_names: Ranker model names in report order.
+      ranker_results: Maps ranker names to (ranking, elapsed_time,
+          served_model_name, backend, usage).
+
+  Returns:
+      The compiled UnsolvableQuestionReport.
+  """
   all_rankings: list[CrossRanking] = []
   if not valid_hypotheses_text:
     logging.warning(
@@ -174,56 +745,30 @@ def analyze_unsolvable_question(
     )
     reporting.append_no_hypotheses_message(markdown_path)
   else:
-
-    def _run_ranker(ranker_client):
-      """Run a single ranker and return results."""
-      logging.info(
-        "Querying ranker %s",
-        ranker_client.model.value,
-      )
-      judge = evaluation.LlmEvaluator(judge_client=ranker_client)
-      ranking, elapsed_time = judge.rank_hypotheses(
-        question, valid_hypotheses_text
-      )
-      return ranker_client.model.value, ranking, elapsed_time
-
-    # Run all rankers in parallel and collect results
-    ranker_results = {}
-    with ThreadPoolExecutor(max_workers=len(ranking_clients)) as executor:
-      future_to_ranker = {
-        executor.submit(_run_ranker, client): client
-        for client in ranking_clients
-      }
-
-      try:
-        for future in as_completed(future_to_ranker):
-          ranker_name, ranking, rank_time = future.result()
-          ranker_results[ranker_name] = (ranking, rank_time)
-      except KeyboardInterrupt:
-        logging.warning(
-          "Keyboard interrupt received, canceling ranker tasks..."
-        )
-        for future in future_to_ranker:
-          future.cancel()
-        executor.shutdown(wait=False, cancel_futures=True)
-        raise
-
     # Write rankings section AFTER all rankers complete
     reporting.start_rankings_section(markdown_path)
 
     # Write rankings in the order of ranking_clients
-    for client in ranking_clients:
-      ranker_name = client.model.value
+    for ranker_name in ranker_names:
       if ranker_name in ranker_results:
-        ranking, rank_time = ranker_results[ranker_name]
+        ranking, rank_time, served, backend, usage = ranker_results[
+          ranker_name
+        ]
         all_rankings.append(
           CrossRanking(
             ranker_model_name=ranker_name,
             ranking=ranking,
             ranking_time=rank_time,
+            served_model_name=served,
+            backend=backend,
+            usage=usage,
           )
         )
-        reporting.append_ranking(markdown_path, ranker_name, ranking.reasoning)
+        reporting.append_ranking(
+          markdown_path,
+          reporting.format_judge_name(ranker_name, served),
+          ranking.reasoning,
+        )
 
   # Write timing summary
   generation_times = {
@@ -239,7 +784,12 @@ def analyze_unsolvable_question(
 
   if generation_times or ranking_times:
     reporting.write_unsolvable_timing_summary(
-      markdown_path, generation_times, ranking_times
+      markdown_path,
+      generation_times,
+      ranking_times,
+      hedged_models={
+        hyp.model_name for hyp in hypotheses if hyp.winning_attempt == "hedge"
+      },
     )
 
   # Compile report for this question
@@ -252,3 +802,4 @@ def analyze_unsolvable_question(
 
   logging.info("Unsolvable question report saved to: %s", markdown_path)
   return report
+
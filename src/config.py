@@ -1,5 +1,6 @@
 """Configuration management for the benchmark."""
 
+import os
 from dataclasses import dataclass
 
 from absl import flags
@@ -8,10 +9,221 @@ from absl import flags
 DATASET_HANDLE: str = "mohammadbinaftab/physicsqa"
 UNSOLVABLE_QUESTIONS_PATH: str = "data/unsolvable.json"
 OUTPUT_DIR: str = "outputs/v3"
+# Append-only record of every finished LLM call and question, fsync'd as
+# it is written, so an interrupted run can be resumed with --resume.
+RUN_JOURNAL_FILENAME: str = "journal.jsonl"
 
 # Parallel execution configuration
 MAX_PARALLEL_WORKERS: int = 10
 
+# Maximum number of iterations in flight at once when running on asyncio
+MAX_ASYNC_ITERATIONS: int = 100
+
+# HTTP transport configuration
+# OpenRouter-compatible API root; point it at `python -m src.mock_server` to
+# run the benchmark without network access or spend.
+LLM_API_BASE_URL: str = "https://openrouter.ai/api/v1"
+# Each role queries every model (3 by default), and pointwise judging
+# overlaps the judges with the solvers, so an iteration may have every
+# solver and judge call in flight at once. The threaded runner's LLM pool,
+# the connection pools and the hedge executor are all sized from this one
+# number so they cover every iteration at once.
+MODELS_PER_ROLE: int = 3
+CALLS_PER_ITERATION: int = 2 * MODELS_PER_ROLE
+HTTP_POOL_SIZE: int = MAX_PARALLEL_WORKERS * CALLS_PER_ITERATION
+HTTP_ASYNC_POOL_SIZE: int = MAX_ASYNC_ITERATIONS * CALLS_PER_ITERATION
+# The threaded runner schedules every question's tasks on shared pools: one
+# for LLM calls, the size of the HTTP pool, and a small one for local work
+# (selecting questions, scoring responses, rendering reports).
+SCHEDULER_LOCAL_WORKERS: int = 2
+HTTP_CONNECT_TIMEOUT: float = 10.0  # In seconds
+HTTP_READ_TIMEOUT: float = 30.0  # In seconds
+# For streamed responses the read timeout only bounds the gap between chunks,
+# so slow-but-healthy long generations are never cut off.
+HTTP_STREAM_IDLE_TIMEOUT: float = 60.0  # In seconds
+
+# Inference backends besides OpenRouter: OpenAI-compatible chat completion
+# APIs, keyed by name. The "openai" dialect sends the plain OpenAI request
+# schema that direct provider APIs and local servers (llama.cpp, vLLM)
+# accept, without OpenRouter's usage accounting, provider routing and
+# reasoning extensions. api_key_env names the environment variable with
+# the backend's comma-separated keys; without one no key is sent. "model"
+# is the model name a single-model server serves every call as, and
+# "models" maps model ids to the names the backend knows them by.
+LLM_BACKENDS: dict[str, dict] = {
+  "openai": {
+    "base_url": "https://api.openai.com/v1",
+    "dialect": "openai",
+    "api_key_env": "OPENAI_API_KEY",
+    "models": {"openai/gpt-5": "gpt-5"},
+  },
+  "local": {"base_url": "http://127.0.0.1:8000/v1", "dialect": "openai"},
+}
+# Backend serving a model id in every role, and backend serving every model
+# in a client role. Roles take precedence; anything unlisted goes through
+# OpenRouter.
+MODEL_BACKENDS: dict[str, str] = {}
+ROLE_BACKENDS: dict[str, str] = {}
+
+# Rate limits shared by every client role of a model: model id ->
+# (requests per minute, tokens per minute). Models not listed use the
+# defaults. Limits are tightened at runtime from rate-limit response headers.
+DEFAULT_REQUESTS_PER_MINUTE: int = 120
+DEFAULT_TOKENS_PER_MINUTE: int = 2_000_000
+MODEL_RATE_LIMITS: dict[str, tuple[int | None, int | None]] = {}
+
+# Adaptive per-model concurrency (AIMD). The limit counts requests in flight
+# to one model across all roles and iterations, and starts where the static
+# worker pool used to sit.
+ADAPTIVE_CONCURRENCY_INITIAL: int = MAX_PARALLEL_WORKERS
+ADAPTIVE_CONCURRENCY_MIN: int = 1
+ADAPTIVE_CONCURRENCY_MAX: int = 64
+ADAPTIVE_CONCURRENCY_BACKOFF: float = 0.5  # Multiplicative decrease
+# Successes slower than this multiple of the average latency, or an error
+# rate above the threshold, stop the limit from growing.
+ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE: float = 2.0
+ADAPTIVE_CONCURRENCY_MAX_ERROR_RATE: float = 0.1
+
+# Per-model circuit breaker: after this many consecutive failed attempts a
+# model fails fast for the recovery timeout, then a single probe decides
+# whether it is healthy again.
+CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+CIRCUIT_BREAKER_RECOVERY_TIMEOUT: float = 30.0  # In seconds
+
+# Retries. Failed attempts are retried with capped decorrelated jitter
+# (each delay is drawn between the base delay and 3x the previous one),
+# or after the server's Retry-After when it sends one. Retry-After values
+# above the cap fail the call instead of waiting. Across all models, retries
+# in the window may not exceed the budget ratio of calls, plus a minimum so
+# quiet runs can still retry.
+RETRY_MAX_DELAY: float = 30.0  # In seconds
+RETRY_MAX_RETRY_AFTER: float = 120.0  # In seconds
+RETRY_BUDGET_RATIO: float = 0.2
+RETRY_BUDGET_MIN_RETRIES: int = 10
+RETRY_BUDGET_WINDOW: float = 60.0  # In seconds
+
+# Latency-aware call timeouts: once a model has enough latency samples in a
+# role, a non-streamed call in that role may take this multiple of their
+# percentile (within the bounds) before it times out, instead of the fixed
+# read timeout.
+CALL_TIMEOUT_PERCENTILE: float = 99.0
+CALL_TIMEOUT_MULTIPLIER: float = 2.0
+CALL_TIMEOUT_MIN: float = 5.0  # In seconds
+CALL_TIMEOUT_MAX: float = 300.0  # In seconds
+CALL_TIMEOUT_MIN_SAMPLES: int = 20
+
+# Hedged requests: a call still running at the observed latency percentile
+# of its model in its role gets a duplicate, and the first response wins.
+# The budget caps hedges per primary call, so hedging can at most double
+# the spend.
+HEDGE_PERCENTILE: float = 95.0
+HEDGE_BUDGET_RATIO: float = 0.1
+HEDGE_MIN_SAMPLES: int = 20  # Latencies observed before hedging a model
+HEDGE_LATENCY_WINDOW: int = 200  # Recent latencies kept per model and role
+# Optional OpenRouter provider order for hedges: model id -> provider names,
+# e.g. {"openai/gpt-5": ["Azure"]}. Models not listed hedge on any route.
+HEDGE_PROVIDER_ROUTES: dict[str, list[str]] = {}
+
+# OpenRouter provider routing per model id. Each entry may set "order"
+# (providers to try first), "ignore" (providers never to use), "sort"
+# ("price", "throughput" or "latency") and "allow_fallbacks" (whether other
+# providers may serve calls the listed ones cannot), e.g.
+# {"openai/gpt-5": {"order": ["OpenAI"], "sort": "latency"}}.
+MODEL_PROVIDER_ROUTING: dict[str, dict] = {}
+# Learned routing: once a provider has served enough calls to a model for
+# a client role, the fastest one is tried first. A share of calls is still
+# left to OpenRouter so the other providers keep being measured.
+ROUTING_MIN_SAMPLES: int = 5
+ROUTING_EXPLORATION: float = 0.1
+
+# Context windows and output limits in tokens, as served through OpenRouter
+# (conservative where providers differ). Requests are checked against them
+# before sending: max_tokens is lowered to fit, judge batches are split, and
+# prompts that cannot fit fail fast. Models not listed use the defaults.
+DEFAULT_CONTEXT_WINDOW: int = 128_000
+MODEL_CONTEXT_WINDOWS: dict[str, int] = {
+  "anthropic/claude-sonnet-4.5": 200_000,
+  "google/gemini-2.5-pro": 1_048_576,
+  "openai/gpt-5": 400_000,
+  "x-ai/grok-4": 256_000,
+  "deepseek/deepseek-chat-v3-0324": 163_840,
+}
+MODEL_MAX_OUTPUT_TOKENS: dict[str, int] = {
+  "anthropic/claude-sonnet-4.5": 64_000,
+  "google/gemini-2.5-pro": 65_536,
+  "openai/gpt-5": 128_000,
+}
+# Share of the window kept free for estimation error, and the fewest
+# completion tokens worth sending a request for.
+CONTEXT_WINDOW_SAFETY_MARGIN: float = 0.05
+MIN_COMPLETION_TOKENS: int = 1024
+
+# Output token budgets per client role. Judges return short JSON, so they
+# get much smaller caps than solvers writing full derivations. For
+# reasoning models the cap includes reasoning tokens. Per-model overrides:
+# model id -> role -> max_tokens.
+DEFAULT_MAX_TOKENS: int = 10_000
+ROLE_MAX_TOKENS: dict[str, int] = {
+  "solver": 10_000,
+  "theorist": 10_000,
+  "evaluator": 4_096,
+  "ranker": 6_144,
+}
+MODEL_MAX_TOKENS: dict[str, dict[str, int]] = {}
+# Reasoning budgets of models that reason by default, per model id and
+# role: an OpenRouter effort level ("minimal", "low", "medium", "high") or
+# a reasoning token cap. Roles not listed keep the model's default.
+# Setting one for a model that does not reason by default (e.g. Claude)
+# turns reasoning on, so only list models that always reason.
+MODEL_REASONING_BUDGETS: dict[str, dict[str, str | int]] = {
+  "openai/gpt-5": {"evaluator": "low", "ranker": "low"},
+  "google/gemini-2.5-pro": {"evaluator": 1_024, "ranker": 1_024},
+}
+# Autotuned budgets: once a model has enough completions in a role, its
+# cap becomes this percentile of the recent completion lengths plus the
+# margin, never above the configured budget.
+TOKEN_BUDGET_PERCENTILE: float = 99.0
+TOKEN_BUDGET_MARGIN: float = 0.25
+TOKEN_BUDGET_MIN_SAMPLES: int = 20
+TOKEN_BUDGET_WINDOW: int = 200
+
+# Responses cut off at max_tokens are resumed by continuation requests that
+# replay the partial output, instead of being scored truncated or
+# regenerated from scratch.
+MAX_CONTINUATIONS: int = 2
+
+# What each model supports (structured outputs, strict schemas, system
+# messages, context length), probed from OpenRouter's model list and
+# downgraded whenever a request is rejected for using a missing feature.
+# Requests are adapted to the cached capabilities, so a rejected request
+# shape is never sent twice, across runs too.
+MODEL_CAPABILITIES_PATH: str = ".cache/model_capabilities.json"
+MODEL_CAPABILITIES_MAX_AGE_DAYS: float = 7.0
+
+# Provider prompt caching. Requests put their static system prompt and
+# shared question block first so providers can reuse the cached prefix.
+# Providers that only cache at explicit breakpoints (model id prefixes) get
+# cache_control markers; the others cache matching prefixes automatically.
+PROMPT_CACHE_CONTROL_PROVIDERS: tuple[str, ...] = ("anthropic/", "google/")
+
+# Judging modes. "batch" grades every response of a question in one call
+# per evaluator once all solvers are done; "pointwise" grades each response
+# in its own call as soon as it arrives, overlapping judging with slower
+# solvers; "adaptive" judges a response pointwise while the solvers still
+# running are expected to take at least the minimum straggler gap (their
+# latency percentile minus the time already spent), unless the question
+# block repeated in each pointwise call outweighs the response by more
+# than the overhead ratio, and batches the rest.
+JUDGE_MODE: str = "adaptive"
+JUDGE_MIN_STRAGGLER_GAP: float = 5.0  # In seconds
+JUDGE_STRAGGLER_PERCENTILE: float = 90.0
+JUDGE_MAX_PROMPT_OVERHEAD: float = 1.0
+
+# LLM response cache configuration
+LLM_CACHE_PATH: str = ".cache/llm_responses.sqlite3"
+LLM_CACHE_MAX_MB: int = 1024
+LLM_CACHE_MAX_AGE_DAYS: float = 30.0
+
 # Define command-line flags
 _SOLVABLE_ITERATIONS = flags.DEFINE_integer(
   "solvable_iterations",
@@ -25,6 +237,282 @@ _UNSOLVABLE_ITERATIONS = flags.DEFINE_integer(
   "The number of unsolvable questions to run.",
 )
 
+_RESUME = flags.DEFINE_boolean(
+  "resume",
+  False,
+  "Resume an interrupted run from its journal in the output directory: "
+  "keep its finished questions and replay the calls it completed.",
+)
+
+_ASYNC_MODE = flags.DEFINE_boolean(
+  "async_mode",
+  False,
+  "Run iterations on a single asyncio event loop instead of worker threads.",
+)
+
+_MAX_ASYNC_ITERATIONS = flags.DEFINE_integer(
+  "max_async_iterations",
+  MAX_ASYNC_ITERATIONS,
+  "Maximum number of iterations in flight at once in --async_mode.",
+)
+
+_LLM_BASE_URL = flags.DEFINE_string(
+  "llm_base_url",
+  LLM_API_BASE_URL,
+  "Base URL of the OpenRouter-compatible chat completions API.",
+)
+
+_ROLE_BACKENDS = flags.DEFINE_list(
+  "role_backends",
+  [f"{role}={backend}" for role, backend in ROLE_BACKENDS.items()],
+  "Backends serving whole client roles, as role=backend pairs, e.g. "
+  f"evaluator=local,ranker=local. Known backends: {', '.join(LLM_BACKENDS)}.",
+)
+
+_LOCAL_BACKEND_URL = flags.DEFINE_string(
+  "local_backend_url",
+  LLM_BACKENDS["local"]["base_url"],
+  "Base URL of the local OpenAI-compatible inference server.",
+)
+
+_LOCAL_BACKEND_MODEL = flags.DEFINE_string(
+  "local_backend_model",
+  None,
+  "Model name the local server serves every call as. Calls keep their "
+  "OpenRouter model ids if unset.",
+)
+
+_HTTP_CONNECT_TIMEOUT = flags.DEFINE_float(
+  "http_connect_timeout",
+  HTTP_CONNECT_TIMEOUT,
+  "Seconds to wait for a connection to the LLM API to open.",
+)
+
+_HTTP_READ_TIMEOUT = flags.DEFINE_float(
+  "http_read_timeout",
+  HTTP_READ_TIMEOUT,
+  "Seconds to wait for the LLM API to send data before timing out.",
+)
+
+_STREAM_RESPONSES = flags.DEFINE_boolean(
+  "stream_responses",
+  False,
+  "Stream completions over SSE, recording time-to-first-token and "
+  "tokens/sec and timing out only when the stream goes idle.",
+)
+
+_STREAM_IDLE_TIMEOUT = flags.DEFINE_float(
+  "stream_idle_timeout",
+  HTTP_STREAM_IDLE_TIMEOUT,
+  "Seconds a streamed response may go without sending data.",
+)
+
+_STREAM_PARTIAL_MARKDOWN = flags.DEFINE_boolean(
+  "stream_partial_markdown",
+  False,
+  "With --stream_responses, write solver text to a .partial.md file next "
+  "to the report as it arrives.",
+)
+
+_ADAPTIVE_CONCURRENCY = flags.DEFINE_boolean(
+  "adaptive_concurrency",
+  True,
+  "Adapt the number of in-flight requests per model to the provider's "
+  "capacity (AIMD): grow while responses are healthy, halve on "
+  "429/503/timeouts.",
+)
+
+_MAX_CONCURRENCY_PER_MODEL = flags.DEFINE_integer(
+  "max_concurrency_per_model",
+  ADAPTIVE_CONCURRENCY_MAX,
+  "Upper bound for the adaptive per-model concurrency limit.",
+)
+
+_CIRCUIT_BREAKER_THRESHOLD = flags.DEFINE_integer(
+  "circuit_breaker_threshold",
+  CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+  "Consecutive failed attempts after which calls to a model fail fast. "
+  "0 disables the circuit breakers.",
+)
+
+_CIRCUIT_BREAKER_RECOVERY = flags.DEFINE_float(
+  "circuit_breaker_recovery",
+  CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+  "Seconds an open circuit fails fast before probing the model again.",
+)
+
+_FALLBACK_MODEL = flags.DEFINE_string(
+  "fallback_model",
+  None,
+  "Model id (e.g. deepseek/deepseek-chat-v3-0324) that serves evaluator "
+  "and ranker calls when the configured judge fails or its circuit is open.",
+)
+
+
+@flags.validator("fallback_model")
+def _check_fallback_model(value: str | None) -> bool:
+  """Rejects a --fallback_model that is not a known model id."""
+  # Imported here: src.llm reads this module's constants on import.
+  from src.llm import models
+
+  model_ids = [model.value for model in models.Model]
+  if value is not None and value not in model_ids:
+    raise flags.ValidationError(
+      f"--fallback_model must be one of: {', '.join(model_ids)}"
+    )
+  return True
+
+
+_HEDGE_REQUESTS = flags.DEFINE_boolean(
+  "hedge_requests",
+  False,
+  "Send a duplicate request when a call runs past its model's observed "
+  "latency percentile, and keep whichever response arrives first.",
+)
+
+_HEDGE_PERCENTILE = flags.DEFINE_float(
+  "hedge_percentile",
+  HEDGE_PERCENTILE,
+  "Latency percentile after which a call is hedged.",
+)
+
+_HEDGE_BUDGET = flags.DEFINE_float(
+  "hedge_budget",
+  HEDGE_BUDGET_RATIO,
+  "Maximum hedges per call to a model (at most 1.0, i.e. double spend).",
+)
+
+_ITERATION_DEADLINE = flags.DEFINE_float(
+  "iteration_deadline",
+  None,
+  "Seconds one iteration may take. Calls still running at the deadline "
+  "are recorded as timed out. Unlimited if unset.",
+)
+
+_SOLVER_PHASE_DEADLINE = flags.DEFINE_float(
+  "solver_phase_deadline",
+  None,
+  "Seconds the solver (or theorist) phase of an iteration may take.",
+)
+
+_JUDGE_PHASE_DEADLINE = flags.DEFINE_float(
+  "judge_phase_deadline",
+  None,
+  "Seconds the evaluator (or ranker) phase of an iteration may take.",
+)
+
+_JUDGE_MODE = flags.DEFINE_enum(
+  "judge_mode",
+  JUDGE_MODE,
+  ["batch", "pointwise", "adaptive"],
+  "How evaluators grade solvable responses: all at once after the last "
+  "solver, each as soon as it arrives, or pointwise only while slower "
+  "solvers are still running.",
+)
+
+_JUDGE_MIN_STRAGGLER_GAP = flags.DEFINE_float(
+  "judge_min_straggler_gap",
+  JUDGE_MIN_STRAGGLER_GAP,
+  "Seconds the remaining solvers must be expected to take for adaptive "
+  "judging to grade an arrived response on its own.",
+)
+
+_ADAPTIVE_TIMEOUTS = flags.DEFINE_boolean(
+  "adaptive_timeouts",
+  True,
+  "Time out non-streamed calls at a multiple of the observed p99 latency "
+  "of their model in their role instead of --http_read_timeout, once "
+  "enough calls have been seen.",
+)
+
+_SINGLE_FLIGHT = flags.DEFINE_boolean(
+  "single_flight",
+  True,
+  "Collapse identical LLM requests that are in flight at the same time "
+  "into one API call.",
+)
+
+_RETRY_BUDGET = flags.DEFINE_float(
+  "retry_budget",
+  RETRY_BUDGET_RATIO,
+  "Retries allowed as a fraction of LLM calls over the last "
+  f"{RETRY_BUDGET_WINDOW:g}s, across all models, so an outage cannot "
+  "turn into a retry storm.",
+)
+
+_PROVIDER_SORT = flags.DEFINE_enum(
+  "provider_sort",
+  None,
+  ["price", "throughput", "latency"],
+  "How OpenRouter ranks the providers of models whose routing does not "
+  "set a sort order. Uses OpenRouter's load balancing if unset.",
+)
+
+_LEARN_PROVIDER_ROUTES = flags.DEFINE_boolean(
+  "learn_provider_routes",
+  False,
+  "Try the provider that has been fastest so far for each model and "
+  "client role first, exploring others on a share of calls.",
+)
+
+_AUTOTUNE_TOKEN_BUDGETS = flags.DEFINE_boolean(
+  "autotune_token_budgets",
+  False,
+  "Set each model's max_tokens per role from its observed completion "
+  f"lengths (p{TOKEN_BUDGET_PERCENTILE:g} plus "
+  f"{TOKEN_BUDGET_MARGIN:.0%}), within the configured budgets.",
+)
+
+_MAX_CONTINUATIONS = flags.DEFINE_integer(
+  "max_continuations",
+  MAX_CONTINUATIONS,
+  "Continuation requests allowed per call to resume a response cut off "
+  "at max_tokens. 0 keeps truncated responses as they are.",
+)
+
+_PROBE_MODEL_CAPABILITIES = flags.DEFINE_boolean(
+  "probe_model_capabilities",
+  True,
+  "Refresh the cached capabilities of the benchmarked models from the "
+  f"API's model list when older than {MODEL_CAPABILITIES_MAX_AGE_DAYS:g} "
+  "days.",
+)
+
+_PROMPT_CACHING = flags.DEFINE_boolean(
+  "prompt_caching",
+  True,
+  "Mark the static system prompt and shared question block with provider "
+  "prompt-cache breakpoints.",
+)
+
+_MAX_COST = flags.DEFINE_float(
+  "max_cost",
+  None,
+  "Stop starting new iterations once the run would spend more than this "
+  "many USD. Unlimited if unset.",
+)
+
+_MAX_TOKENS = flags.DEFINE_integer(
+  "max_tokens",
+  None,
+  "Stop starting new iterations once the run would use more than this "
+  "many tokens. Unlimited if unset.",
+)
+
+_LLM_CACHE_MODE = flags.DEFINE_enum(
+  "llm_cache_mode",
+  "off",
+  ["off", "read_through", "write_only", "replay_only"],
+  "How LLM calls use the on-disk response cache. replay_only fails any "
+  "call that is not already cached.",
+)
+
+_LLM_CACHE_PATH = flags.DEFINE_string(
+  "llm_cache_path",
+  LLM_CACHE_PATH,
+  "SQLite file backing the LLM response cache.",
+)
+
 
 @dataclass
 class BenchmarkConfig:
@@ -33,9 +521,55 @@ class BenchmarkConfig:
   dataset_handle: str
   unsolvable_questions_path: str
   output_dir: str
+  run_journal_path: str
+  resume: bool
   solvable_iterations: int
   unsolvable_iterations: int
   max_parallel_workers: int
+  async_mode: bool
+  max_async_iterations: int
+  http_pool_size: int
+  http_async_pool_size: int
+  llm_base_url: str
+  llm_backends: dict[str, dict]
+  model_backends: dict[str, str]
+  role_backends: dict[str, str]
+  http_connect_timeout: float
+  http_read_timeout: float
+  stream_responses: bool
+  stream_idle_timeout: float
+  stream_partial_markdown: bool
+  adaptive_concurrency: bool
+  concurrency_initial_limit: int
+  concurrency_min_limit: int
+  concurrency_max_limit: int
+  circuit_breaker_threshold: int
+  circuit_breaker_recovery: float
+  fallback_model: str | None
+  hedge_requests: bool
+  hedge_percentile: float
+  hedge_budget: float
+  iteration_deadline: float | None
+  solver_phase_deadline: float | None
+  judge_phase_deadline: float | None
+  judge_mode: str
+  judge_min_straggler_gap: float
+  adaptive_timeouts: bool
+  single_flight: bool
+  retry_budget: float
+  provider_sort: str | None
+  learn_provider_routes: bool
+  autotune_token_budgets: bool
+  max_continuations: int
+  model_capabilities_path: str
+  probe_model_capabilities: bool
+  prompt_caching: bool
+  max_cost: float | None
+  max_tokens: int | None
+  llm_cache_mode: str
+  llm_cache_path: str
+  llm_cache_max_bytes: int
+  llm_cache_max_age_seconds: float
 
   @classmethod
   def from_flags(cls) -> "BenchmarkConfig":
@@ -48,7 +582,65 @@ class BenchmarkConfig:
       dataset_handle=DATASET_HANDLE,
       unsolvable_questions_path=UNSOLVABLE_QUESTIONS_PATH,
       output_dir=OUTPUT_DIR,
+      run_journal_path=os.path.join(OUTPUT_DIR, RUN_JOURNAL_FILENAME),
+      resume=_RESUME.value,
       solvable_iterations=_SOLVABLE_ITERATIONS.value,
       unsolvable_iterations=_UNSOLVABLE_ITERATIONS.value,
       max_parallel_workers=MAX_PARALLEL_WORKERS,
+      async_mode=_ASYNC_MODE.value,
+      max_async_iterations=_MAX_ASYNC_ITERATIONS.value,
+      http_pool_size=HTTP_POOL_SIZE,
+      http_async_pool_size=_MAX_ASYNC_ITERATIONS.value * CALLS_PER_ITERATION,
+      llm_base_url=_LLM_BASE_URL.value,
+      llm_backends=_backends_from_flags(),
+      model_backends=MODEL_BACKENDS,
+      role_backends=dict(
+        pair.split("=", 1) for pair in _ROLE_BACKENDS.value if "=" in pair
+      ),
+      http_connect_timeout=_HTTP_CONNECT_TIMEOUT.value,
+      http_read_timeout=_HTTP_READ_TIMEOUT.value,
+      stream_responses=_STREAM_RESPONSES.value,
+      stream_idle_timeout=_STREAM_IDLE_TIMEOUT.value,
+      stream_partial_markdown=_STREAM_PARTIAL_MARKDOWN.value,
+      adaptive_concurrency=_ADAPTIVE_CONCURRENCY.value,
+      concurrency_initial_limit=min(
+        ADAPTIVE_CONCURRENCY_INITIAL, _MAX_CONCURRENCY_PER_MODEL.value
+      ),
+      concurrency_min_limit=ADAPTIVE_CONCURRENCY_MIN,
+      concurrency_max_limit=_MAX_CONCURRENCY_PER_MODEL.value,
+      circuit_breaker_threshold=_CIRCUIT_BREAKER_THRESHOLD.value,
+      circuit_breaker_recovery=_CIRCUIT_BREAKER_RECOVERY.value,
+      fallback_model=_FALLBACK_MODEL.value,
+      hedge_requests=_HEDGE_REQUESTS.value,
+      hedge_percentile=_HEDGE_PERCENTILE.value,
+      hedge_budget=_HEDGE_BUDGET.value,
+      iteration_deadline=_ITERATION_DEADLINE.value,
+      solver_phase_deadline=_SOLVER_PHASE_DEADLINE.value,
+      judge_phase_deadline=_JUDGE_PHASE_DEADLINE.value,
+      judge_mode=_JUDGE_MODE.value,
+      judge_min_straggler_gap=_JUDGE_MIN_STRAGGLER_GAP.value,
+      adaptive_timeouts=_ADAPTIVE_TIMEOUTS.value,
+      single_flight=_SINGLE_FLIGHT.value,
+      retry_budget=_RETRY_BUDGET.value,
+      provider_sort=_PROVIDER_SORT.value,
+      learn_provider_routes=_LEARN_PROVIDER_ROUTES.value,
+      autotune_token_budgets=_AUTOTUNE_TOKEN_BUDGETS.value,
+      max_continuations=_MAX_CONTINUATIONS.value,
+      model_capabilities_path=MODEL_CAPABILITIES_PATH,
+      probe_model_capabilities=_PROBE_MODEL_CAPABILITIES.value,
+      prompt_caching=_PROMPT_CACHING.value,
+      max_cost=_MAX_COST.value,
+      max_tokens=_MAX_TOKENS.value,
+      llm_cache_mode=_LLM_CACHE_MODE.value,
+      llm_cache_path=_LLM_CACHE_PATH.value,
+      llm_cache_max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024,
+      llm_cache_max_age_seconds=LLM_CACHE_MAX_AGE_DAYS * 24 * 60 * 60,
     )
+
+
+def _backends_from_flags() -> dict[str, dict]:
+  """Returns LLM_BACKENDS with the local server set from the flags."""
+  local = {**LLM_BACKENDS["local"], "base_url": _LOCAL_BACKEND_URL.value}
+  if _LOCAL_BACKEND_MODEL.value:
+    local["model"] = _LOCAL_BACKEND_MODEL.value
+  return {**LLM_BACKENDS, "local": local}
@@ -1,8 +1,8 @@
 """LLM-based evaluation functionality."""
 
+import asyncio
 import json
 import re
-import textwrap
 from typing import Final, Sequence
 
 import requests
@@ -14,11 +14,32 @@ from src.evaluation.models import EvaluationScore
 # A simple regex to parse the score from the evaluator's response
 _SCORE_PARSER: Final = re.compile(r"Score:\s*(\d)\/5")
 
+# (evaluations_dict, elapsed_time, served_model, backend, usage) of one judge
+# call.
+_BatchResult = tuple[
+  dict[str, tuple[float | None, str]],
+  float,
+  str | None,
+  str | None,
+  llm.Usage | None,
+]
 
-class LlmEvaluator:
-  """Uses an LLM to perform qualitative evaluations."""
 
-  def __init__(self, judge_client: llm.LlmClient):
+class LlmEvaluator:
+  """Uses an LLM to perform qualitative evaluations.
+
+  Attributes:
+      client: The judge LLM client.
+      served_model_name: The model that served the most recent batch
+          evaluation or ranking. Differs from the judge's own model when
+          the call was routed to a fallback model.
+      served_backend: Name of the backend that served the most recent
+          batch evaluation or ranking.
+      last_usage: Usage of the most recent batch evaluation or ranking,
+          or None if it was a cache hit or failed.
+  """
+
+  def __init__(self, judge_client: llm.BaseLlmClient):
     """Initializes the evaluator with a specific "judge" LLM client.
 
     Args:
@@ -26,12 +47,18 @@ class LlmEvaluator:
             This client should have the appropriate evaluator prompt.
     """
     self.client = judge_client
+    self.served_model_name = judge_client.model.value
+    self.served_backend = judge_client.backend.name
+    self.last_usage = None
 
   def evaluate_all_solutions(
     self, question: str, responses: dict[str, str], true_answer: str
   ) -> tuple[dict[str, tuple[float | None, str]], float]:
     """Uses the injected LLM client to grade all answers at once.
 
+    If the grading prompt would not fit the judge's context window, the
+    answers are graded in smaller batches, one call after another.
+
     Args:
         question: The physics question being evaluated.
         responses: Dictionary mapping model names to their response texts.
@@ -42,125 +69,261 @@ class LlmEvaluator:
         - evaluations_dict maps model names to tuples of (score, reasoning)
         - elapsed_time is the time in seconds to perform all evaluations
     """
-    # Format all responses for the prompt
-    response_block = ""
-    for model_name, response_text in responses.items():
-      response_block += f"## Response from {model_name}:\n{response_text}\n\n"
+    results = [
+      self._evaluate_batch(question, batch, true_answer)
+      for batch in self._fitting_batches(question, responses, true_answer)
+    ]
+    return self._merge_batches(results)
 
-    user_prompt = textwrap.dedent(f"""
-      ## Question:
-      {question}
+  async def evaluate_all_solutions_async(
+    self, question: str, responses: dict[str, str], true_answer: str
+  ) -> tuple[dict[str, tuple[float | None, str]], float]:
+    """Async variant of evaluate_all_solutions for an AsyncLlmClient judge.
 
-      ## True Answer:
-      {true_answer}
+    Batches split to fit the context window are graded concurrently.
 
-      {response_block}
-    """)
+    Args:
+        question: The physics question being evaluated.
+        responses: Dictionary mapping model names to their response texts.
+        true_answer: The correct answer to the question.
 
-    # Create JSON schema for structured output with scores and reasoning
-    model_names = list(responses.keys())
+    Returns:
+        A tuple of (evaluations_dict, elapsed_time), as evaluate_all_solutions.
+        With concurrent batches, elapsed_time is that of the slowest one.
+    """
+    results = await asyncio.gather(
+      *(
+        self._evaluate_batch_async(question, batch, true_answer)
+        for batch in self._fitting_batches(question, responses, true_answer)
+      )
+    )
+    return self._merge_batches(results, concurrent=True)
+
+  def evaluate_one_solution(
+    self,
+    question: str,
+    model_name: str,
+    response: str,
+    true_answer: str,
+  ) -> tuple[
+    tuple[float | None, str], float, str | None, str | None, llm.Usage | None
+  ]:
+    """Grades a single answer in its own structured-output call.
+
+    Lets an answer be judged as soon as it arrives, without waiting for
+    the rest of the batch. Safe to call concurrently: unlike the batch
+    methods it does not update served_model_name, served_backend or
+    last_usage.
 
-    # Build properties for each model with score and reasoning
-    model_properties = {}
-    for model_name in model_names:
-      model_properties[model_name] = {
-        "type": "object",
-        "properties": {
-          "score": {
-            "type": "integer",
-            "description": f"Score for {model_name} (1-5)",
-          },
-          "reasoning": {
-            "type": "string",
-            "description": f"Brief explanation for the score given to {model_name}",
-          },
-        },
-        "required": ["score", "reasoning"],
-        "additionalProperties": False,
-      }
-
-    response_format = {
-      "type": "json_schema",
-      "json_schema": {
-        "name": "evaluation_scores",
-        "strict": True,
-        "schema": {
-          "type": "object",
-          "properties": {
-            "evaluations": {
-              "type": "object",
-              "properties": model_properties,
-              "required": model_names,
-              "additionalProperties": False,
-            }
-          },
-          "required": ["evaluations"],
-          "additionalProperties": False,
-        },
-      },
-    }
+    Args:
+        question: The physics question being evaluated.
+        model_name: The model that wrote the answer.
+        response: The answer.
+        true_answer: The correct answer to the question.
+
+    Returns:
+        A tuple of ((score, reasoning), elapsed_time, served_model,
+        backend, usage).
+    """
+    evaluations, *call = self._evaluate_batch(
+      question, {model_name: response}, true_answer
+    )
+    return evaluations[model_name], *call
+
+  async def evaluate_one_solution_async(
+    self,
+    question: str,
+    model_name: str,
+    response: str,
+    true_answer: str,
+  ) -> tuple[
+    tuple[float | None, str], float, str | None, str | None, llm.Usage | None
+  ]:
+    """Async variant of evaluate_one_solution for an AsyncLlmClient judge.
+
+    Returns:
+        A tuple of ((score, reasoning), elapsed_time, served_model,
+        backend, usage), as evaluate_one_solution.
+    """
+    evaluations, *call = await self._evaluate_batch_async(
+      question, {model_name: response}, true_answer
+    )
+    return evaluations[model_name], *call
+
+  def _evaluate_batch(
+    self, question: str, responses: dict[str, str], true_answer: str
+  ) -> _BatchResult:
+    """Grades one batch of answers in a single judge call.
+
+    Returns:
+        A tuple of (evaluations_dict, elapsed_time, served_model, backend,
+        usage).
+    """
+    user_prompt, response_format = _build_batch_request(
+      question, responses, true_answer
+    )
+    model_names = list(responses.keys())
 
     try:
-      raw_response, elapsed_time = self.client.call_api(
+      response = self.client.complete(
         user_prompt, response_format=response_format
       )
-      # Parse the JSON response
-      response_data = json.loads(raw_response)
-      evaluations = response_data.get("evaluations", {})
-
-      # Extract scores and reasoning for each model
-      result = {}
-      for model_name in model_names:
-        evaluation = evaluations.get(model_name)
-        if evaluation is not None:
-          score = evaluation.get("score")
-          reasoning = evaluation.get("reasoning", "No reasoning provided")
-          if score is not None:
-            result[model_name] = (float(score), reasoning)
-          else:
-            logging.warning(
-              "Score for model %s not found in response from judge %s",
-              model_name,
-              self.client.model.value,
-            )
-            result[model_name] = (None, reasoning)
-        else:
-          logging.warning(
-            "Evaluation for model %s not found in response from judge %s",
-            model_name,
-            self.client.model.value,
-          )
-          result[model_name] = (None, "Evaluation failed")
-
-      return result, elapsed_time
-
+      return (
+        self._parse_batch_response(response.text, model_names),
+        response.elapsed_time,
+        response.served_model,
+        response.backend,
+        response.usage,
+      )
     except (llm.LlmApiError, requests.exceptions.RequestException) as e:
       logging.error("Evaluator call failed: %s", e)
+      return _batch_failure(model_names, f"API Error: {e}")
+    except (json.JSONDecodeError, KeyError) as e:
+      logging.error("Failed to parse evaluator JSON response: %s", e)
+      return _batch_failure(model_names, f"Parse Error: {e}")
+
+  async def _evaluate_batch_async(
+    self, question: str, responses: dict[str, str], true_answer: str
+  ) -> _BatchResult:
+    """Async variant of _evaluate_batch."""
+    user_prompt, response_format = _build_batch_request(
+      question, responses, true_answer
+    )
+    model_names = list(responses.keys())
+
+    try:
+      response = await self.client.complete(
+        user_prompt, response_format=response_format
+      )
       return (
-        {model_name: (None, f"API Error: {e}") for model_name in model_names},
-        0.0,
+        self._parse_batch_response(response.text, model_names),
+        response.elapsed_time,
+        response.served_model,
+        response.backend,
+        response.usage,
       )
+    except llm.LlmApiError as e:
+      logging.error("Evaluator call failed: %s", e)
+      return _batch_failure(model_names, f"API Error: {e}")
     except (json.JSONDecodeError, KeyError) as e:
       logging.error("Failed to parse evaluator JSON response: %s", e)
-      return (
-        {model_name: (None, f"Parse Error: {e}") for model_name in model_names},
-        0.0,
+      return _batch_failure(model_names, f"Parse Error: {e}")
+
+  def _fitting_batches(
+    self, question: str, responses: dict[str, str], true_answer: str
+  ) -> list[dict[str, str]]:
+    """Splits the answers into batches whose prompts fit the judge.
+
+    Batches that do not fit are halved until they do. A single answer
+    that does not fit is left for the client to reject.
+
+    Returns:
+        The batches, in the order of `responses`.
+    """
+    batches = []
+    pending = [responses]
+    while pending:
+      batch = pending.pop(0)
+      if len(batch) <= 1 or self.client.fits_context(
+        *_build_batch_request(question, batch, true_answer)
+      ):
+        batches.append(batch)
+        continue
+      items = list(batch.items())
+      middle = len(items) // 2
+      pending[:0] = [dict(items[:middle]), dict(items[middle:])]
+
+    if len(batches) > 1:
+      logging.info(
+        "Splitting the evaluation by %s into %d batches to fit its "
+        "context window",
+        self.client.model.value,
+        len(batches),
       )
+    return batches
+
+  def _merge_batches(
+    self, results: Sequence[_BatchResult], concurrent: bool = False
+  ) -> tuple[dict[str, tuple[float | None, str]], float]:
+    """Combines batch results and records their served model and usage.
+
+    The backend recorded is that of the last batch with a served model.
+
+    Args:
+        results: The result of each batch.
+        concurrent: Whether the batches ran concurrently, so the elapsed
+            time is the slowest batch's rather than the sum.
+
+    Returns:
+        A tuple of (evaluations_dict, elapsed_time).
+    """
+    evaluations = {}
+    usages = []
+    for batch_evaluations, _, served_model, backend, usage in results:
+      evaluations.update(batch_evaluations)
+      if served_model is not None:
+        self.served_model_name = served_model
+        self.served_backend = backend
+      if usage is not None:
+        usages.append(usage)
+    elapsed_times = [result[1] for result in results]
+    self.last_usage = sum(usages, llm.Usage()) if usages else None
+    return evaluations, (
+      max(elapsed_times) if concurrent else sum(elapsed_times)
+    )
+
+  def _parse_batch_response(
+    self, raw_response: str, model_names: list[str]
+  ) -> dict[str, tuple[float | None, str]]:
+    """Extracts per-model scores and reasoning from a batch judge response.
+
+    Args:
+        raw_response: The JSON text returned by the judge.
+        model_names: The models that were evaluated.
+
+    Returns:
+        A dict mapping model names to tuples of (score, reasoning).
+
+    Raises:
+        json.JSONDecodeError: If the response is not valid JSON.
+    """
+    response_data = json.loads(raw_response)
+    evaluations = response_data.get("evaluations", {})
+
+    # Extract scores and reasoning for each model
+    result = {}
+    for model_name in model_names:
+      evaluation = evaluations.get(model_name)
+      if evaluation is not None:
+        score = evaluation.get("score")
+        reasoning = evaluation.get("reasoning", "No reasoning provided")
+        if score is not None:
+          result[model_name] = (float(score), reasoning)
+        else:
+          logging.warning(
+            "Score for model %s not found in response from judge %s",
+            model_name,
+            self.client.model.value,
+          )
+          result[model_name] = (None, reasoning)
+      else:
+        logging.warning(
+          "Evaluation for model %s not found in response from judge %s",
+          model_name,
+          self.client.model.value,
+        )
+        result[model_name] = (None, "Evaluation failed")
+
+    return result
 
   def evaluate_solution(
     self, question: str, generated_response: str, true_answer: str
   ) -> EvaluationScore:
     """Uses the injected LLM client to grade a single answer."""
-    user_prompt = textwrap.dedent(f"""
-      ## Question:
-      {question}
-
-      ## True Answer:
-      {true_answer}
-
-      ## Generated Answer:
-      {generated_response}
-    """)
+    user_prompt = [
+      _question_block(question, true_answer),
+      f"## Generated Answer:\n{generated_response}\n",
+    ]
 
     try:
       raw_response, _ = self.client.call_api(user_prompt)
@@ -197,63 +360,196 @@ class LlmEvaluator:
         - "rankings": list of integers where rankings[i] is the rank (1-N) for response i
         - "explanation": string explaining the ranking rationale
     """
-    # Format the list of responses for the prompt
-    response_block = ""
-    for i, resp in enumerate(responses, 1):
-      response_block += f"--- Response {i} ---\n{resp}\n\n"
-
-    user_prompt = textwrap.dedent(f"""
-      ## Unsolved Question:
-      {question}
-
-      ## Generated Responses:
-      {response_block}
-    """)
-
-    # Create JSON schema for structured rankings
-    num_responses = len(responses)
-    response_format = {
-      "type": "json_schema",
-      "json_schema": {
-        "name": "hypothesis_rankings",
-        "strict": True,
-        "schema": {
-          "type": "object",
-          "properties": {
-            "rankings": {
-              "type": "array",
-              "description": f"MUST contain exactly {num_responses} integers. rankings[i] is the rank (1 to {num_responses}) assigned to Response {{i+1}}. Lower rank means better quality. Each rank value must be used exactly once.",
-              "items": {"type": "integer"},
-            },
-            "explanation": {
-              "type": "string",
-              "description": "Brief explanation of the ranking rationale and why each response was ranked as it was.",
-            },
-          },
-          "required": ["rankings", "explanation"],
-          "additionalProperties": False,
-        },
-      },
-    }
+    user_prompt, response_format = _build_ranking_request(question, responses)
 
     try:
-      raw_response, elapsed_time = self.client.call_api(
+      response = self.client.complete(
         user_prompt, response_format=response_format
       )
+      self.served_model_name = response.served_model
+      self.served_backend = response.backend
+      self.last_usage = response.usage
       # Store the full JSON response in reasoning for later parsing
       return EvaluationScore(
         metric_name="llm_hypothesis_ranking",
         score=None,  # No single score for a ranking
-        reasoning=raw_response,  # JSON string
-      ), elapsed_time
+        reasoning=response.text,  # JSON string
+      ), response.elapsed_time
     except (llm.LlmApiError, requests.exceptions.RequestException) as e:
       logging.error("Ranker call failed: %s", e)
-      # Return a JSON string with error info
-      error_json = json.dumps(
-        {"rankings": [0] * num_responses, "explanation": f"Ranking failed: {e}"}
+      return _ranking_failure(len(responses), e), 0.0
+
+  async def rank_hypotheses_async(
+    self, question: str, responses: Sequence[str]
+  ) -> tuple[EvaluationScore, float]:
+    """Async variant of rank_hypotheses for an AsyncLlmClient judge.
+
+    Returns:
+        A tuple of (EvaluationScore, elapsed_time_seconds), as
+        rank_hypotheses.
+    """
+    user_prompt, response_format = _build_ranking_request(question, responses)
+
+    try:
+      response = await self.client.complete(
+        user_prompt, response_format=response_format
       )
+      self.served_model_name = response.served_model
+      self.served_backend = response.backend
+      self.last_usage = response.usage
       return EvaluationScore(
         metric_name="llm_hypothesis_ranking",
         score=None,
-        reasoning=error_json,
-      ), 0.0
+        reasoning=response.text,
+      ), response.elapsed_time
+    except llm.LlmApiError as e:
+      logging.error("Ranker call failed: %s", e)
+      return _ranking_failure(len(responses), e), 0.0
+
+
+def _build_batch_request(
+  question: str, responses: dict[str, str], true_answer: str
+) -> tuple[list[str], dict]:
+  """Builds the prompt and JSON schema for grading all answers at once.
+
+  Args:
+      question: The physics question being evaluated.
+      responses: Dictionary mapping model names to their response texts.
+      true_answer: The correct answer to the question.
+
+  Returns:
+      A tuple of (user_prompt, response_format). The prompt is split into
+      the question block, which every call about the question shares and
+      providers can cache, and the responses being judged.
+  """
+  # Format all responses for the prompt
+  response_block = ""
+  for model_name, response_text in responses.items():
+    response_block += f"## Response from {model_name}:\n{response_text}\n\n"
+
+  user_prompt = [_question_block(question, true_answer), response_block]
+
+  # Create JSON schema for structured output with scores and reasoning
+  model_names = list(responses.keys())
+
+  # Build properties for each model with score and reasoning
+  model_properties = {}
+  for model_name in model_names:
+    model_properties[model_name] = {
+      "type": "object",
+      "properties": {
+        "score": {
+          "type": "integer",
+          "description": f"Score for {model_name} (1-5)",
+        },
+        "reasoning": {
+          "type": "string",
+          "description": f"Brief explanation for the score given to {model_name}",
+        },
+      },
+      "required": ["score", "reasoning"],
+      "additionalProperties": False,
+    }
+
+  response_format = {
+    "type": "json_schema",
+    "json_schema": {
+      "name": "evaluation_scores",
+      "strict": True,
+      "schema": {
+        "type": "object",
+        "properties": {
+          "evaluations": {
+            "type": "object",
+            "properties": model_properties,
+            "required": model_names,
+            "additionalProperties": False,
+          }
+        },
+        "required": ["evaluations"],
+        "additionalProperties": False,
+      },
+    },
+  }
+  return user_prompt, response_format
+
+
+def _question_block(question: str, true_answer: str) -> str:
+  """Returns the question and true answer shared by every judge prompt."""
+  return f"## Question:\n{question}\n\n## True Answer:\n{true_answer}\n\n"
+
+
+def _batch_failure(model_names: list[str], message: str) -> _BatchResult:
+  """Returns a batch result that marks every model as failed."""
+  return (
+    {model_name: (None, message) for model_name in model_names},
+    0.0,
+    None,
+    None,
+    None,
+  )
+
+
+def _build_ranking_request(
+  question: str, responses: Sequence[str]
+) -> tuple[list[str], dict]:
+  """Builds the prompt and JSON schema for ranking hypotheses.
+
+  Args:
+      question: The unsolved question.
+      responses: The hypotheses to rank, in report order.
+
+  Returns:
+      A tuple of (user_prompt, response_format). The prompt is split into
+      the question block, which every call about the question shares and
+      providers can cache, and the responses being judged.
+  """
+  # Format the list of responses for the prompt
+  response_block = ""
+  for i, resp in enumerate(responses, 1):
+    response_block += f"--- Response {i} ---\n{resp}\n\n"
+
+  user_prompt = [
+    f"## Unsolved Question:\n{question}\n\n",
+    f"## Generated Responses:\n{response_block}",
+  ]
+
+  # Create JSON schema for structured rankings
+  num_responses = len(responses)
+  response_format = {
+    "type": "json_schema",
+    "json_schema": {
+      "name": "hypothesis_rankings",
+      "strict": True,
+      "schema": {
+        "type": "object",
+        "properties": {
+          "rankings": {
+            "type": "array",
+            "description": f"MUST contain exactly {num_responses} integers. rankings[i] is the rank (1 to {num_responses}) assigned to Response {{i+1}}. Lower rank means better quality. Each rank value must be used exactly once.",
+            "items": {"type": "integer"},
+          },
+          "explanation": {
+            "type": "string",
+            "description": "Brief explanation of the ranking rationale and why each response was ranked as it was.",
+          },
+        },
+        "required": ["rankings", "explanation"],
+        "additionalProperties": False,
+      },
+    },
+  }
+  return user_prompt, response_format
+
+
+def _ranking_failure(num_responses: int, error: Exception) -> EvaluationScore:
+  """Returns a ranking score whose JSON reasoning records the failure."""
+  # Return a JSON string with error info
+  error_json = json.dumps(
+    {"rankings": [0] * num_responses, "explanation": f"Ranking failed: {error}"}
+  )
+  return EvaluationScore(
+    metric_name="llm_hypothesis_ranking",
+    score=None,
+    reasoning=error_json,
+  )
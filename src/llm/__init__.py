@@ -1,6 +1,55 @@
 """LLM client module for interacting with language models."""
 
-from src.llm.client import LlmApiError, LlmClient
+from src.llm.async_client import AsyncLlmClient
+from src.llm.backends import (
+  OPENROUTER,
+  Backend,
+  configure_backends,
+  get_backend,
+  get_backend_key_pool,
+)
+from src.llm.cache import (
+  CacheMissError,
+  CacheMode,
+  ResponseCache,
+  configure_response_cache,
+  get_response_cache,
+)
+from src.llm.capabilities import (
+  CapabilityCache,
+  ModelCapabilities,
+  UnsupportedRequestError,
+  configure_capabilities,
+  get_capability_cache,
+)
+from src.llm.circuit_breaker import (
+  CircuitBreaker,
+  CircuitOpenError,
+  configure_circuit_breakers,
+  get_circuit_breaker,
+)
+from src.llm.client import BaseLlmClient, LlmClient
+from src.llm.concurrency import (
+  AdaptiveConcurrencyLimiter,
+  configure_concurrency,
+  get_concurrency_limiter,
+  get_concurrency_stats,
+)
+from src.llm.context_window import ContextWindowExceededError
+from src.llm.continuation import (
+  configure_continuations,
+  get_continuation_settings,
+)
+from src.llm.deadline import (
+  Deadline,
+  DeadlineExceededError,
+  bind_deadline,
+  configure_deadlines,
+  deadline_scope,
+  get_deadline_settings,
+  within_deadline,
+)
+from src.llm.errors import LlmApiError
 from src.llm.factory import (
   get_evaluator_models,
   get_ranking_models,
@@ -8,15 +57,163 @@ from src.llm.factory import (
   get_unsolvable_models,
   initialize_models,
 )
-from src.llm.models import Model
+from src.llm.hedging import (
+  ModelHedgePolicy,
+  configure_hedging,
+  get_hedge_policy,
+  get_hedge_stats,
+)
+from src.llm.key_pool import (
+  ApiKey,
+  KeyPool,
+  NoUsableKeyError,
+  get_key_pool,
+  get_key_pool_stats,
+)
+from src.llm.models import LlmResponse, Model, Usage
+from src.llm.prompt_caching import (
+  Prompt,
+  configure_prompt_caching,
+  get_prompt_cache_settings,
+)
+from src.llm.rate_limit import ModelRateLimiter, get_rate_limiter
+from src.llm.retry import (
+  Attempt,
+  ErrorClass,
+  RetryBudget,
+  RetryPolicy,
+  RetryTelemetry,
+  configure_retries,
+  configure_retry_telemetry,
+  get_retry_budget,
+  get_retry_telemetry,
+)
+from src.llm.routing import (
+  ProviderPreferences,
+  configure_routing,
+  get_route_stats,
+  get_routing_settings,
+)
+from src.llm.single_flight import (
+  SingleFlight,
+  configure_single_flight,
+  get_single_flight_stats,
+)
+from src.llm.streaming import StreamCallback, StreamInterruptedError
+from src.llm.token_budgets import (
+  BudgetTuner,
+  TokenBudget,
+  configure_token_budgets,
+  get_budget_tuner,
+  get_token_budget_stats,
+  token_budget,
+)
+from src.llm.tokens import estimate_text_tokens, get_token_estimate_stats
+from src.llm.transport import (
+  close_async_sessions,
+  close_sessions,
+  configure_transport,
+)
+from src.llm.usage import (
+  RunBudget,
+  UsageTracker,
+  configure_run_budget,
+  get_run_budget,
+  get_usage_tracker,
+)
 
 __all__ = [
+  "AsyncLlmClient",
+  "BaseLlmClient",
   "LlmClient",
   "LlmApiError",
+  "LlmResponse",
   "Model",
+  "Usage",
+  "OPENROUTER",
+  "Backend",
+  "configure_backends",
+  "get_backend",
+  "get_backend_key_pool",
+  "CacheMode",
+  "CacheMissError",
+  "ResponseCache",
+  "configure_response_cache",
+  "get_response_cache",
+  "ModelHedgePolicy",
+  "configure_hedging",
+  "get_hedge_policy",
+  "get_hedge_stats",
+  "ModelRateLimiter",
+  "get_rate_limiter",
+  "CircuitBreaker",
+  "CircuitOpenError",
+  "configure_circuit_breakers",
+  "get_circuit_breaker",
+  "AdaptiveConcurrencyLimiter",
+  "configure_concurrency",
+  "get_concurrency_limiter",
+  "get_concurrency_stats",
+  "ApiKey",
+  "KeyPool",
+  "NoUsableKeyError",
+  "get_key_pool",
+  "get_key_pool_stats",
+  "Attempt",
+  "ErrorClass",
+  "RetryBudget",
+  "RetryPolicy",
+  "RetryTelemetry",
+  "configure_retries",
+  "configure_retry_telemetry",
+  "get_retry_budget",
+  "get_retry_telemetry",
+  "ProviderPreferences",
+  "configure_routing",
+  "get_routing_settings",
+  "get_route_stats",
+  "Prompt",
+  "configure_prompt_caching",
+  "get_prompt_cache_settings",
+  "SingleFlight",
+  "configure_single_flight",
+  "get_single_flight_stats",
+  "ContextWindowExceededError",
+  "configure_continuations",
+  "get_continuation_settings",
+  "CapabilityCache",
+  "ModelCapabilities",
+  "UnsupportedRequestError",
+  "configure_capabilities",
+  "get_capability_cache",
+  "get_token_estimate_stats",
+  "estimate_text_tokens",
+  "TokenBudget",
+  "BudgetTuner",
+  "token_budget",
+  "configure_token_budgets",
+  "get_budget_tuner",
+  "get_token_budget_stats",
+  "Deadline",
+  "DeadlineExceededError",
+  "configure_deadlines",
+  "get_deadline_settings",
+  "deadline_scope",
+  "within_deadline",
+  "bind_deadline",
+  "StreamCallback",
+  "StreamInterruptedError",
   "initialize_models",
   "get_solvable_models",
   "get_unsolvable_models",
   "get_evaluator_models",
   "get_ranking_models",
+  "UsageTracker",
+  "RunBudget",
+  "get_usage_tracker",
+  "configure_run_budget",
+  "get_run_budget",
+  "configure_transport",
+  "close_sessions",
+  "close_async_sessions",
 ]
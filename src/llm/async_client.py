@@ -0,0 +1,359 @@
+"""Asyncio-native LLM API client."""
+
+import asyncio
+import dataclasses
+import time
+
+import aiohttp
+from absl import logging
+
+from src.llm import (
+  cache,
+  capabilities,
+  continuation,
+  deadline,
+  hedging,
+  prompt_caching,
+  single_flight,
+  streaming,
+  transport,
+)
+from src.llm.client import BaseLlmClient
+from src.llm.errors import LlmApiError
+from src.llm.models import LlmResponse
+
+
+class AsyncLlmClient(BaseLlmClient):
+  """LLM API client for use on an asyncio event loop.
+
+  Has the same retry and error semantics as LlmClient, but awaits the HTTP
+  request instead of blocking a thread, so hundreds of calls can be in
+  flight on one loop and cancelling the awaiting task aborts the request.
+  """
+
+  async def call_api(
+    self,
+    prompt: prompt_caching.Prompt,
+    response_format: dict | None = None,
+  ) -> tuple[str, float]:
+    """Handles the core logic of calling the LLM API with retries.
+
+    Args:
+        prompt: The user-facing prompt to send to the model.
+        response_format: Optional structured output format specification.
+
+    Returns:
+        A tuple of (response_text, elapsed_time_seconds).
+
+    Raises:
+        LlmApiError: If the API call fails after all retries.
+        asyncio.CancelledError: If the awaiting task is cancelled.
+    """
+    response = await self.complete(prompt, response_format)
+    return response.text, response.elapsed_time
+
+  async def complete(
+    self,
+    prompt: prompt_caching.Prompt,
+    response_format: dict | None = None,
+    on_chunk: streaming.StreamCallback | None = None,
+  ) -> LlmResponse:
+    """Like call_api, but returns the full LlmResponse.
+
+    Checks the request against the model's context window first, lowering
+    max_tokens to fit or failing fast without a round trip. Consults the
+    response cache before calling the API, and shares the result of an
+    identical call that is already in flight. A response cut off at
+    max_tokens is resumed with continuation requests. A request the
+    model rejects for using a feature it lacks (e.g. strict structured
+    outputs) is rebuilt without it, once per lacking feature. If this
+    model fails (including when its circuit is open) and the client has a
+    fallback, the fallback client serves the call instead.
+
+    Args:
+        prompt: The user-facing prompt to send to the model.
+        response_format: Optional structured output format specification.
+        on_chunk: Optional callback receiving text as it streams in. Only
+            called when the client streams and the response is not cached.
+
+    Returns:
+        The LlmResponse for the call.
+
+    Raises:
+        LlmApiError: If the API call fails after all retries.
+    """
+    try:
+      return await self._complete_direct(prompt, response_format, on_chunk)
+    except LlmApiError as e:
+      if self.fallback is None:
+        raise
+      self._log_fallback(e)
+      return await self.fallback.complete(prompt, response_format, on_chunk)
+
+  async def _complete_direct(
+    self,
+    prompt: prompt_caching.Prompt,
+    response_format: dict | None = None,
+    on_chunk: streaming.StreamCallback | None = None,
+  ) -> LlmResponse:
+    """Completes the prompt with this client's own model, without fallback.
+
+    Args:
+        prompt: The user-facing prompt to send to the model.
+        response_format: Optional structured output format specification.
+        on_chunk: Optional callback for streamed text.
+
+    Returns:
+        The LlmResponse for the call.
+
+    Raises:
+        LlmApiError: If the API call fails after all retries.
+    """
+    while True:
+      payload = self._build_fitted_payload(prompt, response_format)
+      try:
+        response = self._lookup_cached(payload)
+        if response is None:
+          response = await single_flight.get_single_flight().do_async(
+            cache.request_key(payload),
+            self.model.value,
+            lambda: self._send_and_store(payload, on_chunk),
+          )
+        break
+      except capabilities.UnsupportedRequestError as e:
+        # The capability cache was downgraded; rebuild the request.
+        logging.info("Adapting the request to %s: %s", self.model.value, e)
+    # Single-flight followers copy the response the leader got, so the
+    # leader stamps and unwraps its own copy instead of the shared one.
+    response = dataclasses.replace(
+      response, served_model=self.model.value, backend=self.backend.name
+    )
+    return self._unwrap_json(payload, response_format, response)
+
+  async def _send_and_store(
+    self, payload: dict, on_chunk: streaming.StreamCallback | None = None
+  ) -> LlmResponse:
+    """Sends a request that missed the cache and caches its response."""
+    response = await self._send_hedged(payload, on_chunk)
+    response = await self._continue_truncated(payload, response, on_chunk)
+    self._store_cached(payload, response)
+    return response
+
+  async def _continue_truncated(
+    self,
+    payload: dict,
+    response: LlmResponse,
+    on_chunk: streaming.StreamCallback | None = None,
+  ) -> LlmResponse:
+    """Async variant of LlmClient._continue_truncated."""
+    while True:
+      request = self._continuation_request(payload, response)
+      if request is None:
+        return response
+      try:
+        part = await self._send(request, on_chunk)
+      except LlmApiError as e:
+        logging.warning("Continuing %s failed: %s", self.model.value, e)
+        return response
+      response = continuation.merge(
+        response, part, structured="response_format" in payload
+      )
+
+  async def _send_hedged(
+    self, payload: dict, on_chunk: streaming.StreamCallback | None = None
+  ) -> LlmResponse:
+    """Sends a request, duplicating it if it runs past the hedge delay.
+
+    Like LlmClient._send_hedged, except that the losing attempt is
+    cancelled, which aborts its HTTP request.
+
+    Args:
+        payload: The request body.
+        on_chunk: Optional callback for streamed text, fed by the primary
+            attempt only.
+
+    Returns:
+        The winning LlmResponse. Its elapsed_time is measured from the
+        start of the primary attempt.
+
+    Raises:
+        LlmApiError: If every attempt fails.
+    """
+    policy = hedging.get_hedge_policy(self.model, self.role)
+    hedge_delay = policy.hedge_delay()
+    if hedge_delay is None:
+      return await self._send(payload, on_chunk)
+
+    start_time = time.time()
+    primary = asyncio.create_task(self._send(payload, on_chunk))
+    attempts = {primary: hedging.PRIMARY}
+    try:
+      done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+      if done or not policy.try_hedge():
+        return await primary
+
+      logging.info(
+        "Hedging %s after %.2fs without a response",
+        self.model.value,
+        hedge_delay,
+      )
+      hedge = asyncio.create_task(self._send(policy.hedge_payload(payload)))
+      attempts[hedge] = hedging.HEDGE
+      pending = set(attempts)
+      error = None
+      while pending:
+        done, pending = await asyncio.wait(
+          pending, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+          if task.exception() is not None:
+            error = task.exception()
+            continue
+          response = task.result()
+          response.winning_attempt = attempts[task]
+          response.elapsed_time = time.time() - start_time
+          policy.record_winner(response.winning_attempt)
+          logging.info(
+            "Hedged call to %s won by the %s attempt",
+            self.model.value,
+            response.winning_attempt,
+          )
+          return response
+      raise error
+    finally:
+      # Cancels the losing attempt, or both if we are cancelled ourselves.
+      for task in attempts:
+        task.cancel()
+
+  async def _send(
+    self, payload: dict, on_chunk: streaming.StreamCallback | None = None
+  ) -> LlmResponse:
+    """Sends a request to the API, retrying transient failures.
+
+    Args:
+        payload: The request body.
+        on_chunk: Optional callback for streamed text.
+
+    Returns:
+        The LlmResponse for the first successful attempt.
+
+    Raises:
+        LlmApiError: If the API call fails after all retries.
+    """
+    api_url = self.backend.chat_completions_url
+    session = transport.get_async_session(api_url)
+    settings = transport.get_transport_settings()
+    call = self._start_call(payload)
+
+    while call.attempt < self.max_retries:
+      self._check_circuit(call)
+
+      with self.key_pool.use(self.model) as key:
+        limiter, delay = self._reserve_rate_limit(call, key)
+        if delay > 0:
+          await asyncio.sleep(delay)
+
+        # The total bound also cuts off streams that run past the deadline.
+        timeout = transport.get_async_timeout(
+          streaming=self.stream,
+          read_timeout=self._attempt_read_timeout(settings),
+          total=deadline.remaining_time(),
+        )
+
+        attempt_start = time.time()
+        async with call.gate.slot_async(self.role) as slot:
+          try:
+            async with session.post(
+              api_url,
+              headers=self._request_headers(key),
+              json=self._attempt_body(payload),
+              timeout=timeout,
+            ) as response:
+              limiter.update_from_headers(response.status, response.headers)
+              if response.ok:
+                if self.stream:
+                  llm_response, usage = await _read_stream(
+                    response, call.start_time, on_chunk
+                  )
+                else:
+                  llm_response, usage = self._parse_completion(
+                    await response.json(content_type=None), call.start_time
+                  )
+                self._record_success(
+                  call,
+                  key,
+                  limiter,
+                  slot,
+                  llm_response,
+                  usage,
+                  response.status,
+                  attempt_start,
+                )
+                return llm_response
+              failure = self._record_error_response(
+                call,
+                key,
+                limiter,
+                slot,
+                response.status,
+                await response.text(),
+                response.headers,
+                attempt_start,
+              )
+              if failure is None:
+                # The key is unusable; repeat the attempt with another one.
+                continue
+
+          except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            streaming.StreamInterruptedError,
+          ) as e:
+            failure = self._record_transport_error(
+              call,
+              limiter,
+              slot,
+              e,
+              timed_out=isinstance(e, asyncio.TimeoutError),
+            )
+
+      # The response and the concurrency slot are released before sleeping
+      # so other requests can use them while we back off.
+      backoff_time = self._next_backoff(call, failure, attempt_start)
+      if backoff_time is None:
+        break
+      await asyncio.sleep(backoff_time)
+
+    raise self._retries_exhausted(call)
+
+
+async def _read_stream(
+  response: aiohttp.ClientResponse,
+  start_time: float,
+  on_chunk: streaming.StreamCallback | None,
+) -> tuple[LlmResponse, dict]:
+  """Reads a streamed completion from an aiohttp response.
+
+  Args:
+      response: A successful streamed response.
+      start_time: time.time() when the call started.
+      on_chunk: Optional callback for streamed text.
+
+  Returns:
+      A tuple of (llm_response, usage_dict).
+
+  Raises:
+      aiohttp.ClientError: If the connection fails.
+      asyncio.TimeoutError: If the stream goes idle for too long.
+      StreamInterruptedError: If the stream errors or ends early.
+  """
+  accumulator = streaming.StreamAccumulator(start_time, on_chunk)
+  try:
+    async for line in response.content:
+      accumulator.feed_line(line.decode("utf-8"))
+      if accumulator.done:
+        break
+    return accumulator.to_response(), accumulator.usage or {}
+  except Exception:
+    accumulator.notify_restart()
+    raise
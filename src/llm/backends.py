@@ -0,0 +1,192 @@
+"""OpenAI-compatible inference backends: OpenRouter, providers, local servers."""
+
+import dataclasses
+import os
+import threading
+
+import dotenv
+
+from src.llm import key_pool, prompt_caching, transport
+from src.llm.models import Model
+
+# Request dialects. "openrouter" adds OpenRouter's extensions to the OpenAI
+# schema; "openai" is the plain schema every compatible server accepts.
+OPENROUTER_DIALECT = "openrouter"
+OPENAI_DIALECT = "openai"
+DIALECTS = (OPENROUTER_DIALECT, OPENAI_DIALECT)
+# Name of the default backend every unmapped model and role goes through.
+OPENROUTER = "openrouter"
+# Placeholder key for backends without auth. Local servers ignore it.
+_NO_AUTH_KEY = "EMPTY"
+
+
+@dataclasses.dataclass(frozen=True)
+class Backend:
+  """An OpenAI-compatible chat completions API.
+
+  Attributes:
+      name: The backend's name, recorded with the responses it serves.
+      base_url: Root of the API, or None for the transport's base URL
+          (--llm_base_url).
+      dialect: "openrouter" or "openai".
+      api_key_env: Environment variable with the backend's comma-separated
+          API keys, or None to send no key (OpenRouter uses its key pool).
+      model: Model name every call is served as, for single-model servers.
+      models: Model ids mapped to the names the backend knows them by.
+  """
+
+  name: str
+  base_url: str | None = None
+  dialect: str = OPENROUTER_DIALECT
+  api_key_env: str | None = None
+  model: str | None = None
+  models: dict[str, str] = dataclasses.field(default_factory=dict)
+
+  @classmethod
+  def from_config(cls, name: str, entry: dict) -> "Backend":
+    """Builds a backend from a config.LLM_BACKENDS entry.
+
+    Raises:
+        ValueError: If the entry names an unknown dialect.
+    """
+    dialect = entry.get("dialect", OPENAI_DIALECT)
+    if dialect not in DIALECTS:
+      raise ValueError(f"Unknown dialect for backend {name}: {dialect}")
+    return cls(
+      name=name,
+      base_url=entry["base_url"].rstrip("/"),
+      dialect=dialect,
+      api_key_env=entry.get("api_key_env"),
+      model=entry.get("model"),
+      models=dict(entry.get("models", {})),
+    )
+
+  @property
+  def is_openrouter(self) -> bool:
+    """Whether requests carry OpenRouter's extensions."""
+    return self.dialect == OPENROUTER_DIALECT
+
+  @property
+  def api_url(self) -> str:
+    """Returns the root of the API, defaulting to the transport's."""
+    return self.base_url or transport.get_transport_settings().base_url
+
+  @property
+  def chat_completions_url(self) -> str:
+    """Returns the URL chat completion requests are sent to."""
+    return f"{self.api_url}/chat/completions"
+
+  def model_name(self, model: Model) -> str:
+    """Returns the name the backend serves `model` as."""
+    return self.models.get(model.value, self.model or model.value)
+
+  def adapt_payload(self, model: Model, payload: dict) -> dict:
+    """Returns an OpenRouter-style request body in the backend's dialect.
+
+    The model is renamed for the backend. For the "openai" dialect,
+    OpenRouter's usage and provider fields are dropped, a reasoning effort
+    becomes `reasoning_effort` (reasoning token caps have no equivalent),
+    prompt-cache breakpoints are flattened into plain text, and streams
+    ask for a final usage chunk.
+
+    Args:
+        model: The model called.
+        payload: The request body. It is not modified.
+    """
+    adapted = {**payload, "model": self.model_name(model)}
+    if self.is_openrouter:
+      return adapted
+
+    adapted.pop("usage", None)
+    adapted.pop("provider", None)
+    reasoning = adapted.pop("reasoning", None) or {}
+    if "effort" in reasoning:
+      adapted["reasoning_effort"] = reasoning["effort"]
+    adapted["messages"] = [
+      {**message, "content": prompt_caching.message_text(message)}
+      for message in payload["messages"]
+    ]
+    if adapted.get("stream"):
+      adapted["stream_options"] = {"include_usage": True}
+    return adapted
+
+
+_backends: dict[str, Backend] = {OPENROUTER: Backend(name=OPENROUTER)}
+_model_backends: dict[str, str] = {}
+_role_backends: dict[str, str] = {}
+_key_pools: dict[str, key_pool.KeyPool] = {}
+_lock = threading.Lock()
+
+
+def configure_backends(
+  backends: dict[str, dict],
+  model_backends: dict[str, str] | None = None,
+  role_backends: dict[str, str] | None = None,
+) -> dict[str, Backend]:
+  """Sets the backends and which models and roles they serve.
+
+  Must be called before clients are created: each client binds its
+  backend when built.
+
+  Args:
+      backends: config.LLM_BACKENDS-style entries, keyed by name. The
+          OpenRouter backend is always available.
+      model_backends: Backend name per model id.
+      role_backends: Backend name per client role, taking precedence.
+
+  Returns:
+      The backends now available, keyed by name.
+
+  Raises:
+      ValueError: If a mapping names an unknown backend.
+  """
+  global _backends, _model_backends, _role_backends
+
+  configured = {OPENROUTER: Backend(name=OPENROUTER)}
+  for name, entry in backends.items():
+    configured[name] = Backend.from_config(name, entry)
+  model_backends = dict(model_backends or {})
+  role_backends = dict(role_backends or {})
+  for name in (*model_backends.values(), *role_backends.values()):
+    if name not in configured:
+      raise ValueError(f"Unknown backend: {name}")
+  with _lock:
+    _backends = configured
+    _model_backends = model_backends
+    _role_backends = role_backends
+    _key_pools.clear()
+  return dict(configured)
+
+
+def get_backend(model: Model, role: str | None = None) -> Backend:
+  """Returns the backend serving `model` in `role`."""
+  with _lock:
+    name = _role_backends.get(role or "") or _model_backends.get(
+      model.value, OPENROUTER
+    )
+    return _backends[name]
+
+
+def get_backend_key_pool(backend: Backend) -> key_pool.KeyPool:
+  """Returns the process-wide pool of the keys of `backend`.
+
+  OpenRouter uses the OPENROUTER_API_KEYS pool. Other backends read their
+  api_key_env variable from the environment or .env file, and backends
+  without one get a placeholder key, as local servers expect none.
+  """
+  if backend.name == OPENROUTER:
+    return key_pool.get_key_pool()
+  with _lock:
+    pool = _key_pools.get(backend.name)
+    if pool is None:
+      keys = [_NO_AUTH_KEY]
+      if backend.api_key_env is not None:
+        dotenv.load_dotenv()
+        keys = [
+          key.strip()
+          for key in os.getenv(backend.api_key_env, "").split(",")
+          if key.strip()
+        ]
+      pool = key_pool.KeyPool(keys)
+      _key_pools[backend.name] = pool
+    return pool
@@ -0,0 +1,303 @@
+"""Persistent content-addressed cache of LLM responses."""
+
+import enum
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from absl import logging
+
+from src.llm.errors import LlmApiError
+
+# Request fields that change what the model generates. Transport-only
+# fields (e.g. streaming) are left out so they do not split the cache.
+_KEY_FIELDS = (
+  "model",
+  "messages",
+  "response_format",
+  "max_tokens",
+  "temperature",
+  "top_p",
+  "top_k",
+  "frequency_penalty",
+  "presence_penalty",
+  "repetition_penalty",
+  "seed",
+  "stop",
+  "reasoning",
+)
+
+
+class CacheMode(str, enum.Enum):
+  """How LLM clients use the response cache."""
+
+  OFF = "off"  # Never read or write the cache
+  READ_THROUGH = "read_through"  # Serve hits, call the API and store misses
+  WRITE_ONLY = "write_only"  # Always call the API, store every response
+  REPLAY_ONLY = "replay_only"  # Serve hits, fail on a miss without calling
+
+
+class CacheMissError(LlmApiError):
+  """Raised in replay-only mode when a request is not in the cache."""
+
+
+def request_key(payload: dict) -> str:
+  """Returns the content address of a chat completion request.
+
+  Args:
+      payload: The request body sent to the API.
+
+  Returns:
+      A hex SHA-256 digest of the fields that determine the response.
+  """
+  keyed = {field: payload[field] for field in _KEY_FIELDS if field in payload}
+  canonical = json.dumps(keyed, sort_keys=True, separators=(",", ":"))
+  return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+  """SQLite-backed response cache with size and age based LRU eviction.
+
+  Safe to share across threads. Each entry stores the response text and the
+  latency of the original API call, so cache hits can report the original
+  generation time instead of the (much shorter) lookup time.
+
+  Attributes:
+      path: Path of the SQLite database file.
+      mode: How clients should use the cache.
+      max_bytes: Total size of stored responses above which the least
+          recently used entries are evicted. None disables size eviction.
+      max_age_seconds: Age after which entries are evicted. None disables
+          age eviction.
+      hits: Number of successful lookups.
+      misses: Number of lookups that found nothing.
+      writes: Number of responses stored.
+      evictions: Number of entries evicted.
+  """
+
+  def __init__(
+    self,
+    path: str,
+    mode: CacheMode = CacheMode.READ_THROUGH,
+    max_bytes: int | None = None,
+    max_age_seconds: float | None = None,
+  ):
+    """Opens (or creates) the cache database.
+
+    Args:
+        path: Path of the SQLite database file.
+        mode: How clients should use the cache.
+        max_bytes: Size limit for stored responses, in bytes.
+        max_age_seconds: Maximum age of an entry, in seconds.
+    """
+    self.path = path
+    self.mode = CacheMode(mode)
+    self.max_bytes = max_bytes
+    self.max_age_seconds = max_age_seconds
+    self.hits = 0
+    self.misses = 0
+    self.writes = 0
+    self.evictions = 0
+
+    directory = os.path.dirname(path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+
+    self._lock = threading.Lock()
+    self._conn = sqlite3.connect(path, check_same_thread=False)
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute(
+      """
+      CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        response_text TEXT NOT NULL,
+        latency REAL NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        last_access REAL NOT NULL
+      )
+      """
+    )
+    self._conn.execute(
+      "CREATE INDEX IF NOT EXISTS responses_last_access "
+      "ON responses (last_access)"
+    )
+    self._conn.commit()
+    self.evict()
+
+  @property
+  def reads_enabled(self) -> bool:
+    """Whether clients should look requests up before calling the API."""
+    return self.mode in (CacheMode.READ_THROUGH, CacheMode.REPLAY_ONLY)
+
+  @property
+  def writes_enabled(self) -> bool:
+    """Whether clients should store fresh API responses."""
+    return self.mode in (CacheMode.READ_THROUGH, CacheMode.WRITE_ONLY)
+
+  def get(self, key: str) -> tuple[str, float] | None:
+    """Looks up a response and marks it as recently used.
+
+    Args:
+        key: The request key from `request_key`.
+
+    Returns:
+        A tuple of (response_text, original_latency_seconds), or None if the
+        key is missing or expired.
+    """
+    now = time.time()
+    with self._lock:
+      row = self._conn.execute(
+        "SELECT response_text, latency, created_at FROM responses "
+        "WHERE key = ?",
+        (key,),
+      ).fetchone()
+      if row is not None and self._is_expired(row[2], now):
+        row = None
+      if row is None:
+        self.misses += 1
+        return None
+
+      self._conn.execute(
+        "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+      )
+      self._conn.commit()
+      self.hits += 1
+      return row[0], row[1]
+
+  def put(self, key: str, model: str, response_text: str, latency: float):
+    """Stores a response, then evicts entries beyond the size/age limits.
+
+    Args:
+        key: The request key from `request_key`.
+        model: The model that produced the response.
+        response_text: The response content.
+        latency: Seconds the original API call took.
+    """
+    now = time.time()
+    with self._lock:
+      self._conn.execute(
+        "INSERT OR REPLACE INTO responses "
+        "(key, model, response_text, latency, size, created_at, last_access) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+          key,
+          model,
+          response_text,
+          latency,
+          len(response_text.encode("utf-8")),
+          now,
+          now,
+        ),
+      )
+      self._conn.commit()
+      self.writes += 1
+    self.evict()
+
+  def evict(self) -> int:
+    """Deletes expired entries, then least recently used ones over max_bytes.
+
+    Returns:
+        The number of entries deleted.
+    """
+    deleted = 0
+    with self._lock:
+      if self.max_age_seconds is not None:
+        cursor = self._conn.execute(
+          "DELETE FROM responses WHERE created_at < ?",
+          (time.time() - self.max_age_seconds,),
+        )
+        deleted += cursor.rowcount
+
+      if self.max_bytes is not None:
+        (total,) = self._conn.execute(
+          "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total > self.max_bytes:
+          excess = total - self.max_bytes
+          freed = 0
+          victims = []
+          for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+          ):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+              break
+          self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+          deleted += len(victims)
+
+      self._conn.commit()
+      self.evictions += deleted
+
+    if deleted:
+      logging.info("Evicted %d LLM cache entries from %s", deleted, self.path)
+    return deleted
+
+  def stats(self) -> dict[str, int]:
+    """Returns the hit/miss/write/eviction counters and current entry count."""
+    with self._lock:
+      (entries,) = self._conn.execute(
+        "SELECT COUNT(*) FROM responses"
+      ).fetchone()
+      return {
+        "hits": self.hits,
+        "misses": self.misses,
+        "writes": self.writes,
+        "evictions": self.evictions,
+        "entries": entries,
+      }
+
+  def close(self) -> None:
+    """Closes the database connection."""
+    with self._lock:
+      self._conn.close()
+
+  def _is_expired(self, created_at: float, now: float) -> bool:
+    """Returns whether an entry created at `created_at` is past max age."""
+    return (
+      self.max_age_seconds is not None
+      and now - created_at > self.max_age_seconds
+    )
+
+
+_response_cache: ResponseCache | None = None
+
+
+def configure_response_cache(
+  path: str,
+  mode: CacheMode | str,
+  max_bytes: int | None = None,
+  max_age_seconds: float | None = None,
+) -> ResponseCache | None:
+  """Sets up the process-wide response cache used by every LLM client.
+
+  Args:
+      path: Path of the SQLite database file.
+      mode: How clients should use the cache. CacheMode.OFF disables it.
+      max_bytes: Size limit for stored responses, in bytes.
+      max_age_seconds: Maximum age of an entry, in seconds.
+
+  Returns:
+      The configured cache, or None if caching is off.
+  """
+  global _response_cache
+
+  if _response_cache is not None:
+    _response_cache.close()
+    _response_cache = None
+
+  mode = CacheMode(mode)
+  if mode != CacheMode.OFF:
+    _response_cache = ResponseCache(path, mode, max_bytes, max_age_seconds)
+    logging.info("LLM response cache enabled: %s (%s)", path, mode.value)
+  return _response_cache
+
+
+def get_response_cache() -> ResponseCache | None:
+  """Returns the process-wide response cache, or None if caching is off."""
+  return _response_cache
@@ -0,0 +1,326 @@
+"""Per-model capability cache that adapts requests to what models support."""
+
+import dataclasses
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+from absl import logging
+
+from src import config
+from src.llm import transport
+from src.llm.errors import LlmApiError
+from src.llm.models import Model
+
+# Error messages of a 400 that mean the request used a feature the model
+# or its provider route does not support.
+_STRICT_UNSUPPORTED = re.compile(r"\bstrict\b", re.IGNORECASE)
+_SCHEMA_UNSUPPORTED = re.compile(
+  r"json_schema|structured.output|response.format", re.IGNORECASE
+)
+_JSON_OBJECT_UNSUPPORTED = re.compile(
+  r"json_object|response.format", re.IGNORECASE
+)
+_SYSTEM_ROLE_UNSUPPORTED = re.compile(
+  r"system (role|message|prompt|instruction)", re.IGNORECASE
+)
+_BAD_REQUEST_STATUS = 400
+
+_JSON_INSTRUCTION = (
+  "\n\nRespond with only a JSON object, without code fences or any other "
+  "text, that matches this JSON schema:\n{schema}\n"
+)
+
+
+class UnsupportedRequestError(LlmApiError):
+  """Raised when a request used a feature the model turned out to lack.
+
+  The model's capabilities have been downgraded by the time it is raised,
+  so rebuilding the request gives one the model accepts.
+  """
+
+
+@dataclasses.dataclass
+class ModelCapabilities:
+  """What one model supports, as far as requests are concerned.
+
+  Attributes:
+      structured_outputs: Whether `json_schema` response formats work.
+      strict_schema: Whether strict mode works with them.
+      json_object: Whether the `json_object` response format works.
+      system_role: Whether system messages are accepted.
+      context_length: Context window in tokens, if known.
+      checked_at: time.time() when the entry was last probed or updated.
+      source: "default", "probe", or "error" if an error response taught
+          us a limitation.
+  """
+
+  structured_outputs: bool = True
+  strict_schema: bool = True
+  json_object: bool = True
+  system_role: bool = True
+  context_length: int | None = None
+  checked_at: float = 0.0
+  source: str = "default"
+
+
+class CapabilityCache:
+  """Capabilities of every model, persisted across runs in a JSON file.
+
+  Entries come from OpenRouter's model list, and are downgraded whenever a
+  request fails for using an unsupported feature, so no incompatible
+  request shape is sent twice, in this run or later ones.
+
+  Safe to share across threads.
+
+  Attributes:
+      path: The JSON file, or None to keep the cache in memory only.
+      max_age: Seconds after which probed entries are refreshed.
+  """
+
+  def __init__(
+    self,
+    path: str | None = None,
+    max_age: float = config.MODEL_CAPABILITIES_MAX_AGE_DAYS * 24 * 60 * 60,
+  ):
+    """Loads the cache file, if it exists.
+
+    Args:
+        path: The JSON file, or None to keep the cache in memory only.
+        max_age: Seconds after which probed entries are refreshed.
+    """
+    self.path = path
+    self.max_age = max_age
+    self._entries: dict[str, ModelCapabilities] = {}
+    self._lock = threading.Lock()
+    if path is not None and os.path.exists(path):
+      self._load()
+
+  def get(self, model: Model) -> ModelCapabilities:
+    """Returns the capabilities of `model`, permissive if unknown."""
+    with self._lock:
+      return dataclasses.replace(
+        self._entries.get(model.value, ModelCapabilities())
+      )
+
+  def stale(self, models: list[Model]) -> bool:
+    """Whether any of `models` has no probed entry younger than max_age."""
+    now = time.time()
+    with self._lock:
+      return any(
+        model.value not in self._entries
+        or now - self._entries[model.value].checked_at > self.max_age
+        for model in models
+      )
+
+  def probe(self, base_url: str, models: list[Model]) -> None:
+    """Refreshes the entries of `models` from OpenRouter's model list.
+
+    Best effort: APIs without a `GET /models` endpoint leave the cache as
+    it is. Limitations learned from errors are kept.
+
+    Args:
+        base_url: Root of the OpenRouter-compatible API.
+        models: The models to refresh.
+    """
+    url = f"{base_url}/models"
+    settings = transport.get_transport_settings()
+    try:
+      response = transport.get_session(url).get(
+        url, timeout=(settings.connect_timeout, settings.read_timeout)
+      )
+      response.raise_for_status()
+      listed = {entry["id"]: entry for entry in response.json()["data"]}
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+      logging.info("Could not probe model capabilities: %s", e)
+      return
+
+    now = time.time()
+    with self._lock:
+      for model in models:
+        entry = listed.get(model.value)
+        if entry is None:
+          continue
+        parameters = set(entry.get("supported_parameters") or ())
+        structured = "structured_outputs" in parameters
+        probed = ModelCapabilities(
+          structured_outputs=structured,
+          strict_schema=structured,
+          json_object="response_format" in parameters,
+          context_length=entry.get("context_length"),
+          checked_at=now,
+          source="probe",
+        )
+        learned = self._entries.get(model.value)
+        if learned is not None and learned.source == "error":
+          probed = dataclasses.replace(
+            probed,
+            structured_outputs=structured and learned.structured_outputs,
+            strict_schema=structured and learned.strict_schema,
+            json_object=probed.json_object and learned.json_object,
+            system_role=learned.system_role,
+            source="error",
+          )
+        self._entries[model.value] = probed
+      self._save()
+
+  def learn_from_error(
+    self, model: Model, status: int, message: str, payload: dict
+  ) -> bool:
+    """Downgrades `model` if an error shows the request used a lacking feature.
+
+    Args:
+        model: The model called.
+        status: The HTTP status of the response.
+        message: The parsed error message.
+        payload: The request that failed.
+
+    Returns:
+        True if a capability was downgraded, so a rebuilt request would
+        differ.
+    """
+    if status != _BAD_REQUEST_STATUS:
+      return False
+    response_format = payload.get("response_format") or {}
+    changes = {}
+    if response_format.get("type") == "json_schema":
+      strict = response_format.get("json_schema", {}).get("strict")
+      if strict and _STRICT_UNSUPPORTED.search(message):
+        changes["strict_schema"] = False
+      elif _SCHEMA_UNSUPPORTED.search(message):
+        changes["structured_outputs"] = False
+    elif response_format.get("type") == "json_object":
+      if _JSON_OBJECT_UNSUPPORTED.search(message):
+        changes["json_object"] = False
+    has_system = any(
+      message_.get("role") == "system" for message_ in payload["messages"]
+    )
+    if has_system and _SYSTEM_ROLE_UNSUPPORTED.search(message):
+      changes["system_role"] = False
+    if not changes:
+      return False
+
+    with self._lock:
+      entry = self._entries.get(model.value, ModelCapabilities())
+      self._entries[model.value] = dataclasses.replace(
+        entry, **changes, checked_at=time.time(), source="error"
+      )
+      self._save()
+    logging.warning(
+      "%s does not support %s; adapting its requests",
+      model.value,
+      ", ".join(changes),
+    )
+    return True
+
+  def stats(self) -> dict[str, dict[str, object]]:
+    """Returns the capabilities of every known model, keyed by model id."""
+    with self._lock:
+      return {
+        model_name: dataclasses.asdict(entry)
+        for model_name, entry in sorted(self._entries.items())
+      }
+
+  def _load(self) -> None:
+    """Reads the cache file. A corrupt file is ignored."""
+    try:
+      with open(self.path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+      self._entries = {
+        model_name: ModelCapabilities(**entry)
+        for model_name, entry in data.items()
+      }
+    except (OSError, ValueError, TypeError) as e:
+      logging.warning("Ignoring unreadable %s: %s", self.path, e)
+
+  def _save(self) -> None:
+    """Writes the cache file atomically. Must be called with the lock held."""
+    if self.path is None:
+      return
+    directory = os.path.dirname(self.path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+      "w", dir=directory, delete=False, encoding="utf-8"
+    ) as f:
+      json.dump(
+        {
+          model_name: dataclasses.asdict(entry)
+          for model_name, entry in self._entries.items()
+        },
+        f,
+        indent=2,
+        sort_keys=True,
+      )
+    os.replace(f.name, self.path)
+
+
+def adapt_response_format(
+  capabilities: ModelCapabilities, response_format: dict | None
+) -> tuple[dict | None, str]:
+  """Returns the response format a model supports, and any prompt suffix.
+
+  A strict `json_schema` is relaxed to non-strict, then replaced by
+  `json_object`, then by no response format at all. Without a schema the
+  prompt asks for JSON matching it instead.
+
+  Args:
+      capabilities: The model's capabilities.
+      response_format: The response format the caller asked for.
+
+  Returns:
+      A tuple of (response_format, prompt_suffix). The suffix is empty
+      when the schema is enforced by the API.
+  """
+  if not response_format or response_format.get("type") != "json_schema":
+    return response_format, ""
+  json_schema = response_format["json_schema"]
+  if capabilities.structured_outputs:
+    if json_schema.get("strict") and not capabilities.strict_schema:
+      json_schema = {**json_schema, "strict": False}
+      return {**response_format, "json_schema": json_schema}, ""
+    return response_format, ""
+
+  suffix = _JSON_INSTRUCTION.format(schema=json.dumps(json_schema["schema"]))
+  if capabilities.json_object:
+    return {"type": "json_object"}, suffix
+  return None, suffix
+
+
+def extract_json(text: str) -> str:
+  """Returns the JSON object in a response not bound to a schema.
+
+  Strips code fences and any text around the outermost braces. Text
+  without braces is returned unchanged.
+  """
+  start = text.find("{")
+  end = text.rfind("}")
+  if start == -1 or end < start:
+    return text
+  return text[start : end + 1]
+
+
+_cache = CapabilityCache()
+
+
+def configure_capabilities(path: str | None) -> CapabilityCache:
+  """Loads the process-wide capability cache from `path`.
+
+  Args:
+      path: The JSON file, or None to keep the cache in memory only.
+
+  Returns:
+      The capability cache now in effect.
+  """
+  global _cache
+
+  _cache = CapabilityCache(path)
+  return _cache
+
+
+def get_capability_cache() -> CapabilityCache:
+  """Returns the process-wide capability cache."""
+  return _cache
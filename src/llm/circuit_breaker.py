@@ -0,0 +1,176 @@
+"""Per-model circuit breakers that fail fast while a provider is down."""
+
+import dataclasses
+import enum
+import threading
+import time
+
+from absl import logging
+
+from src import config
+from src.llm.errors import LlmApiError
+from src.llm.models import Model
+
+
+class CircuitOpenError(LlmApiError):
+  """Raised instead of calling a model whose circuit is open."""
+
+
+class CircuitState(str, enum.Enum):
+  """State of a circuit breaker."""
+
+  CLOSED = "closed"  # Requests flow normally
+  OPEN = "open"  # Requests fail fast until the recovery timeout passes
+  HALF_OPEN = "half_open"  # One probe request decides whether to close
+
+
+@dataclasses.dataclass(frozen=True)
+class CircuitBreakerSettings:
+  """Settings shared by every per-model circuit breaker.
+
+  Attributes:
+      failure_threshold: Consecutive failed attempts that open the circuit.
+          Zero disables the breakers.
+      recovery_timeout: Seconds the circuit stays open before a probe.
+  """
+
+  failure_threshold: int = config.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+  recovery_timeout: float = config.CIRCUIT_BREAKER_RECOVERY_TIMEOUT
+
+
+class CircuitBreaker:
+  """Tracks consecutive failures of one model across all client roles.
+
+  Every request attempt asks `allow_request` first and reports back with
+  `record_success` or `record_failure`. After `failure_threshold` failures
+  in a row the circuit opens and attempts fail immediately. Once
+  `recovery_timeout` has passed, a single probe attempt is let through; its
+  result closes the circuit again or re-opens it.
+
+  Attributes:
+      model: The model this breaker guards.
+      settings: The threshold and recovery timeout.
+  """
+
+  def __init__(self, model: Model, settings: CircuitBreakerSettings):
+    """Initializes a closed breaker.
+
+    Args:
+        model: The model this breaker guards.
+        settings: The threshold and recovery timeout.
+    """
+    self.model = model
+    self.settings = settings
+    self._state = CircuitState.CLOSED
+    self._failures = 0
+    self._opened_at = 0.0  # time.monotonic() value
+    self._probe_started = 0.0  # time.monotonic() value
+    self._lock = threading.Lock()
+
+  @property
+  def state(self) -> CircuitState:
+    """The current state of the circuit."""
+    return self._state
+
+  def allow_request(self) -> bool:
+    """Returns whether an attempt may be sent to the model now."""
+    if self.settings.failure_threshold <= 0:
+      return True
+    with self._lock:
+      now = time.monotonic()
+      if self._state is CircuitState.CLOSED:
+        return True
+      if self._state is CircuitState.OPEN:
+        if now - self._opened_at < self.settings.recovery_timeout:
+          return False
+        self._state = CircuitState.HALF_OPEN
+        self._probe_started = now
+        logging.info("Circuit for %s half-open, probing", self.model.value)
+        return True
+      # Half-open: one probe at a time. A probe that never reported back
+      # (e.g. its task was cancelled) is replaced after the timeout.
+      if now - self._probe_started < self.settings.recovery_timeout:
+        return False
+      self._probe_started = now
+      return True
+
+  def record_success(self) -> None:
+    """Resets the failure count and closes the circuit."""
+    with self._lock:
+      if self._state is not CircuitState.CLOSED:
+        logging.info("Circuit for %s closed", self.model.value)
+      self._state = CircuitState.CLOSED
+      self._failures = 0
+
+  def record_failure(self) -> None:
+    """Counts a failed attempt, opening the circuit at the threshold."""
+    if self.settings.failure_threshold <= 0:
+      return
+    with self._lock:
+      self._failures += 1
+      if self._state is CircuitState.HALF_OPEN or (
+        self._state is CircuitState.CLOSED
+        and self._failures >= self.settings.failure_threshold
+      ):
+        self._state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+        logging.warning(
+          "Circuit for %s opened after %d consecutive failures, failing fast "
+          "for %.0fs",
+          self.model.value,
+          self._failures,
+          self.settings.recovery_timeout,
+        )
+
+
+_settings = CircuitBreakerSettings()
+_breakers: dict[Model, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def configure_circuit_breakers(
+  failure_threshold: int | None = None,
+  recovery_timeout: float | None = None,
+) -> CircuitBreakerSettings:
+  """Updates the settings used by per-model circuit breakers.
+
+  Existing breakers are discarded. Should be called once at startup,
+  before any client is used.
+
+  Args:
+      failure_threshold: Consecutive failures that open a circuit, or zero
+          to disable the breakers.
+      recovery_timeout: Seconds a circuit stays open before a probe.
+
+  Returns:
+      The settings now in effect.
+  """
+  global _settings
+
+  changes = {}
+  if failure_threshold is not None:
+    changes["failure_threshold"] = failure_threshold
+  if recovery_timeout is not None:
+    changes["recovery_timeout"] = recovery_timeout
+
+  with _breakers_lock:
+    _settings = dataclasses.replace(_settings, **changes)
+    _breakers.clear()
+  return _settings
+
+
+def get_circuit_breaker(model: Model) -> CircuitBreaker:
+  """Returns the process-wide circuit breaker for `model`.
+
+  Args:
+      model: The model to guard.
+
+  Returns:
+      The shared CircuitBreaker.
+  """
+  with _breakers_lock:
+    breaker = _breakers.get(model)
+    if breaker is None:
+      breaker = CircuitBreaker(model, _settings)
+      _breakers[model] = breaker
+    return breaker
@@ -1,39 +1,58 @@
 """LLM API client implementation."""
 
-import os
-import random
+import concurrent.futures
+import dataclasses
+import json
 import re
 import time
+from collections.abc import Mapping
 
-import dotenv
 import requests
 from absl import logging
 
-from src.llm.models import Model
+from src.llm import (
+  backends,
+  cache,
+  capabilities,
+  circuit_breaker,
+  concurrency,
+  context_window,
+  continuation,
+  deadline,
+  hedging,
+  key_pool,
+  prompt_caching,
+  rate_limit,
+  retry,
+  routing,
+  single_flight,
+  streaming,
+  token_budgets,
+  tokens,
+  transport,
+)
+from src.llm import usage as usage_accounting
+from src.llm.errors import LlmApiError
+from src.llm.models import LlmResponse, Model, Usage
 
-_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 _MAX_RETRIES = 5
 _INITIAL_BACKOFF = 1.0  # In seconds
 
 
-class LlmApiError(Exception):
-  """Raised when the LLM API call fails after all retries."""
-
-
-def _parse_api_error_message(response: requests.Response) -> str:
+def _parse_error_body(text: str) -> str:
   """Parses a JSON error for a concise, human-readable message.
 
-  If the response is not a known error format, it returns the
-  full text or the extracted 'message' field.
+  If the body is not a known error format, it returns the full text or
+  the extracted 'message' field.
 
   Args:
-      response: The requests.Response object.
+      text: The raw response body.
 
   Returns:
       A concise error message or the original response text.
   """
   try:
-    data = response.json()
+    data = json.loads(text)
 
     # Try to get the error message from various possible locations
     error_obj = data.get("error", {})
@@ -86,24 +105,81 @@ def _parse_api_error_message(response: requests.Response) -> str:
       if "Key limit exceeded (total limit)" in full_error:
         return "Key limit exceeded (total limit)."
 
-    return response.text[:500]  # Limit response text length
+    return text[:500]  # Limit response text length
 
-  except requests.exceptions.JSONDecodeError:
-    return f"Non-JSON response: {response.text[:200]}"
+  except json.JSONDecodeError:
+    return f"Non-JSON response: {text[:200]}"
   except Exception as e:
-    return f"Error parsing response: {e} | Raw: {response.text[:200]}"
+    return f"Error parsing response: {e} | Raw: {text[:200]}"
 
 
-class LlmClient:
-  """LLM API client with retry and fallback logic.
+@dataclasses.dataclass
+class _Call:
+  """State of one call to the API across its attempts.
+
+  Attributes:
+      payload: The request body.
+      breaker: The circuit breaker of the model.
+      gate: The concurrency limiter of the model.
+      estimated_tokens: Tokens the request is expected to use.
+      start_time: time.time() when the call started.
+      backoff_time: The delay waited before the current attempt.
+      attempt: The zero-based number of the current attempt.
+      error_message: Why the last attempt failed.
+  """
+
+  payload: dict
+  breaker: circuit_breaker.CircuitBreaker
+  gate: concurrency.AdaptiveConcurrencyLimiter
+  estimated_tokens: int
+  start_time: float
+  backoff_time: float
+  attempt: int = 0
+  error_message: str = "no attempt was made"
+
+
+@dataclasses.dataclass(frozen=True)
+class _Failure:
+  """How a failed attempt ended.
+
+  Attributes:
+      status: The HTTP status, or the exception name.
+      error_class: How the retry policy classified the failure.
+      retry_after: Seconds the server asked to wait, if it said.
+  """
+
+  status: str
+  error_class: retry.ErrorClass
+  retry_after: float | None = None
+
+
+class BaseLlmClient:
+  """Configuration and request building shared by the LLM clients.
+
+  Subclasses implement `call_api` and the attempts of `_send` on top of a
+  specific HTTP stack. What an attempt's outcome means for the limiters,
+  breakers, telemetry and retries is decided here, so both keep the same
+  payload, retry and error semantics.
 
   Attributes:
       model (Model): The primary model to use for API calls.
-      api_key (str): The API key for authentication.
+      backend (Backend): The API serving the model in the client's role.
+      key_pool (KeyPool): The API keys requests are spread over.
       max_retries (int): Maximum number of retries for transient errors.
       initial_backoff (float): Initial backoff time in seconds for retries.
       system_prompt (str): The system prompt to send with requests.
-      max_tokens (int): The maximum number of tokens to request from the model.
+      max_tokens (int): The maximum number of tokens to request from the
+          model, including any reasoning. Lowered further when budgets
+          are autotuned.
+      reasoning (str | int | None): Reasoning effort level or reasoning
+          token cap, or None for the model's default.
+      stream (bool): Whether to stream completions over server-sent events.
+      fallback (BaseLlmClient | None): Client that serves calls this model
+          fails, e.g. while its circuit breaker is open.
+      role (str | None): What the client is used for, e.g. "solver" or
+          "evaluator". Usage is accounted per model and role.
+      retry_policy (RetryPolicy | None): Policy deciding which failed
+          attempts are retried and when, or None for the process-wide one.
   """
 
   def __init__(
@@ -114,23 +190,50 @@ class LlmClient:
     initial_backoff: float = _INITIAL_BACKOFF,
     system_prompt: str | None = None,
     max_tokens: int = 10000,
+    reasoning: token_budgets.Reasoning = None,
+    stream: bool = False,
+    fallback: "BaseLlmClient | None" = None,
+    role: str | None = None,
+    retry_policy: retry.RetryPolicy | None = None,
   ):
     """Initializes the client.
 
     Args:
         model: The primary model to use for API calls.
-        api_key: The API key for authentication. If None, loaded from .env.
+        api_key: The API key for authentication. If None, requests are
+            spread over the process-wide pool of the backend's keys: for
+            OpenRouter, those in OPENROUTER_API_KEYS and
+            OPENROUTER_API_KEY, loaded from .env (read once per process
+            and shared by all clients).
         max_retries: Maximum number of retries for transient errors.
         initial_backoff: Initial backoff time in seconds for retries.
         system_prompt: The system prompt to send with requests.
         max_tokens: The maximum number of tokens to request from the model.
+        reasoning: Reasoning effort level ("minimal", "low", "medium",
+            "high") or reasoning token cap, or None for the model's default.
+        stream: Whether to stream completions over server-sent events. Streamed
+            calls record time-to-first-token and tokens/sec, and time out only
+            when the stream goes idle.
+        fallback: Optional client, of the same kind, that serves calls
+            this model fails. It should not have a fallback of its own.
+        role: What the client is used for, for usage accounting.
+        retry_policy: Optional policy overriding the process-wide one.
     """
-    dotenv.load_dotenv()
-    self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
-    if not self.api_key:
+    self.backend = backends.get_backend(model, role)
+    self.key_pool = (
+      key_pool.KeyPool([api_key])
+      if api_key
+      else backends.get_backend_key_pool(self.backend)
+    )
+    if not self.key_pool:
+      if self.backend.name != backends.OPENROUTER:
+        raise ValueError(
+          f"{self.backend.api_key_env} must be set in .env file or an API "
+          f"key provided as an argument for backend {self.backend.name}."
+        )
       raise ValueError(
-        "OPENROUTER_API_KEY must be set in .env file or "
-        "provided as an argument."
+        "OPENROUTER_API_KEY or OPENROUTER_API_KEYS must be set in .env file "
+        "or an API key provided as an argument."
       )
 
     self.model = model
@@ -138,14 +241,690 @@ class LlmClient:
     self.initial_backoff = initial_backoff
     self.system_prompt = system_prompt
     self.max_tokens = max_tokens
+    self.reasoning = reasoning
+    self.stream = stream
+    self.fallback = fallback
+    self.role = role
+    self.retry_policy = retry_policy
 
-    self._headers = {
-      "Authorization": f"Bearer {self.api_key}",
+  @staticmethod
+  def _request_headers(key: key_pool.ApiKey) -> dict[str, str]:
+    """Returns the headers of a request sent with `key`."""
+    return {
+      "Authorization": f"Bearer {key.key}",
       "Content-Type": "application/json",
     }
 
+  def _build_payload(
+    self,
+    prompt: prompt_caching.Prompt,
+    response_format: dict | None = None,
+  ) -> dict:
+    """Builds the chat completion request body.
+
+    The request is shaped by the model's cached capabilities, in the
+    dialect of the client's backend.
+
+    Args:
+        prompt: The user-facing prompt to send to the model, or its
+            segments with the parts shared across calls first.
+        response_format: Optional structured output format specification.
+
+    Returns:
+        The JSON-serializable request payload.
+    """
+    # Adapts the request to what the model is known to support: a schema
+    # it cannot enforce is asked for in the prompt instead, and a system
+    # prompt it rejects leads the user prompt.
+    model_capabilities = capabilities.get_capability_cache().get(self.model)
+    response_format, schema_instruction = capabilities.adapt_response_format(
+      model_capabilities, response_format
+    )
+    segments = [prompt] if isinstance(prompt, str) else list(prompt)
+    if schema_instruction:
+      segments[-1] += schema_instruction
+    system_prompt = self.system_prompt
+    if system_prompt and not model_capabilities.system_role:
+      segments.insert(0, f"{system_prompt}\n\n")
+      system_prompt = None
+
+    payload = {
+      "model": self.model.value,
+      "messages": prompt_caching.build_messages(
+        self.model, system_prompt, segments
+      ),
+      "max_tokens": token_budgets.get_budget_tuner().max_tokens(
+        self.model, self.role, self.max_tokens
+      ),
+      # Asks OpenRouter to report the cost alongside the token counts.
+      "usage": {"include": True},
+    }
+
+    reasoning = token_budgets.reasoning_payload(self.reasoning)
+    if reasoning:
+      payload["reasoning"] = reasoning
+
+    if response_format:
+      payload["response_format"] = response_format
+
+    if self.stream:
+      payload["stream"] = True
+
+    return self.backend.adapt_payload(self.model, payload)
+
+  def _lookup_cached(self, payload: dict) -> LlmResponse | None:
+    """Returns the cached response for `payload`, if the cache has one.
+
+    Args:
+        payload: The request body that would be sent to the API.
+
+    Returns:
+        The cached LlmResponse, or None on a miss or when reads are disabled.
+
+    Raises:
+        CacheMissError: On a miss while the cache is in replay-only mode.
+    """
+    response_cache = cache.get_response_cache()
+    if response_cache is None or not response_cache.reads_enabled:
+      return None
+
+    start_time = time.time()
+    hit = response_cache.get(cache.request_key(payload))
+    lookup_time = time.time() - start_time
+    if hit is None:
+      if response_cache.mode == cache.CacheMode.REPLAY_ONLY:
+        raise cache.CacheMissError(
+          f"No cached response for {self.model.value} in replay-only mode."
+        )
+      return None
+
+    response_text, latency = hit
+    logging.info(
+      "Cache hit: %s (recorded %.2fs, lookup %.3fs)",
+      self.model.value,
+      latency,
+      lookup_time,
+    )
+    return LlmResponse(
+      text=response_text,
+      elapsed_time=latency,
+      cache_hit=True,
+      lookup_time=lookup_time,
+    )
+
+  def _store_cached(self, payload: dict, response: LlmResponse) -> None:
+    """Stores a fresh API response if the cache accepts writes."""
+    response_cache = cache.get_response_cache()
+    if response_cache is not None and response_cache.writes_enabled:
+      response_cache.put(
+        cache.request_key(payload),
+        self.model.value,
+        response.text,
+        response.elapsed_time,
+      )
+
+  def fits_context(
+    self,
+    prompt: prompt_caching.Prompt,
+    response_format: dict | None = None,
+  ) -> bool:
+    """Whether a call with this prompt fits the model's context window.
+
+    Args:
+        prompt: The user-facing prompt, as passed to `complete`.
+        response_format: Optional structured output format specification.
+
+    Returns:
+        True if the estimated prompt leaves room for a completion.
+    """
+    return context_window.fits(
+      self.model, self._build_payload(prompt, response_format)
+    )
+
+  def _build_fitted_payload(
+    self,
+    prompt: prompt_caching.Prompt,
+    response_format: dict | None = None,
+  ) -> dict:
+    """Builds the request body, checked against the model's limits.
+
+    Raises:
+        ContextWindowExceededError: If the prompt cannot fit.
+    """
+    return context_window.fit_request(
+      self.model, self._build_payload(prompt, response_format)
+    )
+
+  def _record_usage(
+    self, response: LlmResponse, usage: dict, payload: dict
+  ) -> None:
+    """Attaches the API's usage block to `response` and accounts for it.
+
+    Also records how the local prompt token estimate for `payload`
+    compared with the count the provider reported, and the completion
+    length the token budgets are tuned from.
+    """
+    response.usage = Usage.from_api(usage)
+    response.usage.estimated_prompt_tokens = tokens.estimate_prompt_tokens(
+      payload
+    )
+    tokens.get_token_estimate_tracker().record(
+      self.model,
+      response.usage.estimated_prompt_tokens,
+      response.usage.prompt_tokens,
+    )
+    usage_accounting.get_usage_tracker().record(
+      self.model, self.role, response.usage
+    )
+    token_budgets.get_budget_tuner().record(
+      self.model,
+      self.role,
+      response.usage.completion_tokens,
+      payload["max_tokens"],
+    )
+
+  def _attempt_body(self, payload: dict) -> dict:
+    """Returns the body of one attempt at `payload`.
+
+    OpenRouter requests get the call's provider preferences. Other
+    backends have no provider routing, so hedges go to the same API.
+    """
+    if self.backend.is_openrouter:
+      return routing.route_payload(payload, self.model, self.role)
+    return {key: value for key, value in payload.items() if key != "provider"}
+
+  def _record_route(self, response: LlmResponse, elapsed: float) -> None:
+    """Records how fast the provider that served `response` answered.
+
+    Args:
+        response: The successful response.
+        elapsed: Seconds the successful attempt took.
+    """
+    if response.provider:
+      routing.get_route_tracker().record(
+        self.model, self.role, response.provider, elapsed
+      )
+
+  def _attempt_read_timeout(
+    self, settings: transport.TransportSettings
+  ) -> float:
+    """Returns the read timeout for the next attempt, within the deadline.
+
+    Raises:
+        DeadlineExceededError: If the current deadline has passed.
+    """
+    if self.stream:
+      return deadline.attempt_timeout(
+        self.model,
+        self.role,
+        settings.stream_idle_timeout,
+        adaptive=False,
+      )
+    return deadline.attempt_timeout(
+      self.model, self.role, settings.read_timeout
+    )
+
+  def _raise_if_deadline_passed(self, error: Exception) -> None:
+    """Turns an attempt cut short by the deadline into a deadline error.
+
+    Such a timeout says nothing about the provider's health, so it must
+    not count against the circuit breaker or be retried.
+    """
+    if deadline.deadline_expired():
+      raise deadline.DeadlineExceededError(
+        f"{deadline.current_deadline().name} deadline passed during the "
+        f"call to {self.model.value}."
+      ) from error
+
+  def _raise_if_unsupported(
+    self,
+    payload: dict,
+    attempt: int,
+    status: int,
+    error_message: str,
+    elapsed: float,
+  ) -> None:
+    """Turns a rejection of a feature the model lacks into an adaptation.
+
+    The model's capabilities are downgraded, so the caller can rebuild a
+    request the model accepts instead of sending this one again.
+
+    Args:
+        payload: The request that failed.
+        attempt: The zero-based number of the failed attempt.
+        status: The HTTP status of the response.
+        error_message: The parsed error message.
+        elapsed: Seconds the failed attempt took.
+
+    Raises:
+        UnsupportedRequestError: If the error shows a missing feature.
+    """
+    if not capabilities.get_capability_cache().learn_from_error(
+      self.model, status, error_message, payload
+    ):
+      return
+    self._record_attempt(attempt, str(status), retry.ErrorClass.FATAL, elapsed)
+    raise capabilities.UnsupportedRequestError(
+      f"{self.model.value} rejected the request shape: {error_message}"
+    )
+
+  @staticmethod
+  def _unwrap_json(
+    payload: dict, response_format: dict | None, response: LlmResponse
+  ) -> LlmResponse:
+    """Extracts the JSON of a structured call whose schema was not enforced.
+
+    Args:
+        payload: The request sent.
+        response_format: The response format the caller asked for.
+        response: The response to the request.
+    """
+    if response_format and "json_schema" not in payload.get(
+      "response_format", {}
+    ):
+      response.text = capabilities.extract_json(response.text)
+    return response
+
+  def _continuation_request(
+    self, payload: dict, response: LlmResponse
+  ) -> dict | None:
+    """Returns the request that resumes a truncated response, if any.
+
+    Args:
+        payload: The original request.
+        response: The response so far.
+
+    Returns:
+        The continuation request, or None if the response is complete,
+        has used up its continuations, or cannot be continued within the
+        model's context window.
+    """
+    if not response.truncated:
+      return None
+    settings = continuation.get_continuation_settings()
+    if response.continuations >= settings.max_continuations:
+      logging.warning(
+        "%s response is cut off at max_tokens after %d continuation(s)",
+        self.model.value,
+        response.continuations,
+      )
+      return None
+    try:
+      request = context_window.fit_request(
+        self.model, continuation.continuation_payload(payload, response.text)
+      )
+    except context_window.ContextWindowExceededError:
+      logging.warning(
+        "%s response is cut off at max_tokens and too long to continue",
+        self.model.value,
+      )
+      return None
+    logging.info(
+      "%s response was cut off at max_tokens, continuing it (%d/%d)",
+      self.model.value,
+      response.continuations + 1,
+      settings.max_continuations,
+    )
+    return request
+
+  def _log_fallback(self, error: LlmApiError) -> None:
+    """Logs that a failed call is being routed to the fallback model."""
+    logging.warning(
+      "%s failed (%s), routing the call to fallback model %s",
+      self.model.value,
+      error,
+      self.fallback.model.value,
+    )
+
+  def _retry_delay(
+    self,
+    attempt: int,
+    status: str,
+    error_class: retry.ErrorClass,
+    error_message: str,
+    backoff_time: float,
+    retry_after: float | None,
+    elapsed: float,
+  ) -> float | None:
+    """Decides whether to retry a failed attempt, and records it.
+
+    A retry needs a retryable error, an attempt left, time before the
+    deadline and room in the global retry budget.
+
+    Args:
+        attempt: The zero-based number of the failed attempt.
+        status: The HTTP status, or the exception name.
+        error_class: How the policy classified the failure.
+        error_message: A description of the failure, for logging.
+        backoff_time: The delay waited before the failed attempt.
+        retry_after: Seconds the server asked to wait, if it said.
+        elapsed: Seconds the failed attempt took.
+
+    Returns:
+        Seconds to wait before the next attempt, or None to give up.
+
+    Raises:
+        DeadlineExceededError: If the deadline leaves no time to retry.
+    """
+    policy = self.retry_policy or retry.get_retry_policy()
+    delay = None
+    if attempt + 1 < self.max_retries:
+      delay = policy.next_delay(
+        error_class, backoff_time, self.initial_backoff, retry_after
+      )
+    if delay is not None:
+      try:
+        deadline.ensure_time_for_retry(self.model, self.role, delay)
+      except deadline.DeadlineExceededError:
+        self._record_attempt(attempt, status, error_class, elapsed)
+        raise
+      if not retry.get_retry_budget().try_retry():
+        logging.warning(
+          "Retry budget exhausted, not retrying %s", self.model.value
+        )
+        delay = None
+    self._record_attempt(attempt, status, error_class, elapsed, delay)
+
+    if delay is None:
+      logging.error(
+        "Giving up on %s after attempt %d/%d (%s, %s): %s",
+        self.model.value,
+        attempt + 1,
+        self.max_retries,
+        status,
+        error_class.value,
+        error_message,
+      )
+    else:
+      logging.warning(
+        "Error %s (%s) for %s, retrying in %.2fs (attempt %d/%d): %s",
+        status,
+        error_class.value,
+        self.model.value,
+        delay,
+        attempt + 1,
+        self.max_retries,
+        error_message,
+      )
+    return delay
+
+  def _record_attempt(
+    self,
+    attempt: int,
+    status: str,
+    error_class: retry.ErrorClass,
+    elapsed: float,
+    delay: float | None = None,
+  ) -> None:
+    """Records the telemetry of one attempt.
+
+    Args:
+        attempt: The zero-based attempt number.
+        status: The HTTP status, or the exception name.
+        error_class: How the attempt ended.
+        elapsed: Seconds the attempt took.
+        delay: Seconds until the next attempt, or None if there is none.
+    """
+    retry.get_retry_telemetry().record(
+      retry.Attempt(
+        model=self.model.value,
+        attempt=attempt + 1,
+        status=status,
+        error_class=error_class,
+        elapsed=elapsed,
+        delay=delay or 0.0,
+        gave_up=delay is None and error_class is not retry.ErrorClass.SUCCESS,
+      )
+    )
+
+  def _start_call(self, payload: dict) -> _Call:
+    """Returns the state of a new call to the API with `payload`."""
+    retry.get_retry_budget().record_call()
+    return _Call(
+      payload=payload,
+      breaker=circuit_breaker.get_circuit_breaker(self.model),
+      gate=concurrency.get_concurrency_limiter(self.model),
+      estimated_tokens=rate_limit.estimate_request_tokens(payload),
+      start_time=time.time(),
+      backoff_time=self.initial_backoff,
+    )
+
+  def _check_circuit(self, call: _Call) -> None:
+    """Raises CircuitOpenError if the model's circuit breaker is open."""
+    if not call.breaker.allow_request():
+      raise circuit_breaker.CircuitOpenError(
+        f"Circuit open for {self.model.value}, not calling the API."
+      )
+
+  def _reserve_rate_limit(
+    self, call: _Call, key: key_pool.ApiKey
+  ) -> tuple[rate_limit.ModelRateLimiter, float]:
+    """Reserves the tokens of the next attempt under `key`'s rate limit.
+
+    Args:
+        call: The call being attempted.
+        key: The API key of the attempt.
+
+    Returns:
+        A tuple of (rate_limiter, seconds_to_wait_before_sending).
+
+    Raises:
+        DeadlineExceededError: If the wait would run past the deadline.
+    """
+    limiter = rate_limit.get_rate_limiter(self.model, key.id)
+    delay = limiter.reserve(call.estimated_tokens)
+    if delay > 0:
+      deadline.ensure_time_for_retry(self.model, self.role, delay)
+      logging.info("Waiting %.2fs for %s rate limit", delay, self.model.value)
+    return limiter, delay
+
+  @staticmethod
+  def _parse_completion(
+    data: dict, start_time: float
+  ) -> tuple[LlmResponse, dict]:
+    """Parses the JSON body of a successful non-streamed completion.
+
+    Args:
+        data: The decoded response body.
+        start_time: time.time() when the call started.
+
+    Returns:
+        A tuple of (llm_response, usage_dict).
+    """
+    choice = data["choices"][0]
+    return (
+      LlmResponse(
+        text=choice["message"]["content"] or "",
+        elapsed_time=time.time() - start_time,
+        provider=data.get("provider"),
+        finish_reason=choice.get("finish_reason"),
+      ),
+      data.get("usage") or {},
+    )
+
+  def _record_success(
+    self,
+    call: _Call,
+    key: key_pool.ApiKey,
+    limiter: rate_limit.ModelRateLimiter,
+    slot: concurrency.Slot,
+    response: LlmResponse,
+    usage: dict,
+    status: int,
+    attempt_start: float,
+  ) -> None:
+    """Records a successful attempt with every tracker that learns from it.
+
+    Args:
+        call: The call the attempt belongs to.
+        key: The API key of the attempt.
+        limiter: The rate limiter of the key.
+        slot: The concurrency slot of the attempt.
+        response: The parsed response.
+        usage: The usage reported by the API.
+        status: The HTTP status of the response.
+        attempt_start: time.time() when the attempt started.
+    """
+    logging.info(
+      "API call successful: %s (%.2fs)",
+      self.model.value,
+      response.elapsed_time,
+    )
+    limiter.record_usage(
+      call.estimated_tokens, usage.get("total_tokens", call.estimated_tokens)
+    )
+    slot.record(concurrency.Outcome.SUCCESS)
+    call.breaker.record_success()
+    hedge_policy = hedging.get_hedge_policy(self.model, self.role)
+    hedge_policy.latencies.record(response.elapsed_time)
+    self._record_usage(response, usage, call.payload)
+    self.key_pool.record_cost(key, response.usage.cost)
+    self._record_route(response, time.time() - attempt_start)
+    self._record_attempt(
+      call.attempt,
+      str(status),
+      retry.ErrorClass.SUCCESS,
+      time.time() - attempt_start,
+    )
+
+  def _record_error_response(
+    self,
+    call: _Call,
+    key: key_pool.ApiKey,
+    limiter: rate_limit.ModelRateLimiter,
+    slot: concurrency.Slot,
+    status: int,
+    body: str,
+    headers: Mapping[str, str],
+    attempt_start: float,
+  ) -> _Failure | None:
+    """Records an attempt the API answered with an error status.
+
+    Args:
+        call: The call the attempt belongs to.
+        key: The API key of the attempt.
+        limiter: The rate limiter of the key.
+        slot: The concurrency slot of the attempt.
+        status: The HTTP status of the response.
+        body: The raw response body.
+        headers: The response headers.
+        attempt_start: time.time() when the attempt started.
+
+    Returns:
+        How the attempt failed, or None if the key turned out unusable and
+        the attempt should be repeated with another one.
+
+    Raises:
+        UnsupportedRequestError: If the error shows a missing feature.
+    """
+    # Failed attempts do not consume the token budget.
+    limiter.record_usage(call.estimated_tokens, 0)
+    call.error_message = _parse_error_body(body)
+    if self.key_pool.handle_error(key, status, call.error_message):
+      call.breaker.record_success()
+      return None
+    policy = self.retry_policy or retry.get_retry_policy()
+    error_class = policy.classify(status, retry.error_code(body))
+    if error_class is retry.ErrorClass.FATAL:
+      # The provider answered; the request itself is at fault.
+      call.breaker.record_success()
+    else:
+      call.breaker.record_failure()
+      slot.record(concurrency.Outcome.OVERLOADED)
+    self._raise_if_unsupported(
+      call.payload,
+      call.attempt,
+      status,
+      call.error_message,
+      time.time() - attempt_start,
+    )
+    return _Failure(
+      str(status),
+      error_class,
+      rate_limit.parse_retry_after(headers.get("Retry-After")),
+    )
+
+  def _record_transport_error(
+    self,
+    call: _Call,
+    limiter: rate_limit.ModelRateLimiter,
+    slot: concurrency.Slot,
+    error: Exception,
+    timed_out: bool,
+  ) -> _Failure:
+    """Records an attempt that failed without an answer from the API.
+
+    Args:
+        call: The call the attempt belongs to.
+        limiter: The rate limiter of the attempt's key.
+        slot: The concurrency slot of the attempt.
+        error: The connection, timeout or stream error.
+        timed_out: Whether the attempt timed out, a sign of overload.
+
+    Returns:
+        How the attempt failed.
+
+    Raises:
+        DeadlineExceededError: If the attempt was cut short by the deadline.
+    """
+    limiter.record_usage(call.estimated_tokens, 0)
+    self._raise_if_deadline_passed(error)
+    call.breaker.record_failure()
+    if timed_out:
+      slot.record(concurrency.Outcome.OVERLOADED)
+    call.error_message = str(error) or type(error).__name__
+    policy = self.retry_policy or retry.get_retry_policy()
+    return _Failure(type(error).__name__, policy.classify_exception(error))
+
+  def _next_backoff(
+    self, call: _Call, failure: _Failure, attempt_start: float
+  ) -> float | None:
+    """Decides whether to retry a failed attempt, and moves to the next one.
+
+    Args:
+        call: The call the attempt belongs to.
+        failure: How the attempt failed.
+        attempt_start: time.time() when the attempt started.
+
+    Returns:
+        Seconds to wait before the next attempt, or None to give up.
+
+    Raises:
+        DeadlineExceededError: If the deadline leaves no time to retry.
+    """
+    backoff_time = self._retry_delay(
+      call.attempt,
+      failure.status,
+      failure.error_class,
+      call.error_message,
+      call.backoff_time,
+      failure.retry_after,
+      time.time() - attempt_start,
+    )
+    if backoff_time is not None:
+      call.backoff_time = backoff_time
+      call.attempt += 1
+    return backoff_time
+
+  def _retries_exhausted(self, call: _Call) -> LlmApiError:
+    """Returns the error raised once a call has no attempts left."""
+    return LlmApiError(
+      f"Failed to get a successful response from {self.model.value}: "
+      f"{call.error_message}"
+    )
+
+
+class LlmClient(BaseLlmClient):
+  """LLM API client with retry and fallback logic.
+
+  Uses blocking HTTP through the shared pooled transport, so it is safe to
+  call from worker threads.
+  """
+
   def call_api(
-    self, prompt: str, response_format: dict | None = None
+    self,
+    prompt: prompt_caching.Prompt,
+    response_format: dict | None = None,
   ) -> tuple[str, float]:
     """Handles the core logic of calling the LLM API with retries.
 
@@ -160,95 +939,362 @@ class LlmClient:
         LlmApiError: If the API call fails after all retries.
         requests.exceptions.HTTPError: For unrecoverable HTTP errors.
     """
-    payload = {
-      "model": self.model.value,
-      "messages": [
-        {"role": "user", "content": prompt},
-      ],
-      "max_tokens": self.max_tokens,
-    }
+    response = self.complete(prompt, response_format)
+    return response.text, response.elapsed_time
 
-    if self.system_prompt:
-      payload["messages"].insert(
-        0, {"role": "system", "content": self.system_prompt}
-      )
+  def complete(
+    self,
+    prompt: prompt_caching.Prompt,
+    response_format: dict | None = None,
+    on_chunk: streaming.StreamCallback | None = None,
+  ) -> LlmResponse:
+    """Like call_api, but returns the full LlmResponse.
 
-    if response_format:
-      payload["response_format"] = response_format
+    Checks the request against the model's context window first, lowering
+    max_tokens to fit or failing fast without a round trip. Consults the
+    response cache before calling the API, and shares the result of an
+    identical call that is already in flight. A response cut off at
+    max_tokens is resumed with continuation requests. A request the
+    model rejects for using a feature it lacks (e.g. strict structured
+    outputs) is rebuilt without it, once per lacking feature. If this
+    model fails (including when its circuit is open) and the client has a
+    fallback, the fallback client serves the call instead.
 
-    backoff_time = self.initial_backoff
-    start_time = time.time()
+    Args:
+        prompt: The user-facing prompt to send to the model.
+        response_format: Optional structured output format specification.
+        on_chunk: Optional callback receiving text as it streams in. Only
+            called when the client streams and the response is not cached.
 
-    for attempt in range(self.max_retries):
-      try:
-        response = requests.post(
-          _API_URL,
-          headers=self._headers,
-          json=payload,
-          timeout=30,
-        )
+    Returns:
+        The LlmResponse for the call.
 
-        if response.ok:
-          elapsed_time = time.time() - start_time
-          logging.info(
-            "API call successful: %s (%.2fs)",
-            self.model.value,
-            elapsed_time,
-          )
-          data = response.json()
-          return data["choices"][0]["message"]["content"], elapsed_time
-        elif response.status_code == requests.codes.bad_request:
-          error_message = _parse_api_error_message(response)
-          logging.error(
-            "Bad request (400) for %s: %s",
-            self.model.value,
-            error_message,
-          )
-          break
-        elif response.status_code in {
-          requests.codes.too_many_requests,
-          requests.codes.request_timeout,
-          requests.codes.service_unavailable,
-        }:
-          logging.warning(
-            "Transient error %d for %s, retrying in %.2fs (attempt %d/%d)",
-            response.status_code,
-            self.model.value,
-            backoff_time,
-            attempt + 1,
-            self.max_retries,
-          )
-          time.sleep(backoff_time)
-          backoff_time *= 2 * (1 + random.random())
-          continue
+    Raises:
+        LlmApiError: If the API call fails after all retries.
+    """
+    try:
+      return self._complete_direct(prompt, response_format, on_chunk)
+    except LlmApiError as e:
+      if self.fallback is None:
+        raise
+      self._log_fallback(e)
+      return self.fallback.complete(prompt, response_format, on_chunk)
 
-        else:
-          error_message = _parse_api_error_message(response)
-          logging.error(
-            "Unrecoverable error %d for %s: %s",
-            response.status_code,
+  def _complete_direct(
+    self,
+    prompt: prompt_caching.Prompt,
+    response_format: dict | None = None,
+    on_chunk: streaming.StreamCallback | None = None,
+  ) -> LlmResponse:
+    """Completes the prompt with this client's own model, without fallback.
+
+    Args:
+        prompt: The user-facing prompt to send to the model.
+        response_format: Optional structured output format specification.
+        on_chunk: Optional callback for streamed text.
+
+    Returns:
+        The LlmResponse for the call.
+
+    Raises:
+        LlmApiError: If the API call fails after all retries.
+    """
+    while True:
+      payload = self._build_fitted_payload(prompt, response_format)
+      try:
+        response = self._lookup_cached(payload)
+        if response is None:
+          response = single_flight.get_single_flight().do(
+            cache.request_key(payload),
             self.model.value,
-            error_message,
+            lambda: self._send_and_store(payload, on_chunk),
           )
-          break
+        break
+      except capabilities.UnsupportedRequestError as e:
+        # The capability cache was downgraded; rebuild the request.
+        logging.info("Adapting the request to %s: %s", self.model.value, e)
+    # Single-flight followers copy the response the leader got, so the
+    # leader stamps and unwraps its own copy instead of the shared one.
+    response = dataclasses.replace(
+      response, served_model=self.model.value, backend=self.backend.name
+    )
+    return self._unwrap_json(payload, response_format, response)
 
-      except requests.exceptions.RequestException as e:
-        logging.warning(
-          "Network error for %s, retrying (attempt %d/%d): %s",
-          self.model.value,
-          attempt + 1,
-          self.max_retries,
-          e,
-        )
-        time.sleep(backoff_time)
-        backoff_time *= 2 * (1 + random.random())
+  def _send_and_store(
+    self, payload: dict, on_chunk: streaming.StreamCallback | None = None
+  ) -> LlmResponse:
+    """Sends a request that missed the cache and caches its response."""
+    response = self._send_hedged(payload, on_chunk)
+    response = self._continue_truncated(payload, response, on_chunk)
+    self._store_cached(payload, response)
+    return response
 
-    if attempt + 1 >= self.max_retries:
-      logging.error(
-        "Max retries exceeded for %s",
-        self.model.value,
+  def _continue_truncated(
+    self,
+    payload: dict,
+    response: LlmResponse,
+    on_chunk: streaming.StreamCallback | None = None,
+  ) -> LlmResponse:
+    """Resumes a response cut off at max_tokens instead of regenerating it.
+
+    Args:
+        payload: The request that produced `response`.
+        response: The response, possibly truncated.
+        on_chunk: Optional callback for the streamed continuations.
+
+    Returns:
+        The response extended by its continuations. If one fails, the
+        response so far, still marked as truncated.
+    """
+    while True:
+      request = self._continuation_request(payload, response)
+      if request is None:
+        return response
+      try:
+        part = self._send(request, on_chunk)
+      except LlmApiError as e:
+        logging.warning("Continuing %s failed: %s", self.model.value, e)
+        return response
+      response = continuation.merge(
+        response, part, structured="response_format" in payload
       )
 
-    raise LlmApiError(
-      f"Failed to get a successful response from {self.model.value}."
+  def _send_hedged(
+    self, payload: dict, on_chunk: streaming.StreamCallback | None = None
+  ) -> LlmResponse:
+    """Sends a request, duplicating it if it runs past the hedge delay.
+
+    When hedging is enabled and the call has not finished by the model's
+    observed latency percentile, a hedge request is sent if the model's
+    hedge budget allows, and the first successful response wins. The
+    losing attempt is cancelled: its in-flight response or stream is
+    closed and it makes no further attempts.
+
+    Args:
+        payload: The request body.
+        on_chunk: Optional callback for streamed text, fed by the primary
+            attempt only.
+
+    Returns:
+        The winning LlmResponse. Its elapsed_time is measured from the
+        start of the primary attempt.
+
+    Raises:
+        LlmApiError: If every attempt fails.
+    """
+    policy = hedging.get_hedge_policy(self.model, self.role)
+    hedge_delay = policy.hedge_delay()
+    if hedge_delay is None:
+      return self._send(payload, on_chunk)
+
+    start_time = time.time()
+    executor = hedging.get_executor()
+    primary_cancellation = hedging.Cancellation()
+    primary = executor.submit(
+      deadline.bind_deadline(self._send),
+      payload,
+      on_chunk,
+      primary_cancellation,
+    )
+    try:
+      return primary.result(timeout=hedge_delay)
+    except concurrent.futures.TimeoutError:
+      if not policy.try_hedge():
+        return primary.result()
+
+    logging.info(
+      "Hedging %s after %.2fs without a response",
+      self.model.value,
+      hedge_delay,
+    )
+    hedge_cancellation = hedging.Cancellation()
+    hedge = executor.submit(
+      deadline.bind_deadline(self._send),
+      policy.hedge_payload(payload),
+      None,
+      hedge_cancellation,
     )
+    attempts = {primary: hedging.PRIMARY, hedge: hedging.HEDGE}
+    cancellations = {primary: primary_cancellation, hedge: hedge_cancellation}
+    pending = set(attempts)
+    error = None
+    while pending:
+      done, pending = concurrent.futures.wait(
+        pending, return_when=concurrent.futures.FIRST_COMPLETED
+      )
+      for future in done:
+        if future.exception() is not None:
+          error = future.exception()
+          continue
+        for loser in pending:
+          loser.cancel()
+          cancellations[loser].cancel()
+        response = future.result()
+        response.winning_attempt = attempts[future]
+        response.elapsed_time = time.time() - start_time
+        policy.record_winner(response.winning_attempt)
+        logging.info(
+          "Hedged call to %s won by the %s attempt",
+          self.model.value,
+          response.winning_attempt,
+        )
+        return response
+    raise error
+
+  def _send(
+    self,
+    payload: dict,
+    on_chunk: streaming.StreamCallback | None = None,
+    cancellation: hedging.Cancellation | None = None,
+  ) -> LlmResponse:
+    """Sends a request to the API, retrying transient failures.
+
+    Args:
+        payload: The request body.
+        on_chunk: Optional callback for streamed text.
+        cancellation: Set when the request is one attempt of a hedged call,
+            to stop it once the other attempt wins.
+
+    Returns:
+        The LlmResponse for the first successful attempt.
+
+    Raises:
+        LlmApiError: If the API call fails after all retries.
+        AttemptCancelledError: If the request is cancelled.
+    """
+    settings = transport.get_transport_settings()
+    api_url = self.backend.chat_completions_url
+    session = transport.get_session(api_url)
+    call = self._start_call(payload)
+
+    while call.attempt < self.max_retries:
+      if cancellation is not None:
+        cancellation.check()
+      self._check_circuit(call)
+
+      with self.key_pool.use(self.model) as key:
+        limiter, delay = self._reserve_rate_limit(call, key)
+        if delay > 0:
+          time.sleep(delay)
+
+        timeout = (
+          settings.connect_timeout,
+          self._attempt_read_timeout(settings),
+        )
+        attempt_start = time.time()
+        with call.gate.slot(self.role) as slot:
+          try:
+            response = session.post(
+              api_url,
+              headers=self._request_headers(key),
+              json=self._attempt_body(payload),
+              timeout=timeout,
+              stream=self.stream,
+            )
+            if cancellation is not None:
+              cancellation.track(response)
+            limiter.update_from_headers(response.status_code, response.headers)
+
+            if response.ok:
+              if self.stream:
+                llm_response, usage = _read_stream(
+                  response, call.start_time, on_chunk, cancellation
+                )
+              else:
+                llm_response, usage = self._parse_completion(
+                  response.json(), call.start_time
+                )
+              self._record_success(
+                call,
+                key,
+                limiter,
+                slot,
+                llm_response,
+                usage,
+                response.status_code,
+                attempt_start,
+              )
+              return llm_response
+            failure = self._record_error_response(
+              call,
+              key,
+              limiter,
+              slot,
+              response.status_code,
+              response.text,
+              response.headers,
+              attempt_start,
+            )
+            if failure is None:
+              # The key is unusable; repeat the attempt with another one.
+              continue
+
+          except (
+            requests.exceptions.RequestException,
+            streaming.StreamInterruptedError,
+          ) as e:
+            failure = self._record_transport_error(
+              call,
+              limiter,
+              slot,
+              e,
+              timed_out=isinstance(e, requests.exceptions.Timeout),
+            )
+
+      # The concurrency slot is released before sleeping so other requests
+      # to the model can use it while we back off.
+      backoff_time = self._next_backoff(call, failure, attempt_start)
+      if backoff_time is None:
+        break
+      time.sleep(backoff_time)
+
+    raise self._retries_exhausted(call)
+
+
+def _read_stream(
+  response: requests.Response,
+  start_time: float,
+  on_chunk: streaming.StreamCallback | None,
+  cancellation: hedging.Cancellation | None = None,
+) -> tuple[LlmResponse, dict]:
+  """Reads a streamed completion from a blocking response.
+
+  Args:
+      response: A successful response opened with stream=True.
+      start_time: time.time() when the call started.
+      on_chunk: Optional callback for streamed text.
+      cancellation: Optional cancellation of a hedged attempt, which closes
+          the response from another thread.
+
+  Returns:
+      A tuple of (llm_response, usage_dict).
+
+  Raises:
+      requests.exceptions.RequestException: If the connection fails or goes
+          idle for longer than the stream idle timeout.
+      StreamInterruptedError: If the stream errors or ends early.
+      DeadlineExceededError: If the current deadline passes mid-stream.
+      AttemptCancelledError: If the attempt is cancelled mid-stream.
+  """
+  accumulator = streaming.StreamAccumulator(start_time, on_chunk)
+  try:
+    for line in response.iter_lines():
+      accumulator.feed_line(line.decode("utf-8"))
+      if accumulator.done:
+        break
+      if deadline.deadline_expired():
+        raise deadline.DeadlineExceededError(
+          f"{deadline.current_deadline().name} deadline passed mid-stream."
+        )
+    return accumulator.to_response(), accumulator.usage or {}
+  except Exception as e:
+    accumulator.notify_restart()
+    if cancellation is not None and cancellation.cancelled:
+      # Closing the response under iter_lines surfaces as an arbitrary
+      # error from the connection.
+      raise hedging.AttemptCancelledError(
+        "The hedged call was won mid-stream."
+      ) from e
+    raise
+  finally:
+    response.close()
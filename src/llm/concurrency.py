@@ -0,0 +1,330 @@
+"""Adaptive (AIMD) per-model concurrency limits for LLM requests."""
+
+import asyncio
+import contextlib
+import dataclasses
+import enum
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+
+from absl import logging
+
+from src import config
+from src.llm.models import Model
+from src.llm.usage import UNKNOWN_ROLE
+
+# Smoothing factor of the latency and error-rate moving averages.
+_EWMA_ALPHA = 0.1
+
+
+class Outcome(enum.Enum):
+  """How a request ended, as far as the concurrency limit is concerned."""
+
+  SUCCESS = "success"  # Healthy response, may grow the limit
+  OVERLOADED = "overloaded"  # 429/503/408 or timeout, shrinks the limit
+  FAILED = "failed"  # Any other failure, counts towards the error rate
+
+
+@dataclasses.dataclass(frozen=True)
+class ConcurrencySettings:
+  """Settings shared by every per-model concurrency limiter.
+
+  Attributes:
+      enabled: Whether requests are gated by the adaptive limit at all.
+      initial_limit: In-flight requests allowed before any feedback.
+      min_limit: Floor the limit never shrinks below.
+      max_limit: Ceiling the limit never grows above.
+      backoff_factor: Multiplier applied to the limit on overload.
+      latency_tolerance: A success slower than this multiple of the average
+          latency of its role does not grow the limit.
+      max_error_rate: Error rate (moving average) above which the limit
+          stops growing.
+  """
+
+  enabled: bool = True
+  initial_limit: int = config.ADAPTIVE_CONCURRENCY_INITIAL
+  min_limit: int = config.ADAPTIVE_CONCURRENCY_MIN
+  max_limit: int = config.ADAPTIVE_CONCURRENCY_MAX
+  backoff_factor: float = config.ADAPTIVE_CONCURRENCY_BACKOFF
+  latency_tolerance: float = config.ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE
+  max_error_rate: float = config.ADAPTIVE_CONCURRENCY_MAX_ERROR_RATE
+
+
+class Slot:
+  """One in-flight request admitted by a limiter.
+
+  Attributes:
+      role: The role of the client that sent the request.
+      started_at: time.monotonic() when the slot was granted.
+      outcome: How the request ended. Defaults to FAILED until recorded.
+  """
+
+  def __init__(self, role: str | None = None):
+    self.role = role or UNKNOWN_ROLE
+    self.started_at = time.monotonic()
+    self.outcome = Outcome.FAILED
+
+  def record(self, outcome: Outcome) -> None:
+    """Sets the outcome reported to the limiter when the slot is released."""
+    self.outcome = outcome
+
+
+class AdaptiveConcurrencyLimiter:
+  """Additive-increase/multiplicative-decrease limit on in-flight requests.
+
+  Every healthy response grows the limit by 1/limit, i.e. by one slot per
+  full window of successes, as long as latency and the error rate stay
+  healthy. An overload signal multiplies the limit by the backoff factor,
+  at most once per window: responses to requests sent before the last cut
+  do not cut again.
+
+  Latency is averaged per client role, since an evaluator grading a batch
+  of responses is much slower than a solver, and interleaving the two
+  would make every evaluator call look unhealthy.
+
+  The limiter is shared by threads and by asyncio tasks, so it waits on a
+  threading.Condition for blocking callers and on loop futures for async
+  ones.
+
+  Attributes:
+      model: The model this limiter guards.
+      settings: The limits and tuning parameters.
+  """
+
+  def __init__(self, model: Model, settings: ConcurrencySettings):
+    """Initializes the limiter at the initial limit.
+
+    Args:
+        model: The model this limiter guards.
+        settings: The limits and tuning parameters.
+    """
+    self.model = model
+    self.settings = settings
+    self._limit = float(
+      min(max(settings.initial_limit, settings.min_limit), settings.max_limit)
+    )
+    self._in_flight = 0
+    self._latency_ewma: dict[str, float] = {}
+    self._error_rate = 0.0
+    self._last_decrease = 0.0  # time.monotonic() value
+    self._increases = 0
+    self._decreases = 0
+    self._peak_limit = int(self._limit)
+    self._lowest_limit = int(self._limit)
+    self._condition = threading.Condition()
+    self._async_waiters: list[
+      tuple[asyncio.AbstractEventLoop, asyncio.Future]
+    ] = []
+
+  @property
+  def limit(self) -> int:
+    """The current number of requests allowed in flight."""
+    return int(self._limit)
+
+  @contextlib.contextmanager
+  def slot(self, role: str | None = None) -> Iterator[Slot]:
+    """Blocks until a request may be sent, then holds a slot for it.
+
+    Args:
+        role: The role of the client sending the request.
+
+    Yields:
+        The Slot, on which the caller records the request's outcome.
+    """
+    if self.settings.enabled:
+      with self._condition:
+        while self._in_flight >= self.limit:
+          self._condition.wait()
+        self._in_flight += 1
+    slot = Slot(role)
+    try:
+      yield slot
+    finally:
+      self._release(slot)
+
+  @contextlib.asynccontextmanager
+  async def slot_async(self, role: str | None = None) -> AsyncIterator[Slot]:
+    """Async variant of slot that waits without blocking the event loop.
+
+    Args:
+        role: The role of the client sending the request.
+
+    Yields:
+        The Slot, on which the caller records the request's outcome.
+    """
+    if self.settings.enabled:
+      loop = asyncio.get_running_loop()
+      while True:
+        with self._condition:
+          if self._in_flight < self.limit:
+            self._in_flight += 1
+            break
+          waiter = loop.create_future()
+          self._async_waiters.append((loop, waiter))
+        await waiter
+    slot = Slot(role)
+    try:
+      yield slot
+    finally:
+      self._release(slot)
+
+  def stats(self) -> dict[str, float | int]:
+    """Returns the current limit and the decisions taken so far."""
+    with self._condition:
+      return {
+        "limit": self.limit,
+        "in_flight": self._in_flight,
+        "peak_limit": self._peak_limit,
+        "lowest_limit": self._lowest_limit,
+        "increases": self._increases,
+        "decreases": self._decreases,
+        "error_rate": round(self._error_rate, 3),
+        "latency_ewma": {
+          role: round(latency, 3)
+          for role, latency in sorted(self._latency_ewma.items())
+        },
+      }
+
+  def _release(self, slot: Slot) -> None:
+    """Frees a slot, adapts the limit and wakes up waiters."""
+    if not self.settings.enabled:
+      return
+    now = time.monotonic()
+    with self._condition:
+      self._in_flight -= 1
+      self._adapt(slot, now)
+      self._condition.notify_all()
+      waiters, self._async_waiters = self._async_waiters, []
+    for loop, waiter in waiters:
+      loop.call_soon_threadsafe(_wake, waiter)
+
+  def _adapt(self, slot: Slot, now: float) -> None:
+    """Applies AIMD to the limit. Must be called with the lock held."""
+    previous = self.limit
+    is_error = slot.outcome is not Outcome.SUCCESS
+    self._error_rate += _EWMA_ALPHA * (float(is_error) - self._error_rate)
+
+    if slot.outcome is Outcome.OVERLOADED:
+      if slot.started_at < self._last_decrease:
+        return  # Already backed off for this window
+      self._limit = max(
+        float(self.settings.min_limit),
+        self._limit * self.settings.backoff_factor,
+      )
+      self._last_decrease = now
+      self._decreases += 1
+      self._lowest_limit = min(self._lowest_limit, self.limit)
+      logging.warning(
+        "Concurrency for %s cut from %d to %d after overload",
+        self.model.value,
+        previous,
+        self.limit,
+      )
+      return
+
+    if slot.outcome is not Outcome.SUCCESS:
+      return
+
+    latency = now - slot.started_at
+    latency_ewma = self._latency_ewma.get(slot.role)
+    healthy_latency = (
+      latency_ewma is None
+      or latency <= latency_ewma * self.settings.latency_tolerance
+    )
+    if latency_ewma is None:
+      self._latency_ewma[slot.role] = latency
+    else:
+      self._latency_ewma[slot.role] = latency_ewma + _EWMA_ALPHA * (
+        latency - latency_ewma
+      )
+
+    if not healthy_latency or self._error_rate > self.settings.max_error_rate:
+      return
+    self._limit = min(
+      float(self.settings.max_limit), self._limit + 1.0 / self._limit
+    )
+    if self.limit > previous:
+      self._increases += 1
+      self._peak_limit = max(self._peak_limit, self.limit)
+      logging.info(
+        "Concurrency for %s raised to %d", self.model.value, self.limit
+      )
+
+
+def _wake(waiter: asyncio.Future) -> None:
+  """Resolves an async waiter unless it was cancelled meanwhile."""
+  if not waiter.done():
+    waiter.set_result(None)
+
+
+_settings = ConcurrencySettings()
+_limiters: dict[Model, AdaptiveConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def configure_concurrency(
+  enabled: bool = True,
+  initial_limit: int | None = None,
+  min_limit: int | None = None,
+  max_limit: int | None = None,
+) -> ConcurrencySettings:
+  """Updates the settings used by per-model concurrency limiters.
+
+  Existing limiters are discarded. Should be called once at startup,
+  before any client is used.
+
+  Args:
+      enabled: Whether to gate requests by the adaptive limit.
+      initial_limit: In-flight requests allowed per model at startup.
+      min_limit: Lowest limit the controller may shrink to.
+      max_limit: Highest limit the controller may grow to.
+
+  Returns:
+      The settings now in effect.
+  """
+  global _settings
+
+  changes = {"enabled": enabled}
+  if initial_limit is not None:
+    changes["initial_limit"] = initial_limit
+  if min_limit is not None:
+    changes["min_limit"] = min_limit
+  if max_limit is not None:
+    changes["max_limit"] = max_limit
+
+  with _limiters_lock:
+    _settings = dataclasses.replace(_settings, **changes)
+    _limiters.clear()
+  logging.info(
+    "Adaptive concurrency %s (initial=%d, min=%d, max=%d)",
+    "enabled" if _settings.enabled else "disabled",
+    _settings.initial_limit,
+    _settings.min_limit,
+    _settings.max_limit,
+  )
+  return _settings
+
+
+def get_concurrency_limiter(model: Model) -> AdaptiveConcurrencyLimiter:
+  """Returns the process-wide concurrency limiter for `model`.
+
+  Args:
+      model: The model to limit.
+
+  Returns:
+      The shared AdaptiveConcurrencyLimiter.
+  """
+  with _limiters_lock:
+    limiter = _limiters.get(model)
+    if limiter is None:
+      limiter = AdaptiveConcurrencyLimiter(model, _settings)
+      _limiters[model] = limiter
+    return limiter
+
+
+def get_concurrency_stats() -> dict[str, dict[str, float | int]]:
+  """Returns the stats of every limiter, keyed by model id."""
+  with _limiters_lock:
+    limiters = list(_limiters.values())
+  return {limiter.model.value: limiter.stats() for limiter in limiters}
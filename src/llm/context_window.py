@@ -0,0 +1,91 @@
+"""Pre-flight checks of requests against model context windows."""
+
+from absl import logging
+
+from src import config
+from src.llm import capabilities, tokens
+from src.llm.errors import LlmApiError
+from src.llm.models import Model
+
+
+class ContextWindowExceededError(LlmApiError):
+  """Raised when a prompt leaves no room for a completion in the window."""
+
+
+def context_window(model: Model) -> int:
+  """Returns the model's context window in tokens.
+
+  A window set in config.MODEL_CONTEXT_WINDOWS takes precedence over the
+  one probed from the API's model list.
+  """
+  configured = config.MODEL_CONTEXT_WINDOWS.get(model.value)
+  if configured is not None:
+    return configured
+  probed = capabilities.get_capability_cache().get(model).context_length
+  return probed or config.DEFAULT_CONTEXT_WINDOW
+
+
+def completion_budget(model: Model, payload: dict) -> tuple[int, int]:
+  """Returns (estimated prompt tokens, completion tokens that fit).
+
+  The completion budget is the request's max_tokens, lowered to the
+  model's output limit and to what the context window leaves after the
+  prompt and the safety margin.
+
+  Args:
+      model: The model the request is for.
+      payload: The request body.
+  """
+  prompt_tokens = tokens.get_token_estimate_tracker().calibrated(
+    model, tokens.estimate_prompt_tokens(payload)
+  )
+  margin = config.CONTEXT_WINDOW_SAFETY_MARGIN
+  usable = int(context_window(model) * (1 - margin))
+  budget = min(payload["max_tokens"], usable - prompt_tokens)
+  max_output = config.MODEL_MAX_OUTPUT_TOKENS.get(model.value)
+  if max_output is not None:
+    budget = min(budget, max_output)
+  return prompt_tokens, budget
+
+
+def fits(model: Model, payload: dict) -> bool:
+  """Whether the request leaves room for a worthwhile completion."""
+  _, budget = completion_budget(model, payload)
+  return budget >= _min_completion_tokens(payload)
+
+
+def fit_request(model: Model, payload: dict) -> dict:
+  """Returns the request with max_tokens lowered to fit the model.
+
+  Args:
+      model: The model the request is for.
+      payload: The request body. It is not modified.
+
+  Returns:
+      `payload`, or a copy with a smaller max_tokens.
+
+  Raises:
+      ContextWindowExceededError: If the prompt is too long to leave room
+          for a worthwhile completion.
+  """
+  prompt_tokens, budget = completion_budget(model, payload)
+  if budget < _min_completion_tokens(payload):
+    raise ContextWindowExceededError(
+      f"Prompt of about {prompt_tokens} tokens leaves no room for a "
+      f"completion in the {context_window(model)}-token context window "
+      f"of {model.value}."
+    )
+  if budget < payload["max_tokens"]:
+    logging.info(
+      "Lowering max_tokens for %s from %d to %d to fit its limits",
+      model.value,
+      payload["max_tokens"],
+      budget,
+    )
+    return {**payload, "max_tokens": budget}
+  return payload
+
+
+def _min_completion_tokens(payload: dict) -> int:
+  """Returns the fewest completion tokens worth sending the request for."""
+  return min(config.MIN_COMPLETION_TOKENS, payload["max_tokens"])
@@ -0,0 +1,123 @@
+"""Continuation of responses cut off at their max_tokens."""
+
+import dataclasses
+
+from src import config, prompts
+from src.llm.models import LlmResponse
+
+# Bounds of the repeated text trimmed where a continuation overlaps the
+# end of its prefix. Shorter matches are likely coincidences.
+_MIN_OVERLAP_CHARS = 8
+_MAX_OVERLAP_CHARS = 200
+
+
+@dataclasses.dataclass(frozen=True)
+class ContinuationSettings:
+  """Truncation handling settings.
+
+  Attributes:
+      max_continuations: Continuation requests allowed per call. 0 returns
+          truncated responses as they are.
+  """
+
+  max_continuations: int = config.MAX_CONTINUATIONS
+
+
+_settings = ContinuationSettings()
+
+
+def configure_continuations(max_continuations: int) -> ContinuationSettings:
+  """Sets how many continuation requests a truncated call may make.
+
+  Args:
+      max_continuations: Continuation requests allowed per call.
+
+  Returns:
+      The settings now in effect.
+  """
+  global _settings
+
+  _settings = ContinuationSettings(max_continuations=max_continuations)
+  return _settings
+
+
+def get_continuation_settings() -> ContinuationSettings:
+  """Returns the truncation handling settings."""
+  return _settings
+
+
+def continuation_payload(payload: dict, partial_text: str) -> dict:
+  """Returns the request that resumes a truncated response.
+
+  The partial response is replayed as the assistant's turn, followed by
+  an instruction to carry on from where it stopped. For structured
+  output, the schema is dropped and only the missing tail of the JSON is
+  asked for, since a schema would force a fresh document.
+
+  Args:
+      payload: The request that was truncated.
+      partial_text: Everything generated for it so far.
+  """
+  continued = {
+    key: value for key, value in payload.items() if key != "response_format"
+  }
+  instruction = (
+    prompts.JSON_CONTINUATION_PROMPT
+    if payload.get("response_format")
+    else prompts.CONTINUATION_PROMPT
+  )
+  continued["messages"] = [
+    *payload["messages"],
+    {"role": "assistant", "content": partial_text},
+    {"role": "user", "content": instruction.strip()},
+  ]
+  return continued
+
+
+def merge(
+  response: LlmResponse, continuation: LlmResponse, structured: bool
+) -> LlmResponse:
+  """Appends a continuation to the response it resumes.
+
+  Text the continuation repeats from the end of the response is dropped.
+  Times and usage are summed; the finish reason is the continuation's.
+
+  Args:
+      response: The response so far.
+      continuation: The response to the continuation request.
+      structured: Whether the response is JSON, whose continuation may
+          come wrapped in a code fence.
+  """
+  tail = continuation.text
+  if structured:
+    tail = _strip_code_fence(tail)
+  tail = tail[_overlap(response.text, tail) :]
+  usage = response.usage
+  if continuation.usage is not None:
+    usage = continuation.usage if usage is None else usage + continuation.usage
+  return dataclasses.replace(
+    response,
+    text=response.text + tail,
+    elapsed_time=response.elapsed_time + continuation.elapsed_time,
+    finish_reason=continuation.finish_reason,
+    continuations=response.continuations + 1,
+    usage=usage,
+  )
+
+
+def _overlap(text: str, tail: str) -> int:
+  """Returns the length of the longest end of `text` that `tail` repeats."""
+  longest = min(len(text), len(tail), _MAX_OVERLAP_CHARS)
+  for size in range(longest, _MIN_OVERLAP_CHARS - 1, -1):
+    if text.endswith(tail[:size]):
+      return size
+  return 0
+
+
+def _strip_code_fence(text: str) -> str:
+  """Returns `text` without a surrounding Markdown code fence."""
+  stripped = text.strip()
+  if not stripped.startswith("```"):
+    return text
+  stripped = stripped.split("\n", 1)[1] if "\n" in stripped else ""
+  return stripped.removesuffix("```").rstrip()
@@ -0,0 +1,250 @@
+"""Deadline propagation and latency-aware per-call timeouts."""
+
+import contextlib
+import contextvars
+import dataclasses
+import functools
+import time
+from collections.abc import Callable, Iterator
+
+from src import config
+from src.llm import hedging
+from src.llm.errors import LlmApiError
+from src.llm.models import Model
+
+
+class DeadlineExceededError(LlmApiError):
+  """Raised when a call's deadline leaves no time for another attempt."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Deadline:
+  """A point in time by which some work must finish.
+
+  Attributes:
+      expires_at: time.monotonic() value of the deadline.
+      name: What the deadline bounds, e.g. "solver phase", for messages.
+  """
+
+  expires_at: float
+  name: str
+
+  def remaining(self) -> float:
+    """Returns the seconds left, negative once the deadline has passed."""
+    return self.expires_at - time.monotonic()
+
+
+@dataclasses.dataclass(frozen=True)
+class DeadlineSettings:
+  """Deadline budgets and per-call timeout settings.
+
+  Attributes:
+      iteration: Seconds one benchmark iteration may take, or None.
+      solver_phase: Seconds the solver (or theorist) phase may take, or None.
+      judge_phase: Seconds the evaluator (or ranker) phase may take, or None.
+      adaptive_timeouts: Whether non-streamed calls time out at a multiple
+          of their model's observed latency instead of the fixed read
+          timeout.
+      timeout_percentile: Latency percentile the adaptive timeout scales.
+      timeout_multiplier: Multiple of that percentile a call may take.
+      min_timeout: Lower bound of the adaptive timeout, in seconds.
+      max_timeout: Upper bound of the adaptive timeout, in seconds.
+      min_samples: Latencies to observe before adapting a model's timeout.
+  """
+
+  iteration: float | None = None
+  solver_phase: float | None = None
+  judge_phase: float | None = None
+  adaptive_timeouts: bool = True
+  timeout_percentile: float = config.CALL_TIMEOUT_PERCENTILE
+  timeout_multiplier: float = config.CALL_TIMEOUT_MULTIPLIER
+  min_timeout: float = config.CALL_TIMEOUT_MIN
+  max_timeout: float = config.CALL_TIMEOUT_MAX
+  min_samples: int = config.CALL_TIMEOUT_MIN_SAMPLES
+
+
+_settings = DeadlineSettings()
+_current: contextvars.ContextVar[Deadline | None] = contextvars.ContextVar(
+  "llm_deadline", default=None
+)
+
+
+def configure_deadlines(
+  iteration: float | None = None,
+  solver_phase: float | None = None,
+  judge_phase: float | None = None,
+  adaptive_timeouts: bool = True,
+) -> DeadlineSettings:
+  """Sets the deadline budgets and whether call timeouts adapt to latency.
+
+  Args:
+      iteration: Seconds one benchmark iteration may take, or None.
+      solver_phase: Seconds the solver phase may take, or None.
+      judge_phase: Seconds the evaluator or ranker phase may take, or None.
+      adaptive_timeouts: Whether call timeouts follow observed latency.
+
+  Returns:
+      The settings now in effect.
+  """
+  global _settings
+
+  _settings = dataclasses.replace(
+    _settings,
+    iteration=iteration,
+    solver_phase=solver_phase,
+    judge_phase=judge_phase,
+    adaptive_timeouts=adaptive_timeouts,
+  )
+  return _settings
+
+
+def get_deadline_settings() -> DeadlineSettings:
+  """Returns the deadline settings."""
+  return _settings
+
+
+def current_deadline() -> Deadline | None:
+  """Returns the tightest deadline in effect, or None."""
+  return _current.get()
+
+
+@contextlib.contextmanager
+def deadline_scope(
+  seconds: float | None, name: str
+) -> Iterator[Deadline | None]:
+  """Bounds the enclosed work, and every LLM call made in it, by a deadline.
+
+  Scopes nest: the effective deadline is the tightest one in effect. The
+  deadline follows asyncio tasks created inside the scope; work submitted
+  to a thread pool needs `bind_deadline`.
+
+  Args:
+      seconds: Seconds from now until the deadline, or None to only keep
+          an enclosing deadline.
+      name: What the deadline bounds, for log and error messages.
+
+  Yields:
+      The deadline now in effect, or None if there is none.
+  """
+  candidate = None
+  if seconds is not None:
+    candidate = Deadline(time.monotonic() + seconds, name)
+  with within_deadline(candidate) as deadline:
+    yield deadline
+
+
+@contextlib.contextmanager
+def within_deadline(deadline: Deadline | None) -> Iterator[Deadline | None]:
+  """Like deadline_scope, for a deadline that was set earlier.
+
+  Lets work scheduled on any thread run under the deadline of the phase
+  it belongs to.
+
+  Args:
+      deadline: The deadline, or None to only keep an enclosing one.
+
+  Yields:
+      The tightest deadline now in effect, or None if there is none.
+  """
+  current = _current.get()
+  if deadline is not None and (
+    current is None or deadline.expires_at < current.expires_at
+  ):
+    current = deadline
+  token = _current.set(current)
+  try:
+    yield current
+  finally:
+    _current.reset(token)
+
+
+def bind_deadline(fn: Callable) -> Callable:
+  """Returns `fn` bound to the current deadline, to run on another thread."""
+  return functools.partial(contextvars.copy_context().run, fn)
+
+
+def remaining_time() -> float | None:
+  """Returns the seconds left before the current deadline, or None."""
+  deadline = _current.get()
+  return None if deadline is None else deadline.remaining()
+
+
+def deadline_expired() -> bool:
+  """Whether the current deadline, if any, has passed."""
+  remaining = remaining_time()
+  return remaining is not None and remaining <= 0
+
+
+def attempt_timeout(
+  model: Model, role: str | None, default: float, adaptive: bool = True
+) -> float:
+  """Returns the read timeout for the next attempt of a call to `model`.
+
+  Once the model has enough latency samples in `role`, and adaptive
+  timeouts are on, the timeout is a multiple of its latency percentile in
+  that role; otherwise it is `default`. Either way it is capped by the
+  current deadline.
+
+  Args:
+      model: The model being called.
+      role: The client role, e.g. "solver" or "evaluator".
+      default: The configured read timeout in seconds.
+      adaptive: Whether the timeout may follow observed latency. Streamed
+          calls pass False, since their read timeout bounds idle gaps
+          rather than the whole response.
+
+  Raises:
+      DeadlineExceededError: If the current deadline has passed.
+  """
+  timeout = default
+  if adaptive and _settings.adaptive_timeouts:
+    latencies = hedging.get_hedge_policy(model, role).latencies
+    if len(latencies) >= _settings.min_samples:
+      latency = latencies.percentile(_settings.timeout_percentile)
+      timeout = min(
+        max(latency * _settings.timeout_multiplier, _settings.min_timeout),
+        _settings.max_timeout,
+      )
+  return _cap_to_deadline(model, timeout)
+
+
+def ensure_time_for_retry(
+  model: Model, role: str | None, backoff: float
+) -> None:
+  """Raises unless the current deadline leaves room for another attempt.
+
+  Another attempt needs the backoff plus the model's median latency in
+  `role` (or the minimum call timeout while that is unknown).
+
+  Args:
+      model: The model being called.
+      role: The client role, e.g. "solver" or "evaluator".
+      backoff: Seconds the caller will sleep before the attempt.
+
+  Raises:
+      DeadlineExceededError: If the attempt could not finish in time.
+  """
+  deadline = _current.get()
+  if deadline is None:
+    return
+  median = hedging.get_hedge_policy(model, role).latencies.percentile(50)
+  needed = backoff + (median if median is not None else _settings.min_timeout)
+  remaining = deadline.remaining()
+  if remaining < needed:
+    raise DeadlineExceededError(
+      f"{deadline.name} deadline leaves {max(remaining, 0):.1f}s, not "
+      f"enough for another attempt at {model.value} (needs {needed:.1f}s)."
+    )
+
+
+def _cap_to_deadline(model: Model, timeout: float) -> float:
+  """Returns `timeout`, lowered to the time left before the deadline."""
+  deadline = _current.get()
+  if deadline is None:
+    return timeout
+  remaining = deadline.remaining()
+  if remaining <= 0:
+    raise DeadlineExceededError(
+      f"{deadline.name} deadline passed before calling {model.value}."
+    )
+  return min(timeout, remaining)
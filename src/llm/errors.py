@@ -0,0 +1,5 @@
+"""Exceptions raised by the LLM clients."""
+
+
+class LlmApiError(Exception):
+  """Raised when the LLM API call fails after all retries."""
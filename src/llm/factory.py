@@ -1,7 +1,8 @@
 """Factory functions for creating LLM clients with specific prompts."""
 
 from src import prompts
-from src.llm.client import LlmClient
+from src.llm import token_budgets
+from src.llm.client import BaseLlmClient, LlmClient
 from src.llm.models import Model
 
 # Default models to use for this project
@@ -13,68 +14,159 @@ DEFAULT_MODELS = [
 
 
 def initialize_models(
-  system_prompt: str, models: list[Model] | None = None
-) -> list[LlmClient]:
+  system_prompt: str,
+  models: list[Model] | None = None,
+  client_cls: type[BaseLlmClient] = LlmClient,
+  fallback_model: Model | None = None,
+  **client_kwargs,
+) -> list[BaseLlmClient]:
   """Initializes LLM clients for selected models.
 
   Args:
       system_prompt: The system prompt to use for all clients.
       models: List of Model enums to initialize. If None, uses DEFAULT_MODELS.
+      client_cls: The client class to build, e.g. LlmClient or AsyncLlmClient.
+      fallback_model: Optional model that serves the calls a client's own
+          model fails. Not applied to a client for the fallback model itself.
+      **client_kwargs: Extra keyword arguments for the client constructor.
+          Unless they set max_tokens or reasoning, each client gets the
+          token budget configured for its model and role.
 
   Returns:
-      A list of initialized LlmClient instances.
+      A list of initialized client instances.
   """
   if models is None:
     models = DEFAULT_MODELS
 
+  fallback = None
+  if fallback_model is not None:
+    fallback = client_cls(
+      model=fallback_model,
+      system_prompt=system_prompt,
+      **_with_token_budget(fallback_model, client_kwargs),
+    )
+
   return [
-    LlmClient(model=model, system_prompt=system_prompt) for model in models
+    client_cls(
+      model=model,
+      system_prompt=system_prompt,
+      fallback=fallback if model != fallback_model else None,
+      **_with_token_budget(model, client_kwargs),
+    )
+    for model in models
   ]
 
 
-def get_solvable_models(models: list[Model] | None = None) -> list[LlmClient]:
+def _with_token_budget(model: Model, client_kwargs: dict) -> dict:
+  """Returns the client kwargs with the budget of `model` in its role.
+
+  Explicit max_tokens and reasoning arguments are kept.
+  """
+  budget = token_budgets.token_budget(model, client_kwargs.get("role"))
+  return {
+    "max_tokens": budget.max_tokens,
+    "reasoning": budget.reasoning,
+    **client_kwargs,
+  }
+
+
+def get_solvable_models(
+  models: list[Model] | None = None,
+  client_cls: type[BaseLlmClient] = LlmClient,
+  **client_kwargs,
+) -> list[BaseLlmClient]:
   """Returns a list of models suitable for solving standard physics problems.
 
   Args:
       models: List of Model enums to use. If None, uses DEFAULT_MODELS.
+      client_cls: The client class to build.
+      **client_kwargs: Extra keyword arguments for the client constructor.
 
   Returns:
-      A list of LlmClient instances.
+      A list of client instances.
   """
-  return initialize_models(prompts.PHYSICS_SOLVER_PROMPT, models)
-
-
-def get_unsolvable_models(models: list[Model] | None = None) -> list[LlmClient]:
+  return initialize_models(
+    prompts.PHYSICS_SOLVER_PROMPT,
+    models,
+    client_cls,
+    role="solver",
+    **client_kwargs,
+  )
+
+
+def get_unsolvable_models(
+  models: list[Model] | None = None,
+  client_cls: type[BaseLlmClient] = LlmClient,
+  **client_kwargs,
+) -> list[BaseLlmClient]:
   """Returns a list of models suitable for tackling unsolvable physics problems.
 
   Args:
       models: List of Model enums to use. If None, uses DEFAULT_MODELS.
+      client_cls: The client class to build.
+      **client_kwargs: Extra keyword arguments for the client constructor.
 
   Returns:
-      A list of LlmClient instances.
+      A list of client instances.
   """
-  return initialize_models(prompts.PHYSICS_THEORIST_PROMPT, models)
-
-
-def get_evaluator_models(models: list[Model] | None = None) -> list[LlmClient]:
+  return initialize_models(
+    prompts.PHYSICS_THEORIST_PROMPT,
+    models,
+    client_cls,
+    role="theorist",
+    **client_kwargs,
+  )
+
+
+def get_evaluator_models(
+  models: list[Model] | None = None,
+  client_cls: type[BaseLlmClient] = LlmClient,
+  fallback_model: Model | None = None,
+  **client_kwargs,
+) -> list[BaseLlmClient]:
   """Returns a list of models suitable for evaluating physics problem solutions.
 
   Args:
       models: List of Model enums to use. If None, uses DEFAULT_MODELS.
+      client_cls: The client class to build.
+      fallback_model: Optional model that takes over calls a judge fails.
+      **client_kwargs: Extra keyword arguments for the client constructor.
 
   Returns:
-      A list of LlmClient instances.
+      A list of client instances.
   """
-  return initialize_models(prompts.POINTWISE_EVAL_PROMPT, models)
-
-
-def get_ranking_models(models: list[Model] | None = None) -> list[LlmClient]:
+  return initialize_models(
+    prompts.POINTWISE_EVAL_PROMPT,
+    models,
+    client_cls,
+    fallback_model=fallback_model,
+    role="evaluator",
+    **client_kwargs,
+  )
+
+
+def get_ranking_models(
+  models: list[Model] | None = None,
+  client_cls: type[BaseLlmClient] = LlmClient,
+  fallback_model: Model | None = None,
+  **client_kwargs,
+) -> list[BaseLlmClient]:
   """Returns a list of models suitable for judging physics problem solutions.
 
   Args:
       models: List of Model enums to use. If None, uses DEFAULT_MODELS.
+      client_cls: The client class to build.
+      fallback_model: Optional model that takes over calls a judge fails.
+      **client_kwargs: Extra keyword arguments for the client constructor.
 
   Returns:
-      A list of LlmClient instances.
+      A list of client instances.
   """
-  return initialize_models(prompts.RANKING_EVAL_PROMPT, models)
+  return initialize_models(
+    prompts.RANKING_EVAL_PROMPT,
+    models,
+    client_cls,
+    fallback_model=fallback_model,
+    role="ranker",
+    **client_kwargs,
+  )
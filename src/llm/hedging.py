@@ -0,0 +1,289 @@
+"""Hedged requests: duplicate slow calls to cut tail latency."""
+
+import collections
+import concurrent.futures
+import dataclasses
+import math
+import threading
+
+from src import config
+from src.llm.errors import LlmApiError
+from src.llm.models import Model
+from src.llm.usage import UNKNOWN_ROLE
+
+PRIMARY = "primary"
+HEDGE = "hedge"
+
+
+class AttemptCancelledError(LlmApiError):
+  """Raised by a blocking attempt that lost a hedged call."""
+
+
+class Cancellation:
+  """Lets a hedged call cancel the blocking attempt that lost.
+
+  Cancelling closes the attempt's in-flight response, which interrupts a
+  stream being read, and stops the attempt from retrying. Safe to share
+  across threads.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._cancelled = False
+    self._response = None
+
+  @property
+  def cancelled(self) -> bool:
+    """Whether the attempt has been cancelled."""
+    with self._lock:
+      return self._cancelled
+
+  def cancel(self) -> None:
+    """Cancels the attempt and closes its in-flight response, if any."""
+    with self._lock:
+      self._cancelled = True
+      response, self._response = self._response, None
+    if response is not None:
+      response.close()
+
+  def track(self, response) -> None:
+    """Registers the attempt's in-flight response, to close on cancel.
+
+    Args:
+        response: The requests.Response being read.
+
+    Raises:
+        AttemptCancelledError: If the attempt was already cancelled. The
+            response is closed first.
+    """
+    with self._lock:
+      cancelled = self._cancelled
+      if not cancelled:
+        self._response = response
+    if cancelled:
+      response.close()
+      raise AttemptCancelledError("The hedged call was already won.")
+
+  def check(self) -> None:
+    """Raises AttemptCancelledError if the attempt was cancelled."""
+    if self.cancelled:
+      raise AttemptCancelledError("The hedged call was already won.")
+
+
+@dataclasses.dataclass(frozen=True)
+class HedgeSettings:
+  """Settings shared by every per-model hedging policy.
+
+  Attributes:
+      enabled: Whether slow calls are hedged at all.
+      percentile: Latency percentile after which a hedge is fired.
+      budget_ratio: Maximum hedges per primary call. Capped at 1.0, so
+          hedging can at most double the spend on a model.
+      min_samples: Latencies to observe before hedging a model.
+      window: Number of recent latencies the percentile is computed over.
+  """
+
+  enabled: bool = False
+  percentile: float = config.HEDGE_PERCENTILE
+  budget_ratio: float = config.HEDGE_BUDGET_RATIO
+  min_samples: int = config.HEDGE_MIN_SAMPLES
+  window: int = config.HEDGE_LATENCY_WINDOW
+
+
+class LatencyTracker:
+  """Keeps a sliding window of call latencies for percentile estimates."""
+
+  def __init__(self, window: int):
+    """Initializes an empty tracker.
+
+    Args:
+        window: Number of most recent latencies to keep.
+    """
+    self._latencies: collections.deque[float] = collections.deque(
+      maxlen=window
+    )
+    self._lock = threading.Lock()
+
+  def __len__(self) -> int:
+    return len(self._latencies)
+
+  def record(self, seconds: float) -> None:
+    """Adds one observed latency."""
+    with self._lock:
+      self._latencies.append(seconds)
+
+  def percentile(self, percentile: float) -> float | None:
+    """Returns the nearest-rank percentile, or None with no samples.
+
+    Args:
+        percentile: The percentile to compute, between 0 and 100.
+    """
+    with self._lock:
+      if not self._latencies:
+        return None
+      ordered = sorted(self._latencies)
+    rank = math.ceil(percentile / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class ModelHedgePolicy:
+  """Decides when, and whether, to hedge a call to one model in one role.
+
+  A model's latency depends on what it is asked: an evaluator grading a
+  batch of responses takes far longer than a solver answering a question,
+  so each role gets its own latency window and hedge budget.
+
+  Attributes:
+      model: The model this policy applies to.
+      role: The client role this policy applies to.
+      settings: The hedging settings.
+      latencies: Recent latencies of successful calls to the model in the
+          role.
+  """
+
+  def __init__(self, model: Model, role: str, settings: HedgeSettings):
+    """Initializes the policy with an empty latency window and budget.
+
+    Args:
+        model: The model this policy applies to.
+        role: The client role this policy applies to.
+        settings: The hedging settings.
+    """
+    self.model = model
+    self.role = role
+    self.settings = settings
+    self.latencies = LatencyTracker(settings.window)
+    self._primaries = 0
+    self._hedges = 0
+    self._hedge_wins = 0
+    self._lock = threading.Lock()
+
+  def hedge_delay(self) -> float | None:
+    """Returns how long to wait before hedging a new call.
+
+    Also counts the call against the hedge budget.
+
+    Returns:
+        Seconds after which to fire a hedge, or None if these calls should
+        not be hedged (hedging disabled or too few samples yet).
+    """
+    if not self.settings.enabled:
+      return None
+    with self._lock:
+      self._primaries += 1
+    if len(self.latencies) < self.settings.min_samples:
+      return None
+    return self.latencies.percentile(self.settings.percentile)
+
+  def try_hedge(self) -> bool:
+    """Spends one hedge from the budget, if any is left."""
+    ratio = min(self.settings.budget_ratio, 1.0)
+    with self._lock:
+      if self._hedges + 1 > ratio * self._primaries:
+        return False
+      self._hedges += 1
+      return True
+
+  def record_winner(self, winning_attempt: str) -> None:
+    """Counts which attempt of a hedged call finished first."""
+    if winning_attempt == HEDGE:
+      with self._lock:
+        self._hedge_wins += 1
+
+  def stats(self) -> dict[str, float | int | None]:
+    """Returns the hedge counters and the current hedge delay."""
+    with self._lock:
+      primaries, hedges, wins = self._primaries, self._hedges, self._hedge_wins
+    return {
+      "calls": primaries,
+      "hedges": hedges,
+      "hedge_wins": wins,
+      "hedge_delay": self.latencies.percentile(self.settings.percentile),
+    }
+
+  def hedge_payload(self, payload: dict) -> dict:
+    """Returns the request body for a hedge of `payload`.
+
+    Routes the hedge through the model's alternate providers when
+    config.HEDGE_PROVIDER_ROUTES lists some.
+    """
+    route = config.HEDGE_PROVIDER_ROUTES.get(self.model.value)
+    if not route:
+      return payload
+    return {**payload, "provider": {"order": list(route)}}
+
+
+_settings = HedgeSettings()
+_policies: dict[tuple[Model, str], ModelHedgePolicy] = {}
+_policies_lock = threading.Lock()
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+
+def configure_hedging(
+  enabled: bool,
+  percentile: float | None = None,
+  budget_ratio: float | None = None,
+) -> HedgeSettings:
+  """Updates the hedging settings and resets every hedging policy.
+
+  Args:
+      enabled: Whether to hedge slow calls.
+      percentile: Latency percentile after which a hedge is fired.
+      budget_ratio: Maximum hedges per primary call, at most 1.0.
+
+  Returns:
+      The settings now in effect.
+  """
+  global _settings
+
+  changes = {"enabled": enabled}
+  if percentile is not None:
+    changes["percentile"] = percentile
+  if budget_ratio is not None:
+    changes["budget_ratio"] = min(budget_ratio, 1.0)
+
+  with _policies_lock:
+    _settings = dataclasses.replace(_settings, **changes)
+    _policies.clear()
+  return _settings
+
+
+def get_hedge_policy(
+  model: Model, role: str | None = None
+) -> ModelHedgePolicy:
+  """Returns the process-wide hedging policy for `model` in `role`.
+
+  Args:
+      model: The model being called.
+      role: The client role, e.g. "solver" or "evaluator".
+  """
+  key = (model, role or UNKNOWN_ROLE)
+  with _policies_lock:
+    policy = _policies.get(key)
+    if policy is None:
+      policy = ModelHedgePolicy(model, key[1], _settings)
+      _policies[key] = policy
+    return policy
+
+
+def get_hedge_stats() -> dict[tuple[str, str], dict[str, float | int | None]]:
+  """Returns the stats of every hedging policy, keyed by (model id, role)."""
+  with _policies_lock:
+    policies = list(_policies.values())
+  return {
+    (policy.model.value, policy.role): policy.stats() for policy in policies
+  }
+
+
+def get_executor() -> concurrent.futures.ThreadPoolExecutor:
+  """Returns the thread pool that runs hedged blocking calls."""
+  global _executor
+
+  with _policies_lock:
+    if _executor is None:
+      # Each hedged call runs its primary and at most one hedge here.
+      _executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=2 * config.HTTP_POOL_SIZE,
+        thread_name_prefix="llm-hedge",
+      )
+    return _executor
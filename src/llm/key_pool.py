@@ -0,0 +1,283 @@
+"""Pool of API keys that spreads requests over each key's own limits."""
+
+import contextlib
+import functools
+import os
+import re
+import threading
+from collections.abc import Iterator, Sequence
+
+import dotenv
+import requests
+from absl import logging
+
+from src.llm import rate_limit, transport
+from src.llm.errors import LlmApiError
+from src.llm.models import Model
+
+# Statuses that mean the key itself is unusable: invalid (401), out of
+# credits (402), or over its spending limit (403 with this message).
+_INVALID_KEY_STATUS = 401
+_NO_CREDITS_STATUS = 402
+_FORBIDDEN_STATUS = 403
+_KEY_LIMIT_MESSAGE = "Key limit exceeded"
+# OpenRouter answers a request that costs more than the credit left with a
+# 402 saying how many tokens the key can still afford. A positive amount
+# means the request is too large, not that the key is spent.
+_AFFORDABLE_TOKENS = re.compile(r"can only afford (-?\d+)")
+
+
+class NoUsableKeyError(LlmApiError):
+  """Raised when every key in the pool has been disabled."""
+
+
+class ApiKey:
+  """One API key with its load, spend and health.
+
+  Attributes:
+      key: The secret key. Never logged; use `label` instead.
+      id: Short id the key's rate limiters are kept under.
+      label: The id and the last characters of the key, for logs.
+      in_flight: Requests currently sent with the key.
+      calls: Requests sent with the key so far.
+      spent: Cost in USD of the calls made with the key.
+      credit_limit: Credit left on the key when the run started, in USD,
+          or None if unknown or unlimited.
+      disabled_reason: Why the key was taken out of the pool, or None.
+  """
+
+  def __init__(self, key: str, index: int):
+    """Initializes a healthy, idle key.
+
+    Args:
+        key: The secret key.
+        index: Position of the key in the pool.
+    """
+    self.key = key
+    self.id = f"key{index}"
+    # Short keys (e.g. placeholders for the mock server) are not shown.
+    self.label = f"{self.id} (...{key[-4:]})" if len(key) > 8 else self.id
+    self.in_flight = 0
+    self.calls = 0
+    self.spent = 0.0
+    self.credit_limit: float | None = None
+    self.disabled_reason: str | None = None
+
+  @property
+  def remaining_credit(self) -> float | None:
+    """Credit left on the key in USD, or None if unknown."""
+    if self.credit_limit is None:
+      return None
+    return self.credit_limit - self.spent
+
+
+class KeyPool:
+  """Hands out the least-loaded healthy key for each request attempt.
+
+  A key is chosen per attempt: keys not paused by rate-limit headers for
+  the model come first, then those with the fewest requests in flight,
+  then those used least. Keys that turn out invalid, out of credit or
+  over their limit are disabled, and the attempt is retried with another
+  key.
+
+  Safe to share across threads and asyncio tasks.
+  """
+
+  def __init__(self, keys: Sequence[str]):
+    """Initializes the pool.
+
+    Args:
+        keys: The API keys. Duplicates are dropped.
+    """
+    self._keys = [
+      ApiKey(key, i) for i, key in enumerate(dict.fromkeys(keys), 1)
+    ]
+    self._lock = threading.Lock()
+
+  def __len__(self) -> int:
+    return len(self._keys)
+
+  def acquire(self, model: Model) -> ApiKey:
+    """Picks a key for one request to `model` and marks it in flight.
+
+    The caller must pass the key to `release` when the attempt is over;
+    `use` does both.
+
+    Raises:
+        NoUsableKeyError: If every key has been disabled.
+    """
+    with self._lock:
+      healthy = [key for key in self._keys if key.disabled_reason is None]
+      if not healthy:
+        raise NoUsableKeyError(
+          f"No usable API key left for {model.value}: "
+          + "; ".join(
+            f"{key.label}: {key.disabled_reason}" for key in self._keys
+          )
+        )
+      key = min(
+        healthy,
+        key=lambda candidate: (
+          rate_limit.get_rate_limiter(model, candidate.id).blocked_for() > 0,
+          candidate.in_flight,
+          candidate.calls,
+        ),
+      )
+      key.in_flight += 1
+      key.calls += 1
+      return key
+
+  def release(self, key: ApiKey) -> None:
+    """Marks an attempt with a key returned by `acquire` as finished."""
+    with self._lock:
+      key.in_flight -= 1
+
+  @contextlib.contextmanager
+  def use(self, model: Model) -> Iterator[ApiKey]:
+    """Acquires a key for one attempt and releases it afterwards."""
+    key = self.acquire(model)
+    try:
+      yield key
+    finally:
+      self.release(key)
+
+  def record_cost(self, key: ApiKey, cost: float) -> None:
+    """Adds the cost of a call to the key's spend.
+
+    Disables the key once its known credit is used up.
+
+    Args:
+        key: The key the call was sent with.
+        cost: Cost in USD the call was billed.
+    """
+    with self._lock:
+      key.spent += cost
+      remaining = key.remaining_credit
+      if remaining is not None and remaining <= 0:
+        self._disable(key, "credit limit used up")
+
+  def handle_error(self, key: ApiKey, status: int, message: str) -> bool:
+    """Disables `key` if an error response shows the key is unusable.
+
+    A 402 only disables the key when its credit is exhausted: its known
+    limit is used up, or the error leaves it nothing to afford. A 402 for
+    a request larger than the credit left is the request's fault, and is
+    left to fail like any other request error.
+
+    Args:
+        key: The key the request was sent with.
+        status: The HTTP status of the response.
+        message: The parsed error message.
+
+    Returns:
+        True if the key was disabled and the attempt should be repeated
+        with another key.
+    """
+    if status == _NO_CREDITS_STATUS and not self._credit_exhausted(
+      key, message
+    ):
+      return False
+    if status in (_INVALID_KEY_STATUS, _NO_CREDITS_STATUS) or (
+      status == _FORBIDDEN_STATUS and _KEY_LIMIT_MESSAGE in message
+    ):
+      with self._lock:
+        self._disable(key, f"{status}: {message}")
+      return True
+    return False
+
+  def _credit_exhausted(self, key: ApiKey, message: str) -> bool:
+    """Whether a 402 for `key` means it has no credit left."""
+    with self._lock:
+      remaining = key.remaining_credit
+    if remaining is not None and remaining <= 0:
+      return True
+    match = _AFFORDABLE_TOKENS.search(message)
+    return match is None or int(match.group(1)) <= 0
+
+  def fetch_credit_limits(self, base_url: str) -> None:
+    """Looks up the credit left on each key, where the API reports it.
+
+    Uses OpenRouter's `GET /key` endpoint. Keys without a limit, and APIs
+    without the endpoint, are left unlimited.
+
+    Args:
+        base_url: Root of the OpenRouter-compatible API.
+    """
+    url = f"{base_url}/key"
+    session = transport.get_session(url)
+    settings = transport.get_transport_settings()
+    for key in self._keys:
+      try:
+        response = session.get(
+          url,
+          headers={"Authorization": f"Bearer {key.key}"},
+          timeout=(settings.connect_timeout, settings.read_timeout),
+        )
+        if not response.ok:
+          logging.debug(
+            "No credit info for %s (%d)", key.label, response.status_code
+          )
+          continue
+        remaining = (response.json().get("data") or {}).get("limit_remaining")
+      except (requests.exceptions.RequestException, ValueError) as e:
+        logging.debug("Could not fetch credit info for %s: %s", key.label, e)
+        continue
+      if remaining is not None:
+        with self._lock:
+          key.credit_limit = float(remaining) + key.spent
+        logging.info("%s has $%.2f of credit left", key.label, remaining)
+
+  def stats(self) -> dict[str, dict[str, object]]:
+    """Returns calls, spend, remaining credit and state per key label."""
+    with self._lock:
+      return {
+        key.label: {
+          "calls": key.calls,
+          "spent": round(key.spent, 6),
+          "remaining_credit": key.remaining_credit,
+          "disabled": key.disabled_reason,
+        }
+        for key in self._keys
+      }
+
+  def _disable(self, key: ApiKey, reason: str) -> None:
+    """Takes `key` out of the pool. Must be called with the lock held."""
+    if key.disabled_reason is not None:
+      return
+    key.disabled_reason = reason
+    healthy = sum(1 for k in self._keys if k.disabled_reason is None)
+    logging.warning(
+      "Disabling API key %s (%s); %d key(s) left", key.label, reason, healthy
+    )
+
+
+@functools.cache
+def _keys_from_env() -> tuple[str, ...]:
+  """Loads the .env file once per process and returns the OpenRouter keys.
+
+  Reads the comma-separated OPENROUTER_API_KEYS and the single
+  OPENROUTER_API_KEY.
+  """
+  dotenv.load_dotenv()
+  keys = os.getenv("OPENROUTER_API_KEYS", "").split(",")
+  keys.append(os.getenv("OPENROUTER_API_KEY", ""))
+  return tuple(key.strip() for key in keys if key.strip())
+
+
+_pool: KeyPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_key_pool() -> KeyPool:
+  """Returns the process-wide pool of the keys set in the environment."""
+  global _pool
+
+  with _pool_lock:
+    if _pool is None:
+      _pool = KeyPool(_keys_from_env())
+    return _pool
+
+
+def get_key_pool_stats() -> dict[str, dict[str, object]]:
+  """Returns per-key stats of the process-wide pool."""
+  return get_key_pool().stats()
@@ -1,5 +1,6 @@
-"""Model enumerations for LLM clients."""
+"""Model enumerations and result types for LLM clients."""
 
+import dataclasses
 from enum import Enum
 
 
@@ -11,3 +12,108 @@ class Model(str, Enum):
   GPT_5 = "openai/gpt-5"
   GROK_4 = "x-ai/grok-4"
   DEEP_SEEK_3 = "deepseek/deepseek-chat-v3-0324"
+
+
+@dataclasses.dataclass
+class Usage:
+  """Token counts and cost of one or more LLM calls.
+
+  Attributes:
+      prompt_tokens: Input tokens, including cached ones.
+      estimated_prompt_tokens: Input tokens estimated locally before the
+          call, for comparison with prompt_tokens.
+      completion_tokens: Output tokens, including reasoning ones.
+      reasoning_tokens: Output tokens spent on hidden reasoning.
+      cached_tokens: Input tokens served from the provider's prompt cache.
+      cost: Cost in USD (OpenRouter credits).
+  """
+
+  prompt_tokens: int = 0
+  estimated_prompt_tokens: int = 0
+  completion_tokens: int = 0
+  reasoning_tokens: int = 0
+  cached_tokens: int = 0
+  cost: float = 0.0
+
+  @property
+  def total_tokens(self) -> int:
+    """Prompt plus completion tokens."""
+    return self.prompt_tokens + self.completion_tokens
+
+  def __add__(self, other: "Usage") -> "Usage":
+    return Usage(
+      prompt_tokens=self.prompt_tokens + other.prompt_tokens,
+      estimated_prompt_tokens=(
+        self.estimated_prompt_tokens + other.estimated_prompt_tokens
+      ),
+      completion_tokens=self.completion_tokens + other.completion_tokens,
+      reasoning_tokens=self.reasoning_tokens + other.reasoning_tokens,
+      cached_tokens=self.cached_tokens + other.cached_tokens,
+      cost=self.cost + other.cost,
+    )
+
+  @classmethod
+  def from_api(cls, usage: dict) -> "Usage":
+    """Builds a Usage from the `usage` block of an API response.
+
+    Args:
+        usage: The usage dict, possibly empty.
+    """
+    completion_details = usage.get("completion_tokens_details") or {}
+    prompt_details = usage.get("prompt_tokens_details") or {}
+    return cls(
+      prompt_tokens=usage.get("prompt_tokens") or 0,
+      completion_tokens=usage.get("completion_tokens") or 0,
+      reasoning_tokens=completion_details.get("reasoning_tokens") or 0,
+      cached_tokens=prompt_details.get("cached_tokens") or 0,
+      cost=float(usage.get("cost") or 0.0),
+    )
+
+
+@dataclasses.dataclass
+class LlmResponse:
+  """The result of one completed LLM call.
+
+  Attributes:
+      text: The response content.
+      elapsed_time: Seconds the API call took. For cache hits this is the
+          latency recorded when the response was first generated.
+      cache_hit: Whether the response was served from the response cache.
+      lookup_time: Seconds spent looking the request up in the cache.
+      time_to_first_token: Seconds until the first streamed token arrived,
+          or None if the response was not streamed.
+      tokens_per_second: Streamed completion tokens per second after the
+          first token, or None if the response was not streamed.
+      served_model: Id of the model that produced the response. Differs
+          from the client's model when a fallback model served the call.
+      winning_attempt: "primary", or "hedge" when a hedged duplicate of a
+          slow call returned first.
+      provider: The upstream provider OpenRouter routed the call to, or
+          None if unknown (e.g. for cache hits).
+      backend: Name of the API that served the call, e.g. "openrouter"
+          or "local".
+      finish_reason: Why generation stopped, e.g. "stop", or "length" if
+          the response is still cut off at max_tokens. None if unknown.
+      continuations: Continuation requests made to resume the response
+          after it was cut off.
+      usage: Tokens and cost of the API call, or None for cache hits.
+  """
+
+  text: str
+  elapsed_time: float
+  cache_hit: bool = False
+  lookup_time: float = 0.0
+  time_to_first_token: float | None = None
+  tokens_per_second: float | None = None
+  served_model: str | None = None
+  winning_attempt: str = "primary"
+  provider: str | None = None
+  backend: str | None = None
+  finish_reason: str | None = None
+  continuations: int = 0
+  usage: Usage | None = None
+
+  @property
+  def truncated(self) -> bool:
+    """Whether the response ended because it hit its token limit."""
+    return self.finish_reason in ("length", "max_tokens")
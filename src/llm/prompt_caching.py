@@ -0,0 +1,119 @@
+"""Provider prompt-cache breakpoints for chat completion messages."""
+
+import dataclasses
+from collections.abc import Sequence
+
+from src import config
+from src.llm.models import Model
+
+# A user prompt, or its segments in order. Every segment but the last is
+# shared with other calls (e.g. the question block all judges see) and is
+# marked as a cacheable prefix.
+Prompt = str | Sequence[str]
+
+
+@dataclasses.dataclass(frozen=True)
+class PromptCacheSettings:
+  """Prompt caching settings.
+
+  Attributes:
+      enabled: Whether requests carry cache_control breakpoints.
+      cache_control_providers: Model id prefixes of providers that only
+          cache at explicit breakpoints.
+  """
+
+  enabled: bool = True
+  cache_control_providers: tuple[str, ...] = (
+    config.PROMPT_CACHE_CONTROL_PROVIDERS
+  )
+
+
+_settings = PromptCacheSettings()
+
+
+def configure_prompt_caching(enabled: bool) -> PromptCacheSettings:
+  """Enables or disables prompt-cache breakpoints.
+
+  Args:
+      enabled: Whether requests carry cache_control breakpoints.
+
+  Returns:
+      The settings now in effect.
+  """
+  global _settings
+
+  _settings = dataclasses.replace(_settings, enabled=enabled)
+  return _settings
+
+
+def get_prompt_cache_settings() -> PromptCacheSettings:
+  """Returns the prompt caching settings."""
+  return _settings
+
+
+def uses_cache_control(model: Model) -> bool:
+  """Whether requests to `model` should carry cache_control breakpoints."""
+  return _settings.enabled and model.value.startswith(
+    _settings.cache_control_providers
+  )
+
+
+def build_messages(
+  model: Model, system_prompt: str | None, prompt: Prompt
+) -> list[dict]:
+  """Returns the chat messages for a call, static content first.
+
+  The system prompt and shared prompt segments come before the per-call
+  text, so the prefix is identical across calls and providers can serve
+  it from their prompt cache. For providers that need explicit
+  breakpoints, the system prompt and the last shared segment end in a
+  cache_control marker; the text sent is the same either way.
+
+  Args:
+      model: The model being called.
+      system_prompt: The client's system prompt, or None.
+      prompt: The user prompt or its segments.
+
+  Returns:
+      The messages list of the request body.
+  """
+  segments = [prompt] if isinstance(prompt, str) else list(prompt)
+  cache_control = uses_cache_control(model)
+
+  messages = []
+  if system_prompt:
+    messages.append(
+      {
+        "role": "system",
+        "content": (
+          [_text_part(system_prompt, cached=True)]
+          if cache_control
+          else system_prompt
+        ),
+      }
+    )
+  if cache_control and len(segments) > 1:
+    content = [
+      _text_part(segment, cached=i == len(segments) - 2)
+      for i, segment in enumerate(segments)
+    ]
+  else:
+    content = "".join(segments)
+  messages.append({"role": "user", "content": content})
+  return messages
+
+
+def message_text(message: dict) -> str:
+  """Returns the text of a message, whether plain or split into parts."""
+  content = message.get("content") or ""
+  if isinstance(content, str):
+    return content
+  return "".join(part.get("text", "") for part in content)
+
+
+def _text_part(text: str, cached: bool) -> dict:
+  """Returns a text content part, ending a cacheable prefix if `cached`."""
+  part = {"type": "text", "text": text}
+  if cached:
+    part["cache_control"] = {"type": "ephemeral"}
+  return part
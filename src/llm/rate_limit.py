@@ -0,0 +1,265 @@
+"""Process-wide per-model rate limiting shared by every client role."""
+
+import email.utils
+import re
+import threading
+import time
+from collections.abc import Mapping
+
+from absl import logging
+
+from src import config
+from src.llm import tokens
+from src.llm.models import Model
+
+# How long to hold off a model after a 429 that carries no timing headers.
+_DEFAULT_COOLDOWN = 1.0  # In seconds
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+
+
+class TokenBucket:
+  """A continuously refilling token bucket that hands out reservations.
+
+  Callers reserve capacity up front and are told how long to wait before
+  using it. The bucket may go into debt, so concurrent callers queue up in
+  reservation order instead of all retrying at once.
+  """
+
+  def __init__(self, per_minute: float):
+    """Initializes a full bucket.
+
+    Args:
+        per_minute: Refill rate, which is also the bucket capacity.
+    """
+    self.capacity = float(per_minute)
+    self.rate = per_minute / 60.0  # Tokens per second
+    self._level = self.capacity
+    self._updated = time.monotonic()
+
+  def reserve(self, amount: float, now: float) -> float:
+    """Takes `amount` from the bucket.
+
+    Args:
+        amount: Capacity to reserve.
+        now: The current time.monotonic() value.
+
+    Returns:
+        Seconds until the reserved capacity is available.
+    """
+    self._refill(now)
+    self._level -= min(amount, self.capacity)
+    return max(0.0, -self._level / self.rate)
+
+  def refund(self, amount: float, now: float) -> None:
+    """Returns unused capacity (or takes more if `amount` is negative)."""
+    self._refill(now)
+    self._level = min(self.capacity, self._level + amount)
+
+  def _refill(self, now: float) -> None:
+    """Adds the capacity accrued since the last update."""
+    elapsed = now - self._updated
+    self._updated = now
+    self._level = min(self.capacity, self._level + elapsed * self.rate)
+
+
+class ModelRateLimiter:
+  """Requests-per-minute and tokens-per-minute limits for one model.
+
+  Every client for the model acquires from the same limiter before sending
+  (one limiter per API key), and feeds back the rate-limit headers of each
+  response, so a 429 seen by one role pauses all the others instead of each
+  one discovering it alone.
+
+  Attributes:
+      model: The model this limiter guards.
+  """
+
+  def __init__(
+    self,
+    model: Model,
+    requests_per_minute: int | None,
+    tokens_per_minute: int | None,
+  ):
+    """Initializes the limiter.
+
+    Args:
+        model: The model this limiter guards.
+        requests_per_minute: Request budget, or None for no request limit.
+        tokens_per_minute: Token budget, or None for no token limit.
+    """
+    self.model = model
+    self._requests = (
+      TokenBucket(requests_per_minute) if requests_per_minute else None
+    )
+    self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+    self._blocked_until = 0.0  # time.monotonic() value
+    self._lock = threading.Lock()
+
+  def reserve(self, estimated_tokens: int) -> float:
+    """Reserves capacity for one request.
+
+    Args:
+        estimated_tokens: Expected prompt plus completion tokens.
+
+    Returns:
+        Seconds the caller must wait before sending the request.
+    """
+    with self._lock:
+      now = time.monotonic()
+      delay = max(0.0, self._blocked_until - now)
+      if self._requests is not None:
+        delay = max(delay, self._requests.reserve(1, now))
+      if self._tokens is not None:
+        delay = max(delay, self._tokens.reserve(estimated_tokens, now))
+      return delay
+
+  def blocked_for(self) -> float:
+    """Returns the seconds the model stays paused by rate-limit headers."""
+    with self._lock:
+      return max(0.0, self._blocked_until - time.monotonic())
+
+  def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+    """Settles a reservation once the real token usage is known.
+
+    Args:
+        estimated_tokens: The amount passed to `reserve`.
+        actual_tokens: Total tokens the API reported for the request.
+    """
+    if self._tokens is None:
+      return
+    with self._lock:
+      self._tokens.refund(estimated_tokens - actual_tokens, time.monotonic())
+
+  def update_from_headers(
+    self, status_code: int, headers: Mapping[str, str]
+  ) -> None:
+    """Pauses the model according to rate-limit response headers.
+
+    Understands `Retry-After`, OpenRouter's `X-RateLimit-Remaining` /
+    `X-RateLimit-Reset` (epoch milliseconds) and the provider-style
+    `x-ratelimit-remaining-{requests,tokens}` / `x-ratelimit-reset-*` pairs.
+
+    Args:
+        status_code: The HTTP status of the response.
+        headers: The response headers (case-insensitive mapping).
+    """
+    now = time.monotonic()
+    pause = 0.0
+
+    retry_after = parse_retry_after(headers.get("Retry-After"))
+    if retry_after is not None:
+      pause = max(pause, retry_after)
+
+    if headers.get("X-RateLimit-Remaining") == "0":
+      reset = _to_float(headers.get("X-RateLimit-Reset"))
+      if reset is not None:
+        pause = max(pause, reset / 1000.0 - time.time())
+
+    for kind in ("requests", "tokens"):
+      if headers.get(f"x-ratelimit-remaining-{kind}") == "0":
+        reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+        if reset is not None:
+          pause = max(pause, reset)
+
+    if status_code == 429 and pause <= 0:
+      pause = _DEFAULT_COOLDOWN
+
+    if pause > 0:
+      with self._lock:
+        if now + pause > self._blocked_until:
+          self._blocked_until = now + pause
+          logging.warning(
+            "Rate limit reached for %s, pausing all roles for %.2fs",
+            self.model.value,
+            pause,
+          )
+
+
+def parse_retry_after(value: str | None) -> float | None:
+  """Parses a Retry-After header given in seconds or as an HTTP date.
+
+  Args:
+      value: The header value, if present.
+
+  Returns:
+      Seconds to wait, or None if the header is missing or malformed.
+  """
+  if not value:
+    return None
+  seconds = _to_float(value)
+  if seconds is not None:
+    return max(0.0, seconds)
+  try:
+    retry_at = email.utils.parsedate_to_datetime(value)
+  except (TypeError, ValueError):
+    return None
+  return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _parse_duration(value: str | None) -> float | None:
+  """Parses durations such as "1s", "250ms" or "6m0s" into seconds."""
+  if not value:
+    return None
+  seconds = _to_float(value)
+  if seconds is not None:
+    return seconds
+  parts = _DURATION_PART.findall(value)
+  if not parts:
+    return None
+  scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+  return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def _to_float(value: str | None) -> float | None:
+  """Returns `value` as a float, or None if it is not a plain number."""
+  try:
+    return float(value)
+  except (TypeError, ValueError):
+    return None
+
+
+def estimate_request_tokens(payload: dict) -> int:
+  """Estimates the tokens a request may consume against a TPM budget.
+
+  Counts the estimated prompt tokens plus the full completion budget, the
+  same way providers reserve capacity.
+
+  Args:
+      payload: The request body.
+
+  Returns:
+      The estimated token count.
+  """
+  return tokens.estimate_prompt_tokens(payload) + payload.get("max_tokens", 0)
+
+
+_limiters: dict[tuple[Model, str | None], ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+  model: Model, key_id: str | None = None
+) -> ModelRateLimiter:
+  """Returns the process-wide limiter for `model`, creating it if needed.
+
+  Limits come from config.MODEL_RATE_LIMITS, falling back to the default
+  requests/tokens per minute. Each API key gets its own limiter, since
+  providers enforce limits per key.
+
+  Args:
+      model: The model to limit.
+      key_id: Id of the API key the requests are sent with, or None.
+
+  Returns:
+      The shared ModelRateLimiter.
+  """
+  with _limiters_lock:
+    limiter = _limiters.get((model, key_id))
+    if limiter is None:
+      requests_per_minute, tokens_per_minute = config.MODEL_RATE_LIMITS.get(
+        model.value,
+        (config.DEFAULT_REQUESTS_PER_MINUTE, config.DEFAULT_TOKENS_PER_MINUTE),
+      )
+      limiter = ModelRateLimiter(model, requests_per_minute, tokens_per_minute)
+      _limiters[(model, key_id)] = limiter
+    return limiter
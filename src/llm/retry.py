@@ -0,0 +1,333 @@
+"""Retry policy: error classification, backoff and a global retry budget."""
+
+import collections
+import dataclasses
+import enum
+import json
+import random
+import threading
+import time
+from collections.abc import Callable
+
+from src import config
+
+
+class ErrorClass(str, enum.Enum):
+  """How an attempt ended, as far as retrying is concerned."""
+
+  SUCCESS = "success"
+  RATE_LIMITED = "rate_limited"  # Retry, honoring any Retry-After
+  TRANSIENT = "transient"  # Overload, server or network error; retry
+  FATAL = "fatal"  # The same request would fail again
+
+
+# HTTP statuses worth retrying. Other 4xx statuses are fatal; 5xx statuses
+# other than those that mean "not supported" are transient.
+_STATUS_CLASSES: dict[int, ErrorClass] = {
+  408: ErrorClass.TRANSIENT,  # Request timeout
+  425: ErrorClass.TRANSIENT,  # Too early
+  429: ErrorClass.RATE_LIMITED,
+}
+_FATAL_SERVER_STATUSES = frozenset({501, 505})
+
+# Provider error codes and types that override the status, e.g. an
+# Anthropic "overloaded_error" relayed by OpenRouter as a 400 or 502.
+_ERROR_CODE_CLASSES: dict[str, ErrorClass] = {
+  "rate_limit_exceeded": ErrorClass.RATE_LIMITED,
+  "rate_limit_error": ErrorClass.RATE_LIMITED,
+  "resource_exhausted": ErrorClass.RATE_LIMITED,
+  "overloaded_error": ErrorClass.TRANSIENT,
+  "server_error": ErrorClass.TRANSIENT,
+  "api_error": ErrorClass.TRANSIENT,
+  "timeout": ErrorClass.TRANSIENT,
+  "unavailable": ErrorClass.TRANSIENT,
+  "context_length_exceeded": ErrorClass.FATAL,
+  "invalid_request_error": ErrorClass.FATAL,
+  "insufficient_quota": ErrorClass.FATAL,
+}
+
+
+class RetryPolicy:
+  """Classifies failed attempts and decides how long to wait before retrying.
+
+  Subclass and pass an instance to `configure_retries` (or to a client) to
+  change which errors are retried or how delays are chosen.
+
+  Attributes:
+      max_delay: Cap on the jittered backoff, in seconds.
+      max_retry_after: Longest server-requested delay to wait for, in
+          seconds. Calls asked to wait longer fail instead.
+  """
+
+  def __init__(
+    self,
+    max_delay: float = config.RETRY_MAX_DELAY,
+    max_retry_after: float = config.RETRY_MAX_RETRY_AFTER,
+  ):
+    """Initializes the policy.
+
+    Args:
+        max_delay: Cap on the jittered backoff, in seconds.
+        max_retry_after: Longest server-requested delay to wait for.
+    """
+    self.max_delay = max_delay
+    self.max_retry_after = max_retry_after
+
+  def classify(self, status: int, error_code: str | None = None) -> ErrorClass:
+    """Classifies a non-2xx response.
+
+    Args:
+        status: The HTTP status code.
+        error_code: The provider error code or type from the body, if any.
+    """
+    if error_code is not None and error_code in _ERROR_CODE_CLASSES:
+      return _ERROR_CODE_CLASSES[error_code]
+    if status in _STATUS_CLASSES:
+      return _STATUS_CLASSES[status]
+    if status >= 500 and status not in _FATAL_SERVER_STATUSES:
+      return ErrorClass.TRANSIENT
+    return ErrorClass.FATAL
+
+  def classify_exception(self, error: Exception) -> ErrorClass:
+    """Classifies a network error, timeout or interrupted stream."""
+    del error
+    return ErrorClass.TRANSIENT
+
+  def next_delay(
+    self,
+    error_class: ErrorClass,
+    previous_delay: float,
+    base_delay: float,
+    retry_after: float | None = None,
+  ) -> float | None:
+    """Returns the seconds to wait before retrying, or None to give up.
+
+    Uses the server's Retry-After when given, with a little jitter so
+    callers told the same time do not retry in lockstep. Otherwise draws
+    a decorrelated jitter delay between `base_delay` and three times the
+    previous delay, capped at max_delay.
+
+    Args:
+        error_class: The class of the failed attempt.
+        previous_delay: The delay before the failed attempt, or
+            `base_delay` after the first attempt.
+        base_delay: The smallest delay to wait.
+        retry_after: Seconds the server asked the caller to wait, if any.
+    """
+    if error_class in (ErrorClass.SUCCESS, ErrorClass.FATAL):
+      return None
+    if retry_after is not None:
+      if retry_after > self.max_retry_after:
+        return None
+      return retry_after + random.uniform(0, base_delay)
+    return min(
+      self.max_delay,
+      random.uniform(base_delay, max(base_delay, previous_delay * 3)),
+    )
+
+
+class RetryBudget:
+  """Caps retries at a fraction of recent calls, across all models.
+
+  Every call deposits `ratio` of a retry; a retry is allowed while the
+  retries in the window stay below that allowance plus `min_retries`.
+  When a provider goes down, calls keep failing fast instead of each
+  multiplying its load by the retry count.
+
+  Attributes:
+      ratio: Retries allowed per call.
+      min_retries: Retries always allowed per window.
+      window: Seconds over which calls and retries are counted.
+  """
+
+  def __init__(
+    self,
+    ratio: float = config.RETRY_BUDGET_RATIO,
+    min_retries: int = config.RETRY_BUDGET_MIN_RETRIES,
+    window: float = config.RETRY_BUDGET_WINDOW,
+  ):
+    """Initializes an empty budget.
+
+    Args:
+        ratio: Retries allowed per call.
+        min_retries: Retries always allowed per window.
+        window: Seconds over which calls and retries are counted.
+    """
+    self.ratio = ratio
+    self.min_retries = min_retries
+    self.window = window
+    self._calls: collections.deque[float] = collections.deque()
+    self._retries: collections.deque[float] = collections.deque()
+    self._denied = 0
+    self._lock = threading.Lock()
+
+  def record_call(self) -> None:
+    """Counts one call (its first attempt) towards the allowance."""
+    with self._lock:
+      self._calls.append(time.monotonic())
+
+  def try_retry(self) -> bool:
+    """Reserves one retry if the budget allows it."""
+    now = time.monotonic()
+    with self._lock:
+      for events in (self._calls, self._retries):
+        while events and events[0] < now - self.window:
+          events.popleft()
+      if len(self._retries) >= self.min_retries + self.ratio * len(
+        self._calls
+      ):
+        self._denied += 1
+        return False
+      self._retries.append(now)
+      return True
+
+  def stats(self) -> dict[str, int]:
+    """Returns the calls and retries in the window and the retries denied."""
+    with self._lock:
+      return {
+        "calls": len(self._calls),
+        "retries": len(self._retries),
+        "denied": self._denied,
+      }
+
+
+@dataclasses.dataclass(frozen=True)
+class Attempt:
+  """Telemetry of one request attempt.
+
+  Attributes:
+      model: The model id called.
+      attempt: The attempt number, starting at 1.
+      status: The HTTP status, or the exception name for network errors.
+      error_class: How the attempt ended.
+      elapsed: Seconds the attempt took.
+      delay: Seconds waited before the next attempt, 0 if there was none.
+      gave_up: Whether the call stopped after this failed attempt.
+  """
+
+  model: str
+  attempt: int
+  status: str
+  error_class: ErrorClass
+  elapsed: float
+  delay: float = 0.0
+  gave_up: bool = False
+
+
+class RetryTelemetry:
+  """Counts the attempts of every call and hands each one to a sink.
+
+  Only per-model counts are kept, so memory stays flat however long the
+  run; the attempts themselves go to the sink, e.g. a CSV writer, as they
+  are made. Safe to share across threads.
+  """
+
+  def __init__(self, sink: Callable[[Attempt], None] | None = None):
+    """Initializes the telemetry with no attempts counted.
+
+    Args:
+        sink: Optional callable every attempt is passed to. Called from
+            the threads and event loops making the requests.
+    """
+    self._sink = sink
+    self._stats: dict[str, dict[str, int]] = collections.defaultdict(
+      lambda: {"attempts": 0, "retries": 0, "gave_up": 0}
+    )
+    self._lock = threading.Lock()
+
+  def record(self, attempt: Attempt) -> None:
+    """Counts one attempt and passes it to the sink."""
+    with self._lock:
+      model_stats = self._stats[attempt.model]
+      model_stats["attempts"] += 1
+      model_stats["retries"] += attempt.attempt > 1
+      model_stats["gave_up"] += attempt.gave_up
+    if self._sink is not None:
+      self._sink(attempt)
+
+  def stats(self) -> dict[str, dict[str, int]]:
+    """Returns attempt, retry and give-up counts per model id."""
+    with self._lock:
+      return {model: dict(stats) for model, stats in self._stats.items()}
+
+
+def error_code(body: str) -> str | None:
+  """Returns the provider error code or type from an error body, if any.
+
+  Looks at OpenRouter's `error.code` and `error.type`, then at the raw
+  provider error OpenRouter relays in `error.metadata.raw`.
+
+  Args:
+      body: The raw response body.
+  """
+  try:
+    error = json.loads(body).get("error")
+  except (json.JSONDecodeError, AttributeError):
+    return None
+  if not isinstance(error, dict):
+    return None
+  for key in ("code", "type"):
+    if isinstance(error.get(key), str):
+      return error[key]
+  raw = (error.get("metadata") or {}).get("raw")
+  if isinstance(raw, str):
+    return error_code(raw)
+  return None
+
+
+_policy = RetryPolicy()
+_budget = RetryBudget()
+_telemetry = RetryTelemetry()
+
+
+def configure_retries(
+  budget_ratio: float = config.RETRY_BUDGET_RATIO,
+  policy: RetryPolicy | None = None,
+) -> RetryPolicy:
+  """Sets the retry policy and resets the retry budget.
+
+  Args:
+      budget_ratio: Retries allowed per call, across all models.
+      policy: The policy clients use unless given their own, or None for
+          the default one.
+
+  Returns:
+      The policy now in effect.
+  """
+  global _policy, _budget
+
+  _policy = policy or RetryPolicy()
+  _budget = RetryBudget(ratio=budget_ratio)
+  return _policy
+
+
+def get_retry_policy() -> RetryPolicy:
+  """Returns the process-wide retry policy."""
+  return _policy
+
+
+def get_retry_budget() -> RetryBudget:
+  """Returns the process-wide retry budget."""
+  return _budget
+
+
+def configure_retry_telemetry(
+  sink: Callable[[Attempt], None] | None = None,
+) -> RetryTelemetry:
+  """Resets the attempt telemetry.
+
+  Args:
+      sink: Optional callable every attempt is passed to as it is made.
+
+  Returns:
+      The telemetry now in effect.
+  """
+  global _telemetry
+
+  _telemetry = RetryTelemetry(sink)
+  return _telemetry
+
+
+def get_retry_telemetry() -> RetryTelemetry:
+  """Returns the process-wide attempt telemetry."""
+  return _telemetry
@@ -0,0 +1,256 @@
+"""OpenRouter provider routing, tuned by the latencies we measure."""
+
+import collections
+import dataclasses
+import random
+import threading
+
+from src import config
+from src.llm.models import Model
+from src.llm.usage import UNKNOWN_ROLE
+
+# Provider sort orders OpenRouter accepts.
+SORT_ORDERS = ("price", "throughput", "latency")
+# Weight of the newest sample in a route's latency average.
+_LATENCY_ALPHA = 0.2
+
+
+@dataclasses.dataclass(frozen=True)
+class ProviderPreferences:
+  """OpenRouter provider routing preferences for one model.
+
+  Attributes:
+      order: Providers to try first, in order.
+      ignore: Providers never to route to.
+      sort: How OpenRouter ranks the remaining providers: "price",
+          "throughput" or "latency". None keeps its default load balancing.
+      allow_fallbacks: Whether providers outside `order` may serve the
+          call when those listed are down or rate limited.
+  """
+
+  order: tuple[str, ...] = ()
+  ignore: tuple[str, ...] = ()
+  sort: str | None = None
+  allow_fallbacks: bool = True
+
+  @classmethod
+  def from_config(cls, entry: dict) -> "ProviderPreferences":
+    """Builds preferences from a config.MODEL_PROVIDER_ROUTING entry.
+
+    Raises:
+        ValueError: If the entry names an unknown sort order.
+    """
+    sort = entry.get("sort")
+    if sort is not None and sort not in SORT_ORDERS:
+      raise ValueError(f"Unknown provider sort order: {sort}")
+    return cls(
+      order=tuple(entry.get("order", ())),
+      ignore=tuple(entry.get("ignore", ())),
+      sort=sort,
+      allow_fallbacks=entry.get("allow_fallbacks", True),
+    )
+
+  def to_payload(self) -> dict | None:
+    """Returns the request's `provider` object, or None if it is empty."""
+    provider = {}
+    if self.order:
+      provider["order"] = list(self.order)
+    if self.ignore:
+      provider["ignore"] = list(self.ignore)
+    if self.sort:
+      provider["sort"] = self.sort
+    if not self.allow_fallbacks:
+      provider["allow_fallbacks"] = False
+    return provider or None
+
+
+@dataclasses.dataclass(frozen=True)
+class RoutingSettings:
+  """Provider routing settings.
+
+  Attributes:
+      default_sort: Sort order for models whose preferences set none.
+      learn_routes: Whether calls are steered to the provider that has
+          been fastest for the model and role so far.
+      exploration: Share of calls left to OpenRouter's own routing while
+          learning, so other providers keep being measured.
+      min_samples: Successful calls a provider needs before it can be
+          preferred.
+  """
+
+  default_sort: str | None = None
+  learn_routes: bool = False
+  exploration: float = config.ROUTING_EXPLORATION
+  min_samples: int = config.ROUTING_MIN_SAMPLES
+
+
+class RouteLatencyTracker:
+  """Measures the latency of each provider per model and client role.
+
+  Safe to share across threads and asyncio tasks.
+  """
+
+  def __init__(self):
+    self._latencies: dict[tuple[str, str, str], float] = {}
+    self._calls: dict[tuple[str, str, str], int] = collections.defaultdict(int)
+    self._lock = threading.Lock()
+
+  def record(
+    self, model: Model, role: str | None, provider: str, seconds: float
+  ) -> None:
+    """Adds the latency of one successful call.
+
+    Args:
+        model: The model called.
+        role: The client role, e.g. "solver" or "evaluator".
+        provider: The provider that served the call.
+        seconds: How long the attempt that succeeded took.
+    """
+    key = (model.value, role or UNKNOWN_ROLE, provider)
+    with self._lock:
+      previous = self._latencies.get(key)
+      self._latencies[key] = (
+        seconds
+        if previous is None
+        else previous + _LATENCY_ALPHA * (seconds - previous)
+      )
+      self._calls[key] += 1
+
+  def fastest(
+    self, model: Model, role: str | None, min_samples: int
+  ) -> str | None:
+    """Returns the provider with the lowest average latency, if known.
+
+    Needs at least two providers with enough calls: a single measured
+    provider is not known to be faster than the ones not yet measured.
+
+    Args:
+        model: The model called.
+        role: The client role.
+        min_samples: Calls a provider needs to be considered.
+    """
+    with self._lock:
+      candidates = [
+        (latency, provider)
+        for (model_name, route_role, provider), latency in (
+          self._latencies.items()
+        )
+        if model_name == model.value
+        and route_role == (role or UNKNOWN_ROLE)
+        and self._calls[(model_name, route_role, provider)] >= min_samples
+      ]
+    if len(candidates) < 2:
+      return None
+    return min(candidates)[1]
+
+  def stats(self) -> list[dict[str, object]]:
+    """Returns calls and average latency per model, role and provider."""
+    with self._lock:
+      return [
+        {
+          "model": model_name,
+          "role": role,
+          "provider": provider,
+          "calls": self._calls[(model_name, role, provider)],
+          "latency_ewma": round(latency, 3),
+        }
+        for (model_name, role, provider), latency in sorted(
+          self._latencies.items()
+        )
+      ]
+
+
+_settings = RoutingSettings()
+_tracker = RouteLatencyTracker()
+
+
+def configure_routing(
+  default_sort: str | None = None, learn_routes: bool = False
+) -> RoutingSettings:
+  """Sets the provider routing settings.
+
+  Args:
+      default_sort: Sort order for models whose preferences set none, or
+          None for OpenRouter's default.
+      learn_routes: Whether to prefer the fastest measured provider.
+
+  Returns:
+      The settings now in effect.
+
+  Raises:
+      ValueError: If `default_sort` is not a known sort order.
+  """
+  global _settings
+
+  if default_sort is not None and default_sort not in SORT_ORDERS:
+    raise ValueError(f"Unknown provider sort order: {default_sort}")
+  _settings = dataclasses.replace(
+    _settings, default_sort=default_sort, learn_routes=learn_routes
+  )
+  return _settings
+
+
+def get_routing_settings() -> RoutingSettings:
+  """Returns the provider routing settings."""
+  return _settings
+
+
+def get_route_tracker() -> RouteLatencyTracker:
+  """Returns the process-wide provider latency tracker."""
+  return _tracker
+
+
+def get_route_stats() -> list[dict[str, object]]:
+  """Returns the measured latency of every route."""
+  return _tracker.stats()
+
+
+def provider_preferences(
+  model: Model, role: str | None = None
+) -> ProviderPreferences:
+  """Returns the routing preferences for one call.
+
+  Starts from the model's configured preferences and the default sort.
+  When learning routes, the fastest measured provider for the model and
+  role is put first, except for a share of calls left to explore. The
+  learned provider is only preferred, never required: fallbacks stay as
+  configured.
+
+  Args:
+      model: The model called.
+      role: The client role.
+  """
+  preferences = ProviderPreferences.from_config(
+    config.MODEL_PROVIDER_ROUTING.get(model.value, {})
+  )
+  if preferences.sort is None and _settings.default_sort is not None:
+    preferences = dataclasses.replace(preferences, sort=_settings.default_sort)
+  if not _settings.learn_routes or random.random() < _settings.exploration:
+    return preferences
+
+  fastest = _tracker.fastest(model, role, _settings.min_samples)
+  if fastest is None or fastest in preferences.ignore:
+    return preferences
+  order = (fastest,) + tuple(p for p in preferences.order if p != fastest)
+  return dataclasses.replace(preferences, order=order)
+
+
+def route_payload(payload: dict, model: Model, role: str | None) -> dict:
+  """Returns the request body with the call's provider preferences.
+
+  Requests that already name providers (e.g. hedges on an alternate
+  route) are left alone. The preferences are added to the body of each
+  attempt rather than the cached request, so response cache keys do not
+  depend on the route.
+
+  Args:
+      payload: The request body. It is not modified.
+      model: The model called.
+      role: The client role.
+  """
+  if "provider" in payload:
+    return payload
+  provider = provider_preferences(model, role).to_payload()
+  if provider is None:
+    return payload
+  return {**payload, "provider": provider}
@@ -0,0 +1,181 @@
+"""Single-flight deduplication of identical in-flight LLM requests."""
+
+import asyncio
+import collections
+import dataclasses
+import threading
+from collections.abc import Awaitable, Callable
+
+from src.llm.models import LlmResponse
+
+
+@dataclasses.dataclass
+class _Call:
+  """One outstanding blocking call that followers can wait on."""
+
+  done: threading.Event = dataclasses.field(default_factory=threading.Event)
+  response: LlmResponse | None = None
+  error: BaseException | None = None
+
+
+class SingleFlight:
+  """Collapses concurrent identical requests into one API call.
+
+  The first caller for a key (the leader) makes the call; callers that
+  arrive with the same key while it is outstanding (followers) wait for it
+  and receive a copy of its response. Followers' copies carry no usage, so
+  the call is only accounted for once. Errors are shared the same way.
+
+  Blocking and asyncio callers are tracked separately, since a thread
+  cannot await a call running on an event loop.
+
+  Attributes:
+      enabled: Whether identical calls are collapsed at all.
+  """
+
+  def __init__(self, enabled: bool = True):
+    """Initializes an empty group.
+
+    Args:
+        enabled: Whether identical calls are collapsed at all.
+    """
+    self.enabled = enabled
+    self._calls: dict[str, _Call] = {}
+    self._async_calls: dict[str, asyncio.Future] = {}
+    self._collapsed: dict[str, int] = collections.defaultdict(int)
+    self._lock = threading.Lock()
+
+  def do(
+    self, key: str, model_name: str, call: Callable[[], LlmResponse]
+  ) -> LlmResponse:
+    """Runs `call`, or waits for an identical call already in flight.
+
+    Args:
+        key: Identifies the request, e.g. cache.request_key(payload).
+        model_name: The model id the collapsed-call counter is kept for.
+        call: Makes the request and returns its response.
+
+    Returns:
+        The call's response, copied for followers.
+    """
+    if not self.enabled:
+      return call()
+
+    with self._lock:
+      shared = self._calls.get(key)
+      if shared is None:
+        shared = self._calls[key] = _Call()
+        leader = True
+      else:
+        self._collapsed[model_name] += 1
+        leader = False
+
+    if not leader:
+      shared.done.wait()
+      if shared.error is not None:
+        raise shared.error
+      return _follower_copy(shared.response)
+
+    try:
+      shared.response = call()
+      return shared.response
+    except BaseException as e:
+      shared.error = e
+      raise
+    finally:
+      with self._lock:
+        del self._calls[key]
+      shared.done.set()
+
+  async def do_async(
+    self,
+    key: str,
+    model_name: str,
+    call: Callable[[], Awaitable[LlmResponse]],
+  ) -> LlmResponse:
+    """Like do, for callers on an asyncio event loop.
+
+    If the leader is cancelled, its followers are not: each of them
+    retries, and the first to do so leads the new call.
+
+    Args:
+        key: Identifies the request, e.g. cache.request_key(payload).
+        model_name: The model id the collapsed-call counter is kept for.
+        call: Returns a coroutine that makes the request.
+
+    Returns:
+        The call's response, copied for followers.
+    """
+    if not self.enabled:
+      return await call()
+
+    while True:
+      shared = self._async_calls.get(key)
+      if shared is None:
+        break
+      with self._lock:
+        self._collapsed[model_name] += 1
+      try:
+        # Shielded so that a cancelled follower does not cancel the leader.
+        return _follower_copy(await asyncio.shield(shared))
+      except asyncio.CancelledError:
+        if not shared.cancelled():
+          raise  # This follower itself was cancelled
+        with self._lock:
+          self._collapsed[model_name] -= 1
+
+    shared = asyncio.get_running_loop().create_future()
+    self._async_calls[key] = shared
+    try:
+      response = await call()
+    except asyncio.CancelledError:
+      shared.cancel()
+      raise
+    except BaseException as e:
+      shared.set_exception(e)
+      # Marks the exception as retrieved when no follower was waiting.
+      shared.exception()
+      raise
+    else:
+      shared.set_result(response)
+      return response
+    finally:
+      del self._async_calls[key]
+
+  def stats(self) -> dict[str, int]:
+    """Returns the number of collapsed calls, keyed by model id."""
+    with self._lock:
+      return dict(self._collapsed)
+
+
+def _follower_copy(response: LlmResponse) -> LlmResponse:
+  """Returns a copy of a shared response that is not billed again."""
+  return dataclasses.replace(response, usage=None)
+
+
+_group = SingleFlight()
+
+
+def configure_single_flight(enabled: bool) -> SingleFlight:
+  """Enables or disables collapsing of identical in-flight requests.
+
+  Args:
+      enabled: Whether identical concurrent calls share one API call.
+
+  Returns:
+      The new process-wide group.
+  """
+  global _group
+
+  _group = SingleFlight(enabled)
+  return _group
+
+
+def get_single_flight() -> SingleFlight:
+  """Returns the process-wide single-flight group."""
+  return _group
+
+
+def get_single_flight_stats() -> dict[str, int]:
+  """Returns the number of collapsed calls, keyed by model id."""
+  return _group.stats()
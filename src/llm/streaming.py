@@ -0,0 +1,137 @@
+"""Server-sent events (SSE) handling for streamed chat completions."""
+
+import json
+import time
+from collections.abc import Callable
+
+from src.llm.models import LlmResponse
+
+# Rough characters-per-token ratio used when the stream reports no usage.
+_CHARS_PER_TOKEN = 4
+
+StreamCallback = Callable[[str], None]
+
+
+class StreamInterruptedError(Exception):
+  """Raised when a stream reports an error or ends before completing."""
+
+
+class StreamAccumulator:
+  """Collects the deltas of one streamed completion and times them.
+
+  Shared by the blocking and asyncio clients: both feed it the decoded SSE
+  lines of the response body as they arrive.
+
+  Attributes:
+      done: Whether the stream has signalled completion.
+      finish_reason: The finish reason of the first choice, once known.
+      usage: The usage block, if the stream reported one.
+      provider: The provider serving the stream, once a chunk names it.
+  """
+
+  def __init__(self, start_time: float, on_chunk: StreamCallback | None = None):
+    """Initializes the accumulator.
+
+    Args:
+        start_time: time.time() when the call (including retries) started.
+        on_chunk: Optional callback invoked with each new piece of text.
+    """
+    self.done = False
+    self.finish_reason: str | None = None
+    self.usage: dict | None = None
+    self.provider: str | None = None
+    self._start_time = start_time
+    self._on_chunk = on_chunk
+    self._parts: list[str] = []
+    self._first_token_time: float | None = None
+
+  @property
+  def has_text(self) -> bool:
+    """Whether any text has been received."""
+    return bool(self._parts)
+
+  def feed_line(self, line: str) -> None:
+    """Processes one line of the SSE body.
+
+    Comment lines (OpenRouter sends ": OPENROUTER PROCESSING" keep-alives)
+    and non-data fields are ignored.
+
+    Args:
+        line: A decoded line, with or without its trailing newline.
+
+    Raises:
+        StreamInterruptedError: If the stream carries an error event or a
+            malformed chunk.
+    """
+    line = line.strip()
+    if not line.startswith("data:"):
+      return
+
+    data = line[len("data:") :].strip()
+    if data == "[DONE]":
+      self.done = True
+      return
+
+    try:
+      chunk = json.loads(data)
+    except json.JSONDecodeError as e:
+      raise StreamInterruptedError(f"Malformed stream chunk: {e}") from e
+    if "error" in chunk:
+      error = chunk["error"]
+      if isinstance(error, dict):
+        error = error.get("message", error)
+      raise StreamInterruptedError(f"Stream error: {error}")
+
+    if chunk.get("provider"):
+      self.provider = chunk["provider"]
+    if chunk.get("usage"):
+      self.usage = chunk["usage"]
+
+    for choice in chunk.get("choices", [])[:1]:
+      text = (choice.get("delta") or {}).get("content")
+      if text:
+        if self._first_token_time is None:
+          self._first_token_time = time.time()
+        self._parts.append(text)
+        if self._on_chunk is not None:
+          self._on_chunk(text)
+      if choice.get("finish_reason"):
+        self.finish_reason = choice["finish_reason"]
+
+  def to_response(self) -> LlmResponse:
+    """Builds the final LlmResponse from everything received.
+
+    Raises:
+        StreamInterruptedError: If the stream ended before completing.
+    """
+    if not self.done and self.finish_reason is None:
+      raise StreamInterruptedError(
+        "Stream ended before the completion finished"
+      )
+
+    end_time = time.time()
+    text = "".join(self._parts)
+    time_to_first_token = None
+    tokens_per_second = None
+    if self._first_token_time is not None:
+      time_to_first_token = self._first_token_time - self._start_time
+      completion_tokens = (self.usage or {}).get("completion_tokens") or (
+        len(text) // _CHARS_PER_TOKEN
+      )
+      generation_span = end_time - self._first_token_time
+      if generation_span > 0:
+        tokens_per_second = completion_tokens / generation_span
+
+    return LlmResponse(
+      text=text,
+      elapsed_time=end_time - self._start_time,
+      time_to_first_token=time_to_first_token,
+      tokens_per_second=tokens_per_second,
+      provider=self.provider,
+      finish_reason=self.finish_reason,
+    )
+
+  def notify_restart(self) -> None:
+    """Tells the chunk callback that the partial text will be regenerated."""
+    if self._on_chunk is not None and self._parts:
+      self._on_chunk("\n\n_(stream interrupted, retrying)_\n\n")
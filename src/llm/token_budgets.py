@@ -0,0 +1,213 @@
+"""Output and reasoning token budgets per model and client role."""
+
+import collections
+import dataclasses
+import math
+import threading
+
+from src import config
+from src.llm.models import Model
+from src.llm.usage import UNKNOWN_ROLE
+
+# OpenRouter reasoning effort levels.
+REASONING_EFFORTS = ("minimal", "low", "medium", "high")
+
+# A reasoning budget: an effort level, a reasoning token cap, or None for
+# the model's default.
+Reasoning = str | int | None
+
+
+@dataclasses.dataclass(frozen=True)
+class TokenBudget:
+  """The configured token budget of one model in one role.
+
+  Attributes:
+      max_tokens: Cap on completion tokens, including any reasoning.
+      reasoning: Reasoning effort level, reasoning token cap, or None to
+          leave the model's reasoning at its default.
+  """
+
+  max_tokens: int
+  reasoning: Reasoning = None
+
+
+def reasoning_payload(reasoning: Reasoning) -> dict | None:
+  """Returns the request's `reasoning` object, or None for the default.
+
+  Raises:
+      ValueError: If `reasoning` is an unknown effort level.
+  """
+  if reasoning is None:
+    return None
+  if isinstance(reasoning, int):
+    return {"max_tokens": reasoning}
+  if reasoning not in REASONING_EFFORTS:
+    raise ValueError(f"Unknown reasoning effort: {reasoning}")
+  return {"effort": reasoning}
+
+
+def token_budget(model: Model, role: str | None) -> TokenBudget:
+  """Returns the configured budget of `model` in `role`.
+
+  Per-model overrides in config.MODEL_MAX_TOKENS take precedence over the
+  role's default in config.ROLE_MAX_TOKENS.
+  """
+  role = role or UNKNOWN_ROLE
+  max_tokens = config.MODEL_MAX_TOKENS.get(model.value, {}).get(
+    role, config.ROLE_MAX_TOKENS.get(role, config.DEFAULT_MAX_TOKENS)
+  )
+  reasoning = config.MODEL_REASONING_BUDGETS.get(model.value, {}).get(role)
+  return TokenBudget(max_tokens=max_tokens, reasoning=reasoning)
+
+
+class BudgetTuner:
+  """Sets max_tokens from the completion lengths observed per model and role.
+
+  While autotuning, a model's cap in a role is the chosen percentile of
+  its recent completion lengths plus a margin, within a floor and the
+  configured budget. Calls cut off at the cap are recorded at the cap,
+  which pushes the percentile, and so the cap, back up.
+
+  Safe to share across threads and asyncio tasks.
+
+  Attributes:
+      enabled: Whether caps are tuned or left as configured.
+      percentile: Completion length percentile the cap is based on.
+      margin: Share added on top of the percentile.
+      min_samples: Completions to observe before tuning a cap.
+      window: Number of recent completion lengths kept per model and role.
+  """
+
+  def __init__(
+    self,
+    enabled: bool = False,
+    percentile: float = config.TOKEN_BUDGET_PERCENTILE,
+    margin: float = config.TOKEN_BUDGET_MARGIN,
+    min_samples: int = config.TOKEN_BUDGET_MIN_SAMPLES,
+    window: int = config.TOKEN_BUDGET_WINDOW,
+  ):
+    """Initializes a tuner without observations.
+
+    Args:
+        enabled: Whether caps are tuned or left as configured.
+        percentile: Completion length percentile the cap is based on.
+        margin: Share added on top of the percentile.
+        min_samples: Completions to observe before tuning a cap.
+        window: Number of recent completion lengths kept.
+    """
+    self.enabled = enabled
+    self.percentile = percentile
+    self.margin = margin
+    self.min_samples = min_samples
+    self.window = window
+    self._lengths: dict[tuple[str, str], collections.deque[int]] = {}
+    self._truncated: dict[tuple[str, str], int] = collections.defaultdict(int)
+    self._lock = threading.Lock()
+
+  def record(
+    self, model: Model, role: str | None, completion_tokens: int, cap: int
+  ) -> None:
+    """Adds the completion length of one call.
+
+    Args:
+        model: The model that served the call.
+        role: The client role.
+        completion_tokens: Completion tokens reported, including reasoning.
+            Calls without a count are ignored.
+        cap: The max_tokens the call was sent with.
+    """
+    if completion_tokens <= 0:
+      return
+    key = (model.value, role or UNKNOWN_ROLE)
+    with self._lock:
+      lengths = self._lengths.get(key)
+      if lengths is None:
+        lengths = collections.deque(maxlen=self.window)
+        self._lengths[key] = lengths
+      lengths.append(completion_tokens)
+      if completion_tokens >= cap:
+        self._truncated[key] += 1
+
+  def max_tokens(self, model: Model, role: str | None, configured: int) -> int:
+    """Returns the cap for the next call of `model` in `role`.
+
+    Args:
+        model: The model called.
+        role: The client role.
+        configured: The client's configured max_tokens, which the tuned cap
+            never exceeds.
+    """
+    if not self.enabled:
+      return configured
+    tuned = self._tuned(model.value, role or UNKNOWN_ROLE)
+    if tuned is None:
+      return configured
+    floor = min(config.MIN_COMPLETION_TOKENS, configured)
+    return min(configured, max(floor, tuned))
+
+  def stats(self) -> dict[tuple[str, str], dict[str, int | None]]:
+    """Returns completion length stats keyed by (model id, role).
+
+    Each entry has the completions observed in the window, their
+    percentile, the calls that hit their cap, and the tuned cap (None
+    until enough completions are seen).
+    """
+    with self._lock:
+      keys = list(self._lengths)
+    stats = {}
+    for model_name, role in keys:
+      with self._lock:
+        lengths = list(self._lengths[(model_name, role)])
+        truncated = self._truncated[(model_name, role)]
+      stats[(model_name, role)] = {
+        "calls": len(lengths),
+        "percentile_tokens": _percentile(lengths, self.percentile),
+        "truncated": truncated,
+        "tuned_max_tokens": self._tuned(model_name, role),
+      }
+    return stats
+
+  def _tuned(self, model_name: str, role: str) -> int | None:
+    """Returns the percentile plus margin, or None with too few samples."""
+    with self._lock:
+      lengths = list(self._lengths.get((model_name, role), ()))
+    if len(lengths) < self.min_samples:
+      return None
+    return math.ceil(_percentile(lengths, self.percentile) * (1 + self.margin))
+
+
+def _percentile(values: list[int], percentile: float) -> int | None:
+  """Returns the nearest-rank percentile of `values`, or None if empty."""
+  if not values:
+    return None
+  ordered = sorted(values)
+  rank = math.ceil(percentile / 100 * len(ordered))
+  return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+_tuner = BudgetTuner()
+
+
+def configure_token_budgets(autotune: bool) -> BudgetTuner:
+  """Enables or disables autotuning and forgets observed completions.
+
+  Args:
+      autotune: Whether caps are set from observed completion lengths.
+
+  Returns:
+      The tuner now in effect.
+  """
+  global _tuner
+
+  _tuner = BudgetTuner(enabled=autotune)
+  return _tuner
+
+
+def get_budget_tuner() -> BudgetTuner:
+  """Returns the process-wide budget tuner."""
+  return _tuner
+
+
+def get_token_budget_stats() -> dict[tuple[str, str], dict[str, int | None]]:
+  """Returns completion length stats keyed by (model id, role)."""
+  return _tuner.stats()
@@ -0,0 +1,122 @@
+"""Fast local prompt token estimates, calibrated against reported usage."""
+
+import collections
+import json
+import math
+import re
+import threading
+
+from src.llm import prompt_caching
+from src.llm.models import Model
+
+# Word runs and single symbols. BPE tokenizers split long words into pieces
+# of about four characters and give most symbols (common in LaTeX) their
+# own token, so counting the two separately tracks real tokenizers much
+# better than characters alone.
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+_CHARS_PER_WORD_TOKEN = 4
+# Role markers and separators the chat template adds around each message.
+_TOKENS_PER_MESSAGE = 4
+# Weight of the newest sample in the per-model calibration average.
+_CALIBRATION_ALPHA = 0.1
+
+
+def estimate_text_tokens(text: str) -> int:
+  """Returns a quick estimate of the tokens in `text`."""
+  return sum(
+    math.ceil(len(piece) / _CHARS_PER_WORD_TOKEN)
+    for piece in _TOKEN_PIECES.findall(text)
+  )
+
+
+def estimate_prompt_tokens(payload: dict) -> int:
+  """Returns an uncalibrated estimate of a request's prompt tokens.
+
+  Counts the messages plus any structured output schema, which providers
+  also feed to the model.
+
+  Args:
+      payload: The request body.
+  """
+  tokens = sum(
+    estimate_text_tokens(prompt_caching.message_text(message))
+    + _TOKENS_PER_MESSAGE
+    for message in payload.get("messages", [])
+  )
+  if payload.get("response_format"):
+    tokens += estimate_text_tokens(json.dumps(payload["response_format"]))
+  return tokens
+
+
+class TokenEstimateTracker:
+  """Compares prompt token estimates with the counts providers report.
+
+  Keeps a moving average of the actual/estimated ratio per model, which
+  corrects later estimates for each model's tokenizer.
+  """
+
+  def __init__(self):
+    self._ratios: dict[str, float] = {}
+    self._calls: dict[str, int] = collections.defaultdict(int)
+    self._estimated: dict[str, int] = collections.defaultdict(int)
+    self._actual: dict[str, int] = collections.defaultdict(int)
+    self._lock = threading.Lock()
+
+  def record(self, model: Model, estimated: int, actual: int) -> None:
+    """Adds one call's estimated and reported prompt tokens.
+
+    Args:
+        model: The model that served the call.
+        estimated: The uncalibrated estimate.
+        actual: The prompt tokens the provider reported. Calls without a
+            count are ignored.
+    """
+    if estimated <= 0 or actual <= 0:
+      return
+    ratio = actual / estimated
+    with self._lock:
+      previous = self._ratios.get(model.value)
+      self._ratios[model.value] = (
+        ratio
+        if previous is None
+        else previous + _CALIBRATION_ALPHA * (ratio - previous)
+      )
+      self._calls[model.value] += 1
+      self._estimated[model.value] += estimated
+      self._actual[model.value] += actual
+
+  def calibrated(self, model: Model, estimated: int) -> int:
+    """Returns `estimated` corrected by the model's observed ratio."""
+    with self._lock:
+      ratio = self._ratios.get(model.value, 1.0)
+    return math.ceil(estimated * ratio)
+
+  def stats(self) -> dict[str, dict[str, float]]:
+    """Returns estimate accuracy per model id.
+
+    Each entry has the calls compared, the summed estimated and actual
+    prompt tokens, and the current calibration ratio.
+    """
+    with self._lock:
+      return {
+        model_name: {
+          "calls": self._calls[model_name],
+          "estimated_tokens": self._estimated[model_name],
+          "actual_tokens": self._actual[model_name],
+          "ratio": round(ratio, 3),
+        }
+        for model_name, ratio in self._ratios.items()
+      }
+
+
+_tracker = TokenEstimateTracker()
+
+
+def get_token_estimate_tracker() -> TokenEstimateTracker:
+  """Returns the process-wide token estimate tracker."""
+  return _tracker
+
+
+def get_token_estimate_stats() -> dict[str, dict[str, float]]:
+  """Returns estimate accuracy per model id."""
+  return _tracker.stats()
@@ -0,0 +1,226 @@
+"""Process-wide pooled HTTP transport shared by all LLM clients."""
+
+import asyncio
+import dataclasses
+import threading
+import urllib.parse
+
+import aiohttp
+import requests
+from absl import logging
+from requests.adapters import HTTPAdapter
+
+from src import config
+
+
+@dataclasses.dataclass(frozen=True)
+class TransportSettings:
+  """Connection pool and timeout settings for the shared transport.
+
+  Attributes:
+      pool_size: Maximum number of pooled keep-alive connections per endpoint.
+      async_pool_size: Maximum number of open connections per endpoint for
+          the asyncio transport.
+      connect_timeout: Seconds to wait for a TCP/TLS connection to open.
+      read_timeout: Seconds to wait for the server between received bytes.
+      stream_idle_timeout: Seconds a streamed response may go without
+          sending data.
+      base_url: Root of the OpenRouter-compatible API, without a trailing
+          slash.
+  """
+
+  pool_size: int = config.HTTP_POOL_SIZE
+  async_pool_size: int = config.HTTP_ASYNC_POOL_SIZE
+  connect_timeout: float = config.HTTP_CONNECT_TIMEOUT
+  read_timeout: float = config.HTTP_READ_TIMEOUT
+  stream_idle_timeout: float = config.HTTP_STREAM_IDLE_TIMEOUT
+  base_url: str = config.LLM_API_BASE_URL
+
+  @property
+  def timeout(self) -> tuple[float, float]:
+    """Returns the (connect, read) timeout tuple used by requests."""
+    return (self.connect_timeout, self.read_timeout)
+
+
+_settings = TransportSettings()
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+# Async sessions are bound to the event loop that created them.
+_async_sessions: dict[tuple[int, str], aiohttp.ClientSession] = {}
+
+
+def _endpoint_key(url: str) -> str:
+  """Returns the scheme://host[:port] part of a URL used to key pools."""
+  parts = urllib.parse.urlsplit(url)
+  return f"{parts.scheme}://{parts.netloc}"
+
+
+def configure_transport(
+  pool_size: int | None = None,
+  connect_timeout: float | None = None,
+  read_timeout: float | None = None,
+  async_pool_size: int | None = None,
+  stream_idle_timeout: float | None = None,
+  base_url: str | None = None,
+) -> TransportSettings:
+  """Updates the shared transport settings.
+
+  Existing sessions are closed so the next request builds a pool with the
+  new size. Should be called once at startup, before any client is used.
+
+  Args:
+      pool_size: Maximum number of pooled connections per endpoint.
+      connect_timeout: Connect timeout in seconds.
+      read_timeout: Read timeout in seconds.
+      async_pool_size: Maximum number of connections per endpoint for the
+          asyncio transport.
+      stream_idle_timeout: Idle timeout for streamed responses in seconds.
+      base_url: Root URL of the OpenRouter-compatible API.
+
+  Returns:
+      The settings now in effect.
+  """
+  global _settings
+
+  with _sessions_lock:
+    _settings = dataclasses.replace(
+      _settings,
+      pool_size=pool_size if pool_size is not None else _settings.pool_size,
+      connect_timeout=(
+        connect_timeout
+        if connect_timeout is not None
+        else _settings.connect_timeout
+      ),
+      read_timeout=(
+        read_timeout if read_timeout is not None else _settings.read_timeout
+      ),
+      async_pool_size=(
+        async_pool_size
+        if async_pool_size is not None
+        else _settings.async_pool_size
+      ),
+      stream_idle_timeout=(
+        stream_idle_timeout
+        if stream_idle_timeout is not None
+        else _settings.stream_idle_timeout
+      ),
+      base_url=(
+        base_url.rstrip("/") if base_url is not None else _settings.base_url
+      ),
+    )
+    for session in _sessions.values():
+      session.close()
+    _sessions.clear()
+
+  logging.info(
+    "HTTP transport configured: %s, pool_size=%d, timeouts=%s",
+    _settings.base_url,
+    _settings.pool_size,
+    _settings.timeout,
+  )
+  return _settings
+
+
+def get_transport_settings() -> TransportSettings:
+  """Returns the shared transport settings."""
+  return _settings
+
+
+def get_session(url: str) -> requests.Session:
+  """Returns the pooled keep-alive session for the endpoint serving `url`.
+
+  Sessions are created lazily, one per scheme/host/port, and shared by
+  every client in the process. requests.Session is safe to share across
+  threads for plain request/response use.
+
+  Args:
+      url: Any URL on the endpoint to talk to.
+
+  Returns:
+      The shared requests.Session for that endpoint.
+  """
+  key = _endpoint_key(url)
+  with _sessions_lock:
+    session = _sessions.get(key)
+    if session is None:
+      session = requests.Session()
+      # Retries are handled by LlmClient, so the adapter never retries.
+      adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=_settings.pool_size,
+        max_retries=0,
+        pool_block=False,
+      )
+      session.mount(f"{key}/", adapter)
+      session.headers.update({"Content-Type": "application/json"})
+      _sessions[key] = session
+      logging.debug("Opened pooled HTTP session for %s", key)
+    return session
+
+
+def close_sessions() -> None:
+  """Closes every pooled session and releases their connections."""
+  with _sessions_lock:
+    for session in _sessions.values():
+      session.close()
+    _sessions.clear()
+
+
+def get_async_session(url: str) -> aiohttp.ClientSession:
+  """Returns the pooled aiohttp session for `url` on the running event loop.
+
+  Must be called from a coroutine. Sessions are created lazily, one per
+  event loop and endpoint, and closed by `close_async_sessions`.
+
+  Args:
+      url: Any URL on the endpoint to talk to.
+
+  Returns:
+      The shared aiohttp.ClientSession for that endpoint.
+  """
+  key = (id(asyncio.get_running_loop()), _endpoint_key(url))
+  with _sessions_lock:
+    session = _async_sessions.get(key)
+    if session is None or session.closed:
+      connector = aiohttp.TCPConnector(limit=_settings.async_pool_size)
+      session = aiohttp.ClientSession(
+        connector=connector,
+        headers={"Content-Type": "application/json"},
+      )
+      _async_sessions[key] = session
+      logging.debug("Opened pooled async HTTP session for %s", key[1])
+    return session
+
+
+def get_async_timeout(
+  streaming: bool = False,
+  read_timeout: float | None = None,
+  total: float | None = None,
+) -> aiohttp.ClientTimeout:
+  """Returns the aiohttp timeout matching the shared transport settings.
+
+  Args:
+      streaming: Whether the request streams its response, in which case
+          the read timeout is the stream idle timeout.
+      read_timeout: Overrides the configured read timeout, in seconds.
+      total: Bound on the whole request including the body, in seconds.
+  """
+  if read_timeout is None:
+    read_timeout = (
+      _settings.stream_idle_timeout if streaming else _settings.read_timeout
+    )
+  return aiohttp.ClientTimeout(
+    total=total,
+    sock_connect=_settings.connect_timeout,
+    sock_read=read_timeout,
+  )
+
+
+async def close_async_sessions() -> None:
+  """Closes the async sessions owned by the running event loop."""
+  loop_id = id(asyncio.get_running_loop())
+  with _sessions_lock:
+    keys = [key for key in _async_sessions if key[0] == loop_id]
+    sessions = [_async_sessions.pop(key) for key in keys]
+  for session in sessions:
+    await session.close()
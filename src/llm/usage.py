@@ -0,0 +1,206 @@
+"""Run-wide token and cost accounting with budget enforcement."""
+
+import collections
+import threading
+
+from absl import logging
+
+from src.llm.models import Model, Usage
+
+# Role recorded for clients that were not built by a role-specific factory.
+UNKNOWN_ROLE = "unknown"
+
+
+class UsageTracker:
+  """Aggregates the usage of every API call, per model and client role.
+
+  Safe to share across threads and asyncio tasks.
+  """
+
+  def __init__(self):
+    self._usage: dict[tuple[str, str], Usage] = collections.defaultdict(Usage)
+    self._calls: dict[tuple[str, str], int] = collections.defaultdict(int)
+    self._prompt_cache_hits: dict[str, int] = collections.defaultdict(int)
+    self._lock = threading.Lock()
+
+  def record(self, model: Model, role: str | None, usage: Usage) -> None:
+    """Adds the usage of one API call.
+
+    Args:
+        model: The model that served the call.
+        role: The client role, e.g. "solver" or "evaluator".
+        usage: The call's usage.
+    """
+    key = (model.value, role or UNKNOWN_ROLE)
+    with self._lock:
+      self._usage[key] += usage
+      self._calls[key] += 1
+      if usage.cached_tokens:
+        self._prompt_cache_hits[model.value] += 1
+
+  def total(self) -> Usage:
+    """Returns the usage summed over all models and roles."""
+    with self._lock:
+      return sum(self._usage.values(), Usage())
+
+  def by_model_and_role(self) -> dict[tuple[str, str], tuple[int, Usage]]:
+    """Returns (call count, usage) keyed by (model id, role)."""
+    with self._lock:
+      return {
+        key: (self._calls[key], usage) for key, usage in self._usage.items()
+      }
+
+  def prompt_cache_stats(self) -> dict[str, dict[str, float]]:
+    """Returns provider prompt-cache hit rates, keyed by model id.
+
+    Each entry has the number of calls, the calls that read from the
+    prompt cache, the fraction of calls that did (hit_rate), and the
+    fraction of prompt tokens served from the cache (cached_token_ratio).
+    """
+    calls: dict[str, int] = collections.defaultdict(int)
+    usage: dict[str, Usage] = collections.defaultdict(Usage)
+    with self._lock:
+      for (model_name, role), model_usage in self._usage.items():
+        calls[model_name] += self._calls[(model_name, role)]
+        usage[model_name] += model_usage
+      hits = dict(self._prompt_cache_hits)
+    return {
+      model_name: {
+        "calls": calls[model_name],
+        "hits": hits.get(model_name, 0),
+        "hit_rate": hits.get(model_name, 0) / calls[model_name],
+        "cached_token_ratio": (
+          model_usage.cached_tokens / model_usage.prompt_tokens
+          if model_usage.prompt_tokens
+          else 0.0
+        ),
+      }
+      for model_name, model_usage in usage.items()
+    }
+
+
+class RunBudget:
+  """Stops new iterations from starting before a run exceeds its budget.
+
+  Before an iteration starts, the spend so far plus the projected spend of
+  every in-flight iteration (including the new one) must stay within the
+  limits. The projection uses the average spend of the iterations that
+  have finished so far, so iterations started before the first one
+  finishes are only checked against the spend so far.
+
+  Attributes:
+      max_cost: Cost limit in USD, or None for no limit.
+      max_tokens: Total token limit, or None for no limit.
+  """
+
+  def __init__(
+    self,
+    tracker: UsageTracker,
+    max_cost: float | None = None,
+    max_tokens: int | None = None,
+  ):
+    """Initializes the budget.
+
+    Args:
+        tracker: The tracker whose totals count against the budget.
+        max_cost: Cost limit in USD, or None for no limit.
+        max_tokens: Total token limit, or None for no limit.
+    """
+    self.max_cost = max_cost
+    self.max_tokens = max_tokens
+    self._tracker = tracker
+    self._in_flight = 0
+    self._finished = 0
+    self._exhausted = False
+    self._lock = threading.Lock()
+
+  @property
+  def limited(self) -> bool:
+    """Whether any limit is set."""
+    return self.max_cost is not None or self.max_tokens is not None
+
+  def try_start_iteration(self) -> bool:
+    """Reserves room for one more iteration if the budget allows it.
+
+    Returns:
+        True if the iteration may start; it must later call
+        finish_iteration. False if the budget would be exceeded.
+    """
+    with self._lock:
+      if self._exhausted:
+        return False
+      if self.limited:
+        spent = self._tracker.total()
+        per_iteration = (
+          _scale(spent, 1 / self._finished) if self._finished else Usage()
+        )
+        projected = spent + _scale(per_iteration, self._in_flight + 1)
+        if self._exceeds(projected):
+          self._exhausted = True
+          logging.warning(
+            "Run budget reached (spent $%.4f, %d tokens; limits: cost %s, "
+            "tokens %s). No new iterations will be started.",
+            spent.cost,
+            spent.total_tokens,
+            self.max_cost,
+            self.max_tokens,
+          )
+          return False
+      self._in_flight += 1
+      return True
+
+  def finish_iteration(self) -> None:
+    """Releases the room reserved by try_start_iteration."""
+    with self._lock:
+      self._in_flight -= 1
+      self._finished += 1
+
+  def _exceeds(self, usage: Usage) -> bool:
+    """Whether `usage` goes over any limit."""
+    return (self.max_cost is not None and usage.cost > self.max_cost) or (
+      self.max_tokens is not None and usage.total_tokens > self.max_tokens
+    )
+
+
+def _scale(usage: Usage, factor: float) -> Usage:
+  """Returns `usage` multiplied by `factor` (token counts are rounded)."""
+  return Usage(
+    prompt_tokens=round(usage.prompt_tokens * factor),
+    estimated_prompt_tokens=round(usage.estimated_prompt_tokens * factor),
+    completion_tokens=round(usage.completion_tokens * factor),
+    reasoning_tokens=round(usage.reasoning_tokens * factor),
+    cached_tokens=round(usage.cached_tokens * factor),
+    cost=usage.cost * factor,
+  )
+
+
+_tracker = UsageTracker()
+_budget = RunBudget(_tracker)
+
+
+def get_usage_tracker() -> UsageTracker:
+  """Returns the process-wide usage tracker."""
+  return _tracker
+
+
+def configure_run_budget(
+  max_cost: float | None = None, max_tokens: int | None = None
+) -> RunBudget:
+  """Sets the run-level cost and token limits.
+
+  Args:
+      max_cost: Cost limit in USD, or None for no limit.
+      max_tokens: Total token limit, or None for no limit.
+
+  Returns:
+      The new run budget.
+  """
+  global _budget
+
+  _budget = RunBudget(_tracker, max_cost, max_tokens)
+  return _budget
+
+
+def get_run_budget() -> RunBudget:
+  """Returns the process-wide run budget."""
+  return _budget
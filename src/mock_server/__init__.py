@@ -0,0 +1,12 @@
+"""Local OpenRouter-compatible mock server for offline load testing."""
+
+from src.mock_server.profiles import MockProfile, ModelProfile, load_profile
+from src.mock_server.server import MockChatServer, serve
+
+__all__ = [
+  "MockChatServer",
+  "MockProfile",
+  "ModelProfile",
+  "load_profile",
+  "serve",
+]
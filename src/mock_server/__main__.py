@@ -0,0 +1,37 @@
+"""Runs the mock chat completions server.
+
+Usage:
+    python -m src.mock_server --port=8080 --profile=mock_profile.json
+    python main.py --llm_base_url=http://127.0.0.1:8080/api/v1
+"""
+
+from typing import Sequence
+
+from absl import app, flags
+
+from src import utils
+from src.mock_server import load_profile, serve
+
+_HOST = flags.DEFINE_string("host", "127.0.0.1", "Interface to listen on.")
+_PORT = flags.DEFINE_integer("port", 8080, "Port to listen on.")
+_PROFILE = flags.DEFINE_string(
+  "profile",
+  None,
+  "JSON file with per-model latency, length and fault settings. Uses "
+  "the built-in defaults if unset.",
+)
+_SEED = flags.DEFINE_integer(
+  "seed", None, "Seed for latency and fault draws, for reproducible runs."
+)
+
+
+def main(argv: Sequence[str]) -> None:
+  """Starts the mock server."""
+  del argv
+
+  utils.setup_colored_logging()
+  serve(_HOST.value, _PORT.value, load_profile(_PROFILE.value), _SEED.value)
+
+
+if __name__ == "__main__":
+  app.run(main)
@@ -0,0 +1,199 @@
+"""Latency, length and fault profiles of the mock chat completions server."""
+
+import dataclasses
+import json
+import math
+import random
+
+
+@dataclasses.dataclass(frozen=True)
+class ModelProfile:
+  """How the mock server behaves for one model.
+
+  Attributes:
+      latency_median: Median seconds to produce a full response.
+      latency_sigma: Spread of the log-normal latency distribution.
+      ttft_fraction: Share of the latency spent before the first streamed
+          token.
+      response_tokens: Mean completion length of free-text answers.
+      response_tokens_stddev: Standard deviation of the completion length.
+      cost_per_million_tokens: USD reported per million prompt plus
+          completion tokens.
+      rate_429: Share of requests answered with 429 Too Many Requests.
+      rate_503: Share of requests answered with 503 Service Unavailable.
+      rate_400: Share of requests answered with 400 Bad Request.
+      rate_timeout: Share of requests that hang without an answer.
+      providers: Upstream providers serving the model, mapped to the
+          factor they scale its latency by. Empty for a single "Mock"
+          provider.
+      unsupported_features: Request features answered with 400 Bad
+          Request: "structured_outputs" (json_schema response formats),
+          "strict" (strict json_schema), "json_object" and "system_role".
+  """
+
+  latency_median: float = 2.0
+  latency_sigma: float = 0.5
+  ttft_fraction: float = 0.2
+  response_tokens: int = 400
+  response_tokens_stddev: int = 150
+  cost_per_million_tokens: float = 5.0
+  rate_429: float = 0.0
+  rate_503: float = 0.0
+  rate_400: float = 0.0
+  rate_timeout: float = 0.0
+  providers: dict[str, float] = dataclasses.field(default_factory=dict)
+  unsupported_features: tuple[str, ...] = ()
+
+  def sample_latency(self, rng: random.Random) -> float:
+    """Draws the seconds one response takes."""
+    return rng.lognormvariate(math.log(self.latency_median), self.latency_sigma)
+
+  def sample_response_tokens(self, rng: random.Random) -> int:
+    """Draws the completion length of one free-text response."""
+    return max(
+      1, round(rng.gauss(self.response_tokens, self.response_tokens_stddev))
+    )
+
+  def sample_provider(
+    self, rng: random.Random, preferences: dict
+  ) -> tuple[str, float]:
+    """Picks the provider serving one request, like OpenRouter would.
+
+    Args:
+        rng: The random source.
+        preferences: The request's `provider` object, possibly empty.
+
+    Returns:
+        The provider name and its latency factor. The first provider in
+        the preferred order that serves the model wins; otherwise one not
+        ignored is drawn at random.
+    """
+    if not self.providers:
+      return "Mock", 1.0
+    for name in preferences.get("order", []):
+      if name in self.providers:
+        return name, self.providers[name]
+    ignored = set(preferences.get("ignore", []))
+    candidates = sorted(set(self.providers) - ignored) or sorted(self.providers)
+    name = rng.choice(candidates)
+    return name, self.providers[name]
+
+  def rejection(self, payload: dict) -> str | None:
+    """Returns why the model rejects a request, or None if it accepts it."""
+    response_format = payload.get("response_format") or {}
+    format_type = response_format.get("type")
+    unsupported = set(self.unsupported_features)
+    if format_type == "json_schema":
+      if "structured_outputs" in unsupported:
+        return "json_schema response format is not supported by this model"
+      strict = response_format.get("json_schema", {}).get("strict")
+      if strict and "strict" in unsupported:
+        return "strict mode is not supported for this model's json_schema"
+    if format_type == "json_object" and "json_object" in unsupported:
+      return "json_object response format is not supported by this model"
+    if "system_role" in unsupported and any(
+      message.get("role") == "system" for message in payload["messages"]
+    ):
+      return "system role messages are not supported by this model"
+    return None
+
+  def supported_parameters(self) -> list[str]:
+    """Returns the model's parameters as listed by GET /models."""
+    parameters = ["max_tokens", "reasoning"]
+    if "structured_outputs" not in self.unsupported_features:
+      parameters.append("structured_outputs")
+    if "json_object" not in self.unsupported_features:
+      parameters.append("response_format")
+    return parameters
+
+  def sample_fault(self, rng: random.Random) -> str | None:
+    """Draws the fault to inject into one request.
+
+    Returns:
+        "429", "503", "400", "timeout", or None for a normal response.
+    """
+    draw = rng.random()
+    for fault, rate in (
+      ("429", self.rate_429),
+      ("503", self.rate_503),
+      ("400", self.rate_400),
+      ("timeout", self.rate_timeout),
+    ):
+      if draw < rate:
+        return fault
+      draw -= rate
+    return None
+
+
+@dataclasses.dataclass(frozen=True)
+class MockProfile:
+  """Behavior of the mock server across all models.
+
+  Attributes:
+      default: Profile of models without an override.
+      models: Per-model profiles, keyed by model id.
+      timeout_hang: Seconds an injected timeout holds the request open
+          before dropping it. Should exceed the client read timeout.
+      retry_after: Seconds advertised in the Retry-After header of
+          injected 429 responses.
+      exhausted_keys: API keys answered with 402, as if out of credits.
+  """
+
+  default: ModelProfile = ModelProfile()
+  models: dict[str, ModelProfile] = dataclasses.field(default_factory=dict)
+  timeout_hang: float = 120.0
+  retry_after: float = 1.0
+  exhausted_keys: tuple[str, ...] = ()
+
+  def for_model(self, model: str) -> ModelProfile:
+    """Returns the profile of `model`."""
+    return self.models.get(model, self.default)
+
+
+def load_profile(path: str | None) -> MockProfile:
+  """Loads a mock profile from a JSON file.
+
+  The file holds a "default" object with ModelProfile fields, an optional
+  "models" object mapping model ids to fields that override the default,
+  and optional "timeout_hang", "retry_after" and "exhausted_keys" values,
+  e.g.:
+
+      {
+        "default": {"latency_median": 1.5, "rate_429": 0.02},
+        "models": {"openai/gpt-5": {"latency_median": 6.0}},
+        "timeout_hang": 90
+      }
+
+  Args:
+      path: The JSON file, or None for the built-in defaults.
+
+  Returns:
+      The loaded MockProfile.
+  """
+  if path is None:
+    return MockProfile()
+
+  with open(path, "r", encoding="utf-8") as f:
+    data = json.load(f)
+
+  default = ModelProfile(**_model_fields(data.get("default", {})))
+  models = {
+    model: dataclasses.replace(default, **_model_fields(overrides))
+    for model, overrides in data.get("models", {}).items()
+  }
+  settings = {
+    key: data[key] for key in ("timeout_hang", "retry_after") if key in data
+  }
+  if "exhausted_keys" in data:
+    settings["exhausted_keys"] = tuple(data["exhausted_keys"])
+  return MockProfile(default=default, models=models, **settings)
+
+
+def _model_fields(fields: dict) -> dict:
+  """Returns ModelProfile fields read from JSON, with lists as tuples."""
+  if "unsupported_features" in fields:
+    fields = {
+      **fields,
+      "unsupported_features": tuple(fields["unsupported_features"]),
+    }
+  return fields
@@ -0,0 +1,448 @@
+"""OpenRouter-compatible mock chat completions server for load testing."""
+
+import collections
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from absl import logging
+
+from src.mock_server.profiles import MockProfile, ModelProfile
+
+# Rough characters-per-token ratio used to report token counts.
+_CHARS_PER_TOKEN = 4
+# Streamed responses are sent in chunks of this many words.
+_WORDS_PER_CHUNK = 8
+_WORDS = (
+  "the energy of the system follows from the hamiltonian so we apply "
+  "conservation of momentum and solve for the eigenvalues of the operator "
+  "giving a ground state wave function with a normalization constant of "
+  "one over the square root of two and therefore the answer is"
+).split()
+
+
+class MockChatServer(ThreadingHTTPServer):
+  """Serves fake chat completions shaped like OpenRouter's.
+
+  Answers POSTs to any path ending in /chat/completions, streamed or not,
+  after a latency drawn from the requested model's profile, and reports
+  token usage and cost. Requests with a json_schema response format get
+  JSON that satisfies the schema. Answers longer than the request's
+  max_tokens are cut off with finish_reason "length". Prompt prefixes that
+  end in a cache_control breakpoint are reported as cached tokens when the
+  same model has seen them before. Requests using a feature the model's
+  profile marks unsupported get a 400. GET /stats returns request
+  counters, and GET /models lists the profiled models and the parameters
+  they support.
+
+  Attributes:
+      profile: Latency, length and fault settings per model.
+  """
+
+  daemon_threads = True
+  # Load tests open hundreds of connections at once.
+  request_queue_size = 1024
+
+  def __init__(
+    self,
+    address: tuple[str, int],
+    profile: MockProfile,
+    seed: int | None = None,
+  ):
+    """Binds the server.
+
+    Args:
+        address: (host, port) to listen on. Port 0 picks a free port.
+        profile: Latency, length and fault settings per model.
+        seed: Seed for the random draws, for reproducible runs.
+    """
+    super().__init__(address, _ChatCompletionsHandler)
+    self.profile = profile
+    self._rng = random.Random(seed)
+    self._rng_lock = threading.Lock()
+    self._counters: dict[str, int] = collections.defaultdict(int)
+    self._cached_prefixes: set[tuple[str, str]] = set()
+
+  def draw(self, model_profile: ModelProfile) -> tuple[str | None, float, int]:
+    """Draws the fault, latency and completion length of one request."""
+    with self._rng_lock:
+      return (
+        model_profile.sample_fault(self._rng),
+        model_profile.sample_latency(self._rng),
+        model_profile.sample_response_tokens(self._rng),
+      )
+
+  def pick_provider(
+    self, model_profile: ModelProfile, preferences: dict
+  ) -> tuple[str, float]:
+    """Picks the provider, and its latency factor, serving one request."""
+    with self._rng_lock:
+      return model_profile.sample_provider(self._rng, preferences)
+
+  def fill_schema(self, schema: dict) -> object:
+    """Returns a random value that satisfies a JSON schema."""
+    with self._rng_lock:
+      return _fill_schema(schema, self._rng)
+
+  def cached_tokens(self, model: str, payload: dict) -> int:
+    """Returns the prompt tokens served from the mock prompt cache.
+
+    The cacheable prefix is the prompt text up to its last cache_control
+    breakpoint. It is a hit when the model has already seen it, and is
+    cached for later requests either way.
+    """
+    prefix = _cacheable_prefix(payload)
+    if not prefix:
+      return 0
+    key = (model, prefix)
+    with self._rng_lock:
+      hit = key in self._cached_prefixes
+      self._cached_prefixes.add(key)
+      if hit:
+        self._counters["prompt_cache_hit"] += 1
+    return len(prefix) // _CHARS_PER_TOKEN if hit else 0
+
+  def models(self) -> list[dict]:
+    """Returns the profiled models as listed by OpenRouter's GET /models."""
+    return [
+      {
+        "id": model,
+        "supported_parameters": model_profile.supported_parameters(),
+      }
+      for model, model_profile in sorted(self.profile.models.items())
+    ]
+
+  def count(self, outcome: str) -> None:
+    """Increments the counter of a request outcome."""
+    with self._rng_lock:
+      self._counters[outcome] += 1
+
+  def stats(self) -> dict[str, int]:
+    """Returns the request counters."""
+    with self._rng_lock:
+      return dict(self._counters)
+
+
+class _ChatCompletionsHandler(BaseHTTPRequestHandler):
+  """Handles one connection to the mock server."""
+
+  protocol_version = "HTTP/1.1"
+  server: MockChatServer
+
+  def log_message(self, format: str, *args) -> None:
+    logging.debug("%s - %s", self.address_string(), format % args)
+
+  def do_GET(self) -> None:
+    if self.path.rstrip("/").endswith("/stats"):
+      self._send_json(200, self.server.stats())
+    elif self.path.rstrip("/").endswith("/models"):
+      self._send_json(200, {"data": self.server.models()})
+    else:
+      self._send_json(404, {"error": {"message": "Not found", "code": 404}})
+
+  def do_POST(self) -> None:
+    length = int(self.headers.get("Content-Length", 0))
+    body = self.rfile.read(length)
+    if not self.path.rstrip("/").endswith("/chat/completions"):
+      self._send_json(404, {"error": {"message": "Not found", "code": 404}})
+      return
+    try:
+      payload = json.loads(body)
+      model = payload["model"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+      self.server.count("400")
+      self._send_error(400, "Request body is not a chat completion request")
+      return
+
+    profile = self.server.profile
+    key = self.headers.get("Authorization", "").removeprefix("Bearer ")
+    if key in profile.exhausted_keys:
+      self.server.count("402")
+      self._send_error(402, "Insufficient credits")
+      return
+    model_profile = profile.for_model(model)
+    rejection = model_profile.rejection(payload)
+    if rejection is not None:
+      self.server.count("unsupported")
+      self._send_error(400, rejection)
+      return
+    fault, latency, completion_tokens = self.server.draw(model_profile)
+    self.server.count(fault or "200")
+    provider, latency_factor = self.server.pick_provider(
+      model_profile, payload.get("provider") or {}
+    )
+    latency *= latency_factor
+
+    if fault == "timeout":
+      time.sleep(profile.timeout_hang)
+      self.close_connection = True
+      return
+    if fault is not None:
+      # Errors come back fast, like a provider rejecting the request.
+      time.sleep(min(latency, 0.1))
+      self._send_error(
+        int(fault),
+        f"Injected {fault} for {model}",
+        {"Retry-After": f"{profile.retry_after:g}"} if fault == "429" else {},
+      )
+      return
+
+    content = self._content(payload, completion_tokens)
+    finish_reason = "stop"
+    max_chars = payload.get("max_tokens", 0) * _CHARS_PER_TOKEN
+    if 0 < max_chars < len(content):
+      # Cut off at max_tokens, like a real provider.
+      content = content[:max_chars]
+      finish_reason = "length"
+    usage = _usage(
+      payload,
+      content,
+      model_profile,
+      self.server.cached_tokens(model, payload),
+    )
+    if payload.get("stream"):
+      self._stream(
+        model, provider, content, finish_reason, usage, latency, model_profile
+      )
+    else:
+      time.sleep(latency)
+      self._send_json(
+        200, _completion(model, provider, content, finish_reason, usage)
+      )
+
+  def _content(self, payload: dict, completion_tokens: int) -> str:
+    """Returns the answer text: schema-conforming JSON or filler prose."""
+    response_format = payload.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+      schema = response_format.get("json_schema", {}).get("schema", {})
+      return json.dumps(self.server.fill_schema(schema))
+    words = (_WORDS * (completion_tokens // len(_WORDS) + 1))[
+      :completion_tokens
+    ]
+    return " ".join(words) + " 42."
+
+  def _stream(
+    self,
+    model: str,
+    provider: str,
+    content: str,
+    finish_reason: str,
+    usage: dict,
+    latency: float,
+    model_profile: ModelProfile,
+  ) -> None:
+    """Sends `content` as server-sent events spread over `latency`."""
+    words = content.split(" ")
+    chunks = [
+      " ".join(words[i : i + _WORDS_PER_CHUNK]) + " "
+      for i in range(0, len(words), _WORDS_PER_CHUNK)
+    ]
+    time_to_first_token = latency * model_profile.ttft_fraction
+    chunk_gap = (latency - time_to_first_token) / max(len(chunks), 1)
+    completion_id = f"gen-{uuid.uuid4().hex}"
+
+    self.send_response(200)
+    self.send_header("Content-Type", "text/event-stream")
+    self.send_header("Transfer-Encoding", "chunked")
+    self.end_headers()
+    try:
+      self._write_chunk(b": OPENROUTER PROCESSING\n\n")
+      time.sleep(time_to_first_token)
+      for text in chunks:
+        self._write_event(
+          _chunk(completion_id, model, provider, {"delta": {"content": text}})
+        )
+        time.sleep(chunk_gap)
+      final = _chunk(completion_id, model, provider, {"delta": {}})
+      final["choices"][0]["finish_reason"] = finish_reason
+      final["usage"] = usage
+      self._write_event(final)
+      self._write_chunk(b"data: [DONE]\n\n")
+      self._write_chunk(b"")
+    except (BrokenPipeError, ConnectionResetError):
+      # The client gave up on the stream, e.g. a hedge won.
+      self.close_connection = True
+
+  def _write_event(self, data: dict) -> None:
+    """Writes one server-sent event carrying `data`."""
+    self._write_chunk(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+  def _write_chunk(self, data: bytes) -> None:
+    """Writes one HTTP/1.1 chunk; an empty one ends the response."""
+    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+    self.wfile.flush()
+
+  def _send_error(
+    self, status: int, message: str, headers: dict[str, str] | None = None
+  ) -> None:
+    """Sends an OpenRouter-style error body."""
+    self._send_json(
+      status,
+      {"error": {"message": message, "code": status}},
+      headers,
+    )
+
+  def _send_json(
+    self, status: int, data: object, headers: dict[str, str] | None = None
+  ) -> None:
+    """Sends a JSON response."""
+    body = json.dumps(data).encode("utf-8")
+    try:
+      self.send_response(status)
+      self.send_header("Content-Type", "application/json")
+      self.send_header("Content-Length", str(len(body)))
+      for name, value in (headers or {}).items():
+        self.send_header(name, value)
+      self.end_headers()
+      self.wfile.write(body)
+    except (BrokenPipeError, ConnectionResetError):
+      self.close_connection = True
+
+
+def _completion(
+  model: str, provider: str, content: str, finish_reason: str, usage: dict
+) -> dict:
+  """Returns a non-streamed chat completion body."""
+  return {
+    "id": f"gen-{uuid.uuid4().hex}",
+    "object": "chat.completion",
+    "created": int(time.time()),
+    "model": model,
+    "provider": provider,
+    "choices": [
+      {
+        "index": 0,
+        "message": {"role": "assistant", "content": content},
+        "finish_reason": finish_reason,
+      }
+    ],
+    "usage": usage,
+  }
+
+
+def _chunk(
+  completion_id: str, model: str, provider: str, choice: dict
+) -> dict:
+  """Returns one streamed chat completion chunk."""
+  return {
+    "id": completion_id,
+    "object": "chat.completion.chunk",
+    "created": int(time.time()),
+    "model": model,
+    "provider": provider,
+    "choices": [{"index": 0, **choice}],
+  }
+
+
+def _usage(
+  payload: dict,
+  content: str,
+  model_profile: ModelProfile,
+  cached_tokens: int = 0,
+) -> dict:
+  """Returns the usage block for a request and its answer."""
+  prompt_chars = sum(
+    len(text) for text, _ in _prompt_parts(payload.get("messages", []))
+  )
+  prompt_tokens = max(1, prompt_chars // _CHARS_PER_TOKEN)
+  completion_tokens = max(1, len(content) // _CHARS_PER_TOKEN)
+  total_tokens = prompt_tokens + completion_tokens
+  return {
+    "prompt_tokens": prompt_tokens,
+    "completion_tokens": completion_tokens,
+    "total_tokens": total_tokens,
+    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    "cost": total_tokens * model_profile.cost_per_million_tokens / 1e6,
+  }
+
+
+def _prompt_parts(messages: list) -> list[tuple[str, bool]]:
+  """Returns (text, ends_breakpoint) for each text part of the messages."""
+  parts = []
+  for message in messages:
+    content = message.get("content") or ""
+    if isinstance(content, str):
+      parts.append((content, False))
+      continue
+    for part in content:
+      parts.append((str(part.get("text", "")), "cache_control" in part))
+  return parts
+
+
+def _cacheable_prefix(payload: dict) -> str:
+  """Returns the prompt text up to its last cache_control breakpoint."""
+  parts = _prompt_parts(payload.get("messages", []))
+  breakpoints = [i for i, (_, cached) in enumerate(parts) if cached]
+  if not breakpoints:
+    return ""
+  return "".join(text for text, _ in parts[: breakpoints[-1] + 1])
+
+
+def _fill_schema(schema: dict, rng: random.Random) -> object:
+  """Returns a random value that satisfies `schema`.
+
+  Understands the subset of JSON schema the benchmark's structured output
+  formats use. Arrays whose description asks for "exactly N" integers that
+  are ranks get a permutation of 1..N, so rankings are valid.
+  """
+  schema_type = schema.get("type")
+  description = schema.get("description", "")
+  if schema_type == "object":
+    return {
+      name: _fill_schema(property_schema, rng)
+      for name, property_schema in schema.get("properties", {}).items()
+    }
+  if schema_type == "array":
+    match = re.search(r"exactly (\d+)", description)
+    size = int(match.group(1)) if match else schema.get("minItems", 3)
+    item_schema = schema.get("items", {})
+    if item_schema.get("type") == "integer" and "rank" in description.lower():
+      ranks = list(range(1, size + 1))
+      rng.shuffle(ranks)
+      return ranks
+    return [_fill_schema(item_schema, rng) for _ in range(size)]
+  if schema_type in ("integer", "number"):
+    low, high = schema.get("minimum"), schema.get("maximum")
+    match = re.search(r"\((\d+)\s*-\s*(\d+)\)", description)
+    if match and low is None and high is None:
+      low, high = int(match.group(1)), int(match.group(2))
+    low = 1 if low is None else low
+    high = 5 if high is None else high
+    if schema_type == "integer":
+      return rng.randint(int(low), int(high))
+    return rng.uniform(low, high)
+  if schema_type == "boolean":
+    return rng.random() < 0.5
+  if "enum" in schema:
+    return rng.choice(schema["enum"])
+  return " ".join(rng.choices(_WORDS, k=12)) + "."
+
+
+def serve(
+  host: str,
+  port: int,
+  profile: MockProfile,
+  seed: int | None = None,
+) -> None:
+  """Runs the mock server until interrupted.
+
+  Args:
+      host: Interface to listen on.
+      port: Port to listen on.
+      profile: Latency, length and fault settings per model.
+      seed: Seed for the random draws, for reproducible runs.
+  """
+  with MockChatServer((host, port), profile, seed) as server:
+    logging.info(
+      "Mock chat completions API listening on http://%s:%d/api/v1",
+      *server.server_address[:2],
+    )
+    try:
+      server.serve_forever()
+    except KeyboardInterrupt:
+      pass
+    logging.info("Mock server request counts: %s", server.stats())
@@ -1,5 +1,6 @@
 """Orchestration module for running benchmark iterations."""
 
+from src.orchestration.async_runner import AsyncBenchmarkRunner
 from src.orchestration.runner import BenchmarkRunner
 
-__all__ = ["BenchmarkRunner"]
+__all__ = ["AsyncBenchmarkRunner", "BenchmarkRunner"]
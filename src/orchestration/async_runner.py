@@ -0,0 +1,260 @@
+"""Benchmark runner that executes iterations on a single asyncio event loop."""
+
+import asyncio
+
+from absl import logging
+
+from src import analysis, llm, loader, reporting
+from src.analysis.models import (
+  SolvableQuestionReport,
+  UnsolvableQuestionReport,
+)
+from src.orchestration import runner
+
+
+class AsyncBenchmarkRunner:
+  """Orchestrates concurrent benchmark iterations with asyncio.
+
+  Every iteration, and every LLM call inside it, is a task on one event
+  loop, so hundreds of requests can be in flight without a thread each.
+  """
+
+  def __init__(
+    self,
+    solver_clients: list[llm.AsyncLlmClient],
+    evaluator_clients: list[llm.AsyncLlmClient],
+    theorist_clients: list[llm.AsyncLlmClient],
+    ranking_clients: list[llm.AsyncLlmClient],
+    solvable_dataset: loader.KaggleLoader,
+    unsolvable_dataset: loader.JsonLoader,
+    output_dir: str,
+    max_concurrency: int = 100,
+    stream_partial_markdown: bool = False,
+    resume_state: reporting.JournalState | None = None,
+  ):
+    """Initialize the benchmark runner.
+
+    Args:
+        solver_clients: Async LLM clients for solving solvable questions.
+        evaluator_clients: Async LLM clients for evaluating solutions.
+        theorist_clients: Async LLM clients for generating hypotheses.
+        ranking_clients: Async LLM clients for ranking hypotheses.
+        solvable_dataset: Dataset of solvable questions.
+        unsolvable_dataset: Dataset of unsolvable questions.
+        output_dir: Directory to save results.
+        max_concurrency: Maximum number of iterations in flight at once.
+        stream_partial_markdown: Whether to mirror streamed solver output
+            into per-model .partial.md files.
+        resume_state: What the run journal of an interrupted run recorded.
+            Its finished questions count towards the iterations, and its
+            unfinished ones run again first, from the start.
+    """
+    self.solver_clients = solver_clients
+    self.evaluator_clients = evaluator_clients
+    self.theorist_clients = theorist_clients
+    self.ranking_clients = ranking_clients
+    self.solvable_dataset = solvable_dataset
+    self.unsolvable_dataset = unsolvable_dataset
+    self.output_dir = output_dir
+    self.max_concurrency = max_concurrency
+    self.stream_partial_markdown = stream_partial_markdown
+    self.resume_state = resume_state
+
+  def run_iterations(
+    self,
+    solvable_iterations: int,
+    unsolvable_iterations: int,
+  ) -> tuple[int, int]:
+    """Run all benchmark iterations on a new event loop.
+
+    Ctrl-C cancels every in-flight request before KeyboardInterrupt
+    propagates.
+
+    Args:
+        solvable_iterations: Number of solvable question iterations to run.
+        unsolvable_iterations: Number of unsolvable question iterations to run.
+
+    Returns:
+        Tuple of (solvable_count, unsolvable_count) of finished questions.
+    """
+    return asyncio.run(
+      self.run_iterations_async(solvable_iterations, unsolvable_iterations)
+    )
+
+  async def run_iterations_async(
+    self,
+    solvable_iterations: int,
+    unsolvable_iterations: int,
+  ) -> tuple[int, int]:
+    """Run all benchmark iterations concurrently on the running loop.
+
+    Each report is written to the results CSVs as its question finishes
+    and is not kept afterwards.
+
+    Args:
+        solvable_iterations: Number of solvable question iterations to run.
+        unsolvable_iterations: Number of unsolvable question iterations to run.
+
+    Returns:
+        Tuple of (solvable_count, unsolvable_count) of finished questions,
+        including those a resumed run had already finished.
+    """
+    logging.info("Running %d solvable iteration(s)", solvable_iterations)
+    logging.info("Running %d unsolvable iteration(s)", unsolvable_iterations)
+
+    finished, iterations = runner.plan_iterations(
+      solvable_iterations, unsolvable_iterations, self.resume_state
+    )
+    if not iterations:
+      logging.warning("No iterations to run")
+      return finished["solvable"], finished["unsolvable"]
+
+    semaphore = asyncio.Semaphore(min(len(iterations), self.max_concurrency))
+    totals = {
+      "solvable": solvable_iterations,
+      "unsolvable": unsolvable_iterations,
+    }
+
+    async def _run(
+      task_type: str,
+      iteration: int,
+      resume: reporting.PartialQuestion | None,
+    ):
+      async with semaphore:
+        if task_type == "solvable":
+          return await self._run_solvable_iteration(
+            iteration, totals[task_type], resume
+          )
+        return await self._run_unsolvable_iteration(
+          iteration, totals[task_type], resume
+        )
+
+    results_csv = reporting.get_results_csv()
+    if results_csv is None:
+      results_csv = reporting.IncrementalCsvWriter(self.output_dir)
+    tasks = {}
+    for task_type, iteration, resume in iterations:
+      task = asyncio.create_task(_run(task_type, iteration, resume))
+      tasks[task] = (task_type, iteration)
+
+    try:
+      pending = set(tasks)
+      while pending:
+        done, pending = await asyncio.wait(
+          pending, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+          # Dropping the finished task drops its report too.
+          task_type, iteration = tasks.pop(task)
+          try:
+            report = task.result()
+          except Exception as e:
+            logging.error(
+              "Error in %s iteration %d: %s", task_type, iteration, e
+            )
+            continue
+          if report is None:
+            continue  # Skipped by the run budget
+
+          finished[task_type] += 1
+          if task_type == "solvable":
+            results_csv.write_solvable(report)
+            logging.info(
+              "Completed solvable iteration %d/%d",
+              iteration,
+              solvable_iterations,
+            )
+          else:
+            results_csv.write_unsolvable(report)
+            logging.info(
+              "Completed unsolvable iteration %d/%d",
+              iteration,
+              unsolvable_iterations,
+            )
+          runner.log_usage_total()
+    except asyncio.CancelledError:
+      logging.warning("Run cancelled, canceling all in-flight requests...")
+      for task in tasks:
+        task.cancel()
+      await asyncio.gather(*tasks, return_exceptions=True)
+      raise
+    finally:
+      await llm.close_async_sessions()
+
+    return finished["solvable"], finished["unsolvable"]
+
+  async def _run_solvable_iteration(
+    self,
+    iteration: int,
+    total: int,
+    resume: reporting.PartialQuestion | None = None,
+  ) -> SolvableQuestionReport | None:
+    """Run a single solvable iteration.
+
+    Args:
+        iteration: Current iteration number.
+        total: Total number of iterations.
+        resume: The unfinished question of an interrupted run to run
+            again, or None for a new one.
+
+    Returns:
+        A SolvableQuestionReport, or None if the run budget was reached
+        before the iteration could start.
+    """
+    budget = llm.get_run_budget()
+    if not budget.try_start_iteration():
+      logging.info("Skipping solvable iteration %d/%d", iteration, total)
+      return None
+    logging.info("Starting solvable iteration %d/%d", iteration, total)
+    try:
+      with llm.deadline_scope(
+        llm.get_deadline_settings().iteration, "iteration"
+      ):
+        return await analysis.analyze_solvable_question_async(
+          solver_clients=self.solver_clients,
+          evaluator_clients=self.evaluator_clients,
+          dataset=self.solvable_dataset,
+          output_dir=self.output_dir,
+          stream_partial_markdown=self.stream_partial_markdown,
+          resume=resume,
+        )
+    finally:
+      budget.finish_iteration()
+
+  async def _run_unsolvable_iteration(
+    self,
+    iteration: int,
+    total: int,
+    resume: reporting.PartialQuestion | None = None,
+  ) -> UnsolvableQuestionReport | None:
+    """Run a single unsolvable iteration.
+
+    Args:
+        iteration: Current iteration number.
+        total: Total number of iterations.
+        resume: The unfinished question of an interrupted run to run
+            again, or None for a new one.
+
+    Returns:
+        An UnsolvableQuestionReport, or None if the run budget was reached
+        before the iteration could start.
+    """
+    budget = llm.get_run_budget()
+    if not budget.try_start_iteration():
+      logging.info("Skipping unsolvable iteration %d/%d", iteration, total)
+      return None
+    logging.info("Starting unsolvable iteration %d/%d", iteration, total)
+    try:
+      with llm.deadline_scope(
+        llm.get_deadline_settings().iteration, "iteration"
+      ):
+        return await analysis.analyze_unsolvable_question_async(
+          solver_clients=self.theorist_clients,
+          ranking_clients=self.ranking_clients,
+          dataset=self.unsolvable_dataset,
+          output_dir=self.output_dir,
+          stream_partial_markdown=self.stream_partial_markdown,
+          resume=resume,
+        )
+    finally:
+      budget.finish_iteration()
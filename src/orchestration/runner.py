@@ -1,19 +1,19 @@
 """Benchmark runner for parallel execution of iterations."""
 
-import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import concurrent.futures
 
 from absl import logging
 
-from src import analysis, llm, loader
-from src.analysis.models import (
-  SolvableQuestionReport,
-  UnsolvableQuestionReport,
-)
+from src import analysis, config, llm, loader, reporting
+from src.analysis import scheduler
 
 
 class BenchmarkRunner:
-  """Orchestrates parallel execution of benchmark iterations."""
+  """Orchestrates parallel execution of benchmark iterations.
+
+  Every iteration is a task graph on one shared scheduler, so LLM calls of
+  all questions in flight share a worker pool, capped per model.
+  """
 
   def __init__(
     self,
@@ -25,6 +25,10 @@ class BenchmarkRunner:
     unsolvable_dataset: loader.JsonLoader,
     output_dir: str,
     max_workers: int = 10,
+    stream_partial_markdown: bool = False,
+    max_calls_per_model: int | None = None,
+    local_workers: int = config.SCHEDULER_LOCAL_WORKERS,
+    resume_state: reporting.JournalState | None = None,
   ):
     """Initialize the benchmark runner.
 
@@ -36,7 +40,16 @@ class BenchmarkRunner:
         solvable_dataset: Dataset of solvable questions.
         unsolvable_dataset: Dataset of unsolvable questions.
         output_dir: Directory to save results.
-        max_workers: Maximum number of parallel workers.
+        max_workers: Maximum number of questions in flight at once.
+        stream_partial_markdown: Whether to mirror streamed solver output
+            into per-model .partial.md files.
+        max_calls_per_model: Calls to one model allowed in flight at once
+            across all questions, or None for no cap.
+        local_workers: Workers for selecting questions, scoring responses
+            and rendering reports.
+        resume_state: What the run journal of an interrupted run recorded.
+            Its finished questions count towards the iterations, and its
+            unfinished ones run first, replaying their journaled calls.
     """
     self.solver_clients = solver_clients
     self.evaluator_clients = evaluator_clients
@@ -46,134 +59,212 @@ class BenchmarkRunner:
     self.unsolvable_dataset = unsolvable_dataset
     self.output_dir = output_dir
     self.max_workers = max_workers
+    self.stream_partial_markdown = stream_partial_markdown
+    self.max_calls_per_model = max_calls_per_model
+    self.local_workers = local_workers
+    self.resume_state = resume_state
 
   def run_iterations(
     self,
     solvable_iterations: int,
     unsolvable_iterations: int,
-  ) -> tuple[list[SolvableQuestionReport], list[UnsolvableQuestionReport]]:
+  ) -> tuple[int, int]:
     """Run all benchmark iterations in parallel.
 
+    Each report is written to the results CSVs as its question finishes
+    and is not kept afterwards, so memory stays flat however long the run.
+
     Args:
         solvable_iterations: Number of solvable question iterations to run.
         unsolvable_iterations: Number of unsolvable question iterations to run.
 
     Returns:
-        Tuple of (solvable_reports, unsolvable_reports).
+        Tuple of (solvable_count, unsolvable_count) of finished questions,
+        including those a resumed run had already finished.
     """
     logging.info("Running %d solvable iteration(s)", solvable_iterations)
     logging.info("Running %d unsolvable iteration(s)", unsolvable_iterations)
 
-    solvable_reports: list[SolvableQuestionReport] = []
-    unsolvable_reports: list[UnsolvableQuestionReport] = []
-    reports_lock = threading.Lock()  # Protect list append operations
-
-    total_iterations = solvable_iterations + unsolvable_iterations
-    if total_iterations == 0:
+    finished, iterations = plan_iterations(
+      solvable_iterations, unsolvable_iterations, self.resume_state
+    )
+    if not iterations:
       logging.warning("No iterations to run")
-      return solvable_reports, unsolvable_reports
+      return finished["solvable"], finished["unsolvable"]
 
-    max_workers = min(total_iterations, self.max_workers)
+    max_active = min(len(iterations), self.max_workers)
+    totals = {
+      "solvable": solvable_iterations,
+      "unsolvable": unsolvable_iterations,
+    }
+    budget = llm.get_run_budget()
+    results_csv = reporting.get_results_csv()
+    if results_csv is None:
+      results_csv = reporting.IncrementalCsvWriter(self.output_dir)
+    dag = scheduler.DagScheduler(
+      {
+        scheduler.LLM_POOL: max_active * config.CALLS_PER_ITERATION,
+        scheduler.LOCAL_POOL: self.local_workers,
+      },
+      max_per_key=self.max_calls_per_model,
+    )
+    dag.start()
+    futures = {}
+    next_iteration = 0
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-      futures = {}
+    try:
+      while futures or next_iteration < len(iterations):
+        # Admit new questions only as earlier ones finish. Their tasks are
+        # scheduled in admission order, so in-flight questions finish first.
+        while next_iteration < len(iterations) and len(futures) < max_active:
+          task_type, iteration, resume = iterations[next_iteration]
+          task = self._schedule_iteration(
+            dag,
+            task_type,
+            iteration,
+            totals[task_type],
+            next_iteration,
+            resume,
+          )
+          next_iteration += 1
+          if task is not None:
+            futures[task.future] = (task_type, iteration)
+        if not futures:
+          continue
 
-      # Submit all solvable iterations
-      for i in range(solvable_iterations):
-        future = executor.submit(
-          self._run_solvable_iteration,
-          i + 1,
-          solvable_iterations,
-        )
-        futures[future] = ("solvable", i + 1)
-
-      # Submit all unsolvable iterations
-      for i in range(unsolvable_iterations):
-        future = executor.submit(
-          self._run_unsolvable_iteration,
-          i + 1,
-          unsolvable_iterations,
+        done, _ = concurrent.futures.wait(
+          futures, return_when=concurrent.futures.FIRST_COMPLETED
         )
-        futures[future] = ("unsolvable", i + 1)
-
-      # Collect results as they complete
-      try:
-        for future in as_completed(futures):
-          task_type, iteration = futures[future]
+        for future in done:
+          task_type, iteration = futures.pop(future)
+          budget.finish_iteration()
           try:
             report = future.result()
-            with reports_lock:
-              if task_type == "solvable":
-                solvable_reports.append(report)
-              else:
-                unsolvable_reports.append(report)
-
-            # Log outside the lock to avoid blocking
             if task_type == "solvable":
-              logging.info(
-                "Completed solvable iteration %d/%d",
-                iteration,
-                solvable_iterations,
-              )
+              results_csv.write_solvable(report)
             else:
-              logging.info(
-                "Completed unsolvable iteration %d/%d",
-                iteration,
-                unsolvable_iterations,
-              )
+              results_csv.write_unsolvable(report)
+            finished[task_type] += 1
+            logging.info(
+              "Completed %s iteration %d/%d",
+              task_type,
+              iteration,
+              totals[task_type],
+            )
+            log_usage_total()
           except Exception as e:
             logging.error(
               "Error in %s iteration %d: %s", task_type, iteration, e
             )
-      except KeyboardInterrupt:
-        logging.warning("Keyboard interrupt received, canceling all tasks...")
-        for future in futures:
-          future.cancel()
-        executor.shutdown(wait=False, cancel_futures=True)
-        raise
+    except KeyboardInterrupt:
+      logging.warning("Keyboard interrupt received, canceling all tasks...")
+      dag.shutdown(cancel=True)
+      raise
+    dag.shutdown()
 
-    return solvable_reports, unsolvable_reports
+    return finished["solvable"], finished["unsolvable"]
 
-  def _run_solvable_iteration(
+  def _schedule_iteration(
     self,
+    dag: scheduler.DagScheduler,
+    task_type: str,
     iteration: int,
     total: int,
-  ) -> SolvableQuestionReport:
-    """Run a single solvable iteration.
+    priority: int,
+    resume: reporting.PartialQuestion | None = None,
+  ) -> scheduler.Task | None:
+    """Schedule a single iteration's task graph.
 
     Args:
+        dag: The shared scheduler.
+        task_type: "solvable" or "unsolvable".
         iteration: Current iteration number.
-        total: Total number of iterations.
+        total: Total number of iterations of that type.
+        priority: Priority of the iteration's tasks; lower runs first.
+        resume: The unfinished question of an interrupted run to run
+            again, or None for a new one.
 
     Returns:
-        A SolvableQuestionReport.
+        The iteration's final task, whose result is its report, or None if
+        the run budget was reached before the iteration could start.
     """
-    logging.info("Starting solvable iteration %d/%d", iteration, total)
-    return analysis.analyze_solvable_question(
-      solver_clients=self.solver_clients,
-      evaluator_clients=self.evaluator_clients,
-      dataset=self.solvable_dataset,
+    if not llm.get_run_budget().try_start_iteration():
+      logging.info("Skipping %s iteration %d/%d", task_type, iteration, total)
+      return None
+    logging.info("Starting %s iteration %d/%d", task_type, iteration, total)
+    if task_type == "solvable":
+      return analysis.schedule_solvable_question(
+        dag,
+        solver_clients=self.solver_clients,
+        evaluator_clients=self.evaluator_clients,
+        dataset=self.solvable_dataset,
+        output_dir=self.output_dir,
+        stream_partial_markdown=self.stream_partial_markdown,
+        priority=priority,
+        resume=resume,
+      )
+    return analysis.schedule_unsolvable_question(
+      dag,
+      solver_clients=self.theorist_clients,
+      ranking_clients=self.ranking_clients,
+      dataset=self.unsolvable_dataset,
       output_dir=self.output_dir,
+      stream_partial_markdown=self.stream_partial_markdown,
+      priority=priority,
+      resume=resume,
     )
 
-  def _run_unsolvable_iteration(
-    self,
-    iteration: int,
-    total: int,
-  ) -> UnsolvableQuestionReport:
-    """Run a single unsolvable iteration.
 
-    Args:
-        iteration: Current iteration number.
-        total: Total number of iterations.
+def plan_iterations(
+  solvable_iterations: int,
+  unsolvable_iterations: int,
+  resume_state: reporting.JournalState | None = None,
+) -> tuple[
+  dict[str, int], list[tuple[str, int, reporting.PartialQuestion | None]]
+]:
+  """Works out which iterations a run, or a resumed run, still has to do.
 
-    Returns:
-        An UnsolvableQuestionReport.
-    """
-    logging.info("Starting unsolvable iteration %d/%d", iteration, total)
-    return analysis.analyze_unsolvable_question(
-      solver_clients=self.theorist_clients,
-      ranking_clients=self.ranking_clients,
-      dataset=self.unsolvable_dataset,
-      output_dir=self.output_dir,
+  Args:
+      solvable_iterations: Number of solvable iterations requested.
+      unsolvable_iterations: Number of unsolvable iterations requested.
+      resume_state: What the journal of an interrupted run recorded.
+
+  Returns:
+      The number of questions already finished by type, and the
+      (task_type, iteration, resume) of every iteration left to run, the
+      unfinished questions of the interrupted run first.
+  """
+  state = resume_state or reporting.JournalState()
+  finished = dict(state.finished)
+  iterations = []
+  for task_type, total in (
+    (reporting.SOLVABLE, solvable_iterations),
+    (reporting.UNSOLVABLE, unsolvable_iterations),
+  ):
+    partial = state.partial_of(task_type)
+    for iteration in range(finished[task_type] + 1, total + 1):
+      resume = partial.pop(0) if partial else None
+      iterations.append((task_type, iteration, resume))
+  # Finish what the interrupted run started before anything new.
+  iterations.sort(key=lambda planned: planned[2] is None)
+  if resume_state is not None:
+    logging.info(
+      "Resuming with %d solvable and %d unsolvable question(s) finished, "
+      "%d iteration(s) left",
+      finished[reporting.SOLVABLE],
+      finished[reporting.UNSOLVABLE],
+      len(iterations),
     )
+  return finished, iterations
+
+
+def log_usage_total() -> None:
+  """Logs the tokens and cost spent so far in the run."""
+  total = llm.get_usage_tracker().total()
+  logging.info(
+    "Run usage so far: %d tokens (%d prompt, %d completion), $%.4f",
+    total.total_tokens,
+    total.prompt_tokens,
+    total.completion_tokens,
+    total.cost,
+  )
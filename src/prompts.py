@@ -145,3 +145,25 @@ Your goal is to analyze, compare, and rank these speculative responses.
         **N (Least Insightful)**.
     * Provide a clear, summary justification for your ranking.
 """
+
+
+# ----------------------------------------------------------------------------
+# PROMPT 5: For CONTINUING Truncated Responses
+#
+# Task: To resume a response that was cut off at its token limit, without
+# regenerating what was already written.
+# ----------------------------------------------------------------------------
+
+CONTINUATION_PROMPT = """
+Your previous response was cut off because it reached the length limit.
+Continue it exactly where it stopped. Do not repeat anything already
+written, do not restart, and do not add any preamble.
+"""
+
+JSON_CONTINUATION_PROMPT = """
+Your previous response was a JSON document that was cut off because it
+reached the length limit. Output only the remaining characters needed to
+complete it, starting right after its last character, so that appending
+your output to it gives valid JSON. Do not repeat anything, and do not
+wrap your output in code fences.
+"""
@@ -1,16 +1,33 @@
 """Reporting module for generating markdown reports."""
 
 from src.reporting.csv_writer import (
-  write_evaluations_csv,
-  write_solvable_csv,
-  write_unsolvable_csv,
+  AttemptsCsvWriter,
+  IncrementalCsvWriter,
+  configure_results_csv,
+  get_results_csv,
+  write_concurrency_csv,
+  write_routes_csv,
+  write_usage_csv,
+)
+from src.reporting.journal import (
+  SOLVABLE,
+  UNSOLVABLE,
+  JournalState,
+  PartialQuestion,
+  RunJournal,
+  configure_run_journal,
+  get_run_journal,
 )
 from src.reporting.markdown_writer import (
   append_hypothesis,
+  append_partial_response,
   append_no_hypotheses_message,
   append_question_separator,
   append_ranking,
   append_response,
+  format_judge_name,
+  partial_response_path,
+  remove_partial_response,
   start_analysis_table,
   start_evaluator_reasoning_section,
   start_rankings_section,
@@ -26,6 +43,10 @@ from src.reporting.markdown_writer import (
 __all__ = [
   "write_solvable_header",
   "append_response",
+  "format_judge_name",
+  "partial_response_path",
+  "append_partial_response",
+  "remove_partial_response",
   "start_analysis_table",
   "write_analysis_table_row",
   "start_evaluator_reasoning_section",
@@ -39,7 +60,18 @@ __all__ = [
   "append_no_hypotheses_message",
   "append_question_separator",
   "write_unsolvable_timing_summary",
-  "write_solvable_csv",
-  "write_unsolvable_csv",
-  "write_evaluations_csv",
+  "IncrementalCsvWriter",
+  "configure_results_csv",
+  "get_results_csv",
+  "write_concurrency_csv",
+  "write_usage_csv",
+  "AttemptsCsvWriter",
+  "write_routes_csv",
+  "SOLVABLE",
+  "UNSOLVABLE",
+  "RunJournal",
+  "JournalState",
+  "PartialQuestion",
+  "configure_run_journal",
+  "get_run_journal",
 ]
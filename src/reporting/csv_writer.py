@@ -1,242 +1,560 @@
 """CSV writing functionality for benchmark results."""
 
 import csv
+import dataclasses
+import json
 import os
+import threading
 from typing import Any
 
 from src.analysis.models import (
   SolvableQuestionReport,
   UnsolvableQuestionReport,
 )
-
-
-def write_solvable_csv(
-  reports: list[SolvableQuestionReport],
+from src.llm.models import Usage
+from src.llm.retry import Attempt
+
+# Per-call usage columns, filled from a Usage (empty when it is unknown).
+USAGE_COLUMNS = [
+  "prompt_tokens",
+  "estimated_prompt_tokens",
+  "completion_tokens",
+  "reasoning_tokens",
+  "cached_tokens",
+  "cost",
+]
+
+# Leading columns of each results CSV. Evaluator rating and ranker rank
+# columns follow, sorted by model name.
+SOLVABLE_COLUMNS = [
+  "question_id",
+  "model",
+  "provider",
+  "backend",
+  "time",
+  "ttft",
+  "tokens_per_second",
+  "truncated",
+  *USAGE_COLUMNS,
+  "token_f1",
+  "meteor",
+  "rouge_l",
+  "symbol_f1",
+]
+UNSOLVABLE_COLUMNS = [
+  "question_id",
+  "model",
+  "provider",
+  "backend",
+  "time",
+  "ttft",
+  "tokens_per_second",
+  "truncated",
+  *USAGE_COLUMNS,
+]
+EVALUATION_COLUMNS = [
+  "question_type",
+  "question_id",
+  "evaluator_model",
+  "served_model",
+  "backend",
+  "evaluated_model",
+  "judge_mode",
+  "time",
+  "score",
+  *USAGE_COLUMNS,
+]
+
+# Columns of attempts.csv, one row per request attempt.
+ATTEMPT_COLUMNS = [
+  "model",
+  "attempt",
+  "status",
+  "error_class",
+  "elapsed",
+  "delay",
+  "gave_up",
+]
+
+
+def write_concurrency_csv(
+  concurrency_stats: dict[str, dict[str, Any]],
   output_dir: str,
 ) -> None:
-  """Write solvable question results to a CSV file.
+  """Write the final adaptive concurrency state of each model to a CSV file.
 
-  CSV columns include: question_id, question, true_answer, model,
-  response, time, token_f1, meteor, rouge_l, symbol_f1, and
-  evaluator ratings (model1_rating, model2_rating, etc.).
+  CSV columns include: model, limit, peak_limit, lowest_limit, increases,
+  decreases, error_rate, and latency_ewma (per client role, as
+  "role=seconds" pairs separated by spaces).
 
   Args:
-      reports: List of SolvableQuestionReport objects.
+      concurrency_stats: Limiter stats keyed by model id.
       output_dir: Directory to save the CSV file.
   """
-  if not reports:
+  if not concurrency_stats:
     return
 
   csv_dir = os.path.join(output_dir, "csv")
-  csv_path = os.path.join(csv_dir, "solvable.csv")
+  csv_path = os.path.join(csv_dir, "concurrency.csv")
   os.makedirs(csv_dir, exist_ok=True)
 
-  # Collect all evaluator names across all reports
-  evaluator_names = set()
-  for report in reports:
-    for response in report.responses:
-      for eval_item in response.llm_evaluations:
-        evaluator_names.add(eval_item.evaluator_model_name)
-  evaluator_names = sorted(evaluator_names)
-
-  # Define CSV headers (excluding question, true_answer, response)
   headers = [
-    "question_id",
     "model",
-    "time",
-    "token_f1",
-    "meteor",
-    "rouge_l",
-    "symbol_f1",
+    "limit",
+    "peak_limit",
+    "lowest_limit",
+    "increases",
+    "decreases",
+    "error_rate",
+    "latency_ewma",
   ]
-  # Add evaluator rating columns
-  for evaluator in evaluator_names:
-    headers.append(f"{evaluator}_rating")
 
-  # Write CSV
   with open(csv_path, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=headers)
+    writer = csv.DictWriter(f, fieldnames=headers, extrasaction="ignore")
     writer.writeheader()
-
-    for report in reports:
-      for response in report.responses:
-        row: dict[str, Any] = {
-          "question_id": report.question_id,
-          "model": response.model_name,
-          "time": response.generation_time,
-        }
-
-        # Add deterministic scores
-        for score in response.deterministic_scores:
-          if score.metric_name in [
-            "token_f1",
-            "meteor",
-            "rouge_l",
-            "symbol_f1",
-          ]:
-            row[score.metric_name] = (
-              score.score if score.score is not None else ""
-            )
-
-        # Add evaluator ratings
-        for eval_item in response.llm_evaluations:
-          col_name = f"{eval_item.evaluator_model_name}_rating"
-          row[col_name] = (
-            eval_item.evaluation.score
-            if eval_item.evaluation.score is not None
-            else ""
-          )
-
-        # Fill in missing evaluator columns with empty strings
-        for evaluator in evaluator_names:
-          col_name = f"{evaluator}_rating"
-          if col_name not in row:
-            row[col_name] = ""
-
-        writer.writerow(row)
-
-
-def write_unsolvable_csv(
-  reports: list[UnsolvableQuestionReport],
+    for model_name, stats in sorted(concurrency_stats.items()):
+      latency_ewma = " ".join(
+        f"{role}={latency}"
+        for role, latency in stats.get("latency_ewma", {}).items()
+      )
+      writer.writerow(
+        {"model": model_name, **stats, "latency_ewma": latency_ewma}
+      )
+
+
+def write_usage_csv(
+  usage_by_model_and_role: dict[tuple[str, str], tuple[int, Usage]],
   output_dir: str,
+  backends: dict[tuple[str, str], str] | None = None,
 ) -> None:
-  """Write unsolvable question results to a CSV file.
-
-  This creates a CSV with hypothesis-level data (one row per hypothesis).
-  Rankings from each ranker model are included as columns showing the rank
-  assigned to that specific hypothesis.
+  """Write the token usage and cost of the run to a CSV file.
 
-  CSV columns include: question_id, question, model, hypothesis, time,
-  and {ranker_model}_rank columns for each ranker.
+  CSV columns include: model, role, backend, calls, and the usage columns
+  (prompt_tokens, estimated_prompt_tokens, completion_tokens,
+  reasoning_tokens, cached_tokens, cost).
 
   Args:
-      reports: List of UnsolvableQuestionReport objects.
+      usage_by_model_and_role: (call count, usage) keyed by (model id,
+          role), as returned by UsageTracker.by_model_and_role.
       output_dir: Directory to save the CSV file.
+      backends: Name of the backend serving each (model id, role), if
+          known.
   """
-  import json
-
-  if not reports:
+  if not usage_by_model_and_role:
     return
 
   csv_dir = os.path.join(output_dir, "csv")
-  csv_path = os.path.join(csv_dir, "unsolvable.csv")
+  csv_path = os.path.join(csv_dir, "usage.csv")
   os.makedirs(csv_dir, exist_ok=True)
 
-  # Collect all ranker names across all reports
-  ranker_names = set()
-  for report in reports:
-    for ranking in report.rankings:
-      ranker_names.add(ranking.ranker_model_name)
-  ranker_names = sorted(ranker_names)
-
-  # Define CSV headers (excluding question and hypothesis)
-  headers = [
-    "question_id",
-    "model",
-    "time",
-  ]
-  # Add ranker ranking columns
-  for ranker in ranker_names:
-    headers.append(f"{ranker}_rank")
+  headers = ["model", "role", "backend", "calls", *USAGE_COLUMNS]
 
-  # Write CSV
   with open(csv_path, "w", newline="", encoding="utf-8") as f:
     writer = csv.DictWriter(f, fieldnames=headers)
     writer.writeheader()
+    for (model_name, role), (calls, usage) in sorted(
+      usage_by_model_and_role.items()
+    ):
+      writer.writerow(
+        {
+          "model": model_name,
+          "role": role,
+          "backend": (backends or {}).get((model_name, role), ""),
+          "calls": calls,
+          **_usage_columns(usage),
+        }
+      )
 
-    for report in reports:
-      for hyp_idx, hypothesis in enumerate(report.hypotheses):
-        row: dict[str, Any] = {
-          "question_id": report.question_id,
-          "model": hypothesis.model_name,
-          "time": hypothesis.generation_time,
+
+class AttemptsCsvWriter:
+  """Writes the telemetry of every LLM request attempt as it is made.
+
+  CSV columns include: model, attempt, status, error_class, elapsed,
+  delay, and gave_up. The file is replaced on the first attempt of a run,
+  then kept open and flushed after every row, so it holds no more than a
+  row in memory. Pass `write` to llm.configure_retry_telemetry. Safe to
+  share across threads.
+  """
+
+  def __init__(self, output_dir: str):
+    """Initializes the writer. The file is opened on the first attempt.
+
+    Args:
+        output_dir: Directory whose csv/ subdirectory holds the file.
+    """
+    self.path = os.path.join(output_dir, "csv", "attempts.csv")
+    self._file = None
+    self._writer: csv.DictWriter | None = None
+    self._lock = threading.Lock()
+
+  def write(self, attempt: Attempt) -> None:
+    """Appends one attempt to the file."""
+    with self._lock:
+      if self._writer is None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=ATTEMPT_COLUMNS)
+        self._writer.writeheader()
+      self._writer.writerow(
+        {
+          **dataclasses.asdict(attempt),
+          "error_class": attempt.error_class.value,
         }
+      )
+      self._file.flush()
 
-        # Add ranker rankings - parse JSON and extract rank for this hypothesis
-        for ranking in report.rankings:
-          col_name = f"{ranking.ranker_model_name}_rank"
-          try:
-            # Parse the JSON response
-            ranking_data = json.loads(ranking.ranking.reasoning)
-            rankings_list = ranking_data.get("rankings", [])
-
-            # Get the rank for this hypothesis (hyp_idx corresponds to Response i+1)
-            if hyp_idx < len(rankings_list):
-              row[col_name] = rankings_list[hyp_idx]
-            else:
-              row[col_name] = ""
-          except (json.JSONDecodeError, KeyError, TypeError):
-            # If parsing fails, leave empty
-            row[col_name] = ""
-
-        # Fill in missing ranker columns with empty strings
-        for ranker in ranker_names:
-          col_name = f"{ranker}_rank"
-          if col_name not in row:
-            row[col_name] = ""
-
-        writer.writerow(row)
-
-
-def write_evaluations_csv(
-  solvable_reports: list[SolvableQuestionReport],
-  unsolvable_reports: list[UnsolvableQuestionReport],
+  def close(self) -> None:
+    """Closes the file, if it was opened."""
+    with self._lock:
+      if self._file is not None:
+        self._file.close()
+        self._file = None
+        self._writer = None
+
+
+def write_routes_csv(
+  route_stats: list[dict[str, Any]],
   output_dir: str,
 ) -> None:
-  """Write evaluation results to a separate CSV file.
+  """Write the measured latency of each provider route to a CSV file.
 
-  This CSV contains information about the evaluations themselves,
-  including: question_type, question_id, evaluator_model, time, etc.
+  CSV columns include: model, role, provider, calls, and latency_ewma.
 
   Args:
-      solvable_reports: List of SolvableQuestionReport objects.
-      unsolvable_reports: List of UnsolvableQuestionReport objects.
+      route_stats: Route stats, as returned by llm.get_route_stats.
       output_dir: Directory to save the CSV file.
   """
+  if not route_stats:
+    return
+
   csv_dir = os.path.join(output_dir, "csv")
-  csv_path = os.path.join(csv_dir, "evaluations.csv")
+  csv_path = os.path.join(csv_dir, "routes.csv")
   os.makedirs(csv_dir, exist_ok=True)
 
-  headers = [
-    "question_type",
-    "question_id",
-    "evaluator_model",
-    "evaluated_model",
-    "time",
-    "score",
-  ]
+  headers = ["model", "role", "provider", "calls", "latency_ewma"]
 
   with open(csv_path, "w", newline="", encoding="utf-8") as f:
     writer = csv.DictWriter(f, fieldnames=headers)
     writer.writeheader()
+    writer.writerows(route_stats)
 
-    # Write solvable evaluations
-    for report in solvable_reports:
-      for response in report.responses:
-        for eval_item in response.llm_evaluations:
-          row = {
-            "question_type": "solvable",
-            "question_id": report.question_id,
-            "evaluator_model": eval_item.evaluator_model_name,
-            "evaluated_model": response.model_name,
-            "time": eval_item.evaluation_time,
-            "score": (
-              eval_item.evaluation.score
-              if eval_item.evaluation.score is not None
-              else ""
-            ),
-          }
-          writer.writerow(row)
 
-    # Write unsolvable evaluations (rankings)
-    for report in unsolvable_reports:
-      for ranking in report.rankings:
-        row = {
-          "question_type": "unsolvable",
+class IncrementalCsvWriter:
+  """Appends each finished question's rows to the results CSVs.
+
+  solvable.csv, unsolvable.csv and evaluations.csv stay current while the
+  run goes on and keep the rows of earlier runs in the same directory.
+  A question written again replaces its earlier rows. Safe to share
+  across threads.
+  """
+
+  def __init__(self, output_dir: str):
+    """Initializes the writer. The files are opened on first use.
+
+    Args:
+        output_dir: Directory whose csv/ subdirectory holds the files.
+    """
+    csv_dir = os.path.join(output_dir, "csv")
+    self._solvable = _AppendableCsv(
+      os.path.join(csv_dir, "solvable.csv"), SOLVABLE_COLUMNS, ["question_id"]
+    )
+    self._unsolvable = _AppendableCsv(
+      os.path.join(csv_dir, "unsolvable.csv"),
+      UNSOLVABLE_COLUMNS,
+      ["question_id"],
+    )
+    self._evaluations = _AppendableCsv(
+      os.path.join(csv_dir, "evaluations.csv"),
+      EVALUATION_COLUMNS,
+      ["question_type", "question_id"],
+    )
+
+  def write_solvable(self, report: SolvableQuestionReport) -> None:
+    """Writes the rows of a finished solvable question."""
+    self._solvable.write_question(
+      (report.question_id,), _solvable_rows(report)
+    )
+    self._evaluations.write_question(
+      ("solvable", report.question_id), _solvable_evaluation_rows(report)
+    )
+
+  def write_unsolvable(self, report: UnsolvableQuestionReport) -> None:
+    """Writes the rows of a finished unsolvable question."""
+    self._unsolvable.write_question(
+      (report.question_id,), _unsolvable_rows(report)
+    )
+    self._evaluations.write_question(
+      ("unsolvable", report.question_id),
+      _unsolvable_evaluation_rows(report),
+    )
+
+
+class _AppendableCsv:
+  """A CSV file that grows by one question's rows at a time.
+
+  The header is the leading columns followed by the other columns seen so
+  far, sorted. Rows are appended; only when a question brings a column the
+  header lacks, such as a new evaluator's rating, or replaces rows already
+  in the file is the file rewritten, streamed row by row into a temporary
+  file that then replaces it. Only the header and the keys of the
+  questions in the file are held in memory.
+  """
+
+  def __init__(
+    self, path: str, leading_columns: list[str], key_columns: list[str]
+  ):
+    self.path = path
+    self.leading_columns = leading_columns
+    self.key_columns = key_columns
+    self._lock = threading.Lock()
+    self._headers: list[str] | None = None
+    self._keys: set[tuple[str, ...]] = set()
+
+  def write_question(
+    self, key: tuple[str, ...], rows: list[dict[str, Any]]
+  ) -> None:
+    """Writes a question's rows, replacing any it had in the file.
+
+    Args:
+        key: The question's values of the key columns.
+        rows: The question's rows. May be empty, e.g. for a question
+            without evaluations, to just drop earlier rows.
+    """
+    key = tuple(str(value) for value in key)
+    with self._lock:
+      self._load()
+      new_columns = {
+        column
+        for row in rows
+        for column in row
+        if column not in self._headers
+      }
+      if new_columns or key in self._keys:
+        self._rewrite(self._headers + sorted(new_columns), drop=key)
+      if not rows:
+        return
+      with open(self.path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=self._headers, restval="")
+        if f.tell() == 0:
+          writer.writeheader()
+        writer.writerows(rows)
+      self._keys.add(key)
+
+  def _load(self) -> None:
+    """Reads the header and question keys of the existing file, once."""
+    if self._headers is not None:
+      return
+    self._headers = list(self.leading_columns)
+    if not os.path.exists(self.path):
+      os.makedirs(os.path.dirname(self.path), exist_ok=True)
+      return
+    with open(self.path, newline="", encoding="utf-8") as f:
+      reader = csv.DictReader(f)
+      on_disk = reader.fieldnames or []
+      for row in reader:
+        self._keys.add(self._key_of(row))
+    headers = _ordered_columns(self.leading_columns, on_disk)
+    if on_disk != headers:
+      # Rows are appended in header order, so a file written with other
+      # columns, e.g. by an older version, is brought to that order first.
+      self._rewrite(headers)
+    self._headers = headers
+
+  def _rewrite(
+    self, headers: list[str], drop: tuple[str, ...] | None = None
+  ) -> None:
+    """Rewrites the file with `headers`, without the rows of `drop`."""
+    self._headers = _ordered_columns(self.leading_columns, headers)
+    self._keys.discard(drop)
+    if not os.path.exists(self.path):
+      return
+    temp_path = f"{self.path}.tmp"
+    with (
+      open(self.path, newline="", encoding="utf-8") as source,
+      open(temp_path, "w", newline="", encoding="utf-8") as target,
+    ):
+      writer = csv.DictWriter(target, fieldnames=self._headers, restval="")
+      writer.writeheader()
+      for row in csv.DictReader(source):
+        if self._key_of(row) != drop:
+          writer.writerow(row)
+    os.replace(temp_path, self.path)
+
+  def _key_of(self, row: dict[str, Any]) -> tuple[str, ...]:
+    """Returns the question key of a row read back from the file."""
+    return tuple(str(row.get(column, "")) for column in self.key_columns)
+
+
+def _ordered_columns(leading: list[str], columns: list[str]) -> list[str]:
+  """Returns `leading` followed by the other `columns`, sorted."""
+  return leading + sorted(set(columns) - set(leading))
+
+
+def _solvable_rows(report: SolvableQuestionReport) -> list[dict[str, Any]]:
+  """Returns the solvable.csv rows of a question, one per response."""
+  rows = []
+  for response in report.responses:
+    row: dict[str, Any] = {
+      "question_id": report.question_id,
+      "model": response.model_name,
+      "provider": _optional(response.provider),
+      "backend": _optional(response.backend),
+      "time": response.generation_time,
+      "ttft": _optional(response.time_to_first_token),
+      "tokens_per_second": _optional(response.tokens_per_second),
+      "truncated": response.truncated,
+      **_usage_columns(response.usage),
+    }
+
+    # Add deterministic scores
+    for score in response.deterministic_scores:
+      if score.metric_name in [
+        "token_f1",
+        "meteor",
+        "rouge_l",
+        "symbol_f1",
+      ]:
+        row[score.metric_name] = score.score if score.score is not None else ""
+
+    # Add evaluator ratings
+    for eval_item in response.llm_evaluations:
+      col_name = f"{eval_item.evaluator_model_name}_rating"
+      row[col_name] = (
+        eval_item.evaluation.score
+        if eval_item.evaluation.score is not None
+        else ""
+      )
+    rows.append(row)
+  return rows
+
+
+def _unsolvable_rows(report: UnsolvableQuestionReport) -> list[dict[str, Any]]:
+  """Returns the unsolvable.csv rows of a question, one per hypothesis."""
+  rows = []
+  for hyp_idx, hypothesis in enumerate(report.hypotheses):
+    row: dict[str, Any] = {
+      "question_id": report.question_id,
+      "model": hypothesis.model_name,
+      "provider": _optional(hypothesis.provider),
+      "backend": _optional(hypothesis.backend),
+      "time": hypothesis.generation_time,
+      "ttft": _optional(hypothesis.time_to_first_token),
+      "tokens_per_second": _optional(hypothesis.tokens_per_second),
+      "truncated": hypothesis.truncated,
+      **_usage_columns(hypothesis.usage),
+    }
+
+    # Add ranker rankings - parse JSON and extract rank for this hypothesis
+    for ranking in report.rankings:
+      col_name = f"{ranking.ranker_model_name}_rank"
+      try:
+        # Parse the JSON response
+        ranking_data = json.loads(ranking.ranking.reasoning)
+        rankings_list = ranking_data.get("rankings", [])
+
+        # Get the rank for this hypothesis (hyp_idx corresponds to Response i+1)
+        if hyp_idx < len(rankings_list):
+          row[col_name] = rankings_list[hyp_idx]
+        else:
+          row[col_name] = ""
+      except (json.JSONDecodeError, KeyError, TypeError):
+        # If parsing fails, leave empty
+        row[col_name] = ""
+    rows.append(row)
+  return rows
+
+
+def _solvable_evaluation_rows(
+  report: SolvableQuestionReport,
+) -> list[dict[str, Any]]:
+  """Returns the evaluations.csv rows of a solvable question.
+
+  A judge scores the batched responses of a question in one call, so the
+  usage of that call is written on the first of its rows only; summing a
+  usage column gives the true spend.
+  """
+  rows = []
+  batches_written = set()
+  for response in report.responses:
+    for eval_item in response.llm_evaluations:
+      usage = None
+      if eval_item.mode == "pointwise":
+        usage = eval_item.usage
+      elif eval_item.evaluator_model_name not in batches_written:
+        batches_written.add(eval_item.evaluator_model_name)
+        usage = eval_item.usage
+      rows.append(
+        {
+          "question_type": "solvable",
           "question_id": report.question_id,
-          "evaluator_model": ranking.ranker_model_name,
-          "evaluated_model": "",  # Rankings evaluate all hypotheses together
-          "time": ranking.ranking_time,
-          "score": "",  # Rankings don't have numeric scores
+          "evaluator_model": eval_item.evaluator_model_name,
+          "served_model": _optional(eval_item.served_model_name),
+          "backend": _optional(eval_item.backend),
+          "evaluated_model": response.model_name,
+          "judge_mode": eval_item.mode,
+          "time": eval_item.evaluation_time,
+          "score": (
+            eval_item.evaluation.score
+            if eval_item.evaluation.score is not None
+            else ""
+          ),
+          **_usage_columns(usage),
         }
-        writer.writerow(row)
+      )
+  return rows
+
+
+def _unsolvable_evaluation_rows(
+  report: UnsolvableQuestionReport,
+) -> list[dict[str, Any]]:
+  """Returns the evaluations.csv rows (rankings) of an unsolvable question."""
+  return [
+    {
+      "question_type": "unsolvable",
+      "question_id": report.question_id,
+      "evaluator_model": ranking.ranker_model_name,
+      "served_model": _optional(ranking.served_model_name),
+      "backend": _optional(ranking.backend),
+      "evaluated_model": "",  # Rankings evaluate all hypotheses together
+      "judge_mode": "batch",
+      "time": ranking.ranking_time,
+      "score": "",  # Rankings don't have numeric scores
+      **_usage_columns(ranking.usage),
+    }
+    for ranking in report.rankings
+  ]
+
+
+_results_csv: IncrementalCsvWriter | None = None
+
+
+def configure_results_csv(output_dir: str) -> IncrementalCsvWriter:
+  """Sets up incremental writing of the results CSVs.
+
+  Args:
+      output_dir: Directory whose csv/ subdirectory holds the files.
+
+  Returns:
+      The writer now in effect.
+  """
+  global _results_csv
+
+  _results_csv = IncrementalCsvWriter(output_dir)
+  return _results_csv
+
+
+def get_results_csv() -> IncrementalCsvWriter | None:
+  """Returns the results CSV writer, or None if it is not configured."""
+  return _results_csv
+
+
+def _usage_columns(usage: Usage | None) -> dict[str, Any]:
+  """Returns the usage columns of a row, empty when `usage` is None."""
+  if usage is None:
+    return {column: "" for column in USAGE_COLUMNS}
+  return {column: getattr(usage, column) for column in USAGE_COLUMNS}
+
+
+def _optional(value: Any) -> Any:
+  """Returns `value`, or an empty string for a missing (None) value."""
+  return value if value is not None else ""
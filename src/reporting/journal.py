@@ -0,0 +1,356 @@
+"""Append-only run journal of finished calls and questions, for resuming."""
+
+import dataclasses
+import json
+import os
+import threading
+
+from absl import logging
+
+from src.analysis.models import (
+  CrossEvaluation,
+  ModelHypothesis,
+  ModelResponse,
+)
+from src.evaluation.models import EvaluationScore
+from src.llm.models import Usage
+
+SOLVABLE = "solvable"
+UNSOLVABLE = "unsolvable"
+
+# Record kinds, one JSON object per line.
+_STARTED = "started"
+_RESPONSE = "response"
+_JUDGMENT = "judgment"
+_QUESTION = "question"
+
+
+@dataclasses.dataclass
+class PartialQuestion:
+  """What a question that did not finish had completed.
+
+  Attributes:
+      question_type: "solvable" or "unsolvable".
+      question_id: The question's identifier.
+      responses: Successful solver or theorist responses by model name.
+      judgments: Successful judge results by judge name, each with the
+          model names judged, in order.
+  """
+
+  question_type: str
+  question_id: str
+  responses: dict[str, ModelResponse | ModelHypothesis] = dataclasses.field(
+    default_factory=dict
+  )
+  judgments: dict[str, list[tuple[tuple[str, ...], tuple]]] = (
+    dataclasses.field(default_factory=dict)
+  )
+
+  def response(
+    self, model_name: str
+  ) -> ModelResponse | ModelHypothesis | None:
+    """Returns the recorded response of `model_name`, if any."""
+    return self.responses.get(model_name)
+
+  def judgment(
+    self, judge_name: str, model_names: list[str], ordered: bool = False
+  ) -> tuple | None:
+    """Returns a recorded result of `judge_name` on exactly `model_names`.
+
+    Args:
+        judge_name: The evaluator or ranker.
+        model_names: The models whose responses were judged together.
+        ordered: Whether the order matters, as for rankings.
+
+    Returns:
+        The result, as the judge call returned it, or None.
+    """
+    key = tuple(model_names) if ordered else tuple(sorted(model_names))
+    for judged, result in reversed(self.judgments.get(judge_name, [])):
+      if (judged if ordered else tuple(sorted(judged))) == key:
+        return result
+    return None
+
+  def judged_order(self, model_names: list[str]) -> tuple[str, ...] | None:
+    """Returns the order some judge saw exactly `model_names` in, if any."""
+    for results in self.judgments.values():
+      for judged, _ in reversed(results):
+        if sorted(judged) == sorted(model_names):
+          return judged
+    return None
+
+  def judged_alone(self, model_name: str) -> bool:
+    """Whether any judge recorded a result on `model_name` by itself."""
+    return any(
+      judged == (model_name,)
+      for results in self.judgments.values()
+      for judged, _ in results
+    )
+
+
+@dataclasses.dataclass
+class JournalState:
+  """What a journal recorded, for resuming the run.
+
+  Finished questions are only counted: their rows are already in the
+  results CSVs.
+
+  Attributes:
+      finished: Number of finished questions by type.
+      partial: Questions that started but did not finish, in start order.
+  """
+
+  finished: dict[str, int] = dataclasses.field(
+    default_factory=lambda: {SOLVABLE: 0, UNSOLVABLE: 0}
+  )
+  partial: list[PartialQuestion] = dataclasses.field(default_factory=list)
+
+  def partial_of(self, question_type: str) -> list[PartialQuestion]:
+    """Returns the unfinished questions of one type."""
+    return [
+      question
+      for question in self.partial
+      if question.question_type == question_type
+    ]
+
+
+class RunJournal:
+  """Appends every finished call and question to a JSON-lines file.
+
+  Each record is flushed and fsync'd before the call returns, so a crash
+  loses at most the calls still in flight. Safe to share across threads.
+
+  Attributes:
+      path: The journal file.
+  """
+
+  def __init__(self, path: str):
+    """Opens the journal for appending.
+
+    Args:
+        path: The journal file. Created if missing.
+    """
+    self.path = path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    self._lock = threading.Lock()
+    # Start on a fresh line if a crash cut the last record short. Read as
+    # bytes: the cut may fall inside a multi-byte character.
+    ends_cut = False
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+      with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        ends_cut = f.read(1) != b"\n"
+    self._file = open(path, "a", encoding="utf-8")
+    if ends_cut:
+      self._file.write("\n")
+
+  def close(self) -> None:
+    """Closes the journal file."""
+    with self._lock:
+      self._file.close()
+
+  def started(self, question_type: str, question_id: str) -> None:
+    """Records that a question was selected and its report begun."""
+    self._append(
+      {"kind": _STARTED, "type": question_type, "question_id": question_id}
+    )
+
+  def record_response(
+    self,
+    question_type: str,
+    question_id: str,
+    response: ModelResponse | ModelHypothesis,
+  ) -> None:
+    """Records a successful solver or theorist response."""
+    self._append(
+      {
+        "kind": _RESPONSE,
+        "type": question_type,
+        "question_id": question_id,
+        "response": dataclasses.asdict(response),
+      }
+    )
+
+  def record_judgment(
+    self,
+    question_type: str,
+    question_id: str,
+    judge_name: str,
+    model_names: list[str],
+    result: tuple,
+  ) -> None:
+    """Records a successful evaluator or ranker call.
+
+    Args:
+        question_type: "solvable" or "unsolvable".
+        question_id: The question's identifier.
+        judge_name: The evaluator or ranker.
+        model_names: The models whose responses were judged, in order.
+        result: (scores, elapsed_time, served_model_name, backend, usage),
+            where scores maps model names to (score, reasoning) for
+            evaluators and is the ranking EvaluationScore for rankers.
+    """
+    scores, elapsed_time, served_model_name, backend, usage = result
+    if isinstance(scores, EvaluationScore):
+      scores = dataclasses.asdict(scores)
+    self._append(
+      {
+        "kind": _JUDGMENT,
+        "type": question_type,
+        "question_id": question_id,
+        "judge": judge_name,
+        "models": list(model_names),
+        "result": [
+          scores,
+          elapsed_time,
+          served_model_name,
+          backend,
+          None if usage is None else dataclasses.asdict(usage),
+        ],
+      }
+    )
+
+  def record_question(self, question_type: str, question_id: str) -> None:
+    """Records that a question finished.
+
+    Its report is not journaled: the rows are already in the results CSVs,
+    and a resumed run only needs to count the question as done.
+    """
+    self._append(
+      {"kind": _QUESTION, "type": question_type, "question_id": question_id}
+    )
+
+  def load(self) -> JournalState:
+    """Reads back everything recorded so far.
+
+    A line cut short by a crash is skipped.
+
+    Returns:
+        The number of finished questions and the unfinished questions.
+    """
+    state = JournalState()
+    partial: dict[tuple[str, str], PartialQuestion] = {}
+    with self._lock:
+      self._file.flush()
+    # Lines are decoded one by one, so a record cut inside a multi-byte
+    # character is skipped like any other cut record.
+    with open(self.path, "rb") as f:
+      for line_number, line in enumerate(f, 1):
+        try:
+          record = json.loads(line)
+        except ValueError:
+          logging.warning(
+            "Skipping unreadable line %d of %s", line_number, self.path
+          )
+          continue
+        key = (record["type"], record["question_id"])
+        if record["kind"] == _STARTED:
+          partial.setdefault(key, PartialQuestion(*key))
+        elif record["kind"] == _RESPONSE:
+          question = partial.setdefault(key, PartialQuestion(*key))
+          response = _response_from_dict(record["type"], record["response"])
+          question.responses[response.model_name] = response
+        elif record["kind"] == _JUDGMENT:
+          question = partial.setdefault(key, PartialQuestion(*key))
+          question.judgments.setdefault(record["judge"], []).append(
+            (tuple(record["models"]), _result_from_list(record["result"]))
+          )
+        elif record["kind"] == _QUESTION:
+          partial.pop(key, None)
+          state.finished[record["type"]] += 1
+    state.partial = list(partial.values())
+    return state
+
+  def _append(self, record: dict) -> None:
+    """Writes one record and forces it to disk."""
+    line = json.dumps(record, ensure_ascii=False)
+    with self._lock:
+      self._file.write(line + "\n")
+      self._file.flush()
+      os.fsync(self._file.fileno())
+
+
+def _usage_from_dict(data: dict | None) -> Usage | None:
+  """Rebuilds a Usage, or returns None."""
+  return None if data is None else Usage(**data)
+
+
+def _response_from_dict(
+  question_type: str, data: dict
+) -> ModelResponse | ModelHypothesis:
+  """Rebuilds a solver response or a theorist hypothesis."""
+  if question_type == UNSOLVABLE:
+    return ModelHypothesis(
+      **{**data, "usage": _usage_from_dict(data["usage"])}
+    )
+  return ModelResponse(
+    **{
+      **data,
+      "usage": _usage_from_dict(data["usage"]),
+      "deterministic_scores": [
+        EvaluationScore(**score) for score in data["deterministic_scores"]
+      ],
+      "llm_evaluations": [
+        CrossEvaluation(
+          **{
+            **evaluation,
+            "evaluation": EvaluationScore(**evaluation["evaluation"]),
+            "usage": _usage_from_dict(evaluation["usage"]),
+          }
+        )
+        for evaluation in data["llm_evaluations"]
+      ],
+    }
+  )
+
+
+def _result_from_list(result: list) -> tuple:
+  """Rebuilds a judge result as the judge call returned it.
+
+  Journals written before judge results carried a backend have none.
+  """
+  if len(result) == 4:
+    result = [*result[:3], None, result[3]]
+  scores, elapsed_time, served_model_name, backend, usage = result
+  if "metric_name" in scores:
+    scores = EvaluationScore(**scores)
+  else:
+    scores = {
+      model_name: tuple(score_and_reasoning)
+      for model_name, score_and_reasoning in scores.items()
+    }
+  return (
+    scores,
+    elapsed_time,
+    served_model_name,
+    backend,
+    _usage_from_dict(usage),
+  )
+
+
+_journal: RunJournal | None = None
+
+
+def configure_run_journal(path: str, resume: bool = False) -> RunJournal:
+  """Opens the process-wide run journal.
+
+  Args:
+      path: The journal file.
+      resume: Whether to keep appending to an existing journal. Otherwise
+          an existing journal is moved aside to `<path>.bak` first.
+
+  Returns:
+      The run journal now in effect.
+  """
+  global _journal
+
+  if not resume and os.path.exists(path):
+    os.replace(path, f"{path}.bak")
+    logging.info("Moved the previous run journal to %s.bak", path)
+  _journal = RunJournal(path)
+  return _journal
+
+
+def get_run_journal() -> RunJournal | None:
+  """Returns the process-wide run journal, or None if runs are unjournaled."""
+  return _journal
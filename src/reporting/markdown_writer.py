@@ -1,5 +1,8 @@
 """Markdown report writing utilities."""
 
+import os
+import re
+
 
 def write_solvable_header(
   filepath: str, q_id: str, question: str, true_answer: str
@@ -35,6 +38,61 @@ def append_response(filepath: str, model_name: str, response: str) -> None:
       f.write(f"{response}\n\n")
 
 
+def format_judge_name(
+  judge_model_name: str, served_model_name: str | None
+) -> str:
+  """Returns a judge's name, noting the fallback model if one answered.
+
+  Args:
+      judge_model_name: The configured evaluator or ranker model.
+      served_model_name: The model that actually served the call.
+  """
+  if served_model_name is None or served_model_name == judge_model_name:
+    return judge_model_name
+  return f"{judge_model_name} (served by fallback {served_model_name})"
+
+
+def partial_response_path(filepath: str, model_name: str) -> str:
+  """Returns the sidecar file that holds a model's in-progress response.
+
+  Args:
+      filepath: Path to the question's markdown file.
+      model_name: Name of the model.
+  """
+  base, _ = os.path.splitext(filepath)
+  safe_model_name = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+  return f"{base}.{safe_model_name}.partial.md"
+
+
+def append_partial_response(filepath: str, model_name: str, text: str) -> None:
+  """Appends streamed text to a model's in-progress response file.
+
+  Concurrent solvers each get their own sidecar file, so partial text never
+  interleaves with the main report.
+
+  Args:
+      filepath: Path to the question's markdown file.
+      model_name: Name of the model.
+      text: The newly received text.
+  """
+  with open(
+    partial_response_path(filepath, model_name), "a", encoding="utf-8"
+  ) as f:
+    f.write(text)
+
+
+def remove_partial_response(filepath: str, model_name: str) -> None:
+  """Deletes a model's in-progress response file, if there is one.
+
+  Args:
+      filepath: Path to the question's markdown file.
+      model_name: Name of the model.
+  """
+  path = partial_response_path(filepath, model_name)
+  if os.path.exists(path):
+    os.remove(path)
+
+
 def start_analysis_table(
   filepath: str, model_names: list[str], evaluator_names: list[str]
 ) -> None:
@@ -121,6 +179,7 @@ def write_timing_summary(
   filepath: str,
   generation_times: dict[str, float],
   evaluation_times: dict[str, float],
+  hedged_models: set[str] | None = None,
 ) -> None:
   """Writes a timing summary section to the markdown file.
 
@@ -128,6 +187,8 @@ def write_timing_summary(
       filepath: Path to the markdown file.
       generation_times: Dict mapping model names to generation times in seconds.
       evaluation_times: Dict mapping evaluator names to evaluation times in seconds.
+      hedged_models: Models whose response came from a hedged duplicate
+          request rather than the primary one.
   """
   with open(filepath, "a", encoding="utf-8") as f:
     f.write("\n## Timing Summary\n\n")
@@ -144,6 +205,8 @@ def write_timing_summary(
       eval_time = evaluation_times.get(model_name)
 
       gen_str = f"{gen_time:.2f}s" if gen_time is not None else "N/A"
+      if hedged_models and model_name in hedged_models:
+        gen_str += " (hedge)"
       eval_str = f"{eval_time:.2f}s" if eval_time is not None else "N/A"
 
       f.write(f"| {model_name} | {gen_str} | {eval_str} |\n")
@@ -153,6 +216,7 @@ def write_unsolvable_timing_summary(
   filepath: str,
   generation_times: dict[str, float],
   ranking_times: dict[str, float],
+  hedged_models: set[str] | None = None,
 ) -> None:
   """Writes a timing summary for unsolvable question analysis.
 
@@ -160,6 +224,8 @@ def write_unsolvable_timing_summary(
       filepath: Path to the markdown file.
       generation_times: Dict mapping model names to hypothesis generation times.
       ranking_times: Dict mapping ranker names to ranking times in seconds.
+      hedged_models: Models whose hypothesis came from a hedged duplicate
+          request rather than the primary one.
   """
   with open(filepath, "a", encoding="utf-8") as f:
     f.write("\n## Timing Summary\n\n")
@@ -176,6 +242,8 @@ def write_unsolvable_timing_summary(
       rank_time = ranking_times.get(model_name)
 
       gen_str = f"{gen_time:.2f}s" if gen_time is not None else "N/A"
+      if hedged_models and model_name in hedged_models:
+        gen_str += " (hedge)"
       rank_str = f"{rank_time:.2f}s" if rank_time is not None else "N/A"
 
       f.write(f"| {model_name} | {gen_str} | {rank_str} |\n")